@@ -0,0 +1,281 @@
+"""
+Investor pipeline benchmark against the fakemt5 stand-in terminal.
+
+Builds a sandbox with N synthetic accounts (investors.json, account folders,
+normalization file), points synapse at it and runs full cycles: either the
+real orchestrator (parallel terminal workers) or every investor in this
+process, one after another (for profiling). Stage timings come from the
+pipeline's own metrics; the result can be saved and compared against an
+earlier run to catch regressions.
+
+    python benchmark.py --accounts 20 --terminals 4 --cycles 3 --latency-ms 2
+    python benchmark.py --accounts 5 --inline --profile
+    python benchmark.py --accounts 20 --output after.json --baseline before.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import cProfile
+import pstats
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+
+import fakemt5
+fakemt5.install()
+
+import synapse
+from pipelinemetrics import summarize_cycle, print_cycle_summary
+
+
+REPO_DIR = Path(__file__).resolve().parent
+SANDBOX_ENV = "SYNAPSE_BENCHMARK_SANDBOX"
+ACCOUNT_TEMPLATE = REPO_DIR / "synapse_accountmanagement.json"
+NORMALIZATION_FILE = REPO_DIR / "symbols_normalization.json"
+REQUIREMENTS_FILE = REPO_DIR / "requirements.json"
+FIRST_LOGIN = 5000001
+# A stage mean slower than the baseline by more than this fraction (and this many seconds) is a regression
+REGRESSION_TOLERANCE = 0.20
+REGRESSION_MIN_SECONDS = 0.005
+
+
+def build_sandbox(root, accounts, terminals, market_time):
+    """Investor folders and registries for `accounts` synthetic accounts spread over `terminals` terminals."""
+    root = Path(root)
+    inv_path = root / "investors"
+    inv_path.mkdir(parents=True, exist_ok=True)
+
+    with open(ACCOUNT_TEMPLATE, 'r', encoding='utf-8') as f:
+        template = json.load(f)
+    template.setdefault("settings", {})["synapse"] = True
+
+    start_date = (market_time - timedelta(days=7)).strftime("%Y-%m-%d")
+    expiry_date = (market_time + timedelta(days=23)).strftime("%Y-%m-%d")
+    investors = {}
+    for index in range(accounts):
+        inv_id = str(FIRST_LOGIN + index)
+        investors[inv_id] = {
+            "LOGIN_ID": inv_id,
+            "PASSWORD": "benchmark",
+            "SERVER": "FakeMT5-Demo",
+            "INVESTED_WITH": "fake1_prices",
+            "TERMINAL_PATH": str(root / "terminals" / f"terminal{index % terminals}" / "terminal64.exe"),
+        }
+        inv_root = inv_path / inv_id
+        inv_root.mkdir(exist_ok=True)
+        with open(inv_root / "accountmanagement.json", 'w', encoding='utf-8') as f:
+            json.dump(template, f, indent=4)
+        with open(inv_root / "activities.json", 'w', encoding='utf-8') as f:
+            json.dump({
+                "activate_autotrading": True,
+                "bypass_restriction": True,
+                "execution_start_date": start_date,
+                "contract_duration": 30,
+                "contract_expiry_date": expiry_date,
+                "unauthorized_trades": {},
+                "unauthorized_withdrawals": {},
+                "unauthorized_action_detected": False,
+                "strategies": ["prices"],
+            }, f, indent=4)
+        with open(inv_root / "tradeshistory.json", 'w', encoding='utf-8') as f:
+            json.dump([], f)
+
+    with open(inv_path / "investors.json", 'w', encoding='utf-8') as f:
+        json.dump(investors, f, indent=4)
+    shutil.copy(NORMALIZATION_FILE, root / "symbols_normalization.json")
+    shutil.copy(REPO_DIR / "default_accountmanagement.json", root / "default_accountmanagement.json")
+    if REQUIREMENTS_FILE.exists():
+        shutil.copy(REQUIREMENTS_FILE, inv_path / "requirements.json")
+    return investors
+
+
+def point_synapse_at(root):
+    """Redirect every synapse path constant into the sandbox and load its investors."""
+    root = Path(root)
+    inv_path = root / "investors"
+    synapse.INV_PATH = str(inv_path)
+    synapse.INVESTOR_USERS = str(inv_path / "investors.json")
+    synapse.STATE_DB_PATH = str(root / "investors_state.db")
+    synapse.NORMALIZE_SYMBOLS_PATH = str(root / "symbols_normalization.json")
+    synapse.SYMBOL_CACHE_DIR = str(root / "symbolcache")
+    synapse.DEFAULT_ACCOUNTMANAGEMENT = str(root / "default_accountmanagement.json")
+    synapse.VERIFIED_INVESTORS = str(root / "verified_investors.json")
+    synapse.UPDATED_INVESTORS = str(root / "updated_investors.json")
+    synapse.ISSUES_INVESTORS = str(root / "issues_investors.json")
+    synapse.METRICS_PATH = str(root / "metrics" / "pipeline_metrics.jsonl")
+    synapse.BREAKEVEN_MONITORS = False
+    with open(inv_path / "investors.json", 'r', encoding='utf-8') as f:
+        synapse.usersdictionary = json.load(f)
+
+
+# Spawned workers re-import this module: point their synapse at the same sandbox
+if os.environ.get(SANDBOX_ENV):
+    point_synapse_at(os.environ[SANDBOX_ENV])
+
+
+def _read_metrics(path, since=0):
+    """Stage/investor records and cycle summaries appended to the metrics file after byte offset `since`."""
+    records, summaries = [], []
+    if not os.path.exists(path):
+        return records, summaries
+    with open(path, 'r', encoding='utf-8') as f:
+        f.seek(since)
+        for line in f:
+            record = json.loads(line)
+            (summaries if record.get("type") == "cycle" else records).append(record)
+    return records, summaries
+
+
+def run_parallel_cycle(cycle_id):
+    """One place_orders_parallel() cycle; its summary is read back from the metrics file."""
+    offset = os.path.getsize(synapse.METRICS_PATH) if os.path.exists(synapse.METRICS_PATH) else 0
+    synapse.place_orders_parallel()
+    records, summaries = _read_metrics(synapse.METRICS_PATH, offset)
+    return records, (summaries[-1] if summaries else summarize_cycle(records, cycle_id))
+
+
+def run_inline_cycle(cycle_id):
+    """Every investor in this process, sequentially (what a profiler can see)."""
+    records = []
+    for inv_id in synapse.usersdictionary:
+        stats = synapse.process_single_investor(Path(synapse.INV_PATH) / inv_id, cycle_id)
+        records.extend(stats.get("metrics", []))
+    summary = summarize_cycle(records, cycle_id)
+    print_cycle_summary(summary)
+    return records, summary
+
+
+def compare(result, baseline):
+    """Print per-stage mean time against a saved run; returns the stages that got slower than the tolerance."""
+    print(f"\n{'='*10} 📈 AGAINST BASELINE {'='*10}")
+    regressions = []
+    current, previous = result["stages"], baseline.get("stages", {})
+    for name in sorted(set(current) | set(previous), key=lambda n: -current.get(n, {}).get("mean_seconds", 0)):
+        now_mean = current.get(name, {}).get("mean_seconds")
+        before = previous.get(name, {}).get("mean_seconds")
+        if now_mean is None or before is None:
+            print(f"   {name:<45} {'only in ' + ('this run' if before is None else 'baseline')}")
+            continue
+        change = (now_mean - before) / before if before else 0.0
+        significant = abs(now_mean - before) > REGRESSION_MIN_SECONDS
+        slower = significant and change > REGRESSION_TOLERANCE
+        faster = significant and change < -REGRESSION_TOLERANCE
+        mark = "🔺" if slower else ("🔻" if faster else "  ")
+        print(f"   {mark} {name:<42} {before:>8.3f}s → {now_mean:>8.3f}s ({change:+.0%})")
+        if slower:
+            regressions.append(name)
+    before_wall, now_wall = baseline.get("mean_cycle_seconds"), result["mean_cycle_seconds"]
+    if before_wall:
+        print(f"   Cycle wall time: {before_wall:.2f}s → {now_wall:.2f}s ({(now_wall - before_wall) / before_wall:+.0%})")
+    return regressions
+
+
+def _merge_stages(summaries):
+    """Per-stage totals over several cycle summaries."""
+    stages = {}
+    for summary in summaries:
+        for name, s in summary["stages"].items():
+            m = stages.setdefault(name, {"runs": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0, "mt5_calls": 0})
+            m["runs"] += s["runs"]
+            m["errors"] += s["errors"]
+            m["seconds"] += s["seconds"]
+            m["max_seconds"] = max(m["max_seconds"], s["max_seconds"])
+            m["mt5_calls"] += s["mt5_calls"]
+    for m in stages.values():
+        m["mean_seconds"] = round(m["seconds"] / m["runs"], 4)
+        m["seconds"] = round(m["seconds"], 4)
+    return stages
+
+
+def run_benchmark(accounts=10, terminals=2, cycles=1, latency_ms=0.0, seed=1, inline=False,
+                  profile=False, sandbox=None, market_time=None):
+    # The pipeline compares deal times with the real clock, so the market runs at the current hour
+    market_time = market_time or datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    latency = {"default": latency_ms / 1000.0}
+    fakemt5.configure(seed=seed, time=market_time.isoformat(), latency=latency)
+
+    root = Path(sandbox or tempfile.mkdtemp(prefix="synapse_benchmark_"))
+    build_sandbox(root, accounts, terminals, market_time)
+    os.environ[SANDBOX_ENV] = str(root)
+    point_synapse_at(root)
+    print(f" 🧪 Sandbox {root} | {accounts} accounts on {terminals} terminals | "
+          f"{cycles} cycle(s) | {latency_ms}ms per MT5 call | {'inline' if inline else 'parallel'}")
+
+    profiler = cProfile.Profile() if profile else None
+    cycle_seconds, summaries = [], []
+    for cycle in range(cycles):
+        cycle_id = f"bench-{cycle + 1}"
+        started = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        records, summary = run_inline_cycle(cycle_id) if inline else run_parallel_cycle(cycle_id)
+        if profiler:
+            profiler.disable()
+        cycle_seconds.append(time.perf_counter() - started)
+        summaries.append(summary)
+        print(f" ⏱️  Cycle {cycle + 1}/{cycles}: {cycle_seconds[-1]:.2f}s | "
+              f"{summary['investors'] - summary['investors_failed']}/{summary['investors']} investors ok")
+
+    if profiler:
+        print(f"\n{'='*10} 🔬 PROFILE (cumulative, top 30) {'='*10}")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(30)
+
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "accounts": accounts,
+        "terminals": terminals,
+        "cycles": cycles,
+        "latency_ms": latency_ms,
+        "seed": seed,
+        "market_time": market_time.isoformat(),
+        "mode": "inline" if inline else "parallel",
+        "sandbox": str(root),
+        "cycle_seconds": [round(s, 4) for s in cycle_seconds],
+        "mean_cycle_seconds": round(sum(cycle_seconds) / len(cycle_seconds), 4) if cycle_seconds else 0.0,
+        "stages": _merge_stages(summaries),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the synapse investor pipeline against fakemt5")
+    parser.add_argument("--accounts", type=int, default=10)
+    parser.add_argument("--terminals", type=int, default=2)
+    parser.add_argument("--cycles", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay of every MT5 call")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--market-time", help="ISO time of the synthetic market (replays an earlier run exactly)")
+    parser.add_argument("--inline", action="store_true", help="run investors in this process, one after another")
+    parser.add_argument("--profile", action="store_true", help="cProfile the cycles (use with --inline)")
+    parser.add_argument("--sandbox", help="sandbox directory (default: a new temp directory)")
+    parser.add_argument("--keep", action="store_true", help="keep the sandbox directory")
+    parser.add_argument("--output", help="save the result as JSON")
+    parser.add_argument("--baseline", help="compare against a result saved with --output")
+    args = parser.parse_args()
+
+    market_time = datetime.fromisoformat(args.market_time) if args.market_time else None
+    result = run_benchmark(args.accounts, args.terminals, args.cycles, args.latency_ms, args.seed,
+                           args.inline, args.profile, args.sandbox, market_time)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=4)
+        print(f" 💾 Result saved to {args.output}")
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(result, json.load(f))
+
+    if not args.inline:
+        synapse.get_supervisor().shutdown()
+    if not args.keep and not args.sandbox:
+        shutil.rmtree(result["sandbox"], ignore_errors=True)
+    if regressions:
+        print(f" 🔺 Slower than baseline: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
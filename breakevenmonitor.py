@@ -0,0 +1,349 @@
+import os
+import time
+import json
+import multiprocessing as mp
+import MetaTrader5 as mt5
+from mt5session import TerminalLoginLock, ensure_session
+
+
+# Tick poll interval of a monitor (seconds); one symbol_info_tick per symbol with open positions
+POLL_INTERVAL_SECONDS = 0.25
+# Open positions are re-listed this often, and right after an SL was moved
+POSITIONS_REFRESH_SECONDS = 1.0
+# accountmanagement.json is re-read this often (enable_breakeven / breakeven_dictionary edits)
+CONFIG_REFRESH_SECONDS = 30
+# A position whose SL modification failed is left alone this long
+RETRY_AFTER_SECONDS = 10
+# Terminal not attached: try again after
+RECONNECT_SECONDS = 15
+# Shared terminal on another investor's account: look again after
+OTHER_ACCOUNT_RECHECK_SECONDS = 1.0
+
+# Same fallback as apply_dynamic_breakeven
+DEFAULT_BREAKEVEN_RULES = [
+    {"reward": 1, "breakeven_at_reward": 0.5},
+    {"reward": 2, "breakeven_at_reward": 1},
+    {"reward": 3, "breakeven_at_reward": 1.5},
+]
+
+
+def _wait(seconds, stop_event):
+    if stop_event is None:
+        time.sleep(seconds)
+    else:
+        stop_event.wait(seconds)
+
+
+def read_breakeven_rules(acc_mgmt_path):
+    """
+    Reward levels from accountmanagement.json sorted by reward, or None when
+    breakeven is disabled (or the file cannot be read).
+    """
+    try:
+        with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
+            settings = json.load(f).get("settings", {})
+    except Exception:
+        return None
+    if not settings.get("enable_breakeven", False):
+        return None
+    rules = settings.get("breakeven_dictionary", []) or DEFAULT_BREAKEVEN_RULES
+    return sorted(rules, key=lambda x: x["reward"])
+
+
+def breakeven_sl(is_buy, price_open, risk_distance, price, rules, digits):
+    """
+    SL the highest reached reward level asks for, or None.
+
+    Same decision as apply_dynamic_breakeven, with the reward measured in
+    price (move from entry / original risk distance) instead of money, which
+    is the same ratio for a position's own symbol.
+    """
+    move = (price - price_open) if is_buy else (price_open - price)
+    if move <= 0 or risk_distance <= 0:
+        return None
+    r_multiple = move / risk_distance
+
+    reached = [rule for rule in rules if r_multiple >= rule["reward"]]
+    if not reached:
+        return None
+    target_reward = reached[-1]["breakeven_at_reward"]
+    if target_reward < 0:
+        return None
+
+    if is_buy:
+        return round(price_open + risk_distance * target_reward, digits)
+    return round(price_open - risk_distance * target_reward, digits)
+
+
+def sl_improves(is_buy, price_open, current_sl, target_sl, point):
+    """Target SL protects more than the current one, by more than apply_dynamic_breakeven's threshold."""
+    if is_buy:
+        if target_sl <= current_sl:
+            return False
+        current_distance, target_distance = price_open - current_sl, price_open - target_sl
+    else:
+        if target_sl >= current_sl:
+            return False
+        current_distance, target_distance = current_sl - price_open, target_sl - price_open
+    pip_threshold = max(abs(target_distance) * 0.1, point * 20)
+    return abs(current_distance - target_distance) > pip_threshold
+
+
+class BreakevenMonitor:
+    """
+    Resident breakeven/trailing watcher for one account.
+
+    Runs in its own process attached to the investor's terminal and only
+    polls ticks and open positions, so SL moves happen as soon as a reward
+    level is crossed instead of on the next full pipeline cycle.
+
+    On the pipeline's terminal it never logs in: it polls whenever the
+    terminal is on its account - including while a pipeline worker runs that
+    investor - and waits while it is on another one (apply_dynamic_breakeven
+    stays the backstop). Every poll holds the terminal's TerminalLoginLock,
+    which every account switch takes too, so the login checked at the start
+    of a poll is still the one its order_send acts on. Positions seen on one
+    login are never acted on under another.
+
+    Accounts sharing a terminal with other investors are only watched while
+    it is on them. Give such an account its own terminal install with
+    MONITOR_TERMINAL_PATH in its investors.json entry: the monitor then logs
+    in there itself and watches it all the time.
+
+    The original risk of every position is remembered the first time it is
+    seen with its SL on the losing side, so later levels (2R -> 1R, ...) can
+    still trail after the SL has passed the entry.
+    """
+
+    def __init__(self, inv_id, broker_cfg, acc_mgmt_path):
+        self.inv_id = inv_id
+        self.broker_cfg = broker_cfg
+        self.dedicated = bool(broker_cfg.get("MONITOR_TERMINAL_PATH"))
+        self.terminal_path = broker_cfg.get("MONITOR_TERMINAL_PATH") or broker_cfg["TERMINAL_PATH"]
+        self.login_id = int(broker_cfg["LOGIN_ID"])
+        self.acc_mgmt_path = acc_mgmt_path
+        self.login_lock = TerminalLoginLock(self.terminal_path)
+        self.rules = None
+        self.attached_login = None  # login the positions below were read on
+        self.next_positions = 0.0
+        self.positions = []
+        self.risk_distance = {}   # ticket -> entry-to-original-SL distance
+        self.saved_risk_distance = {}  # this account's risks while the terminal is on another one
+        self.retry_at = {}        # ticket -> monotonic time of the next attempt
+        self.symbols = {}         # symbol -> (point, digits)
+        self.stats = {"sl_moves": 0, "errors": 0}
+
+    def _log(self, message):
+        print(f" [{self.inv_id}] {message}")
+
+    # ------------------------------------------------------------ connection
+    def _attach(self):
+        """
+        True while the terminal is attached and on this account (re-attaches a
+        lost terminal, logs in on a dedicated one). Call with the login lock held.
+        """
+        if self.dedicated:
+            # Nobody else drives this install, so the monitor keeps it on its account
+            cfg = self.broker_cfg
+            on_account = ensure_session(self.terminal_path, self.login_id, cfg["PASSWORD"], cfg["SERVER"])
+            login = self.login_id if on_account else None
+        else:
+            acc = mt5.account_info()
+            if acc is None:
+                try:
+                    mt5.shutdown()
+                except Exception:
+                    pass
+                if mt5.initialize(path=self.terminal_path):
+                    acc = mt5.account_info()
+            login = acc.login if acc is not None else None
+        if login != self.attached_login:
+            self._switch_login(login)
+        return login == self.login_id
+
+    def _switch_login(self, login):
+        """
+        Drop the positions and retries read on the previous login; they must
+        never be acted on under another one. This account's original risks
+        are set aside while the terminal is elsewhere, so positions whose SL
+        already passed the entry can still trail when it comes back.
+        """
+        if self.attached_login == self.login_id:
+            self.saved_risk_distance = self.risk_distance
+        self.positions = []
+        self.risk_distance = self.saved_risk_distance if login == self.login_id else {}
+        self.retry_at = {}
+        self.next_positions = 0.0
+        self.attached_login = login
+
+    # ------------------------------------------------------------- positions
+    def _symbol(self, symbol):
+        spec = self.symbols.get(symbol)
+        if spec is None:
+            info = mt5.symbol_info(symbol)
+            if info is None:
+                return None
+            spec = (info.point, info.digits)
+            self.symbols[symbol] = spec
+        return spec
+
+    def _refresh_positions(self):
+        positions = mt5.positions_get()
+        if positions is None:
+            return False
+        self.positions = list(positions)
+        open_tickets = {p.ticket for p in self.positions}
+        for position in self.positions:
+            if position.ticket in self.risk_distance or position.sl == 0:
+                continue
+            is_buy = position.type == mt5.POSITION_TYPE_BUY
+            distance = (position.price_open - position.sl) if is_buy else (position.sl - position.price_open)
+            if distance > 0:
+                self.risk_distance[position.ticket] = distance
+        for ticket in list(self.risk_distance):
+            if ticket not in open_tickets:
+                del self.risk_distance[ticket]
+                self.retry_at.pop(ticket, None)
+        return True
+
+    def _check_position(self, position, tick):
+        risk_distance = self.risk_distance.get(position.ticket)
+        spec = self._symbol(position.symbol)
+        if risk_distance is None or spec is None or position.sl == 0:
+            return False
+        if self.retry_at.get(position.ticket, 0) > time.monotonic():
+            return False
+
+        point, digits = spec
+        is_buy = position.type == mt5.POSITION_TYPE_BUY
+        price = tick.bid if is_buy else tick.ask
+        target_sl = breakeven_sl(is_buy, position.price_open, risk_distance, price, self.rules, digits)
+        if target_sl is None or not sl_improves(is_buy, position.price_open, position.sl, target_sl, point):
+            return False
+
+        result = mt5.order_send({
+            "action": mt5.TRADE_ACTION_SLTP,
+            "position": position.ticket,
+            "sl": target_sl,
+            "tp": position.tp,  # Keep existing TP
+        })
+        if result and result.retcode == mt5.TRADE_RETCODE_DONE:
+            self.stats["sl_moves"] += 1
+            self._log(f"🎯 #{position.ticket} {position.symbol} @ {price:.{digits}f}: SL {position.sl:.{digits}f} → {target_sl:.{digits}f}")
+            return True
+
+        self.stats["errors"] += 1
+        self.retry_at[position.ticket] = time.monotonic() + RETRY_AFTER_SECONDS
+        error_msg = result.comment if result else mt5.last_error()
+        self._log(f"❌ #{position.ticket} {position.symbol}: SL move to {target_sl:.{digits}f} failed: {error_msg}")
+        return False
+
+    # ------------------------------------------------------------------ loop
+    def _poll(self, now):
+        """
+        One poll with the login lock held. Returns how long to wait before
+        the next one.
+        """
+        if not self._attach():
+            return RECONNECT_SECONDS if self.attached_login is None else OTHER_ACCOUNT_RECHECK_SECONDS
+
+        if now >= self.next_positions:
+            self._refresh_positions()
+            self.next_positions = now + POSITIONS_REFRESH_SECONDS
+
+        moved = False
+        ticks = {}
+        for position in self.positions:
+            if position.symbol not in ticks:
+                ticks[position.symbol] = mt5.symbol_info_tick(position.symbol)
+            tick = ticks[position.symbol]
+            if tick is not None and self._check_position(position, tick):
+                moved = True
+        if moved:
+            # Pick up the new SLs before the next tick
+            self.next_positions = 0.0
+        return POLL_INTERVAL_SECONDS
+
+    def run(self, stop_event=None):
+        """Poll until stop_event is set (forever without one)."""
+        self._log(f"👁️  Breakeven monitor started (pid {os.getpid()})")
+        next_config = 0.0
+        while stop_event is None or not stop_event.is_set():
+            now = time.monotonic()
+            if now >= next_config:
+                self.rules = read_breakeven_rules(self.acc_mgmt_path)
+                next_config = now + CONFIG_REFRESH_SECONDS
+            if not self.rules:
+                _wait(CONFIG_REFRESH_SECONDS, stop_event)
+                continue
+
+            # An account switch is in flight on this terminal: poll right after it
+            if not self.login_lock.try_acquire():
+                _wait(POLL_INTERVAL_SECONDS, stop_event)
+                continue
+            try:
+                wait_seconds = self._poll(now)
+            except Exception as e:
+                self.stats["errors"] += 1
+                self._log(f"⚠️  Breakeven monitor error: {e}")
+                wait_seconds = RECONNECT_SECONDS
+            finally:
+                self.login_lock.release()
+
+            _wait(wait_seconds, stop_event)
+
+        mt5.shutdown()
+        self._log(f"🛑 Breakeven monitor stopped ({self.stats['sl_moves']} SL moves)")
+
+
+def run_breakeven_monitor(inv_id, broker_cfg, acc_mgmt_path, stop_event=None):
+    """Process entry point: one monitor per account."""
+    BreakevenMonitor(inv_id, broker_cfg, acc_mgmt_path).run(stop_event)
+
+
+# --- orchestrator side: inv_id -> (process, stop event, account key) ---
+_MONITORS = {}
+
+
+def _account_key(broker_cfg):
+    """A monitor is restarted when its account or the terminal it watches changes."""
+    return f"{broker_cfg.get('LOGIN_ID')}@{broker_cfg.get('MONITOR_TERMINAL_PATH') or broker_cfg.get('TERMINAL_PATH')}"
+
+
+def ensure_breakeven_monitors(investors):
+    """
+    Keep exactly one monitor process per given investor: start missing or
+    dead ones, restart those whose account changed and stop the ones no longer
+    listed. investors: {inv_id: (broker_cfg, acc_mgmt_path)}.
+    Monitors of accounts with breakeven disabled just sleep.
+    """
+    for inv_id in list(_MONITORS):
+        process, stop_event, account_key = _MONITORS[inv_id]
+        wanted = investors.get(inv_id)
+        if wanted is not None and process.is_alive() and _account_key(wanted[0]) == account_key:
+            continue
+        stop_event.set()
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+        del _MONITORS[inv_id]
+
+    started = 0
+    for inv_id, (broker_cfg, acc_mgmt_path) in investors.items():
+        if inv_id in _MONITORS:
+            continue
+        stop_event = mp.Event()
+        process = mp.Process(
+            target=run_breakeven_monitor,
+            args=(inv_id, broker_cfg, str(acc_mgmt_path), stop_event),
+            daemon=True
+        )
+        process.start()
+        _MONITORS[inv_id] = (process, stop_event, _account_key(broker_cfg))
+        started += 1
+    return started
+
+
+def stop_breakeven_monitors():
+    """Stop every monitor this orchestrator started."""
+    ensure_breakeven_monitors({})
@@ -5,6 +5,8 @@ from collections import defaultdict
 from datetime import datetime
 import glob
 import MetaTrader5 as mt5
+from symbolresolver import get_resolver
+from mt5session import ensure_session, close_session
 import copy
 import math
 import shutil
@@ -29,113 +31,13 @@ def get_normalized_symbol(record_symbol, norm_map):
     3. Finds the list in Normalization JSON.
     4. Checks broker for any name in that list.
     5. Handles special suffixes like m, pro, +, \, . etc.
+    Lookups go through the session-wide SymbolResolver (built once per MT5 session).
     """
     if not record_symbol:
         return None
 
-    # Step 1: Clean the record name for searching (remove spaces, underscores, dots)
-    # "US Oil" -> "USOIL" | "US_OIL" -> "USOIL"
-    search_term = record_symbol.replace(" ", "").replace("_", "").replace(".", "").upper()
-    
-    # Also create a base version without any special suffixes for matching
-    # Remove common suffixes like m, pro, +, \, etc.
-    import re
-    
-    # Pattern to remove common suffixes (m, pro, +, \, etc.) at the end
-    # This handles cases like CHFJPY+ -> CHFJPY
-    base_search_term = re.sub(r'[+\\]|\.PRO|\.M|M$|PRO$', '', search_term)
-    
-    norm_data = norm_map.get("NORMALIZATION", {})
-    target_synonyms = []
-    base_target_synonyms = []  # Store base versions without suffixes
-
-    # Step 2: Go to Normalization straight
-    for standard_key, synonyms in norm_data.items():
-        # Clean the standard key and all synonyms for a fair comparison
-        clean_key = standard_key.replace("_", "").upper()
-        clean_syns = [s.replace(" ", "").replace("_", "").replace("/", "").upper() for s in synonyms]
-        
-        # Also create base versions without suffixes
-        base_clean_key = re.sub(r'[+\\]|\.PRO|\.M|M$|PRO$', '', clean_key)
-        base_clean_syns = [re.sub(r'[+\\]|\.PRO|\.M|M$|PRO$', '', s) for s in clean_syns]
-        
-        # Check both the full term and base term
-        if (search_term == clean_key or search_term in clean_syns or 
-            base_search_term == base_clean_key or base_search_term in base_clean_syns):
-            target_synonyms = synonyms
-            # Also store base versions for suffix matching
-            base_target_synonyms = [re.sub(r'[+\\]|\.PRO|\.M|M$|PRO$', '', s.replace(" ", "").replace("_", "").replace("/", "").upper()) 
-                                   for s in synonyms]
-            break
-
-    # If the record symbol isn't in our map, at least try the cleaned versions
-    if not target_synonyms:
-        target_synonyms = [record_symbol, search_term, base_search_term]
-        base_target_synonyms = [base_search_term]
-
-    # Step 3: Check Broker for any of these possibilities
-    # Fetch all available names once to save time
-    available_symbols = [s.name for s in mt5.symbols_get()]
-    
-    # Create a map of base symbol names to their actual broker names
-    # This helps with suffix matching
-    base_to_actual = {}
-    for broker_name in available_symbols:
-        # Remove common suffixes for base matching
-        base_name = re.sub(r'[+\\]|\.PRO|\.M|M$|PRO$', '', broker_name.upper())
-        base_name = base_name.replace(".", "")
-        if base_name not in base_to_actual:
-            base_to_actual[base_name] = []
-        base_to_actual[base_name].append(broker_name)
-    
-    # First try exact matches
-    for option in target_synonyms:
-        # Check for Exact Match (e.g., "USOUSD")
-        if option in available_symbols:
-            return option
-            
-        # Check with different case variations
-        for broker_name in available_symbols:
-            if broker_name.upper() == option.upper():
-                return broker_name
-    
-    # Then try matching with suffixes - using base versions
-    for option in base_target_synonyms:
-        # Clean the option for matching
-        clean_option = re.sub(r'[+\\]|\.PRO|\.M|M$|PRO$', '', option.upper())
-        if clean_option in base_to_actual:
-            # Return the first actual broker name (preferring standard format)
-            actual_symbols = base_to_actual[clean_option]
-            # Prefer symbols without special suffixes first
-            for sym in actual_symbols:
-                if not re.search(r'[+\\]|\.PRO|\.M|M$|PRO$', sym.upper()):
-                    return sym
-            # If all have suffixes, return the first one
-            return actual_symbols[0]
-    
-    # Finally try partial matching with any remaining options
-    for option in target_synonyms:
-        # Clean the option for suffix matching
-        clean_opt = re.sub(r'[+\\]|\.PRO|\.M|M$|PRO$', '', option.replace("/", "").upper())
-        
-        # Check for Suffix Match in our pre-built map
-        if clean_opt in base_to_actual:
-            actual_symbols = base_to_actual[clean_opt]
-            # Prefer symbols without special suffixes first
-            for sym in actual_symbols:
-                if not re.search(r'[+\\]|\.PRO|\.M|M$|PRO$', sym.upper()):
-                    return sym
-            return actual_symbols[0]
-        
-        # Legacy check: try if any broker symbol starts with our cleaned option
-        for broker_name in available_symbols:
-            broker_upper = broker_name.upper()
-            broker_base = re.sub(r'[+\\]|\.PRO|\.M|M$|PRO$', '', broker_upper)
-            if broker_upper.startswith(clean_opt) or broker_base.startswith(clean_opt):
-                return broker_name
-
-    print(f"[!] No broker match found for {record_symbol} even after normalization check.")
-    return None
+    resolver = get_resolver(NORMALIZE_SYMBOLS_PATH, norm_data=norm_map.get("NORMALIZATION", {}))
+    return resolver.resolve_strict(record_symbol)
 
 def clean_risk_folders():
     """
@@ -177,12 +79,13 @@ def clean_risk_folders():
     print(f"{'='*10} CLEANUP COMPLETE {'='*10}\n")
     return True
 
-def purge_unauthorized_symbols():
+def purge_unauthorized_symbols(dev_broker_ids=None):
     """
     Iterates through users and their specific strategy folders (new_filename).
     Validates symbols in limit_orders.json against the local strategy config.
     Removes unauthorized orders from BOTH 'limit_orders.json' and 'limit_orders_backup.json'.
     If allowedsymbolsandvolumes.json is missing in strategy folder, copies from user root.
+    dev_broker_ids limits the purge to those developers (default: all).
     """
     print(f"\n{'='*10} PURGING UNAUTHORIZED SYMBOLS BY STRATEGY {'='*10}")
     
@@ -198,6 +101,8 @@ def purge_unauthorized_symbols():
         total_purged_overall = 0
 
         for dev_broker_id in users_data.keys():
+            if dev_broker_ids is not None and dev_broker_id not in dev_broker_ids:
+                continue
             print(f" [{dev_broker_id}] 🔍 Auditing strategy-specific permissions...")
             
             user_folder = os.path.join(DEV_PATH, dev_broker_id)
@@ -366,11 +271,12 @@ def purge_unauthorized_symbols():
         print(f" [!] Critical Error during symbol purge: {e}")
         return False      
 
-def backup_limit_orders():
+def backup_limit_orders(dev_broker_ids=None):
     """
     Identifies strategy folders via accountmanagement.json.
     Targets limit orders specifically within the 'pending_orders' subfolder.
     Prioritizes restoring from backup; otherwise, creates a new backup.
+    dev_broker_ids limits the sync to those developers (default: all).
     """
     print(f"\n{'='*10} SYNCING STRATEGY-SPECIFIC LIMIT ORDERS {'='*10}")
     
@@ -387,6 +293,8 @@ def backup_limit_orders():
         total_backed_up = 0
         
         for dev_broker_id in users_data.keys():
+            if dev_broker_ids is not None and dev_broker_id not in dev_broker_ids:
+                continue
             print(f" [{dev_broker_id}] 🔍 Auditing strategy directories for sync...")
             
             user_folder = os.path.join(DEV_PATH, dev_broker_id)
@@ -2254,6 +2162,80 @@ def sync_dev_investors(dev_broker_id):
         print(f" [!] Enrichment Error for {dev_broker_id}: {e}")
         return False
 
+def process_developer(dev_broker_id, config):
+    """
+    All processing steps for one developer account (brokers.json entry),
+    on a session to its terminal. Returns True when every step completed.
+    """
+    # --- MT5 CONNECTION (Handled here now) ---
+    # Reuses the live session if the previous broker ran on the same terminal/account
+    authorized = ensure_session(
+        config.get("TERMINAL_PATH", ""), 
+        config.get("LOGIN_ID"), 
+        config.get("PASSWORD"), 
+        config.get("SERVER")
+    )
+
+    if not authorized:
+        print(f" [{dev_broker_id}] ❌ Connection Failed: {mt5.last_error()}")
+        return False
+
+    print(f" [{dev_broker_id}] 🟢 Connected & Authorized")
+
+    # --- CALL ALL PROCESSORS ---
+    # Pass only the ID, as the processors use it to find local files
+    try:
+        # Step 1: Preprocess limit orders with broker data
+        print(f"\n [Step 1/11] Preprocessing limit orders with broker data...")
+        preprocess_limit_orders_with_broker_data(dev_broker_id)
+        
+        # Step 2: Synchronize volumes from allowed symbols config
+        print(f"\n [Step 2/11] Synchronizing volumes from configuration...")
+        provide_orders_volume(dev_broker_id)
+        
+        # Step 3: Check for empty targets and enforce USD risk
+        print(f"\n [Step 3/11] Checking for empty targets and enforcing USD risk...")
+        activate_usd_based_risk_on_empty_pricelevels(dev_broker_id)
+        
+        # Step 4: Enforce risk based on configuration rules
+        print(f"\n [Step 4/11] Enforcing risk rules from configuration...")
+        enforce_risks_on_option(dev_broker_id)
+        
+        # Step 5: Validate orders with live volume
+        print(f"\n [Step 5/11] Validating orders with live volume...")
+        validate_orders_with_live_volume(dev_broker_id)
+        
+        # Step 6: Calculate exit/target prices for all orders
+        print(f"\n [Step 6/11] Calculating exit/target prices for all orders...")
+        calculate_symbols_orders(dev_broker_id)
+        
+        # Step 7: Calculate risk reward amounts and volume scale
+        print(f"\n [Step 7/11] Calculating risk reward amounts and volume scaling...")
+        live_risk_reward_amounts_and_volume_scale(dev_broker_id)
+        
+        # Step 8: Adjust fractional risk orders to next bucket
+        print(f"\n [Step 8/11] Adjusting fractional risk orders to next bucket...")
+        ajdust_order_price_closer_in_95cent_to_next_bucket(dev_broker_id)
+        
+        # Step 9: Fix any bucket violations
+        print(f"\n [Step 9/11] Fixing bucket violations...")
+        fix_risk_buckets_according_to_orders_risk(dev_broker_id)
+        
+        # Step 10: Deduplicate redundant orders in risk buckets (run once)
+        print(f"\n [Step 10/11] Deduplicating redundant orders in risk buckets...")
+        deduplicate_risk_bucket_orders(dev_broker_id)
+        
+        # Step 11: Sync investor accounts for this developer
+        print(f"\n [Step 11/11] Syncing investor accounts...")
+        sync_dev_investors(dev_broker_id)
+        
+        print(f"\n [{dev_broker_id}] ✅ All processing steps completed successfully.")
+        return True
+        
+    except Exception as e:
+        print(f" [{dev_broker_id}] ⚠️ Error during processing: {e}")
+        return False
+
 def run_accounts():
     """
     Orchestrator: Handles broker connections and triggers 
@@ -2273,75 +2255,11 @@ def run_accounts():
     print(f"\n{'='*10} STARTING GLOBAL ACCOUNT PROCESSING {'='*10}")
 
     for dev_broker_id, config in broker_configs.items():
-        # --- MT5 CONNECTION (Handled here now) ---
-        authorized = mt5.initialize(
-            path=config.get("TERMINAL_PATH", ""), 
-            login=int(config.get("LOGIN_ID")), 
-            password=config.get("PASSWORD"), 
-            server=config.get("SERVER")
-        )
-
-        if not authorized:
-            print(f" [{dev_broker_id}] ❌ Connection Failed: {mt5.last_error()}")
-            continue
-
-        print(f" [{dev_broker_id}] 🟢 Connected & Authorized")
-
-        # --- CALL ALL PROCESSORS ---
-        # Pass only the ID, as the processors use it to find local files
-        try:
-            # Step 1: Preprocess limit orders with broker data
-            print(f"\n [Step 1/11] Preprocessing limit orders with broker data...")
-            preprocess_limit_orders_with_broker_data(dev_broker_id)
-            
-            # Step 2: Synchronize volumes from allowed symbols config
-            print(f"\n [Step 2/11] Synchronizing volumes from configuration...")
-            provide_orders_volume(dev_broker_id)
-            
-            # Step 3: Check for empty targets and enforce USD risk
-            print(f"\n [Step 3/11] Checking for empty targets and enforcing USD risk...")
-            activate_usd_based_risk_on_empty_pricelevels(dev_broker_id)
-            
-            # Step 4: Enforce risk based on configuration rules
-            print(f"\n [Step 4/11] Enforcing risk rules from configuration...")
-            enforce_risks_on_option(dev_broker_id)
-            
-            # Step 5: Validate orders with live volume
-            print(f"\n [Step 5/11] Validating orders with live volume...")
-            validate_orders_with_live_volume(dev_broker_id)
-            
-            # Step 6: Calculate exit/target prices for all orders
-            print(f"\n [Step 6/11] Calculating exit/target prices for all orders...")
-            calculate_symbols_orders(dev_broker_id)
-            
-            # Step 7: Calculate risk reward amounts and volume scale
-            print(f"\n [Step 7/11] Calculating risk reward amounts and volume scaling...")
-            live_risk_reward_amounts_and_volume_scale(dev_broker_id)
-            
-            # Step 8: Adjust fractional risk orders to next bucket
-            print(f"\n [Step 8/11] Adjusting fractional risk orders to next bucket...")
-            ajdust_order_price_closer_in_95cent_to_next_bucket(dev_broker_id)
-            
-            # Step 9: Fix any bucket violations
-            print(f"\n [Step 9/11] Fixing bucket violations...")
-            fix_risk_buckets_according_to_orders_risk(dev_broker_id)
-            
-            # Step 10: Deduplicate redundant orders in risk buckets (run once)
-            print(f"\n [Step 10/11] Deduplicating redundant orders in risk buckets...")
-            deduplicate_risk_bucket_orders(dev_broker_id)
-            
-            # Step 11: Sync investor accounts for this developer
-            print(f"\n [Step 11/11] Syncing investor accounts...")
-            sync_dev_investors(dev_broker_id)
-            
-            print(f"\n [{dev_broker_id}] ✅ All processing steps completed successfully.")
-            
-        except Exception as e:
-            print(f" [{dev_broker_id}] ⚠️ Error during processing: {e}")
+        process_developer(dev_broker_id, config)
 
-        # --- SHUTDOWN (Handled here now) ---
-        mt5.shutdown()
-        print(f" [{dev_broker_id}] ⚪ Connection Closed")
+    # --- SHUTDOWN (once, after the last account) ---
+    close_session()
+    print(f" ⚪ Connection Closed")
 
     print(f"\n{'='*10} ALL ACCOUNTS PROCESSED {'='*10}")
     return True
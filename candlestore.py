@@ -0,0 +1,151 @@
+import os
+import json
+import numpy as np
+from datetime import datetime
+
+
+STORE_VERSION = 1
+HEADER_FILE = "header.json"
+
+# column -> on-disk dtype. time is epoch seconds (UTC, as returned by MT5).
+COLUMNS = {
+    "time": np.int64,
+    "open": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "close": np.float64,
+    "volume": np.float64,
+    "spread": np.int32,
+    "real_volume": np.float64,
+}
+
+
+def store_dir(base_dir, symbol, timeframe_str):
+    """Folder holding one symbol/timeframe series: {symbol}_{timeframe}_candles/"""
+    return os.path.join(base_dir, f"{symbol}_{timeframe_str}_candles")
+
+
+def _atomic_save_array(path, array):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array, allow_pickle=False)
+    os.replace(tmp_path, path)
+
+
+def save_candles(base_dir, symbol, timeframe_str, columns, extra_header=None):
+    """
+    Write a candle series as one .npy file per column plus a small JSON header.
+    `columns` maps column name -> array-like, oldest first. Missing columns are
+    zero-filled so every store has the same layout.
+    The header is written last, so a reader never sees a count that the
+    column files cannot satisfy.
+    """
+    folder = store_dir(base_dir, symbol, timeframe_str)
+    os.makedirs(folder, exist_ok=True)
+
+    count = len(columns["time"])
+    for name, dtype in COLUMNS.items():
+        values = columns.get(name)
+        if values is None:
+            array = np.zeros(count, dtype=dtype)
+        else:
+            array = np.ascontiguousarray(values, dtype=dtype)
+        if len(array) != count:
+            raise ValueError(f"Column '{name}' has {len(array)} rows, expected {count}")
+        _atomic_save_array(os.path.join(folder, f"{name}.npy"), array)
+
+    header = {
+        "version": STORE_VERSION,
+        "symbol": symbol,
+        "timeframe": timeframe_str,
+        "count": count,
+        "first_time": int(columns["time"][0]) if count else None,
+        "last_time": int(columns["time"][-1]) if count else None,
+        "columns": list(COLUMNS),
+        "written_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    if extra_header:
+        header.update(extra_header)
+
+    tmp_path = os.path.join(folder, HEADER_FILE + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(header, f, indent=4)
+    os.replace(tmp_path, os.path.join(folder, HEADER_FILE))
+    return folder
+
+
+def save_candles_df(base_dir, symbol, timeframe_str, df, extra_header=None):
+    """Write an ohlc.fetch_ohlcv_data DataFrame (DatetimeIndex named 'time')."""
+    columns = {
+        name: df[name].to_numpy() for name in COLUMNS if name != "time" and name in df.columns
+    }
+    columns["time"] = df.index.values.astype("datetime64[s]").astype(np.int64)
+    return save_candles(base_dir, symbol, timeframe_str, columns, extra_header)
+
+
+def read_header(base_dir, symbol, timeframe_str):
+    """Return the store header, or None if the series has not been written yet."""
+    path = os.path.join(store_dir(base_dir, symbol, timeframe_str), HEADER_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def load_candles(base_dir, symbol, timeframe_str, columns=None, mmap=True):
+    """
+    Open a stored series. Returns {"header": {...}, "<column>": ndarray, ...}
+    or None when missing/corrupt.
+
+    With mmap=True the arrays are read-only memory-mapped views of the files,
+    so nothing is copied until a slice is actually used. On Windows a mapped
+    file cannot be replaced, so drop the views before the next ohlc write or
+    pass mmap=False.
+    """
+    header = read_header(base_dir, symbol, timeframe_str)
+    if header is None:
+        return None
+
+    folder = store_dir(base_dir, symbol, timeframe_str)
+    count = header.get("count", 0)
+    result = {"header": header}
+    for name in (columns or COLUMNS):
+        path = os.path.join(folder, f"{name}.npy")
+        if not os.path.exists(path):
+            return None
+        array = np.load(path, mmap_mode='r' if mmap else None, allow_pickle=False)
+        if len(array) < count:
+            return None
+        result[name] = array[:count]
+    return result
+
+
+def candles_to_records(store, symbol=None, timeframe_str=None):
+    """
+    Expand a loaded store into the legacy list-of-dicts layout that
+    *_candledetails.json used (oldest first, candle_number 0 = oldest).
+    Only for consumers that still need dicts; array consumers should use
+    the columns directly.
+    """
+    header = store["header"]
+    symbol = symbol or header.get("symbol")
+    timeframe_str = timeframe_str or header.get("timeframe")
+    times = np.asarray(store["time"]).astype("datetime64[s]").astype(str)
+
+    names = [n for n in COLUMNS if n != "time" and n in store]
+    columns = {n: np.asarray(store[n]).tolist() for n in names}
+
+    records = []
+    for i in range(len(times)):
+        candle = {n: columns[n][i] for n in names}
+        candle.update({
+            "time": times[i].replace("T", " "),
+            "candle_number": i,
+            "symbol": symbol,
+            "timeframe": timeframe_str,
+        })
+        records.append(candle)
+    return records
@@ -0,0 +1,137 @@
+import os
+import json
+import shutil
+import cv2
+from swingengine import load_chart_geometry, fit_chart_geometry, chart_geometry_path, chart_signature
+
+
+class ChartContext:
+    """
+    What the techniques detectors read for one (broker, symbol, timeframe),
+    loaded at most once however many detectors run over it: the candle JSON
+    per (direction, bars), the decoded chart per bars, its geometry sidecar
+    and its candle contours.
+
+    Charts a detector annotates are kept in memory until flush(), so the
+    next detector drawing on them (liquidity on the HH/LL chart, directional
+    bias on its source chart) gets them without a PNG encode/decode.
+    config.json goes through documentcache and is written once per chart
+    by whoever opened the document cycle.
+    """
+
+    def __init__(self, base_folder, broker_name, symbol, timeframe):
+        self.base_folder = base_folder
+        self.broker_name = broker_name
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.source_dir = os.path.join(base_folder, symbol, timeframe)
+        self.output_dir = os.path.join(
+            os.path.abspath(os.path.join(base_folder, "..", "developers", broker_name)), symbol, timeframe
+        )
+        self.config_path = os.path.join(self.output_dir, "config.json")
+        self._candles = {}
+        self._charts = {}
+        self._geometry = {}
+        self._contours = {}
+        self._images = {}  # output path -> annotated chart waiting for flush()
+
+    def source_json_path(self, direction, bars):
+        return os.path.join(self.source_dir, "candlesdetails", f"{direction}_{bars}.json")
+
+    def source_chart_path(self, bars):
+        return os.path.join(self.source_dir, f"chart_{bars}.png")
+
+    def candles(self, direction, bars):
+        """
+        Candles of {direction}_{bars}.json in file order, as fresh dicts the
+        caller may annotate (the parsed file is shared). None when missing.
+        """
+        key = (direction, bars)
+        if key not in self._candles:
+            path = self.source_json_path(direction, bars)
+            if not os.path.exists(path):
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                self._candles[key] = json.load(f)
+        return [dict(c) for c in self._candles[key]]
+
+    def chart(self, bars):
+        """Copy of the decoded chart_{bars}.png to draw on, None when missing or unreadable."""
+        if bars not in self._charts:
+            self._charts[bars] = cv2.imread(self.source_chart_path(bars))
+        img = self._charts[bars]
+        return None if img is None else img.copy()
+
+    def geometry(self, bars):
+        if bars not in self._geometry:
+            self._geometry[bars] = load_chart_geometry(self.source_chart_path(bars))
+        return self._geometry[bars]
+
+    def learn_geometry(self, bars, boxes, highs, lows):
+        """
+        Fit the geometry of chart_{bars}.png from its contour boxes and save
+        it as the chart's sidecar, tied to this render of the PNG. Charts
+        come without a sidecar; after this the detectors skip the decode and
+        contour pass until the chart is rendered again. Returns the geometry
+        or None when the contours do not fit.
+        """
+        chart_path = self.source_chart_path(bars)
+        geometry = fit_chart_geometry(boxes, highs, lows)
+        signature = chart_signature(chart_path)
+        if geometry is None or signature is None:
+            return None
+        geometry["chart_signature"] = signature
+        sidecar = chart_geometry_path(chart_path)
+        tmp_path = f"{sidecar}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(geometry, f, indent=4)
+            os.replace(tmp_path, sidecar)
+        except OSError as e:
+            print(f" ⚠️  Could not save chart geometry {sidecar}: {e}")
+            return None
+        self._geometry[bars] = geometry
+        return geometry
+
+    def contours(self, bars):
+        """Green/red candle contours of the source chart, left to right (shared, read only)."""
+        if bars not in self._contours:
+            if bars not in self._charts:
+                self._charts[bars] = cv2.imread(self.source_chart_path(bars))
+            img = self._charts[bars]
+            if img is None:
+                return []
+            hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+            mask = cv2.inRange(hsv, (35, 50, 50), (85, 255, 255)) | cv2.inRange(hsv, (0, 50, 50), (10, 255, 255))
+            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            self._contours[bars] = sorted(contours, key=lambda c: cv2.boundingRect(c)[0])
+        return self._contours[bars]
+
+    def image_exists(self, path):
+        """os.path.exists() that also sees charts saved by an earlier detector but not flushed yet."""
+        return path in self._images or os.path.exists(path)
+
+    def image(self, path):
+        """Copy of an output chart: the unflushed version if a detector saved one, else the file."""
+        if path in self._images:
+            return self._images[path].copy()
+        return cv2.imread(path)
+
+    def save_image(self, path, img):
+        self._images[path] = img
+
+    def copy_chart(self, bars, path):
+        """Output chart with nothing drawn on it: a file copy of chart_{bars}.png, no decode / encode."""
+        self._images.pop(path, None)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(self.source_chart_path(bars), path)
+
+    def flush(self):
+        """Write the annotated charts. Returns how many were written."""
+        written = 0
+        for path, img in self._images.items():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if cv2.imwrite(path, img):
+                written += 1
+        self._images.clear()
+        return written
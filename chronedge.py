@@ -3,34 +3,67 @@ import techniques
 import calculateprices
 import placeorders
 import demo_placeorders
+import os
+import json
 import time
+from pathlib import Path
+from datetime import datetime, timedelta
+from stagegraph import StageGraph, files_fingerprint
 
-def fetch_ohlc():
+# Every cycle starts right after the close of a candle of this timeframe
+CYCLE_TIMEFRAME_MINUTES = 60
+# Let the brokers publish the closed candle before fetching it
+CANDLE_CLOSE_DELAY_SECONDS = 5
+# Per-stage limits (seconds); an overrunning stage is killed and its dependents skipped
+STAGE_TIMEOUTS = {
+    "ohlc": 600,
+    "techniques": 1200,
+    "calculateprices": 900,
+    "placeorders": 900,
+}
+MAX_PARALLEL_STAGES = None  # None = min(cpu cores, lanes)
+# Input fingerprints of the last successful stage runs (skip-if-unchanged)
+STAGE_STATE_PATH = r"C:\xampp\htdocs\chronedge\synarex\usersdata\stage_state.json"
+
+
+def fetch_ohlc(investor_id):
     try:
-        ohlc.main()
-        print("ohlc completed.")
+        # Lane workers live across cycles: pick up investors added/edited since the last one
+        ohlc.investor_users = ohlc.load_investor_users()
+        count = ohlc.fetch_charts_for_investor(investor_id)
+        print(f"ohlc completed for {investor_id}.")
+        return count
     except Exception as e:
-        print(f"Error in ohlc: {e}")
+        print(f"Error in ohlc ({investor_id}): {e}")
+        return False
 
-def technical_analysis():
+def technical_analysis(broker_name):
     try:
-        techniques.main()
-        print("technical analysis completed.")
+        report = techniques.process_single_developer_pipeline(broker_name)
+        print(report)
+        return "PIPELINE FAILED" not in report
     except Exception as e:
-        print(f"Error in techniques: {e}")
+        print(f"Error in techniques ({broker_name}): {e}")
+        return False
 
-def calculate_prices():
+def calculate_prices(dev_broker_id, config):
     try:
-        calculateprices.calculate_orders()
+        # Cleanups of this developer's fresh limit orders, after its analysis like the sequential flow
+        calculateprices.purge_unauthorized_symbols({dev_broker_id})
+        calculateprices.backup_limit_orders({dev_broker_id})
+        return calculateprices.process_developer(dev_broker_id, config)
     except Exception as e:
-        print(f"Error in calculateprices: {e}")
+        print(f"Error in calculateprices ({dev_broker_id}): {e}")
+        return False
 
-def place_orders():
+def place_orders(investor_id):
     try:
-        placeorders.place_orders()
-        print("Placing real account orders completed.")
+        stats = placeorders.process_single_investor(Path(placeorders.INV_PATH) / investor_id)
+        print(f"Placing real account orders completed for {investor_id}.")
+        return stats.get("success", False)
     except Exception as e:
-        print(f"Error in placeorders: {e}")
+        print(f"Error in placeorders ({investor_id}): {e}")
+        return False
 
 def place_demo_orders():
     try:
@@ -39,15 +72,107 @@ def place_demo_orders():
     except Exception as e:
         print(f"Error in placedemoorders: {e}")
 
+
+def _linked_developer(investor_cfg):
+    """Developer id of an investor: INVESTED_WITH is "<developer>_<strategy>"."""
+    invested_with = investor_cfg.get("INVESTED_WITH", "")
+    return invested_with.split("_", 1)[0] if "_" in invested_with else None
+
+
+def _candle_inputs(base_folder):
+    pattern = os.path.join(base_folder, "*", "*", "candlesdetails", "newest_oldest.json")
+    return lambda: files_fingerprint(pattern)
+
+
+def build_trade_graph():
+    """
+    One chain per developer broker:
+        ohlc (its investors) -> techniques -> calculateprices -> placeorders (its investors)
+    MT5 stages run in the lane of their terminal, analysis in a lane per developer.
+    techniques is skipped when none of the developer's candle files changed.
+    An investor's ohlc is only a soft dependency of techniques: a dead or
+    hung terminal costs that investor's fresh candles, not the developer's
+    analysis and every other investor's orders.
+    """
+    graph = StageGraph()
+    developers = techniques.load_developers_dictionary()
+    # Re-read every cycle: run_trade runs for days, investors come and go
+    ohlc.investor_users = ohlc.load_investor_users()
+    investors = ohlc.investor_users
+
+    broker_configs = {}
+    if os.path.exists(calculateprices.BROKER_DICT_PATH):
+        with open(calculateprices.BROKER_DICT_PATH, 'r') as f:
+            broker_configs = json.load(f)
+
+    ohlc_stages = {}
+    for investor_id, cfg in investors.items():
+        ohlc_stages.setdefault(_linked_developer(cfg), []).append(graph.add(
+            f"ohlc:{investor_id}", fetch_ohlc, (investor_id,),
+            lane=cfg.get("TERMINAL_PATH"), timeout=STAGE_TIMEOUTS["ohlc"]
+        ))
+
+    price_stages = {}
+    for dev_broker_id, dev_cfg in sorted(developers.items()):
+        analysis = graph.add(
+            f"techniques:{dev_broker_id}", technical_analysis, (dev_broker_id,),
+            soft_deps=ohlc_stages.get(dev_broker_id, []),
+            timeout=STAGE_TIMEOUTS["techniques"],
+            inputs=_candle_inputs(dev_cfg.get("BASE_FOLDER", ""))
+        )
+        broker_cfg = broker_configs.get(dev_broker_id)
+        if broker_cfg is None:
+            print(f" ⚠️  {dev_broker_id}: not in brokers.json - no price calculation")
+            continue
+        price_stages[dev_broker_id] = graph.add(
+            f"calculateprices:{dev_broker_id}", calculate_prices, (dev_broker_id, broker_cfg),
+            deps=[analysis],
+            lane=broker_cfg.get("TERMINAL_PATH"), timeout=STAGE_TIMEOUTS["calculateprices"]
+        )
+
+    for investor_id, cfg in investors.items():
+        if not (Path(placeorders.INV_PATH) / investor_id).is_dir():
+            continue
+        developer_stage = price_stages.get(_linked_developer(cfg))
+        graph.add(
+            f"placeorders:{investor_id}", place_orders, (investor_id,),
+            deps=[developer_stage] if developer_stage else [],
+            lane=cfg.get("TERMINAL_PATH"), timeout=STAGE_TIMEOUTS["placeorders"]
+        )
+
+    return graph
+
+
+def next_candle_close(now=None):
+    """Start of the next CYCLE_TIMEFRAME_MINUTES candle (local clock) plus the publish delay."""
+    now = now or datetime.now()
+    minutes = now.hour * 60 + now.minute
+    next_minutes = (minutes // CYCLE_TIMEFRAME_MINUTES + 1) * CYCLE_TIMEFRAME_MINUTES
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight + timedelta(minutes=next_minutes, seconds=CANDLE_CLOSE_DELAY_SECONDS)
+
+
+def run_cycle():
+    started = time.monotonic()
+    graph = build_trade_graph()
+    print(f"\n{'='*10} TRADE CYCLE: {len(graph.stages)} stages {'='*10}")
+    outcome = graph.run(max_workers=MAX_PARALLEL_STAGES, state_path=STAGE_STATE_PATH)
+
+    counts = {}
+    for result in outcome.values():
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    summary = " | ".join(f"{status}: {count}" for status, count in sorted(counts.items()))
+    print(f"{'='*10} CYCLE DONE in {time.monotonic() - started:.1f}s | {summary} {'='*10}\n")
+    return outcome
+
+
 def run_trade():
-    fetch_ohlc()
-    technical_analysis()
-    calculate_prices()
-    place_orders()
-    time.sleep(3200)
-    run_trade()
-    
+    """Run a cycle after every candle close (iteratively, no recursion)."""
+    while True:
+        run_cycle()
+        wake_at = next_candle_close()
+        print(f"Next cycle at {wake_at:%Y-%m-%d %H:%M:%S}")
+        time.sleep(max(0.0, (wake_at - datetime.now()).total_seconds()))
+
 if __name__ == "__main__":
    run_trade()
-
-
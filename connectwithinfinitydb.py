@@ -5,6 +5,9 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.exceptions import NewConnectionError
 import time
 import signal
 import sys
@@ -50,6 +53,17 @@ json_log_path = r'C:\xampp\htdocs\CIPHER\cipher trader\market\dbserver\connectwi
 driver = None
 session = None
 current_servers = primary_servers  # Start with primary servers
+
+# Queries go straight to the 'fetch' endpoint over a keep-alive session; the
+# browser only bootstraps the host's anti-bot cookie and is the fallback
+HTTP_QUERIES = True
+HTTP_TIMEOUT_SECONDS = 30
+HTTP_POOL_SIZE = 4
+# Statements per request in execute_queries()
+QUERY_BATCH_SIZE = 25
+# After the endpoint could not be used over HTTP, queries go through the browser for this long
+HTTP_RETRY_AFTER_SECONDS = 300
+http_disabled_until = 0
 # ==============================================================================
 
 
@@ -87,9 +101,7 @@ def initialize_browser():
         try:
             driver.get(current_servers['query_page'])
             # Re-sync session cookies
-            session = requests.Session()
-            for cookie in driver.get_cookies():
-                session.cookies.set(cookie['name'], cookie['value'])
+            session = new_http_session(driver.get_cookies())
             return True
         except Exception:
             log_and_print("Session invalid, restarting browser...", "WARNING")
@@ -161,9 +173,7 @@ def initialize_browser():
             log_and_print(f"Authenticated on {server_type} server", "SUCCESS")
             
             # Sync requests session
-            session = requests.Session()
-            for cookie in driver.get_cookies():
-                session.cookies.set(cookie['name'], cookie['value'])
+            session = new_http_session(driver.get_cookies())
             
             append_to_json_log(server_type, servers['query_page'])
             return True
@@ -256,6 +266,203 @@ def cleanup():
             log_and_print(f"Failed to clean temporary directory: {str(e)}", "ERROR")
 
 
+def new_http_session(cookies=()):
+    """
+    requests.Session with keep-alive and a small connection pool, so every
+    query reuses an open TLS connection. Browser cookies (the host's anti-bot
+    cookie) are copied in. Only connection failures are retried: a request
+    that reached the server is never sent twice.
+    """
+    http = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_SIZE,
+        pool_maxsize=HTTP_POOL_SIZE,
+        max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.5)
+    )
+    http.mount('https://', adapter)
+    http.mount('http://', adapter)
+    http.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/141.0.0.0 Safari/537.36',
+        'Accept': 'application/json, text/html;q=0.9, */*;q=0.8',
+        'X-Requested-With': 'XMLHttpRequest',
+        'Connection': 'keep-alive'
+    })
+    for cookie in cookies:
+        http.cookies.set(cookie['name'], cookie['value'])
+    return http
+
+def is_write_query(sql_query):
+    return not sql_query.strip().upper().startswith(("SELECT", "SHOW", "DESCRIBE", "EXPLAIN"))
+
+def is_challenge_page(text):
+    """The host answers with a JavaScript cookie challenge until the browser has passed it once."""
+    return "aes.js" in text or "slowAES" in text or "__test=" in text
+
+def _cell(value):
+    # Same strings the scraped result table holds
+    return "" if value is None else str(value)
+
+def parse_results_html(html):
+    """
+    Rows of the result table rendered by the query page, [{'status': 'done'}]
+    for a write's success message, or None when the page has neither.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    container = soup.find('div', id='query-result') or soup.find('div', id='column-data')
+    table = container.find('table') if container else soup.find('table')
+    if table:
+        results = []
+        headers = [th.text.strip() for th in table.find_all('th')]
+        for row in table.find_all('tr')[1:]:  # Skip header row
+            cols = row.find_all('td')
+            if len(cols) > 0:
+                results.append({headers[i]: cols[i].text.strip() for i in range(len(cols)) if i < len(headers)})
+        return results
+    message = soup.find('div', id='message')
+    msg_text = message.get_text() if message else ""
+    if "Affected rows" in msg_text or "success" in msg_text.lower():
+        return [{'status': 'done'}]
+    return None
+
+def parse_json_result(payload):
+    """execute_query() result from one JSON answer of the endpoint, None if the shape is unknown."""
+    if isinstance(payload, list):
+        return {'status': 'success', 'results': [{k: _cell(v) for k, v in row.items()} for row in payload if isinstance(row, dict)]}
+    if not isinstance(payload, dict):
+        return None
+    status = str(payload.get('status', '')).lower()
+    if status == 'error' or ('error' in payload and status != 'success'):
+        return {'status': 'error', 'message': str(payload.get('message') or payload.get('error')), 'results': []}
+    for key in ('results', 'data', 'rows'):
+        if isinstance(payload.get(key), list):
+            return parse_json_result(payload[key])
+    if status == 'success' or 'affected_rows' in payload:
+        return {'status': 'success', 'results': [{'status': 'done'}]}
+    return None
+
+def parse_http_response(response):
+    """execute_query() result from the endpoint's answer (JSON or the query page's HTML), None if unreadable."""
+    if response.status_code != 200 or is_challenge_page(response.text):
+        return None
+    try:
+        return parse_json_result(response.json())
+    except ValueError:
+        pass
+    rows = parse_results_html(response.text)
+    return None if rows is None else {'status': 'success', 'results': rows}
+
+def _post(data):
+    """POST to the fetch endpoint; passes the anti-bot challenge through the browser once if needed."""
+    global session
+    if session is None:
+        session = new_http_session()
+    fields = dict(data, admin_email=admin_email, admin_password=admin_password)
+    response = session.post(current_servers['fetch'], data=fields, timeout=HTTP_TIMEOUT_SECONDS)
+    if is_challenge_page(response.text):
+        log_and_print("Anti-bot cookie missing, passing the challenge in the browser...", "INFO")
+        if initialize_browser():
+            response = session.post(current_servers['fetch'], data=fields, timeout=HTTP_TIMEOUT_SECONDS)
+    return response
+
+def request_not_sent(error):
+    """True when the request failed before reaching the server (DNS, refused connection, connect timeout)."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+def _disable_http(reason):
+    global http_disabled_until
+    http_disabled_until = time.time() + HTTP_RETRY_AFTER_SECONDS
+    log_and_print(f"HTTP query failed ({reason}); using the browser for {HTTP_RETRY_AFTER_SECONDS}s", "WARNING")
+
+def http_query(sql_query):
+    """
+    Run one statement over HTTP. None means "not run, use the browser". A
+    write that may have reached the server but whose answer cannot be read
+    (read timeout, reset, error status, unreadable page) is reported as an
+    error instead, as it may already have been applied.
+    """
+    if not HTTP_QUERIES or time.time() < http_disabled_until:
+        return None
+    try:
+        response = _post({'query': sql_query})
+    except requests.RequestException as e:
+        _disable_http(e)
+        if request_not_sent(e) or not is_write_query(sql_query):
+            return None
+        return {'status': 'error', 'message': f'No answer to a write ({e}); not re-sent', 'results': []}
+    result = parse_http_response(response)
+    if result is not None:
+        return result
+    _disable_http(f"status {response.status_code}, unreadable answer")
+    # A challenge page means the statement never reached the query endpoint
+    if is_write_query(sql_query) and not is_challenge_page(response.text):
+        return {'status': 'error', 'message': f'Unreadable answer to a write (status {response.status_code}); not re-sent', 'results': []}
+    return None
+
+def _batch_not_supported(response):
+    """
+    The endpoint answered, but not as a batch endpoint: one without batch
+    support runs nothing from the queries field (a JSON answer without
+    'batch', or the bare query page / cookie challenge).
+    """
+    if response.status_code != 200:
+        return False
+    if is_challenge_page(response.text):
+        return True
+    try:
+        payload = response.json()
+    except ValueError:
+        return parse_results_html(response.text) is None
+    return isinstance(payload, dict) and 'batch' not in payload
+
+def _batch_lost(sql_queries, reason):
+    """
+    The batch reached the server but its answer can't be read: writes may
+    already be applied, so they are reported as errors, never re-sent; reads
+    (None) are run again one by one.
+    """
+    _disable_http(reason)
+    return [
+        {'status': 'error', 'message': f'Batch answer lost ({reason}); write not re-sent', 'results': []}
+        if is_write_query(sql_query) else None
+        for sql_query in sql_queries
+    ]
+
+def http_query_batch(sql_queries):
+    """
+    Several statements in one request (queries = JSON list), answered with one
+    result per statement. None when the batch was not run (HTTP disabled,
+    connection never made, endpoint without batch support), so the
+    statements can safely be sent one by one afterwards. When the batch may
+    have run but its answer is unreadable, see _batch_lost().
+    """
+    if not HTTP_QUERIES or time.time() < http_disabled_until:
+        return None
+    try:
+        response = _post({'queries': json.dumps(sql_queries)})
+    except requests.RequestException as e:
+        if request_not_sent(e):
+            return None
+        return _batch_lost(sql_queries, e)
+    if _batch_not_supported(response):
+        return None
+    try:
+        payload = response.json() if response.status_code == 200 else None
+    except ValueError:
+        payload = None
+    if isinstance(payload, dict):
+        payload = payload.get('batch')
+    if not isinstance(payload, list) or len(payload) != len(sql_queries):
+        return _batch_lost(sql_queries, f"status {response.status_code}, unreadable batch answer")
+    results = [parse_json_result(item) for item in payload]
+    if any(result is None for result in results):
+        # Statements whose own answer is readable keep it
+        lost = _batch_lost(sql_queries, "unreadable batch item")
+        return [result if result is not None else fallback for result, fallback in zip(results, lost)]
+    return results
+
 def check_server_availability(url):
     """Check if a server is available by sending a HEAD request with browser-like headers."""
     try:
@@ -273,9 +480,36 @@ def check_server_availability(url):
         return False
 
 def execute_query(sql_query):
+    """Run one statement: over the pooled HTTP session, through the browser if that is not possible."""
+    result = http_query(sql_query)
+    if result is not None:
+        return result
+    return browser_query(sql_query)
+
+def execute_queries(sql_queries, batch_size=QUERY_BATCH_SIZE):
+    """
+    Run many statements, batch_size per request where the endpoint supports
+    it. Returns one execute_query() result per statement, in order. Only
+    statements the batch did not run (or reads whose answer was lost) are
+    sent again one by one.
+    """
+    results = []
+    for start in range(0, len(sql_queries), batch_size):
+        chunk = list(sql_queries[start:start + batch_size])
+        batch = http_query_batch(chunk) if len(chunk) > 1 else None
+        if batch is None:
+            batch = [None] * len(chunk)
+        results.extend(
+            result if result is not None else execute_query(sql_query)
+            for sql_query, result in zip(chunk, batch)
+        )
+    return results
+
+def browser_query(sql_query):
+    """Run one statement through the query page in Chrome and scrape the rendered result."""
     global driver, session
     try:
-        log_and_print("===== Database Query Execution =====", "TITLE")
+        log_and_print("===== Database Query Execution (browser) =====", "TITLE")
         if not initialize_browser():
             return {'status': 'error', 'message': 'Browser init failed', 'results': []}
 
@@ -312,27 +546,12 @@ def execute_query(sql_query):
                 )
 
             # Now that we know the element is there, parse the HTML
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            
-            # Look for table in common containers
-            container = soup.find('div', id='query-result') or soup.find('div', id='column-data')
-            table = container.find('table') if container else soup.find('table')
-
-            if table:
-                headers = [th.text.strip() for th in table.find_all('th')]
-                for row in table.find_all('tr')[1:]:  # Skip header row
-                    cols = row.find_all('td')
-                    if len(cols) > 0:
-                        row_dict = {headers[i]: cols[i].text.strip() for i in range(len(cols)) if i < len(headers)}
-                        results.append(row_dict)
-                log_and_print(f"Scraped {len(results)} rows successfully", "SUCCESS")
+            rows = parse_results_html(driver.page_source)
+            if rows is None:
+                log_and_print("No table found after waiting.", "WARNING")
             else:
-                # Handle Non-SELECT success messages
-                msg_text = soup.find('div', id='message').get_text() if soup.find('div', id='message') else ""
-                if "Affected rows" in msg_text or "success" in msg_text.lower():
-                    results = [{'status': 'done'}]
-                else:
-                    log_and_print("No table found after waiting.", "WARNING")
+                results = rows
+                log_and_print(f"Scraped {len(results)} rows successfully", "SUCCESS")
 
             return {'status': 'success', 'results': results}
 
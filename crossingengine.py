@@ -0,0 +1,84 @@
+import numpy as np
+
+
+# Orders above the market are crossed by a candle coming down through them,
+# orders below the market by a candle coming up through them
+DOWN_CROSS_TYPES = ('buy_stop', 'sell_limit')
+UP_CROSS_TYPES = ('sell_stop', 'buy_limit')
+
+
+def first_true(mask):
+    """
+    Index of the first True along the last axis of a boolean mask, -1 where
+    there is none. Returns a Python int for a 1-D mask and a list of ints for
+    a 2-D one (one row per order / level pair), so the results can go straight
+    into the JSON reports.
+    """
+    mask = np.asarray(mask, dtype=bool)
+    if mask.shape[-1] == 0:
+        first = np.full(mask.shape[:-1], -1, dtype=np.int64)
+    else:
+        first = np.where(mask.any(axis=-1), mask.argmax(axis=-1), -1)
+    return first.tolist()
+
+
+def crossing_directions(order_types):
+    """+1 for orders crossed downward, -1 for orders crossed upward, 0 for unknown types."""
+    return np.array(
+        [1 if t in DOWN_CROSS_TYPES else -1 if t in UP_CROSS_TYPES else 0 for t in order_types],
+        dtype=np.int8
+    )
+
+
+def first_crossings(opens, highs, lows, entries, order_types):
+    """
+    First candle crossing each order, for all orders at once.
+
+    - buy_stop / sell_limit: open > entry and low < entry (crosses DOWN)
+    - sell_stop / buy_limit: open < entry and high > entry (crosses UP)
+
+    opens/highs/lows are candle columns in search order (newest first in
+    placeorders); entries/order_types describe one order per element.
+    Returns the index of the first crossing candle per order, -1 if none.
+    """
+    entries = np.asarray(entries, dtype=np.float64)[:, None]
+    directions = crossing_directions(order_types)[:, None]
+    crosses_down = (opens > entries) & (lows < entries)
+    crosses_up = (opens < entries) & (highs > entries)
+    mask = np.where(directions == 1, crosses_down, (directions == -1) & crosses_up)
+    return first_true(mask)
+
+
+def trapped_indices(highs, lows, lower_price, upper_price):
+    """Indices of all candles entirely between two levels (high < upper and low > lower)."""
+    return np.flatnonzero((highs < upper_price) & (lows > lower_price)).tolist()
+
+
+def first_liquidations(highs, lows, lower_prices, upper_prices):
+    """
+    First candle taking out both levels of each pair (high > upper and low < lower).
+    lower_prices/upper_prices hold one level pair per element.
+    """
+    lower_prices = np.asarray(lower_prices, dtype=np.float64)[:, None]
+    upper_prices = np.asarray(upper_prices, dtype=np.float64)[:, None]
+    return first_true((highs > upper_prices) & (lows < lower_prices))
+
+
+def first_ranging(highs, lows, ask_level=None, bid_level=None):
+    """
+    First candle meeting the ranging condition of the selected ask and bid orders.
+
+    ask_level / bid_level are (entry, exit, tp) tuples, None when the order is
+    not on that side of the market (it can then never range).
+    - ask: high < tp and low < min(entry, exit)
+    - bid: low > tp and low > max(entry, exit)
+    Returns (ask_index, bid_index), -1 where the condition is never met.
+    """
+    ask_index = bid_index = -1
+    if ask_level is not None:
+        entry, exit_price, tp = ask_level
+        ask_index = first_true((highs < tp) & (lows < min(entry, exit_price)))
+    if bid_level is not None:
+        entry, exit_price, tp = bid_level
+        bid_index = first_true((lows > tp) & (lows > max(entry, exit_price)))
+    return ask_index, bid_index
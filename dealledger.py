@@ -0,0 +1,341 @@
+import os
+import json
+from bisect import bisect_left, bisect_right
+import MetaTrader5 as mt5
+from pathlib import Path
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+
+LEDGER_VERSION = 1
+LEDGER_DIR = "dealledger"
+HEADER_FILE = "ledger.json"
+DEALS_FILE = "deals.jsonl"
+
+# Re-fetch window behind the newest stored deal; catches deals the terminal
+# reports late and absorbs any local/server clock difference.
+OVERLAP_SECONDS = 86400
+
+# Stored per deal, in this order (one compact JSON array per line)
+DEAL_FIELDS = (
+    "ticket", "order", "time", "time_msc", "type", "entry", "magic", "position_id",
+    "reason", "volume", "price", "commission", "swap", "profit", "fee", "symbol", "comment",
+)
+
+# Read-only stand-in for mt5 TradeDeal: same attribute names the callers already use
+Deal = namedtuple("Deal", DEAL_FIELDS)
+
+# deal.type values as the scripts interpret them
+TRADE_TYPES = (0, 1)   # BUY / SELL
+DEPOSIT_TYPE = 2
+WITHDRAWAL_TYPE = 3
+
+
+def to_epoch(dt):
+    """
+    Seconds since the epoch, read the way mt5.history_deals_get reads its
+    arguments: naive datetimes as local time, aware ones by their offset.
+    """
+    return int(dt.timestamp())
+
+
+def _deal_time(deal):
+    return deal.time
+
+
+def _from_mt5(deal):
+    return Deal(*(getattr(deal, field, 0) for field in DEAL_FIELDS))
+
+
+def _empty_summary():
+    return {
+        "deal_count": 0,
+        "trade_deals": 0,
+        "trade_pnl": 0.0,
+        "trade_profits": 0.0,
+        "trade_losses": 0.0,
+        "deposit_count": 0,
+        "deposits_total": 0.0,
+        "withdrawal_count": 0,
+        "withdrawals_total": 0.0,
+        "withdrawals_abs": 0.0,
+        "other_count": 0,
+        "first_deposit": None,
+        "before_first_deposit": None,
+        "by_symbol": {},
+        "by_day": {},
+    }
+
+
+class DealLedger:
+    """
+    Persistent, append-only copy of one account's deal history from an
+    anchor date (the investor's execution_start_date) onwards.
+
+    sync() asks the terminal only for deals newer than the last stored one,
+    appends them to deals.jsonl and folds them into running aggregates kept
+    in ledger.json, so totals (deposits, withdrawals, P&L per symbol / day,
+    first deposit, ...) are O(1) reads however long the account has traded.
+    The full deal list is only loaded for callers that really need it.
+    """
+
+    def __init__(self, inv_root, login, start_datetime):
+        self.folder = Path(inv_root) / LEDGER_DIR
+        self.header_path = self.folder / HEADER_FILE
+        self.deals_path = self.folder / DEALS_FILE
+        self.login = int(login)
+        self.start_time = to_epoch(start_datetime)
+        self._deals = None
+
+        self.header = self._read_header()
+        if (self.header is None or self.header.get("version") != LEDGER_VERSION
+                or self.header.get("login") != self.login
+                or self.header.get("start_time") != self.start_time):
+            # New investor, other account or moved start date: rebuild from scratch
+            self.header = {
+                "version": LEDGER_VERSION,
+                "login": self.login,
+                "start_time": self.start_time,
+                "last_time": None,
+                "tail_tickets": [],
+                "deals_bytes": 0,
+                "summary": _empty_summary(),
+            }
+            self._deals = []
+
+    # ------------------------------------------------------------------ disk
+    def _read_header(self):
+        if not self.header_path.exists():
+            return None
+        try:
+            with open(self.header_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def _write_header(self):
+        tmp_path = self.header_path.with_name(HEADER_FILE + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.header, f)
+        os.replace(tmp_path, self.header_path)
+
+    def _load_deals(self):
+        deals = []
+        size = self.header["deals_bytes"]
+        if size and self.deals_path.exists():
+            with open(self.deals_path, 'rb') as f:
+                # Bytes past deals_bytes belong to an interrupted append
+                for line in f.read(size).splitlines():
+                    if line:
+                        deals.append(Deal(*json.loads(line)))
+        # Late deals are appended out of order; timsort makes this near-free otherwise
+        deals.sort(key=lambda d: (d.time, d.ticket))
+        return deals
+
+    def _append_deals(self, new_deals):
+        self.folder.mkdir(parents=True, exist_ok=True)
+        mode = 'r+b' if self.header["deals_bytes"] and self.deals_path.exists() else 'wb'
+        with open(self.deals_path, mode) as f:
+            f.seek(self.header["deals_bytes"])
+            f.truncate()
+            for deal in new_deals:
+                f.write(json.dumps(list(deal), separators=(",", ":")).encode("utf-8") + b"\n")
+            self.header["deals_bytes"] = f.tell()
+
+    # ------------------------------------------------------------ aggregates
+    def _fold(self, summary, deal):
+        summary["deal_count"] += 1
+        if deal.type in TRADE_TYPES:
+            pnl = deal.profit + deal.swap + deal.commission
+            summary["trade_deals"] += 1
+            summary["trade_pnl"] += pnl
+            if pnl > 0:
+                summary["trade_profits"] += pnl
+            elif pnl < 0:
+                summary["trade_losses"] += abs(pnl)
+            if deal.symbol:
+                summary["by_symbol"][deal.symbol] = summary["by_symbol"].get(deal.symbol, 0.0) + pnl
+            day = datetime.fromtimestamp(deal.time, timezone.utc).strftime('%Y-%m-%d')
+            summary["by_day"][day] = summary["by_day"].get(day, 0.0) + pnl
+        elif deal.type == DEPOSIT_TYPE:
+            summary["deposit_count"] += 1
+            summary["deposits_total"] += deal.profit
+        elif deal.type == WITHDRAWAL_TYPE:
+            summary["withdrawal_count"] += 1
+            summary["withdrawals_total"] += deal.profit
+            summary["withdrawals_abs"] += abs(deal.profit)
+        else:
+            summary["other_count"] += 1
+
+    def _set_first_deposit(self, summary, deposit, deals):
+        summary["first_deposit"] = {"ticket": deposit.ticket, "time": deposit.time, "amount": deposit.profit}
+        before = [d for d in deals if d.time < deposit.time]
+        summary["before_first_deposit"] = {
+            "deal_count": len(before),
+            "trade_pnl": sum(d.profit + d.swap + d.commission for d in before if d.type in TRADE_TYPES),
+            "withdrawals_total": sum(d.profit for d in before if d.type == WITHDRAWAL_TYPE),
+        }
+
+    def _rebuild_summary(self, deals):
+        summary = _empty_summary()
+        for deal in deals:
+            self._fold(summary, deal)
+            if deal.type == DEPOSIT_TYPE and summary["first_deposit"] is None:
+                self._set_first_deposit(summary, deal, deals)
+        return summary
+
+    # ------------------------------------------------------------------ sync
+    def sync(self):
+        """Pull deals newer than the stored ones from the terminal. Returns how many were added."""
+        last_time = self.header["last_time"]
+        from_time = self.start_time if last_time is None else max(self.start_time, last_time - OVERLAP_SECONDS)
+        fetched = mt5.history_deals_get(
+            datetime.fromtimestamp(from_time, timezone.utc),
+            datetime.now(timezone.utc) + timedelta(days=1)
+        )
+        if fetched is None:
+            print(f"  ⚠️  Deal ledger sync failed: {mt5.last_error()}")
+            return 0
+
+        known = {ticket for ticket, _ in self.header["tail_tickets"]}
+        new_deals = sorted(
+            (_from_mt5(d) for d in fetched if d.ticket not in known and d.time >= self.start_time),
+            key=lambda d: (d.time, d.ticket)
+        )
+        if not new_deals:
+            return 0
+
+        summary = self.header["summary"]
+        out_of_order = last_time is not None and new_deals[0].time < last_time
+        if out_of_order or (summary["first_deposit"] is None and any(d.type == DEPOSIT_TYPE for d in new_deals)):
+            # Needs the earlier deals: load them once
+            deals = self.deals + new_deals
+            deals.sort(key=lambda d: (d.time, d.ticket))
+        else:
+            deals = None
+
+        self._append_deals(new_deals)
+        if self._deals is not None:
+            if deals is not None:
+                self._deals = deals
+            else:
+                self._deals.extend(new_deals)
+
+        if out_of_order:
+            self.header["summary"] = self._rebuild_summary(deals)
+        else:
+            for deal in new_deals:
+                self._fold(summary, deal)
+                if deal.type == DEPOSIT_TYPE and summary["first_deposit"] is None:
+                    self._set_first_deposit(summary, deal, deals)
+
+        # Remember the tickets the next overlap window will return again
+        newest = max(last_time or 0, new_deals[-1].time)
+        tail = self.header["tail_tickets"] + [[d.ticket, d.time] for d in new_deals]
+        self.header["last_time"] = newest
+        self.header["tail_tickets"] = [[t, ts] for t, ts in tail if ts >= newest - OVERLAP_SECONDS]
+        self._write_header()
+        return len(new_deals)
+
+    # ----------------------------------------------------------------- reads
+    @property
+    def summary(self):
+        """Running aggregates since the anchor date (see _empty_summary for the keys)."""
+        return self.header["summary"]
+
+    @property
+    def deals(self):
+        """All stored deals, oldest first (loaded from disk on first use). Do not modify."""
+        if self._deals is None:
+            self._deals = self._load_deals()
+        return self._deals
+
+    def deals_between(self, from_datetime, to_datetime=None):
+        """
+        Stored deals in [from, to]. Windows starting before the anchor date
+        are not covered by the ledger and go to the terminal directly.
+        """
+        from_time = to_epoch(from_datetime)
+        if from_time < self.start_time:
+            to_datetime = to_datetime or datetime.now()
+            return mt5.history_deals_get(from_datetime, to_datetime) or ()
+        deals = self.deals
+        start = bisect_left(deals, from_time, key=_deal_time)
+        end = len(deals) if to_datetime is None else bisect_right(deals, to_epoch(to_datetime), key=_deal_time)
+        return deals[start:end]
+
+    def starting_balance(self, current_balance):
+        """
+        Starting balance as get_requirements defines it: the balance found
+        before the first deposit if positive, else the first deposit, else the
+        current balance minus all trade P&L.
+        """
+        s = self.summary
+        first = s["first_deposit"]
+        existing_balance = None
+        if first is not None:
+            before = s["before_first_deposit"]
+            if before["deal_count"]:
+                starting_from_exec = current_balance - s["deposits_total"] - s["trade_pnl"] - s["withdrawals_total"]
+                existing_balance = starting_from_exec + before["trade_pnl"] + before["withdrawals_total"]
+            else:
+                existing_balance = 0
+
+        if existing_balance is not None and existing_balance > 0:
+            starting_balance = existing_balance
+        elif first is not None:
+            starting_balance = first["amount"]
+        else:
+            starting_balance = current_balance - s["trade_pnl"]
+
+        return {
+            "starting_balance": starting_balance,
+            "existing_balance": existing_balance,
+            "first_deposit": first,
+            "other_deposits": (s["deposits_total"] - first["amount"]) if first is not None else 0,
+        }
+
+
+# --- one ledger per investor per process ---
+_LEDGERS = {}
+
+
+def get_deal_ledger(inv_root, start_datetime, login=None):
+    """
+    Synced ledger of the logged-in account for inv_root, anchored at
+    start_datetime. Returns None when the terminal has no account.
+    """
+    if login is None:
+        acc = mt5.account_info()
+        if acc is None:
+            return None
+        login = acc.login
+    key = (os.path.normcase(str(inv_root)), int(login), to_epoch(start_datetime))
+    ledger = _LEDGERS.get(key)
+    if ledger is None:
+        ledger = DealLedger(inv_root, login, start_datetime)
+        _LEDGERS[key] = ledger
+    ledger.sync()
+    return ledger
+
+
+def stored_anchor(inv_root):
+    """Anchor date of inv_root's existing ledger, or None if there is none yet."""
+    header_path = Path(inv_root) / LEDGER_DIR / HEADER_FILE
+    if not header_path.exists():
+        return None
+    try:
+        with open(header_path, 'r', encoding='utf-8') as f:
+            start_time = json.load(f)["start_time"]
+    except Exception:
+        return None
+    # Aware, so the stored anchor maps back to the same epoch whatever the local zone
+    return datetime.fromtimestamp(start_time, timezone.utc)
+
+
+def open_deal_ledger(inv_root, login=None):
+    """Existing ledger of inv_root at its stored anchor (synced), or None if there is none yet."""
+    start = stored_anchor(inv_root)
+    if start is None:
+        return None
+    return get_deal_ledger(inv_root, start, login)
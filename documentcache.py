@@ -0,0 +1,130 @@
+import os
+import json
+
+
+# How flushed documents are encoded on disk:
+#   "pretty"  - indent=4, what the web pages and people reading the files expect
+#   "compact" - no whitespace, several times smaller for the big symbols_prices.json
+DOCUMENT_ENCODING = "pretty"
+
+# path key -> {"path": ..., "data": ..., "dirty": bool}; only used while a cycle is open
+_DOCUMENTS = {}
+_CYCLE_OPEN = False
+
+
+def _path_key(path):
+    return os.path.normcase(os.path.abspath(str(path)))
+
+
+def _json_key(key):
+    if isinstance(key, str):
+        return key
+    if key is True:
+        return "true"
+    if key is False:
+        return "false"
+    if key is None:
+        return "null"
+    if isinstance(key, (int, float)):
+        return repr(key)
+    return str(key)
+
+
+def _to_json(value):
+    """
+    Deep copy that turns value into exactly what a json.dump + json.load
+    round trip would give back (tuples become lists, keys become strings,
+    anything else unknown goes through str() like default=str).
+    """
+    if isinstance(value, dict):
+        return {_json_key(k): _to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(v) for v in value]
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    return str(value)
+
+
+def _write_atomic(path, data):
+    """Temp file + rename: a crash leaves the previous file, never half of a new one."""
+    os.makedirs(os.path.dirname(str(path)) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        if DOCUMENT_ENCODING == "compact":
+            json.dump(data, f, separators=(",", ":"))
+        else:
+            json.dump(data, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+def load_document(path):
+    """
+    Parsed JSON document (private copy). Inside a cycle the first read comes
+    from disk and later reads - including this cycle's unflushed edits -
+    come from memory.
+    """
+    if not _CYCLE_OPEN:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    key = _path_key(path)
+    entry = _DOCUMENTS.get(key)
+    if entry is None:
+        with open(path, 'r', encoding='utf-8') as f:
+            entry = {"path": path, "data": json.load(f), "dirty": False}
+        _DOCUMENTS[key] = entry
+    return _to_json(entry["data"])
+
+
+def save_document(path, data):
+    """
+    Replace the document with data. Inside a cycle this only marks it dirty
+    (written by the next flush_documents()); outside one it is written now.
+    """
+    data = _to_json(data)
+    if not _CYCLE_OPEN:
+        _write_atomic(path, data)
+        return
+    _DOCUMENTS[_path_key(path)] = {"path": path, "data": data, "dirty": True}
+
+
+def document_exists(path):
+    """os.path.exists() that also sees documents created in this cycle but not flushed yet."""
+    return (_CYCLE_OPEN and _path_key(path) in _DOCUMENTS) or os.path.exists(path)
+
+
+def flush_documents():
+    """Write every dirty document once (atomic replace). Returns how many were written."""
+    written = 0
+    for entry in _DOCUMENTS.values():
+        if not entry["dirty"]:
+            continue
+        try:
+            _write_atomic(entry["path"], entry["data"])
+            entry["dirty"] = False
+            written += 1
+        except Exception as e:
+            print(f" ❌ Could not write {entry['path']}: {e}")
+    return written
+
+
+def document_cycle_open():
+    return _CYCLE_OPEN
+
+
+def begin_document_cycle():
+    """Start caching documents for one investor cycle (worker side)."""
+    global _CYCLE_OPEN
+    if _CYCLE_OPEN:
+        flush_documents()
+    _DOCUMENTS.clear()
+    _CYCLE_OPEN = True
+
+
+def end_document_cycle():
+    """Flush what the cycle changed and drop the cache, so the next cycle re-reads the disk."""
+    global _CYCLE_OPEN
+    written = flush_documents() if _CYCLE_OPEN else 0
+    _DOCUMENTS.clear()
+    _CYCLE_OPEN = False
+    return written
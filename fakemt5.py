@@ -0,0 +1,1005 @@
+"""
+Local stand-in for the MetaTrader5 package.
+
+Same functions, constants and result records as the real module, backed by
+a synthetic (or recorded) market and per-account state held in the calling
+process, so synapse / placeorders / calculateprices / ohlc can run and be
+benchmarked on Linux without a terminal.
+
+    import fakemt5
+    fakemt5.install(latency={"order_send": 0.05}, seed=7)
+    import synapse   # "import MetaTrader5 as mt5" now gets this module
+
+Configuration is kept in the FAKEMT5_CONFIG environment variable as well,
+so worker processes (fork or spawn) build the same market and accounts.
+Everything is derived from the seed, the login and the market clock: two
+runs with the same configuration see the same symbols, prices, positions,
+orders and deals.
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import fnmatch
+from datetime import datetime, timezone
+from collections import namedtuple
+import numpy as np
+
+
+CONFIG_ENV = "FAKEMT5_CONFIG"
+
+DEFAULT_CONFIG = {
+    "seed": 1,
+    "time": None,                 # market clock (ISO, UTC); None = real time, rounded down to the minute
+    "clock": "frozen",            # "frozen" or "live" (the clock runs from `time` on)
+    "latency": {"default": 0.0},  # seconds per call, by function name
+    "symbols": None,              # subset of the synthetic universe, None = all
+    "balance": 1000.0,
+    "currency": "USD",
+    "leverage": 100,
+    "positions_per_account": 2,
+    "orders_per_account": 4,
+    "history_days": 7,
+    "deals_per_day": 3,
+    "recording": None,            # JSON file written by record_market(); replaces the synthetic market
+}
+
+# --- constants (same values as the MetaTrader5 package) ---
+TIMEFRAME_M1, TIMEFRAME_M2, TIMEFRAME_M3, TIMEFRAME_M4, TIMEFRAME_M5 = 1, 2, 3, 4, 5
+TIMEFRAME_M6, TIMEFRAME_M10, TIMEFRAME_M12, TIMEFRAME_M15, TIMEFRAME_M20, TIMEFRAME_M30 = 6, 10, 12, 15, 20, 30
+TIMEFRAME_H1, TIMEFRAME_H2, TIMEFRAME_H3, TIMEFRAME_H4 = 16385, 16386, 16387, 16388
+TIMEFRAME_H6, TIMEFRAME_H8, TIMEFRAME_H12, TIMEFRAME_D1 = 16390, 16392, 16396, 16408
+TIMEFRAME_W1, TIMEFRAME_MN1 = 32769, 49153
+
+ORDER_TYPE_BUY, ORDER_TYPE_SELL = 0, 1
+ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_SELL_LIMIT = 2, 3
+ORDER_TYPE_BUY_STOP, ORDER_TYPE_SELL_STOP = 4, 5
+ORDER_TYPE_BUY_STOP_LIMIT, ORDER_TYPE_SELL_STOP_LIMIT = 6, 7
+ORDER_TYPE_CLOSE_BY = 8
+
+ORDER_FILLING_FOK, ORDER_FILLING_IOC, ORDER_FILLING_RETURN, ORDER_FILLING_BOC = 0, 1, 2, 3
+ORDER_TIME_GTC, ORDER_TIME_DAY, ORDER_TIME_SPECIFIED, ORDER_TIME_SPECIFIED_DAY = 0, 1, 2, 3
+ORDER_STATE_STARTED, ORDER_STATE_PLACED, ORDER_STATE_CANCELED = 0, 1, 2
+ORDER_STATE_PARTIAL, ORDER_STATE_FILLED, ORDER_STATE_REJECTED = 3, 4, 5
+
+TRADE_ACTION_DEAL, TRADE_ACTION_PENDING, TRADE_ACTION_SLTP = 1, 5, 6
+TRADE_ACTION_MODIFY, TRADE_ACTION_REMOVE, TRADE_ACTION_CLOSE_BY = 7, 8, 10
+
+POSITION_TYPE_BUY, POSITION_TYPE_SELL = 0, 1
+
+DEAL_TYPE_BUY, DEAL_TYPE_SELL, DEAL_TYPE_BALANCE, DEAL_TYPE_CREDIT = 0, 1, 2, 3
+DEAL_ENTRY_IN, DEAL_ENTRY_OUT, DEAL_ENTRY_INOUT, DEAL_ENTRY_OUT_BY = 0, 1, 2, 3
+DEAL_REASON_CLIENT, DEAL_REASON_EXPERT, DEAL_REASON_SL, DEAL_REASON_TP = 0, 3, 4, 5
+
+SYMBOL_TRADE_MODE_DISABLED, SYMBOL_TRADE_MODE_LONGONLY, SYMBOL_TRADE_MODE_SHORTONLY = 0, 1, 2
+SYMBOL_TRADE_MODE_CLOSEONLY, SYMBOL_TRADE_MODE_FULL = 3, 4
+SYMBOL_FILLING_FOK, SYMBOL_FILLING_IOC = 1, 2
+
+ACCOUNT_TRADE_MODE_DEMO, ACCOUNT_TRADE_MODE_CONTEST, ACCOUNT_TRADE_MODE_REAL = 0, 1, 2
+
+TRADE_RETCODE_REQUOTE = 10004
+TRADE_RETCODE_REJECT = 10006
+TRADE_RETCODE_PLACED = 10008
+TRADE_RETCODE_DONE = 10009
+TRADE_RETCODE_DONE_PARTIAL = 10010
+TRADE_RETCODE_ERROR = 10011
+TRADE_RETCODE_INVALID = 10013
+TRADE_RETCODE_INVALID_VOLUME = 10014
+TRADE_RETCODE_INVALID_PRICE = 10015
+TRADE_RETCODE_INVALID_STOPS = 10016
+TRADE_RETCODE_TRADE_DISABLED = 10017
+TRADE_RETCODE_MARKET_CLOSED = 10018
+TRADE_RETCODE_NO_MONEY = 10019
+TRADE_RETCODE_INVALID_FILL = 10030
+TRADE_RETCODE_CONNECTION = 10031
+TRADE_RETCODE_LIMIT_ORDERS = 10033
+TRADE_RETCODE_INVALID_ORDER = 10035
+TRADE_RETCODE_POSITION_CLOSED = 10036
+
+RES_S_OK = 1
+RES_E_FAIL = -1
+RES_E_INVALID_PARAMS = -2
+RES_E_NOT_FOUND = -4
+RES_E_AUTH_FAILED = -6
+RES_E_INTERNAL_FAIL_INIT = -10005
+
+# --- result records (field names of the real package) ---
+AccountInfo = namedtuple("AccountInfo", [
+    "login", "trade_mode", "leverage", "limit_orders", "margin_so_mode", "trade_allowed", "trade_expert",
+    "margin_mode", "currency_digits", "fifo_close", "balance", "credit", "profit", "equity", "margin",
+    "margin_free", "margin_level", "margin_so_call", "margin_so_so", "margin_initial", "margin_maintenance",
+    "assets", "liabilities", "commission_blocked", "name", "server", "currency", "company"])
+TerminalInfo = namedtuple("TerminalInfo", [
+    "community_account", "community_connection", "connected", "dlls_allowed", "trade_allowed",
+    "tradeapi_disabled", "email_enabled", "ftp_enabled", "notifications_enabled", "mqid", "build", "maxbars",
+    "codepage", "ping_last", "community_balance", "retransmission", "company", "name", "language", "path",
+    "data_path", "commondata_path"])
+SymbolInfo = namedtuple("SymbolInfo", [
+    "custom", "chart_mode", "select", "visible", "session_deals", "session_buy_orders", "session_sell_orders",
+    "volume", "volumehigh", "volumelow", "time", "digits", "spread", "spread_float", "ticks_bookdepth",
+    "trade_calc_mode", "trade_mode", "start_time", "expiration_time", "trade_stops_level", "trade_freeze_level",
+    "trade_exemode", "swap_mode", "swap_rollover3days", "margin_hedged_use_leg", "expiration_mode",
+    "filling_mode", "order_mode", "order_gtc_mode", "option_mode", "option_right", "bid", "bidhigh", "bidlow",
+    "ask", "askhigh", "asklow", "last", "lasthigh", "lastlow", "volume_real", "volumehigh_real",
+    "volumelow_real", "option_strike", "point", "trade_tick_value", "trade_tick_value_profit",
+    "trade_tick_value_loss", "trade_tick_size", "trade_contract_size", "trade_accrued_interest",
+    "trade_face_value", "trade_liquidity_rate", "volume_min", "volume_max", "volume_step", "volume_limit",
+    "swap_long", "swap_short", "margin_initial", "margin_maintenance", "session_volume", "session_turnover",
+    "session_interest", "session_buy_orders_volume", "session_sell_orders_volume", "session_open",
+    "session_close", "session_aw", "session_price_settlement", "session_price_limit_min",
+    "session_price_limit_max", "margin_hedged", "price_change", "price_volatility", "price_theoretical",
+    "price_greeks_delta", "price_greeks_theta", "price_greeks_gamma", "price_greeks_vega", "price_greeks_rho",
+    "price_greeks_omega", "price_sensitivity", "basis", "category", "currency_base", "currency_profit",
+    "currency_margin", "bank", "description", "exchange", "formula", "isin", "name", "page", "path"])
+Tick = namedtuple("Tick", ["time", "bid", "ask", "last", "volume", "time_msc", "flags", "volume_real"])
+TradeOrder = namedtuple("TradeOrder", [
+    "ticket", "time_setup", "time_setup_msc", "time_done", "time_done_msc", "time_expiration", "type",
+    "type_time", "type_filling", "state", "magic", "position_id", "position_by_id", "reason", "volume_initial",
+    "volume_current", "price_open", "sl", "tp", "price_current", "price_stoplimit", "symbol", "comment",
+    "external_id"])
+TradePosition = namedtuple("TradePosition", [
+    "ticket", "time", "time_msc", "time_update", "time_update_msc", "type", "magic", "identifier", "reason",
+    "volume", "price_open", "sl", "tp", "price_current", "swap", "profit", "symbol", "comment", "external_id"])
+TradeDeal = namedtuple("TradeDeal", [
+    "ticket", "order", "time", "time_msc", "type", "entry", "magic", "position_id", "reason", "volume", "price",
+    "commission", "swap", "profit", "fee", "symbol", "comment", "external_id"])
+TradeRequest = namedtuple("TradeRequest", [
+    "action", "magic", "order", "symbol", "volume", "price", "stoplimit", "sl", "tp", "deviation", "type",
+    "type_filling", "type_time", "expiration", "comment", "position", "position_by"])
+OrderSendResult = namedtuple("OrderSendResult", [
+    "retcode", "deal", "order", "volume", "price", "bid", "ask", "comment", "request_id", "retcode_external",
+    "request"])
+
+RATES_DTYPE = np.dtype([("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+                        ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8")])
+
+# Timeframe -> bar length in seconds (MN1 as 30 days)
+TIMEFRAME_SECONDS = {
+    TIMEFRAME_M1: 60, TIMEFRAME_M2: 120, TIMEFRAME_M3: 180, TIMEFRAME_M4: 240, TIMEFRAME_M5: 300,
+    TIMEFRAME_M6: 360, TIMEFRAME_M10: 600, TIMEFRAME_M12: 720, TIMEFRAME_M15: 900, TIMEFRAME_M20: 1200,
+    TIMEFRAME_M30: 1800, TIMEFRAME_H1: 3600, TIMEFRAME_H2: 7200, TIMEFRAME_H3: 10800, TIMEFRAME_H4: 14400,
+    TIMEFRAME_H6: 21600, TIMEFRAME_H8: 28800, TIMEFRAME_H12: 43200, TIMEFRAME_D1: 86400,
+    TIMEFRAME_W1: 604800, TIMEFRAME_MN1: 2592000,
+}
+
+# Synthetic universe: name -> (mid price, digits, contract size, base, profit currency, path)
+SYMBOLS = {
+    "EURUSD": (1.0850, 5, 100000, "EUR", "USD", "Forex\\Majors"),
+    "GBPUSD": (1.2700, 5, 100000, "GBP", "USD", "Forex\\Majors"),
+    "AUDUSD": (0.6600, 5, 100000, "AUD", "USD", "Forex\\Majors"),
+    "NZDUSD": (0.6100, 5, 100000, "NZD", "USD", "Forex\\Majors"),
+    "USDJPY": (150.00, 3, 100000, "USD", "JPY", "Forex\\Majors"),
+    "USDCHF": (0.8800, 5, 100000, "USD", "CHF", "Forex\\Majors"),
+    "USDCAD": (1.3600, 5, 100000, "USD", "CAD", "Forex\\Majors"),
+    "EURJPY": (162.75, 3, 100000, "EUR", "JPY", "Forex\\Crosses"),
+    "GBPJPY": (190.50, 3, 100000, "GBP", "JPY", "Forex\\Crosses"),
+    "AUDJPY": (99.000, 3, 100000, "AUD", "JPY", "Forex\\Crosses"),
+    "NZDJPY": (91.500, 3, 100000, "NZD", "JPY", "Forex\\Crosses"),
+    "CADJPY": (110.30, 3, 100000, "CAD", "JPY", "Forex\\Crosses"),
+    "CHFJPY": (170.45, 3, 100000, "CHF", "JPY", "Forex\\Crosses"),
+    "EURGBP": (0.8545, 5, 100000, "EUR", "GBP", "Forex\\Crosses"),
+    "EURCHF": (0.9550, 5, 100000, "EUR", "CHF", "Forex\\Crosses"),
+    "EURCAD": (1.4750, 5, 100000, "EUR", "CAD", "Forex\\Crosses"),
+    "EURAUD": (1.6440, 5, 100000, "EUR", "AUD", "Forex\\Crosses"),
+    "EURNZD": (1.7790, 5, 100000, "EUR", "NZD", "Forex\\Crosses"),
+    "GBPAUD": (1.9240, 5, 100000, "GBP", "AUD", "Forex\\Crosses"),
+    "GBPCAD": (1.7270, 5, 100000, "GBP", "CAD", "Forex\\Crosses"),
+    "GBPCHF": (1.1180, 5, 100000, "GBP", "CHF", "Forex\\Crosses"),
+    "GBPNZD": (2.0820, 5, 100000, "GBP", "NZD", "Forex\\Crosses"),
+    "AUDCAD": (0.8980, 5, 100000, "AUD", "CAD", "Forex\\Crosses"),
+    "AUDCHF": (0.5810, 5, 100000, "AUD", "CHF", "Forex\\Crosses"),
+    "AUDNZD": (1.0820, 5, 100000, "AUD", "NZD", "Forex\\Crosses"),
+    "NZDCAD": (0.8300, 5, 100000, "NZD", "CAD", "Forex\\Crosses"),
+    "CADCHF": (0.6470, 5, 100000, "CAD", "CHF", "Forex\\Crosses"),
+    "XAUUSD": (2350.00, 2, 100, "XAU", "USD", "Metals"),
+    "XAGUSD": (28.000, 3, 5000, "XAG", "USD", "Metals"),
+    "US30": (39000.0, 1, 1, "USD", "USD", "Indices"),
+    "NAS100": (18200.0, 1, 1, "USD", "USD", "Indices"),
+    "GER40": (18300.0, 1, 1, "EUR", "EUR", "Indices"),
+    "USOIL": (78.500, 3, 1000, "USD", "USD", "Energies"),
+    "BTCUSD": (64000.0, 2, 1, "BTC", "USD", "Crypto"),
+}
+
+_state = {
+    "config": None,
+    "market": None,       # name -> spec dict
+    "initialized": False,
+    "path": None,
+    "login": None,
+    "accounts": {},       # login -> account dict
+    "last_error": (RES_S_OK, "Success"),
+    "started": time.monotonic(),
+}
+CALLS = {}  # function name -> calls in this process
+
+
+# ----------------------------------------------------------------- config
+def configure(**overrides):
+    """Update the configuration (also for worker processes started afterwards) and reset all state."""
+    config = dict(DEFAULT_CONFIG)
+    config.update(_env_config())
+    config.update(overrides)
+    if config["time"] is None:
+        config["time"] = datetime.fromtimestamp(int(time.time()) // 60 * 60, timezone.utc).isoformat()
+    latency = dict(DEFAULT_CONFIG["latency"])
+    latency.update(config.get("latency") or {})
+    config["latency"] = latency
+    os.environ[CONFIG_ENV] = json.dumps(config)
+    _state.update(config=config, market=None, initialized=False, path=None, login=None, accounts={},
+                  last_error=(RES_S_OK, "Success"), started=time.monotonic())
+    CALLS.clear()
+    return config
+
+
+def _env_config():
+    try:
+        return json.loads(os.environ.get(CONFIG_ENV, "") or "{}")
+    except ValueError:
+        return {}
+
+
+def _config():
+    if _state["config"] is None:
+        configure()
+    return _state["config"]
+
+
+def install(**overrides):
+    """Make "import MetaTrader5" return this module (call before importing the trading modules)."""
+    if overrides or _state["config"] is None:
+        configure(**overrides)
+    sys.modules["MetaTrader5"] = sys.modules[__name__]
+    return sys.modules[__name__]
+
+
+def _call(name):
+    CALLS[name] = CALLS.get(name, 0) + 1
+    latency = _config()["latency"]
+    delay = latency.get(name, latency.get("default", 0.0))
+    if delay:
+        time.sleep(delay)
+
+
+def _fail(code, message, result=None):
+    _state["last_error"] = (code, message)
+    return result
+
+
+def _ok(result):
+    _state["last_error"] = (RES_S_OK, "Success")
+    return result
+
+
+def _rng(*key):
+    """Random generator seeded by the configured seed and the key (stable across processes)."""
+    digest = zlib.crc32("|".join(str(k) for k in (_config()["seed"],) + key).encode("utf-8"))
+    return np.random.default_rng(digest)
+
+
+# ----------------------------------------------------------------- clock
+def _now():
+    """Market clock as epoch seconds."""
+    config = _config()
+    start = datetime.fromisoformat(config["time"]).timestamp()
+    if config["clock"] == "live":
+        return start + (time.monotonic() - _state["started"])
+    return start
+
+
+def advance(seconds):
+    """Move a frozen market clock forward (replays a later moment of the same market)."""
+    config = _config()
+    moved = datetime.fromtimestamp(datetime.fromisoformat(config["time"]).timestamp() + seconds, timezone.utc)
+    config["time"] = moved.isoformat()
+    os.environ[CONFIG_ENV] = json.dumps(config)
+
+
+def _epoch(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            # The real package reads naive datetimes as UTC
+            return value.replace(tzinfo=timezone.utc).timestamp()
+        return value.timestamp()
+    return float(value)
+
+
+# ----------------------------------------------------------------- market
+def _market():
+    if _state["market"] is not None:
+        return _state["market"]
+    config = _config()
+    market = {}
+    if config.get("recording"):
+        with open(config["recording"], 'r', encoding='utf-8') as f:
+            recording = json.load(f)
+        for name, rec in recording["symbols"].items():
+            spec = dict(rec["info"])
+            spec["_rates"] = {int(tf): np.array([tuple(r) for r in rows], dtype=RATES_DTYPE)
+                              for tf, rows in rec.get("rates", {}).items()}
+            spec["_tick"] = rec.get("tick")
+            market[name] = spec
+    else:
+        wanted = config.get("symbols") or list(SYMBOLS)
+        for name in wanted:
+            if name not in SYMBOLS:
+                continue
+            mid, digits, contract, base, profit, path = SYMBOLS[name]
+            point = 10.0 ** -digits
+            rng = _rng("symbol", name)
+            market[name] = {
+                "name": name, "digits": digits, "point": point, "trade_tick_size": point,
+                "trade_contract_size": float(contract), "currency_base": base, "currency_profit": profit,
+                "currency_margin": base, "path": f"{path}\\{name}", "description": name,
+                "volume_min": 0.01, "volume_max": 100.0, "volume_step": 0.01, "volume_limit": 0.0,
+                "trade_mode": SYMBOL_TRADE_MODE_FULL, "trade_stops_level": 0, "filling_mode": SYMBOL_FILLING_FOK,
+                "spread": int(rng.integers(5, 25)),
+                "_mid": mid, "_vol": mid * float(rng.uniform(0.0002, 0.0006)),
+                "_phase": float(rng.uniform(0, 2 * np.pi)), "_period": float(rng.uniform(3, 11)) * 86400,
+            }
+    _state["market"] = market
+    return market
+
+
+def _price_at(spec, t):
+    """Deterministic mid price of a synthetic symbol at epoch seconds t (array or scalar)."""
+    t = np.asarray(t, dtype=np.float64)
+    minutes = np.floor(t / 60.0)
+    # Two slow waves plus a per-minute wiggle that is a pure function of the minute
+    wave = np.sin(2 * np.pi * t / spec["_period"] + spec["_phase"]) * 30 \
+        + np.sin(2 * np.pi * t / (spec["_period"] / 7.3) + 2 * spec["_phase"]) * 8
+    wiggle = np.sin(minutes * 12.9898 + spec["_phase"] * 78.233) * 43758.5453
+    wiggle = (wiggle - np.floor(wiggle) - 0.5) * 2
+    return spec["_mid"] + spec["_vol"] * (wave + wiggle)
+
+
+def _mid(symbol, t):
+    """Mid price at epoch seconds t; a recording only knows its last tick."""
+    spec = _market()[symbol]
+    if "_rates" in spec:
+        return _tick(symbol).bid
+    return round(float(_price_at(spec, t)), spec["digits"])
+
+
+def _synthetic_rates(spec, timeframe, end_index, count):
+    seconds = TIMEFRAME_SECONDS[timeframe]
+    starts = (np.arange(end_index - count + 1, end_index + 1, dtype=np.int64)) * seconds
+    samples = 8
+    offsets = np.linspace(0, seconds, samples + 1)
+    prices = _price_at(spec, starts[:, None] + offsets[None, :])
+    digits = spec["digits"]
+    rates = np.zeros(len(starts), dtype=RATES_DTYPE)
+    rates["time"] = starts
+    rates["open"] = np.round(prices[:, 0], digits)
+    rates["close"] = np.round(prices[:, -1], digits)
+    rates["high"] = np.round(prices.max(axis=1), digits)
+    rates["low"] = np.round(prices.min(axis=1), digits)
+    rates["tick_volume"] = (np.abs(np.sin(starts / 977.0)) * 900 + 100).astype(np.uint64)
+    rates["spread"] = spec["spread"]
+    return rates
+
+
+def _rates(symbol, timeframe, end_time, count):
+    """Up to count bars whose open time is <= end_time, oldest first."""
+    spec = _market().get(symbol)
+    if spec is None or timeframe not in TIMEFRAME_SECONDS or count <= 0:
+        return None
+    end_time = min(end_time, _now())
+    if "_rates" in spec:
+        rows = spec["_rates"].get(timeframe)
+        if rows is None:
+            return None
+        rows = rows[rows["time"] <= end_time]
+        return rows[-count:]
+    end_index = int(end_time // TIMEFRAME_SECONDS[timeframe])
+    return _synthetic_rates(spec, timeframe, end_index, count)
+
+
+def _tick(symbol):
+    spec = _market().get(symbol)
+    if spec is None:
+        return None
+    t = _now()
+    if "_rates" in spec:
+        recorded = spec.get("_tick") or {}
+        bid = recorded.get("bid", spec.get("bid", 0.0))
+        ask = recorded.get("ask", spec.get("ask", bid))
+    else:
+        bid = round(float(_price_at(spec, t)), spec["digits"])
+        ask = round(bid + spec["spread"] * spec["point"], spec["digits"])
+    return Tick(int(t), bid, ask, 0.0, 0, int(t * 1000), 6, 0.0)
+
+
+def _rate_to_account(currency, account_currency, depth=0):
+    """Price of 1 unit of currency in the account currency, from the market's own ticks."""
+    if currency == account_currency:
+        return 1.0
+    market = _market()
+    direct, inverse = currency + account_currency, account_currency + currency
+    if direct in market:
+        return _tick(direct).bid
+    if inverse in market:
+        return 1.0 / _tick(inverse).bid
+    if depth == 0 and currency != "USD" and account_currency != "USD":
+        return _rate_to_account(currency, "USD", 1) * _rate_to_account("USD", account_currency, 1)
+    return None
+
+
+def _symbol_record(spec, account_currency):
+    tick = _tick(spec["name"])
+    tick_value = spec["trade_tick_size"] * spec["trade_contract_size"]
+    rate = _rate_to_account(spec["currency_profit"], account_currency) or 0.0
+    values = {field: 0 for field in SymbolInfo._fields}
+    values.update({k: v for k, v in spec.items() if not k.startswith("_") and k in values})
+    values.update(
+        select=True, visible=True, bid=tick.bid, ask=tick.ask, bidhigh=tick.bid, bidlow=tick.bid,
+        askhigh=tick.ask, asklow=tick.ask, time=tick.time, trade_exemode=2, order_mode=127,
+        expiration_mode=15, trade_tick_value=tick_value * rate, trade_tick_value_profit=tick_value * rate,
+        trade_tick_value_loss=tick_value * rate,
+        bank="", exchange="", formula="", isin="", page="", category="",
+        basis="", description=spec.get("description", spec["name"]), path=spec.get("path", spec["name"]),
+    )
+    return SymbolInfo(**values)
+
+
+# ----------------------------------------------------------------- accounts
+def _account(login=None):
+    login = login if login is not None else _state["login"]
+    if login is None:
+        return None
+    account = _state["accounts"].get(login)
+    if account is None:
+        account = _state["accounts"][login] = _new_account(login)
+    return account
+
+
+def _new_account(login):
+    """Synthetic account: balance, a few open positions, pending orders and closed-deal history."""
+    config = _config()
+    rng = _rng("account", login)
+    account = {
+        "login": login, "balance": float(config["balance"]), "currency": config["currency"],
+        "leverage": config["leverage"], "positions": {}, "orders": {}, "deals": [],
+        "next_ticket": 10 ** 8 + (login % 1000) * 10 ** 5,
+    }
+    names = sorted(_market())
+    if not names:
+        return account
+    t = _now()
+
+    # Closed trades of the last days (balance already includes them)
+    days = int(config["history_days"])
+    for day in range(days):
+        for _ in range(int(config["deals_per_day"])):
+            symbol = names[int(rng.integers(len(names)))]
+            close_time = t - (day + rng.uniform(0.05, 0.95)) * 86400
+            is_buy = bool(rng.integers(2))
+            volume = _min_volume(symbol)
+            profit = round(float(rng.normal(0, config["balance"] * 0.01)), 2)
+            position_id = _ticket(account)
+            open_time = close_time - rng.uniform(600, 20000)
+            account["deals"].append(_deal(account, symbol, DEAL_TYPE_BUY if is_buy else DEAL_TYPE_SELL,
+                                          DEAL_ENTRY_IN, volume, _mid(symbol, open_time), 0.0, position_id, open_time))
+            account["deals"].append(_deal(account, symbol, DEAL_TYPE_SELL if is_buy else DEAL_TYPE_BUY,
+                                          DEAL_ENTRY_OUT, volume, _mid(symbol, close_time), profit, position_id,
+                                          close_time))
+    account["deals"].sort(key=lambda d: d.time_msc)
+
+    for _ in range(int(config["positions_per_account"])):
+        symbol = names[int(rng.integers(len(names)))]
+        spec, tick = _market()[symbol], _tick(symbol)
+        is_buy = bool(rng.integers(2))
+        risk = _risk_distance(spec, tick)
+        price_open = round((tick.ask if is_buy else tick.bid) + (-1 if is_buy else 1) * risk * rng.uniform(-0.5, 0.5),
+                           spec["digits"])
+        sl = round(price_open - risk if is_buy else price_open + risk, spec["digits"])
+        tp = round(price_open + 2 * risk if is_buy else price_open - 2 * risk, spec["digits"])
+        ticket = _ticket(account)
+        account["positions"][ticket] = {
+            "ticket": ticket, "time": int(t - rng.uniform(600, 7200)), "type": POSITION_TYPE_BUY if is_buy else POSITION_TYPE_SELL,
+            "symbol": symbol, "volume": _min_volume(symbol), "price_open": price_open, "sl": sl, "tp": tp,
+            "magic": 0, "comment": "",
+        }
+
+    for _ in range(int(config["orders_per_account"])):
+        symbol = names[int(rng.integers(len(names)))]
+        spec, tick = _market()[symbol], _tick(symbol)
+        order_type = int(rng.choice([ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_SELL_LIMIT, ORDER_TYPE_BUY_STOP, ORDER_TYPE_SELL_STOP]))
+        is_buy = order_type in (ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_BUY_STOP)
+        below = order_type in (ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_SELL_STOP)
+        risk = _risk_distance(spec, tick)
+        price = round(tick.bid + (-1 if below else 1) * risk * rng.uniform(1, 3), spec["digits"])
+        sl = round(price - risk if is_buy else price + risk, spec["digits"])
+        tp = round(price + 2 * risk if is_buy else price - 2 * risk, spec["digits"])
+        ticket = _ticket(account)
+        account["orders"][ticket] = {
+            "ticket": ticket, "time_setup": int(t - rng.uniform(600, 7200)), "type": order_type, "symbol": symbol,
+            "volume": _min_volume(symbol), "price_open": price, "sl": sl, "tp": tp, "magic": 0, "comment": "",
+        }
+    return account
+
+
+def _risk_distance(spec, tick):
+    """SL distance of the synthetic trades: a few hours of typical movement."""
+    return spec["_vol"] * 10 if "_vol" in spec else tick.bid * 0.004
+
+
+def _ticket(account):
+    account["next_ticket"] += 1
+    return account["next_ticket"]
+
+
+def _min_volume(symbol):
+    return _market()[symbol].get("volume_min", 0.01)
+
+
+def _deal(account, symbol, deal_type, entry, volume, price, profit, position_id, when, order=0):
+    return TradeDeal(_ticket(account), order, int(when), int(when * 1000), deal_type, entry, 0, position_id,
+                     DEAL_REASON_EXPERT, volume, price, 0.0, 0.0, profit, 0.0, symbol, "", "")
+
+
+def _position_profit(position):
+    tick = _tick(position["symbol"])
+    if tick is None:
+        return 0.0
+    is_buy = position["type"] == POSITION_TYPE_BUY
+    close = tick.bid if is_buy else tick.ask
+    profit = _calc_profit(ORDER_TYPE_BUY if is_buy else ORDER_TYPE_SELL, position["symbol"], position["volume"],
+                          position["price_open"], close)
+    return round(profit or 0.0, 2)
+
+
+def _calc_profit(order_type, symbol, volume, price_open, price_close):
+    spec = _market().get(symbol)
+    account = _account()
+    if spec is None or account is None:
+        return None
+    direction = 1 if order_type in (ORDER_TYPE_BUY, ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_BUY_STOP,
+                                    ORDER_TYPE_BUY_STOP_LIMIT) else -1
+    gross = (price_close - price_open) * direction * volume * spec["trade_contract_size"]
+    if spec["currency_profit"] == account["currency"]:
+        return gross
+    if spec["currency_base"] == account["currency"] and spec["currency_profit"] != account["currency"]:
+        # e.g. USDJPY on a USD account: the profit is converted at the closing price
+        return gross / price_close if price_close else None
+    rate = _rate_to_account(spec["currency_profit"], account["currency"])
+    return None if rate is None else gross * rate
+
+
+def _matches(name, group):
+    """MT5 group filter: comma-separated masks, "!" excludes."""
+    if not group:
+        return True
+    included = False
+    for mask in group.split(","):
+        mask = mask.strip()
+        if mask.startswith("!"):
+            if fnmatch.fnmatchcase(name, mask[1:]):
+                return False
+        elif fnmatch.fnmatchcase(name, mask):
+            included = True
+    return included
+
+
+def _require_connection():
+    if not _state["initialized"]:
+        return _fail(RES_E_INTERNAL_FAIL_INIT, "Terminal: Call initialize() first", False)
+    return True
+
+
+# ----------------------------------------------------------------- API: session
+def initialize(path=None, login=None, password=None, server=None, timeout=None, portable=False):
+    _call("initialize")
+    _state.update(initialized=True, path=path or "fake-terminal")
+    if login is not None:
+        _state["login"] = int(login)
+    elif _state["login"] is None:
+        _state["login"] = 1000 + zlib.crc32(str(_state["path"]).encode("utf-8")) % 1000
+    return _ok(True)
+
+
+def login(login, password=None, server=None, timeout=None):
+    _call("login")
+    if not _require_connection():
+        return False
+    _state["login"] = int(login)
+    _account()
+    return _ok(True)
+
+
+def shutdown():
+    _call("shutdown")
+    _state.update(initialized=False)
+    return True
+
+
+def version():
+    _call("version")
+    return (500, 4000, "01 Jan 2024")
+
+
+def last_error():
+    return _state["last_error"]
+
+
+def terminal_info():
+    _call("terminal_info")
+    if not _state["initialized"]:
+        return _fail(RES_E_INTERNAL_FAIL_INIT, "Terminal: Call initialize() first")
+    values = {field: 0 for field in TerminalInfo._fields}
+    values.update(connected=True, trade_allowed=True, dlls_allowed=True, build=4000, maxbars=100000,
+                  company="FakeMT5", name="FakeMT5 Terminal", language="English", path=_state["path"],
+                  data_path=_state["path"], commondata_path=_state["path"], mqid=False,
+                  community_account=False, community_connection=False, tradeapi_disabled=False,
+                  email_enabled=False, ftp_enabled=False, notifications_enabled=False)
+    return _ok(TerminalInfo(**values))
+
+
+def account_info():
+    _call("account_info")
+    if not _state["initialized"] or _state["login"] is None:
+        return _fail(RES_E_INTERNAL_FAIL_INIT, "Terminal: Call initialize() first")
+    account = _account()
+    profit = round(sum(_position_profit(p) for p in account["positions"].values()), 2)
+    equity = round(account["balance"] + profit, 2)
+    values = {field: 0 for field in AccountInfo._fields}
+    values.update(
+        login=account["login"], trade_mode=ACCOUNT_TRADE_MODE_DEMO, leverage=account["leverage"],
+        limit_orders=500, trade_allowed=True, trade_expert=True, currency_digits=2, fifo_close=False,
+        balance=account["balance"], profit=profit, equity=equity, margin_free=equity, margin_level=0.0,
+        name=f"Fake {account['login']}", server="FakeMT5-Demo", currency=account["currency"], company="FakeMT5",
+    )
+    return _ok(AccountInfo(**values))
+
+
+# ----------------------------------------------------------------- API: symbols and prices
+def symbols_total():
+    _call("symbols_total")
+    return len(_market())
+
+
+def symbols_get(group=None):
+    _call("symbols_get")
+    if not _require_connection():
+        return None
+    currency = _account()["currency"]
+    return _ok(tuple(_symbol_record(spec, currency) for name, spec in _market().items() if _matches(name, group)))
+
+
+def symbol_info(symbol):
+    _call("symbol_info")
+    if not _require_connection():
+        return None
+    spec = _market().get(symbol)
+    if spec is None:
+        return _fail(RES_E_NOT_FOUND, f"Symbol {symbol} not found")
+    return _ok(_symbol_record(spec, _account()["currency"]))
+
+
+def symbol_info_tick(symbol):
+    _call("symbol_info_tick")
+    if not _require_connection():
+        return None
+    tick = _tick(symbol)
+    if tick is None:
+        return _fail(RES_E_NOT_FOUND, f"Symbol {symbol} not found")
+    return _ok(tick)
+
+
+def symbol_select(symbol, enable=True):
+    _call("symbol_select")
+    if not _require_connection():
+        return False
+    return _ok(symbol in _market())
+
+
+def copy_rates_from(symbol, timeframe, date_from, count):
+    _call("copy_rates_from")
+    if not _require_connection():
+        return None
+    return _ok(_rates(symbol, timeframe, _epoch(date_from), int(count)))
+
+
+def copy_rates_from_pos(symbol, timeframe, start_pos, count):
+    _call("copy_rates_from_pos")
+    if not _require_connection():
+        return None
+    rates = _rates(symbol, timeframe, _now(), int(start_pos) + int(count))
+    if rates is None:
+        return _fail(RES_E_NOT_FOUND, f"No data for {symbol}")
+    return _ok(rates[:len(rates) - int(start_pos)] if start_pos else rates)
+
+
+def copy_rates_range(symbol, timeframe, date_from, date_to):
+    _call("copy_rates_range")
+    if not _require_connection():
+        return None
+    start, end = _epoch(date_from), min(_epoch(date_to), _now())
+    seconds = TIMEFRAME_SECONDS.get(timeframe)
+    if seconds is None or end < start:
+        return _fail(RES_E_INVALID_PARAMS, "Invalid params")
+    count = int(end // seconds - start // seconds) + 1
+    rates = _rates(symbol, timeframe, end, count)
+    return _ok(None if rates is None else rates[rates["time"] >= start // seconds * seconds])
+
+
+# ----------------------------------------------------------------- API: trading state
+def _order_record(order):
+    tick = _tick(order["symbol"])
+    price_current = tick.ask if order["type"] in (ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_BUY_STOP) else tick.bid
+    return TradeOrder(
+        order["ticket"], order["time_setup"], order["time_setup"] * 1000, 0, 0, 0, order["type"], ORDER_TIME_GTC,
+        ORDER_FILLING_RETURN, ORDER_STATE_PLACED, order["magic"], 0, 0, 3, order["volume"], order["volume"],
+        order["price_open"], order["sl"], order["tp"], price_current, 0.0, order["symbol"], order["comment"], "")
+
+
+def _position_record(position):
+    tick = _tick(position["symbol"])
+    price_current = tick.bid if position["type"] == POSITION_TYPE_BUY else tick.ask
+    return TradePosition(
+        position["ticket"], position["time"], position["time"] * 1000, position["time"], position["time"] * 1000,
+        position["type"], position["magic"], position["ticket"], 3, position["volume"], position["price_open"],
+        position["sl"], position["tp"], price_current, 0.0, _position_profit(position), position["symbol"],
+        position["comment"], "")
+
+
+def _select(records, symbol=None, group=None, ticket=None):
+    selected = []
+    for record in records:
+        if symbol is not None and record["symbol"] != symbol:
+            continue
+        if ticket is not None and record["ticket"] != ticket:
+            continue
+        if group is not None and not _matches(record["symbol"], group):
+            continue
+        selected.append(record)
+    return selected
+
+
+def orders_total():
+    _call("orders_total")
+    account = _account()
+    return len(account["orders"]) if account else 0
+
+
+def orders_get(symbol=None, group=None, ticket=None):
+    _call("orders_get")
+    if not _require_connection():
+        return None
+    orders = _select(_account()["orders"].values(), symbol, group, ticket)
+    return _ok(tuple(_order_record(o) for o in orders))
+
+
+def positions_total():
+    _call("positions_total")
+    account = _account()
+    return len(account["positions"]) if account else 0
+
+
+def positions_get(symbol=None, group=None, ticket=None):
+    _call("positions_get")
+    if not _require_connection():
+        return None
+    positions = _select(_account()["positions"].values(), symbol, group, ticket)
+    return _ok(tuple(_position_record(p) for p in positions))
+
+
+def history_deals_get(date_from=None, date_to=None, group=None, ticket=None, position=None):
+    _call("history_deals_get")
+    if not _require_connection():
+        return None
+    deals = _account()["deals"]
+    if ticket is not None:
+        return _ok(tuple(d for d in deals if d.order == ticket))
+    if position is not None:
+        return _ok(tuple(d for d in deals if d.position_id == position))
+    start, end = _epoch(date_from), _epoch(date_to)
+    return _ok(tuple(d for d in deals
+                     if (start is None or d.time >= start) and (end is None or d.time <= end)
+                     and _matches(d.symbol, group)))
+
+
+def history_deals_total(date_from, date_to):
+    _call("history_deals_total")
+    if not _require_connection():
+        return None
+    start, end = _epoch(date_from), _epoch(date_to)
+    return sum(1 for d in _account()["deals"] if start <= d.time <= end)
+
+
+def history_orders_get(date_from=None, date_to=None, group=None, ticket=None, position=None):
+    _call("history_orders_get")
+    if not _require_connection():
+        return None
+    return _ok(tuple())
+
+
+def order_calc_profit(action, symbol, volume, price_open, price_close):
+    _call("order_calc_profit")
+    if not _require_connection():
+        return None
+    profit = _calc_profit(action, symbol, volume, price_open, price_close)
+    if profit is None:
+        return _fail(RES_E_INVALID_PARAMS, f"Cannot calculate profit for {symbol}")
+    return _ok(round(profit, 2))
+
+
+def order_calc_margin(action, symbol, volume, price):
+    _call("order_calc_margin")
+    if not _require_connection():
+        return None
+    spec, account = _market().get(symbol), _account()
+    if spec is None:
+        return _fail(RES_E_INVALID_PARAMS, f"Unknown symbol {symbol}")
+    rate = _rate_to_account(spec["currency_profit"], account["currency"]) or 1.0
+    return _ok(round(volume * spec["trade_contract_size"] * price * rate / account["leverage"], 2))
+
+
+# ----------------------------------------------------------------- API: order_send
+def _result(request, retcode, comment, order=0, deal=0, price=0.0):
+    tick = _tick(request.get("symbol", "")) if request.get("symbol") else None
+    trade_request = TradeRequest(**{field: request.get(field, 0) for field in TradeRequest._fields})
+    return OrderSendResult(retcode, deal, order, float(request.get("volume", 0.0)), price,
+                           tick.bid if tick else 0.0, tick.ask if tick else 0.0, comment, 0, 0, trade_request)
+
+
+def _valid_volume(symbol, volume):
+    spec = _market()[symbol]
+    if volume < spec["volume_min"] - 1e-9 or volume > spec["volume_max"] + 1e-9:
+        return False
+    steps = volume / spec["volume_step"]
+    return abs(steps - round(steps)) < 1e-6
+
+
+def _valid_stops(is_buy, price, sl, tp):
+    if sl and (sl >= price if is_buy else sl <= price):
+        return False
+    if tp and (tp <= price if is_buy else tp >= price):
+        return False
+    return True
+
+
+def order_send(request):
+    _call("order_send")
+    if not _require_connection():
+        return None
+    if not isinstance(request, dict):
+        return _fail(RES_E_INVALID_PARAMS, "Invalid request")
+    account = _account()
+    action = request.get("action")
+    symbol = request.get("symbol")
+
+    if action == TRADE_ACTION_REMOVE:
+        order = account["orders"].pop(request.get("order"), None)
+        if order is None:
+            return _ok(_result(request, TRADE_RETCODE_INVALID_ORDER, "Invalid order"))
+        return _ok(_result(request, TRADE_RETCODE_DONE, "Request executed", order=order["ticket"]))
+
+    if action == TRADE_ACTION_MODIFY:
+        order = account["orders"].get(request.get("order"))
+        if order is None:
+            return _ok(_result(request, TRADE_RETCODE_INVALID_ORDER, "Invalid order"))
+        price = float(request.get("price") or order["price_open"])
+        sl, tp = float(request.get("sl", order["sl"]) or 0.0), float(request.get("tp", order["tp"]) or 0.0)
+        is_buy = order["type"] in (ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_BUY_STOP, ORDER_TYPE_BUY_STOP_LIMIT)
+        if not _valid_stops(is_buy, price, sl, tp):
+            return _ok(_result(request, TRADE_RETCODE_INVALID_STOPS, "Invalid stops"))
+        order.update(price_open=price, sl=sl, tp=tp)
+        return _ok(_result(request, TRADE_RETCODE_DONE, "Request executed", order=order["ticket"], price=price))
+
+    if action == TRADE_ACTION_SLTP:
+        position = account["positions"].get(request.get("position"))
+        if position is None:
+            return _ok(_result(request, TRADE_RETCODE_POSITION_CLOSED, "Position doesn't exist"))
+        sl, tp = float(request.get("sl") or 0.0), float(request.get("tp") or 0.0)
+        tick = _tick(position["symbol"])
+        is_buy = position["type"] == POSITION_TYPE_BUY
+        if not _valid_stops(is_buy, tick.bid if is_buy else tick.ask, sl, tp):
+            return _ok(_result(request, TRADE_RETCODE_INVALID_STOPS, "Invalid stops"))
+        position.update(sl=sl, tp=tp)
+        return _ok(_result(request, TRADE_RETCODE_DONE, "Request executed"))
+
+    if symbol not in _market():
+        return _ok(_result(request, TRADE_RETCODE_INVALID, "Invalid request"))
+    volume = float(request.get("volume") or 0.0)
+    order_type = request.get("type")
+    tick = _tick(symbol)
+    sl, tp = float(request.get("sl") or 0.0), float(request.get("tp") or 0.0)
+
+    if action == TRADE_ACTION_PENDING:
+        if order_type not in (ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_SELL_LIMIT, ORDER_TYPE_BUY_STOP, ORDER_TYPE_SELL_STOP,
+                              ORDER_TYPE_BUY_STOP_LIMIT, ORDER_TYPE_SELL_STOP_LIMIT):
+            return _ok(_result(request, TRADE_RETCODE_INVALID, "Invalid request"))
+        if not _valid_volume(symbol, volume):
+            return _ok(_result(request, TRADE_RETCODE_INVALID_VOLUME, "Invalid volume"))
+        price = float(request.get("price") or 0.0)
+        is_buy = order_type in (ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_BUY_STOP, ORDER_TYPE_BUY_STOP_LIMIT)
+        wrong_side = {
+            ORDER_TYPE_BUY_LIMIT: price >= tick.ask, ORDER_TYPE_SELL_LIMIT: price <= tick.bid,
+            ORDER_TYPE_BUY_STOP: price <= tick.ask, ORDER_TYPE_SELL_STOP: price >= tick.bid,
+        }.get(order_type, False)
+        if price <= 0 or wrong_side:
+            return _ok(_result(request, TRADE_RETCODE_INVALID_PRICE, "Invalid price"))
+        if not _valid_stops(is_buy, price, sl, tp):
+            return _ok(_result(request, TRADE_RETCODE_INVALID_STOPS, "Invalid stops"))
+        ticket = _ticket(account)
+        account["orders"][ticket] = {
+            "ticket": ticket, "time_setup": int(_now()), "type": order_type, "symbol": symbol, "volume": volume,
+            "price_open": price, "sl": sl, "tp": tp, "magic": int(request.get("magic", 0) or 0),
+            "comment": str(request.get("comment", "") or ""),
+        }
+        return _ok(_result(request, TRADE_RETCODE_DONE, "Request executed", order=ticket, price=price))
+
+    if action == TRADE_ACTION_DEAL:
+        if order_type not in (ORDER_TYPE_BUY, ORDER_TYPE_SELL):
+            return _ok(_result(request, TRADE_RETCODE_INVALID, "Invalid request"))
+        if not _valid_volume(symbol, volume):
+            return _ok(_result(request, TRADE_RETCODE_INVALID_VOLUME, "Invalid volume"))
+        is_buy = order_type == ORDER_TYPE_BUY
+        price = tick.ask if is_buy else tick.bid
+        closing = account["positions"].get(request.get("position")) if request.get("position") else None
+        order_ticket = _ticket(account)
+        if closing is not None:
+            closing_profit = _position_profit(closing)
+            del account["positions"][closing["ticket"]]
+            account["balance"] = round(account["balance"] + closing_profit, 2)
+            deal = _deal(account, symbol, DEAL_TYPE_BUY if is_buy else DEAL_TYPE_SELL, DEAL_ENTRY_OUT, volume,
+                         price, closing_profit, closing["ticket"], _now(), order_ticket)
+            account["deals"].append(deal)
+            return _ok(_result(request, TRADE_RETCODE_DONE, "Request executed", order_ticket, deal.ticket, price))
+        if not _valid_stops(is_buy, price, sl, tp):
+            return _ok(_result(request, TRADE_RETCODE_INVALID_STOPS, "Invalid stops"))
+        ticket = _ticket(account)
+        account["positions"][ticket] = {
+            "ticket": ticket, "time": int(_now()), "type": POSITION_TYPE_BUY if is_buy else POSITION_TYPE_SELL,
+            "symbol": symbol, "volume": volume, "price_open": price, "sl": sl, "tp": tp,
+            "magic": int(request.get("magic", 0) or 0), "comment": str(request.get("comment", "") or ""),
+        }
+        deal = _deal(account, symbol, DEAL_TYPE_BUY if is_buy else DEAL_TYPE_SELL, DEAL_ENTRY_IN, volume, price,
+                     0.0, ticket, _now(), order_ticket)
+        account["deals"].append(deal)
+        return _ok(_result(request, TRADE_RETCODE_DONE, "Request executed", order_ticket, deal.ticket, price))
+
+    return _ok(_result(request, TRADE_RETCODE_INVALID, "Invalid request"))
+
+
+# ----------------------------------------------------------------- recording
+def record_market(path, symbols=None, timeframes=(TIMEFRAME_M15, TIMEFRAME_H1, TIMEFRAME_H4), bars=500):
+    """
+    Dump symbol specs, ticks and bars from a live terminal into a recording
+    for replay (FAKEMT5 recording=path). Run it on the trading machine with
+    the real MetaTrader5 package initialized and logged in.
+    """
+    import importlib
+    real = sys.modules.get("MetaTrader5")
+    if real is None or real is sys.modules[__name__]:
+        sys.modules.pop("MetaTrader5", None)
+        real = importlib.import_module("MetaTrader5")
+    if symbols is None:
+        symbols = [s.name for s in (real.symbols_get() or [])]
+
+    recording = {"recorded_at": datetime.now(timezone.utc).isoformat(), "symbols": {}}
+    for symbol in symbols:
+        info = real.symbol_info(symbol)
+        if info is None:
+            continue
+        tick = real.symbol_info_tick(symbol)
+        rates = {}
+        for timeframe in timeframes:
+            rows = real.copy_rates_from_pos(symbol, timeframe, 0, bars)
+            if rows is not None and len(rows):
+                rates[str(timeframe)] = [[int(r["time"]), float(r["open"]), float(r["high"]), float(r["low"]),
+                                          float(r["close"]), int(r["tick_volume"]), int(r["spread"]),
+                                          int(r["real_volume"])] for r in rows]
+        recording["symbols"][symbol] = {
+            "info": {k: v for k, v in info._asdict().items() if isinstance(v, (int, float, str, bool))},
+            "tick": tick._asdict() if tick is not None else None,
+            "rates": rates,
+        }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(recording, f)
+    print(f" 💾 Recorded {len(recording['symbols'])} symbols to {path}")
+    return len(recording["symbols"])
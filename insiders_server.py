@@ -2,6 +2,7 @@ import connectwithinfinitydb as db
 import json
 import os
 import shutil
+import hashlib
 from datetime import datetime
 from colorama import Fore, Style, init
 
@@ -11,6 +12,11 @@ init()
 OUTPUT_FILE_PATH = r"C:\xampp\htdocs\chronedge\synarex\users.json"
 MT5_TEMPLATE_SOURCE_DIR = r"C:\xampp\htdocs\chronedge\mt5\MetaTrader 5"
 BROKERS_OUTPUT_FILE_PATH = r"C:\xampp\htdocs\chronedge\synarex\developersdictionary.json"
+# Hash of the values last pushed per database id; unchanged users are not sent again
+SYNCED_HASHES_PATH = r"C:\xampp\htdocs\chronedge\synarex\updatedusers_synced.json"
+# Changed users are pushed as multi-row UPDATE ... CASE id statements of this many rows
+BATCHED_SYNC = True
+SYNC_BATCH_SIZE = 50
 
 # --- HELPER FUNCTIONS ---
 
@@ -145,12 +151,106 @@ def cleanup_stale_records_in_updatedusers():
     except Exception as e:
         print(f"Failed to save cleaned file: {e}", "CRITICAL")
 
-def update_table_fromupdatedusers():
+def build_user_update_fields(data):
+    """
+    Column -> SQL literal for one updatedusers.json record.
+    FIX: Ensures CONTRACT_DAYS_LEFT is updated in its own column and not concatenated to 'loyalties'.
+    """
+    fields = {}
+
+    # Loyalty string - ONLY the base loyalty is used for the database 'loyalties' column
+    loyalty_str = str(data.get("LOYALTIES", "low")).strip()
+
+    # Numeric
+    if "BROKER_BALANCE" in data:
+        fields["broker_balance"] = f"{safe_float(data['BROKER_BALANCE'])}"
+    if "PROFITANDLOSS" in data:
+        fields["profitandloss"] = f"{safe_float(data['PROFITANDLOSS'])}"
+
+    # Contract Days Left (UPDATED IN ITS OWN COLUMN)
+    contract_days_update = data.get("CONTRACT_DAYS_LEFT")
+    if contract_days_update is not None and str(contract_days_update).strip() not in ("None", "null", ""):
+        # Use safe_float for database insertion to handle potential floats and set NULL if invalid
+        fields["contract_days_left"] = f"{safe_float(contract_days_update)}"
+    else:
+        # Explicitly set it to NULL if not present/valid in JSON
+        fields["contract_days_left"] = "NULL"
+
+    # Date
+    exec_date = data.get("EXECUTION_START_DATE")
+    if exec_date and str(exec_date).strip() not in ("None", "null", ""):
+        date_str = str(exec_date).split(" ")[0]
+        fields["execution_start_date"] = f"'{date_str}'"
+    else:
+        fields["execution_start_date"] = "NULL"
+
+    # Text history fields
+    for json_field, db_field in [
+        ("BROKER_BALANCE_HISTORY", "broker_balance_history"),
+        ("EXECUTION_DATES_HISTORY", "execution_dates_history"),
+        ("PROFITANDLOSS_HISTORY", "profitandlosshistory"),
+        ("TRADES", "trades"),
+    ]:
+        if json_field in data:
+            val = str(data[json_field]).replace("'", "''")
+            fields[db_field] = f"'{val}'"
+
+    # Application status
+    verification = str(data.get("ACCOUNT_VERIFICATION", "")).lower().strip()
+    if verification == "verified":
+        fields["application_status"] = "'approved'"
+    elif verification == "invalid":
+        fields["application_status"] = "'declined'"
+    else:
+        fields["application_status"] = "'pending'"
+
+    # Loyalty (Only the base string)
+    fields["loyalties"] = "'" + loyalty_str.replace("'", "''") + "'"
+    return fields
+
+def fields_hash(fields):
+    return hashlib.sha1(json.dumps(fields, sort_keys=True).encode("utf-8")).hexdigest()
+
+def load_synced_hashes():
+    try:
+        with open(SYNCED_HASHES_PATH, "r", encoding="utf-8") as f:
+            hashes = json.load(f)
+        return hashes if isinstance(hashes, dict) else {}
+    except Exception:
+        return {}
+
+def save_synced_hashes(hashes):
+    try:
+        tmp_path = f"{SYNCED_HASHES_PATH}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(hashes, f, indent=4)
+        os.replace(tmp_path, SYNCED_HASHES_PATH)
+    except Exception as e:
+        log_and_print(f"Could not save sync hashes: {e}", "WARNING")
+
+def build_single_update(table, db_id, fields):
+    return f"UPDATE {table} SET " + ", ".join(f"{col} = {val}" for col, val in fields.items()) + f" WHERE id = {db_id}"
+
+def build_batch_update(table, rows):
+    """
+    One UPDATE for several rows with the same columns:
+    SET col = CASE id WHEN 1 THEN .. WHEN 2 THEN .. END, ... WHERE id IN (1, 2)
+    """
+    columns = list(rows[0][1].keys())
+    assignments = []
+    for col in columns:
+        cases = " ".join(f"WHEN {db_id} THEN {fields[col]}" for db_id, fields in rows)
+        assignments.append(f"{col} = CASE id {cases} END")
+    ids = ", ".join(str(db_id) for db_id, _ in rows)
+    return f"UPDATE {table} SET " + ", ".join(assignments) + f" WHERE id IN ({ids})"
+
+def update_table_fromupdatedusers(force=False):
     cleanup_stale_records_in_updatedusers()
     """
     Reads updatedusers.json and pushes ALL relevant fields BACK to insiders_server table.
     Now 100% reliable key matching + proper escaping + full field sync.
-    FIX: Ensures CONTRACT_DAYS_LEFT is updated in its own column and not concatenated to 'loyalties'.
+    Only users whose values changed since the last successful push are sent (force=True sends all),
+    batched into multi-row UPDATE statements of SYNC_BATCH_SIZE rows.
     """
     USERS_JSON_PATH = r"C:\xampp\htdocs\chronedge\synarex\updatedusers.json"
     insiders_server_TABLE = "insiders_server"
@@ -194,8 +294,11 @@ def update_table_fromupdatedusers():
         key = f"{broker_norm}{row['id']}"
         broker_to_id[key] = row['id']
 
-    updated = skipped = errors = 0
+    updated = skipped = unchanged = errors = 0
+    synced_hashes = {} if force else load_synced_hashes()
 
+    # Changed users, grouped by their column set (a batch statement needs the same columns)
+    pending = {}  # column tuple -> [(json_key, db_id, fields, hash)]
     for json_key, data in users_dict.items():
         db_id = broker_to_id.get(json_key.lower())
 
@@ -204,76 +307,51 @@ def update_table_fromupdatedusers():
             skipped += 1
             continue
 
-        # Loyalty string - ONLY the base loyalty is used for the database 'loyalties' column
-        base_loyalty = str(data.get("LOYALTIES", "low")).strip()
-        loyalty_str = base_loyalty # <--- FIX: Removed contract_days_left concatenation
-
-        # Build update fields
-        fields = []
+        fields = build_user_update_fields(data)
+        digest = fields_hash(fields)
+        if synced_hashes.get(str(db_id)) == digest:
+            unchanged += 1
+            continue
+        pending.setdefault(tuple(fields), []).append((json_key, db_id, fields, digest))
 
-        # Numeric
-        if "BROKER_BALANCE" in data:
-            fields.append(f"broker_balance = {safe_float(data['BROKER_BALANCE'])}")
-        if "PROFITANDLOSS" in data:
-            fields.append(f"profitandloss = {safe_float(data['PROFITANDLOSS'])}")
-            
-        # Contract Days Left (UPDATED IN ITS OWN COLUMN)
-        contract_days_update = data.get("CONTRACT_DAYS_LEFT")
-        if contract_days_update is not None and str(contract_days_update).strip() not in ("None", "null", ""):
-            # Use safe_float for database insertion to handle potential floats and set NULL if invalid
-            safe_days = safe_float(contract_days_update)
-            fields.append(f"contract_days_left = {safe_days}")
-        else:
-             # Add this to explicitly set it to NULL if not present/valid in JSON
-             fields.append("contract_days_left = NULL")
-
-        # Date
-        exec_date = data.get("EXECUTION_START_DATE")
-        if exec_date and str(exec_date).strip() not in ("None", "null", ""):
-            date_str = str(exec_date).split(" ")[0]
-            fields.append(f"execution_start_date = '{date_str}'")
-        else:
-            fields.append("execution_start_date = NULL")
-
-        # Text history fields
-        for json_field, db_field in [
-            ("BROKER_BALANCE_HISTORY", "broker_balance_history"),
-            ("EXECUTION_DATES_HISTORY", "execution_dates_history"),
-            ("PROFITANDLOSS_HISTORY", "profitandlosshistory"),
-            ("TRADES", "trades"),
-        ]:
-            if json_field in data:
-                val = str(data[json_field]).replace("'", "''")
-                fields.append(f"{db_field} = '{val}'")
-
-        # Application status
-        verification = str(data.get("ACCOUNT_VERIFICATION", "")).lower().strip()
-        if verification == "verified":
-            fields.append("application_status = 'approved'")
-        elif verification == "invalid":
-            fields.append("application_status = 'declined'")
-        else:
-            fields.append("application_status = 'pending'")
+    def record(entries, res):
+        nonlocal updated, errors
+        for json_key, db_id, fields, digest in entries:
+            if res.get('status') == 'success':
+                log_and_print(f"UPDATED → {json_key} (ID: {db_id}) | Loyalty: {str(users_dict[json_key].get('LOYALTIES', 'low')).strip()}", "SUCCESS")
+                synced_hashes[str(db_id)] = digest
+                updated += 1
+            else:
+                log_and_print(f"FAILED → {json_key} (ID: {db_id}): {res.get('message')}", "ERROR")
+                errors += 1
 
-        # Loyalty (Only the base string)
-        safe_loyalty = loyalty_str.replace("'", "''")
-        fields.append(f"loyalties = '{safe_loyalty}'") # <--- FIX: loyalty_str no longer contains contract_days_left
+    batch_size = SYNC_BATCH_SIZE if BATCHED_SYNC else 1
+    chunks = [
+        entries[start:start + batch_size]
+        for entries in pending.values()
+        for start in range(0, len(entries), batch_size)
+    ]
+    statements = [
+        build_single_update(insiders_server_TABLE, chunk[0][1], chunk[0][2]) if len(chunk) == 1
+        else build_batch_update(insiders_server_TABLE, [(db_id, fields) for _, db_id, fields, _ in chunk])
+        for chunk in chunks
+    ]
+    if statements:
+        log_and_print(f"Pushing {sum(len(c) for c in chunks)} changed users in {len(statements)} statement(s)", "INFO")
 
-        if not fields:
+    for chunk, res in zip(chunks, db.execute_queries(statements)):
+        if res.get('status') == 'success' or len(chunk) == 1:
+            record(chunk, res)
             continue
+        # A failed batch is retried row by row so one bad record does not hold back the others
+        log_and_print(f"Batch of {len(chunk)} failed ({res.get('message')}), retrying row by row", "WARNING")
+        for entry, row_res in zip(chunk, db.execute_queries([build_single_update(insiders_server_TABLE, entry[1], entry[2]) for entry in chunk])):
+            record([entry], row_res)
 
-        sql = f"UPDATE {insiders_server_TABLE} SET " + ", ".join(fields) + f" WHERE id = {db_id}"
-        res = db.execute_query(sql)
-
-        if res.get('status') == 'success':
-            log_and_print(f"UPDATED → {json_key} (ID: {db_id}) | Loyalty: {loyalty_str}", "SUCCESS")
-            updated += 1
-        else:
-            log_and_print(f"FAILED → {json_key} (ID: {db_id}): {res.get('message')}", "ERROR")
-            errors += 1
+    save_synced_hashes(synced_hashes)
 
     log_and_print("=== Sync Complete ===", "TITLE")
-    log_and_print(f"Updated: {updated} | Skipped: {skipped} | Errors: {errors}", "INFO")
+    log_and_print(f"Updated: {updated} | Unchanged: {unchanged} | Skipped: {skipped} | Errors: {errors}", "INFO")
 
 def fetch_insiders_server_rows():
     """
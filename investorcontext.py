@@ -0,0 +1,140 @@
+import os
+import json
+import MetaTrader5 as mt5
+from pathlib import Path
+from datetime import datetime
+from dealledger import get_deal_ledger, stored_anchor, to_epoch
+
+
+# account_info fields that stay fixed for a session (balance/equity do not)
+ACCOUNT_FIELDS = ("login", "server", "currency", "leverage", "company", "name", "trade_mode")
+
+
+def _path_key(path):
+    return os.path.normcase(os.path.abspath(str(path)))
+
+
+def _copy_json(value):
+    """Deep copy for parsed JSON (dicts, lists, scalars) - much cheaper than copy.deepcopy."""
+    if isinstance(value, dict):
+        return {k: _copy_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_json(v) for v in value]
+    return value
+
+
+class InvestorContext:
+    """
+    Immutable snapshot of one investor's inputs for a single cycle.
+
+    Built once by the orchestrator right after the MT5 session is ready and
+    handed to every stage as ctx=. Holds the parsed accountmanagement.json,
+    the symbols normalization file and the static account fields, so the
+    stages stop re-opening and re-parsing the same files. Only files that no
+    stage writes during a cycle belong here; signals.json, activities.json
+    and friends are still read from disk.
+
+    Every read returns a private copy, so a stage editing its config cannot
+    leak into the next stage.
+
+    The deal ledger is synced with the terminal once, when the context is
+    loaded (or when a stage first asks for another anchor), and the same
+    ledger is handed to every stage of the cycle.
+    """
+
+    __slots__ = ("inv_id", "inv_root", "account", "created_at", "_files", "_ledgers")
+
+    def __init__(self, inv_id, inv_root, files, account=None):
+        object.__setattr__(self, "inv_id", inv_id)
+        object.__setattr__(self, "inv_root", Path(inv_root))
+        object.__setattr__(self, "account", dict(account) if account else None)
+        object.__setattr__(self, "created_at", datetime.now())
+        object.__setattr__(self, "_files", dict(files))
+        object.__setattr__(self, "_ledgers", {})
+
+    def __setattr__(self, name, value):
+        raise AttributeError("InvestorContext is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("InvestorContext is immutable")
+
+    @classmethod
+    def load(cls, inv_id, inv_root, norm_path):
+        """
+        Parse the investor's per-cycle inputs once. A file that is missing or
+        unreadable is simply left out, so the stage falls back to its own disk
+        read and reports the problem the way it always has.
+        """
+        files = {}
+        for path in (Path(inv_root) / "accountmanagement.json", norm_path):
+            if not path or not os.path.exists(path):
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    files[_path_key(path)] = json.load(f)
+            except Exception as e:
+                print(f" [{inv_id}] ⚠️  Could not snapshot {path}: {e}")
+
+        acc = mt5.account_info()
+        account = None
+        if acc is not None:
+            account = {field: getattr(acc, field, None) for field in ACCOUNT_FIELDS}
+        ctx = cls(inv_id, inv_root, files, account)
+
+        # The cycle's one ledger sync; stages read it through deal_ledger()
+        try:
+            ctx.deal_ledger()
+        except Exception as e:
+            print(f" [{inv_id}] ⚠️  Could not sync deal ledger: {e}")
+        return ctx
+
+    def has(self, path):
+        return _path_key(path) in self._files
+
+    def json(self, path):
+        """Private copy of a snapshotted file, or None if it is not part of the snapshot."""
+        data = self._files.get(_path_key(path))
+        return None if data is None else _copy_json(data)
+
+    @property
+    def accountmanagement(self):
+        return self.json(self.inv_root / "accountmanagement.json")
+
+    def deal_ledger(self, start_datetime=None):
+        """
+        The investor's deal ledger anchored at start_datetime (default: the
+        stored anchor), synced with the terminal the first time this cycle
+        asks for that anchor and reused after that. None when there is no
+        ledger yet or no account.
+        """
+        if start_datetime is None:
+            start_datetime = stored_anchor(self.inv_root)
+            if start_datetime is None:
+                return None
+        key = to_epoch(start_datetime)
+        if key not in self._ledgers:
+            login = self.account["login"] if self.account else None
+            ledger = get_deal_ledger(self.inv_root, start_datetime, login)
+            if ledger is None:
+                return None
+            self._ledgers[key] = ledger
+        return self._ledgers[key]
+
+
+def account_field(field, ctx=None):
+    """
+    Static account_info field (login, server, currency, ...) from the cycle's
+    InvestorContext; asked from the terminal when there is no snapshot.
+    """
+    if ctx is not None and ctx.account is not None and field in ctx.account:
+        return ctx.account[field]
+    acc = mt5.account_info()
+    return None if acc is None else getattr(acc, field, None)
+
+
+def read_json(path, ctx=None):
+    """json.load() of path, served from the cycle's InvestorContext when it holds that file."""
+    if ctx is not None and ctx.has(path):
+        return ctx.json(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,487 @@
+import os
+import sys
+import time
+import atexit
+import hashlib
+import tempfile
+import traceback
+import multiprocessing as mp
+from multiprocessing.connection import wait as wait_connections
+import MetaTrader5 as mt5
+from symbolresolver import reset_resolver
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+
+# The MetaTrader5 package talks to one terminal per process; this records which one.
+_SESSION = {"path": None, "login": None}
+
+
+def ensure_session(terminal_path, login_id, password, server, timeout=180000):
+    """
+    Make sure this process is connected to terminal_path and logged into login_id.
+
+    A live session on the same terminal and account is reused after a cheap
+    account_info() health check; a different account on the same terminal only
+    costs a login; anything else (first use, dead terminal, other terminal)
+    does a full shutdown + initialize. Whatever may switch the terminal's
+    account runs under its TerminalLoginLock.
+    """
+    login_id = int(login_id)
+
+    if _SESSION["path"] == terminal_path:
+        acc = mt5.account_info()
+        if acc is not None and acc.login == login_id:
+            return True
+
+    with TerminalLoginLock(terminal_path):
+        return _switch_session(terminal_path, login_id, password, server, timeout)
+
+
+def _switch_session(terminal_path, login_id, password, server, timeout):
+    if _SESSION["path"] == terminal_path:
+        acc = mt5.account_info()
+        if acc is not None and acc.login == login_id:
+            return True
+        if acc is not None:
+            reset_resolver()
+            if mt5.login(login_id, password=password, server=server):
+                _SESSION["login"] = login_id
+                return True
+
+    # (Re)connect from scratch
+    if _SESSION["path"] is not None:
+        try:
+            mt5.shutdown()
+        except Exception:
+            pass
+    _SESSION.update(path=None, login=None)
+    reset_resolver()
+
+    if not mt5.initialize(path=terminal_path, timeout=timeout):
+        return False
+
+    acc = mt5.account_info()
+    if acc is None or acc.login != login_id:
+        if not mt5.login(login_id, password=password, server=server):
+            mt5.shutdown()
+            return False
+
+    _SESSION.update(path=terminal_path, login=login_id)
+    return True
+
+
+def ensure_investor_session(broker_cfg, timeout=180000):
+    """ensure_session() for an investors.json / brokers.json entry."""
+    return ensure_session(
+        broker_cfg["TERMINAL_PATH"], broker_cfg["LOGIN_ID"],
+        broker_cfg["PASSWORD"], broker_cfg["SERVER"], timeout=timeout
+    )
+
+
+def close_session():
+    """Shut the terminal connection of this process down (if any)."""
+    if _SESSION["path"] is not None:
+        try:
+            mt5.shutdown()
+        except Exception:
+            pass
+    _SESSION.update(path=None, login=None)
+
+
+# Lock files live outside the project so every script (synapse, placeorders, ohlc, ...) shares them
+TERMINAL_LOCK_DIR = os.path.join(tempfile.gettempdir(), "synarex_terminal_locks")
+
+
+class TerminalAdmission:
+    """
+    Cross-process admission to one terminal binary.
+
+    An exclusive OS file lock keyed by the terminal path: only one process
+    at a time drives a given terminal, while different terminals are admitted
+    fully in parallel. The OS drops the lock when the holder dies, so a worker
+    killed on its deadline never leaves a terminal blocked. Re-entrant within
+    a process.
+    """
+
+    _held = {}  # lock path -> [file object, depth] for this process
+
+    def __init__(self, terminal_path, timeout=None, poll_interval=0.05):
+        digest = hashlib.sha1(os.path.normcase(str(terminal_path)).encode("utf-8")).hexdigest()[:16]
+        self.terminal_path = terminal_path
+        self.lock_path = os.path.join(TERMINAL_LOCK_DIR, f"{digest}.lock")
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+    @staticmethod
+    def _try_lock(f):
+        try:
+            if sys.platform == "win32":
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def _unlock(f):
+        try:
+            if sys.platform == "win32":
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        except OSError:
+            pass
+
+    def acquire(self, timeout=None):
+        """Wait until the terminal is free (or timeout seconds pass). Returns True when admitted."""
+        held = self._held.get(self.lock_path)
+        if held is not None:
+            held[1] += 1
+            return True
+
+        timeout = self.timeout if timeout is None else timeout
+        os.makedirs(TERMINAL_LOCK_DIR, exist_ok=True)
+        f = open(self.lock_path, "a+b")
+        started = time.monotonic()
+        waited = False
+        while not self._try_lock(f):
+            if timeout is not None and time.monotonic() - started >= timeout:
+                f.close()
+                print(f" ⛔ Terminal busy for {timeout}s, not admitted: {self.terminal_path}")
+                return False
+            if not waited:
+                print(f" ⏳ Waiting for terminal: {self.terminal_path}")
+                waited = True
+            time.sleep(self.poll_interval)
+
+        self._held[self.lock_path] = [f, 1]
+        return True
+
+    def try_acquire(self):
+        """Single non-blocking attempt, without the waiting/busy messages. Returns True when admitted."""
+        held = self._held.get(self.lock_path)
+        if held is not None:
+            held[1] += 1
+            return True
+
+        os.makedirs(TERMINAL_LOCK_DIR, exist_ok=True)
+        f = open(self.lock_path, "a+b")
+        if not self._try_lock(f):
+            f.close()
+            return False
+        self._held[self.lock_path] = [f, 1]
+        return True
+
+    def release(self):
+        held = self._held.get(self.lock_path)
+        if held is None:
+            return
+        held[1] -= 1
+        if held[1] > 0:
+            return
+        del self._held[self.lock_path]
+        self._unlock(held[0])
+        held[0].close()
+
+    def __enter__(self):
+        if not self.acquire():
+            raise TimeoutError(f"Terminal not admitted: {self.terminal_path}")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+class TerminalLoginLock(TerminalAdmission):
+    """
+    Short exclusive lock on a terminal's logged-in account, separate from its
+    admission. ensure_session() holds it while it may switch the account;
+    breakeven monitors hold it for one poll, so the account cannot change
+    between their login check and their order_send - without waiting for
+    the admission a pipeline worker keeps for a whole investor run.
+    """
+
+    def __init__(self, terminal_path, timeout=None, poll_interval=0.01):
+        super().__init__(terminal_path, timeout, poll_interval)
+        self.lock_path = self.lock_path[:-len(".lock")] + ".login.lock"
+
+    def acquire(self, timeout=None):
+        """Wait (quietly: holders only keep it for milliseconds) until the lock is free."""
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        while not self.try_acquire():
+            if timeout is not None and time.monotonic() - started >= timeout:
+                return False
+            time.sleep(self.poll_interval)
+        return True
+
+
+def _terminal_worker(task_queue, result_conn):
+    """
+    Long-lived worker bound to one terminal path. Runs dispatched stage
+    functions one after another; the functions call ensure_session(), so the
+    logged-in session survives from one task (and cycle) to the next.
+
+    Results go back over the worker's own pipe, so killing one worker can
+    never leave a half-written result where the other workers write theirs.
+    """
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        job_id, func, args, kwargs = task
+        try:
+            outcome = (job_id, True, func(*args, **kwargs))
+        except Exception as e:
+            outcome = (job_id, False, f"{e}\n{traceback.format_exc()}")
+        try:
+            result_conn.send(outcome)
+        except Exception as e:
+            # Result that can't be pickled: report it instead of losing the job
+            result_conn.send((job_id, False, f"Result could not be sent back: {e}"))
+    result_conn.close()
+    close_session()
+
+
+def default_concurrency(terminal_count):
+    """Never more workers than cores, and never more than there are terminals to drive."""
+    return max(1, min(os.cpu_count() or 1, terminal_count))
+
+
+class SessionSupervisor:
+    """
+    One worker process per terminal path, kept alive across cycles.
+    Jobs for the same terminal run sequentially in its worker; different
+    terminals run in parallel.
+    """
+
+    def __init__(self):
+        self._workers = {}
+        self._last_used = {}
+        self._job_paths = {}  # job_id -> terminal path, until its result is read
+        self._next_job_id = 0
+        atexit.register(self.shutdown)
+
+    def _stop_worker(self, terminal_path, kill=False):
+        process, task_queue, result_conn = self._workers.pop(terminal_path)
+        self._last_used.pop(terminal_path, None)
+        for job_id in [j for j, path in self._job_paths.items() if path == terminal_path]:
+            del self._job_paths[job_id]
+        if kill:
+            process.terminate()
+        elif process.is_alive():
+            task_queue.put(None)
+        process.join(timeout=30)
+        if process.is_alive():
+            process.terminate()
+        # Whatever the worker left in its own pipe goes with it
+        result_conn.close()
+        task_queue.cancel_join_thread()
+
+    def _worker_for(self, terminal_path):
+        self._last_used[terminal_path] = time.monotonic()
+        worker = self._workers.get(terminal_path)
+        if worker is not None and worker[0].is_alive():
+            return worker
+        if worker is not None:
+            print(f" ⚠️  Terminal worker for {terminal_path} died - restarting")
+            self._stop_worker(terminal_path)
+        task_queue = mp.Queue()
+        result_conn, worker_conn = mp.Pipe(duplex=False)
+        process = mp.Process(target=_terminal_worker, args=(task_queue, worker_conn))
+        process.start()
+        worker_conn.close()
+        self._workers[terminal_path] = (process, task_queue, result_conn)
+        self._last_used[terminal_path] = time.monotonic()
+        return self._workers[terminal_path]
+
+    def make_room(self, terminal_path, busy, max_workers):
+        """
+        Keep at most max_workers workers alive: before terminal_path gets a new
+        worker, stop the least recently used idle one. Returns False when all
+        of them are busy (dispatch later).
+        """
+        if terminal_path in self._workers or len(self._workers) < max_workers:
+            return True
+        idle = [p for p in self._workers if p not in busy]
+        if not idle:
+            return False
+        self._stop_worker(min(idle, key=lambda p: self._last_used.get(p, 0)))
+        return True
+
+    def retire_workers(self, keep):
+        """Stop the workers of every terminal path not in keep (accounts / lanes that are gone)."""
+        for terminal_path in list(self._workers):
+            if terminal_path not in keep:
+                self._stop_worker(terminal_path)
+
+    def submit(self, terminal_path, func, *args, **kwargs):
+        """Queue func(*args, **kwargs) on the worker of terminal_path; returns a job id."""
+        job_id = self._next_job_id
+        self._next_job_id += 1
+        self._worker_for(terminal_path)[1].put((job_id, func, args, kwargs))
+        self._job_paths[job_id] = terminal_path
+        return job_id
+
+    def collect(self, job_ids, timeout=None, first=False):
+        """
+        Wait for the given jobs. Returns {job_id: (ok, result_or_error)}.
+        Jobs still running when timeout (seconds) expires are missing from the result.
+        With first=True it returns as soon as one job has finished.
+        """
+        pending = set(job_ids)
+        results = {}
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while pending:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            connections = {worker[2]: path for path, worker in self._workers.items()}
+            if not connections:
+                break
+            ready = wait_connections(list(connections), timeout=remaining if remaining is not None else 5)
+            if not ready:
+                if deadline is None and not any(worker[0].is_alive() for worker in self._workers.values()):
+                    break
+                continue
+            for conn in ready:
+                try:
+                    job_id, ok, payload = conn.recv()
+                except (EOFError, OSError):
+                    # Worker died: fail the jobs it still owed; the next submit restarts it
+                    terminal_path = connections[conn]
+                    print(f" ⚠️  Terminal worker for {terminal_path} exited")
+                    for job_id in pending:
+                        if self._job_paths.get(job_id) == terminal_path:
+                            results[job_id] = (False, "terminal worker exited")
+                    pending.difference_update(results)
+                    self._stop_worker(terminal_path)
+                    continue
+                self._job_paths.pop(job_id, None)
+                if job_id in pending:
+                    pending.discard(job_id)
+                    results[job_id] = (ok, payload)
+                    if first:
+                        # Other finished jobs stay in their pipes for the next collect
+                        break
+            if first and results:
+                break
+        return results
+
+    def run(self, jobs, timeout=None):
+        """
+        jobs: list of (terminal_path, func, args). Returns the results in the
+        same order as (ok, result_or_error) tuples; (False, "timeout") when missing.
+        """
+        job_ids = [self.submit(path, func, *args) for path, func, args in jobs]
+        results = self.collect(job_ids, timeout=timeout)
+        return [results.get(job_id, (False, "timeout")) for job_id in job_ids]
+
+    def run_scheduled(self, jobs, max_workers=None, deadline=None, max_attempts=1,
+                      backoff=10, is_success=None):
+        """
+        Bounded, fault-tolerant variant of run().
+
+        - at most max_workers jobs run at once and at most max_workers terminal
+          workers stay alive (the least recently used idle one is stopped to
+          make room), default: default_concurrency(number of terminals);
+        - a job running longer than `deadline` seconds has its worker killed;
+        - a job that times out, raises, or whose result fails is_success(result)
+          is requeued up to max_attempts in total, after backoff * 2**(attempt-1)
+          seconds, without blocking other jobs.
+
+        Returns [(ok, result_or_error, attempts)] in job order.
+        """
+        terminals = {path for path, _, _ in jobs}
+        max_workers = max_workers or default_concurrency(len(terminals))
+        is_success = is_success or (lambda result: True)
+
+        # index -> attempt count / earliest start; pending keeps submission order
+        attempts = [0] * len(jobs)
+        not_before = [0.0] * len(jobs)
+        pending = list(range(len(jobs)))
+        final = [None] * len(jobs)
+        in_flight = {}  # job_id -> (index, terminal_path, started)
+
+        def finish(index, ok, payload):
+            if not ok and attempts[index] < max_attempts:
+                delay = backoff * (2 ** (attempts[index] - 1))
+                not_before[index] = time.monotonic() + delay
+                pending.append(index)
+                print(f" 🔁 Requeued job {index} ({jobs[index][0]}) in {delay:.0f}s "
+                      f"(attempt {attempts[index]}/{max_attempts} failed)")
+            else:
+                final[index] = (ok, payload, attempts[index])
+
+        while pending or in_flight:
+            now = time.monotonic()
+            busy = {path for _, path, _ in in_flight.values()}
+
+            # Dispatch whatever fits
+            for index in list(pending):
+                if len(in_flight) >= max_workers:
+                    break
+                path, func, args = jobs[index]
+                if path in busy or not_before[index] > now:
+                    continue
+                if not self.make_room(path, busy, max_workers):
+                    continue
+                pending.remove(index)
+                attempts[index] += 1
+                job_id = self.submit(path, func, *args)
+                in_flight[job_id] = (index, path, now)
+                busy.add(path)
+
+            if not in_flight:
+                # Everything left is backing off
+                time.sleep(max(0.0, min(not_before[i] for i in pending) - time.monotonic()))
+                continue
+
+            # Wait for a result, but wake up for the next deadline or retry
+            wake = [1.0]
+            if deadline:
+                wake.append(min(started + deadline for _, _, started in in_flight.values()) - now)
+            for job_id, (ok, payload) in self.collect(in_flight, timeout=max(0.05, min(wake)), first=True).items():
+                index, _, _ = in_flight.pop(job_id)
+                finish(index, ok and is_success(payload), payload)
+
+            # Kill overrunning jobs
+            if deadline:
+                now = time.monotonic()
+                for job_id, (index, path, started) in list(in_flight.items()):
+                    if now - started > deadline:
+                        print(f" ⏱️  Job {index} on {path} exceeded {deadline}s - killing its worker")
+                        in_flight.pop(job_id)
+                        self._stop_worker(path, kill=True)
+                        finish(index, False, f"deadline of {deadline}s exceeded")
+
+        return final
+
+    def stop_worker(self, terminal_path, kill=False):
+        """Stop the worker of terminal_path (kill=True: terminate it mid-job)."""
+        if terminal_path in self._workers:
+            self._stop_worker(terminal_path, kill=kill)
+
+    def shutdown(self):
+        """Stop all terminal workers (each closes its MT5 session)."""
+        for terminal_path in list(self._workers):
+            self._stop_worker(terminal_path)
+
+
+_SUPERVISOR = None
+
+
+def get_supervisor():
+    """Process-wide supervisor (created on first use in the orchestrator)."""
+    global _SUPERVISOR
+    if _SUPERVISOR is None:
+        _SUPERVISOR = SessionSupervisor()
+    return _SUPERVISOR
@@ -39,6 +39,9 @@ import multiprocessing as mp
 from pathlib import Path
 import time
 import random
+from swingengine import chart_geometry_path, load_chart_geometry
+import candlestore
+from mt5session import ensure_session, close_session
 
 INV_PATH = r"C:\xampp\htdocs\synapse\synarex\usersdata\investors"
 UPDATED_INVESTORS = r"C:\xampp\htdocs\synapse\synarex\updated_investors.json"
@@ -59,6 +62,7 @@ TIMEFRAME_MAP = {
     "4h": mt5.TIMEFRAME_H4
 }
 ERROR_JSON_PATH = os.path.join(BASE_ERROR_FOLDER, "chart_errors.json")
+CHART_DPI = 100
 
 def load_investor_users():
     """Load investor users config from JSON file."""
@@ -213,6 +217,28 @@ def load_investor_symbols(investor_id):
         print(f"  ❌  Investor {investor_id} | Failed to load symbols from accountmanagement.json: {e}", "ERROR")
         return []
     
+def load_chart_timeframes(investor_id):
+    """
+    Timeframes whose chart PNG a downstream consumer needs, from "chart_timeframes"
+    in accountmanagement.json. Without the key every timeframe is rendered, as
+    before the setting existed; an empty list turns charts off for this investor.
+    """
+    accountmanagement_path = os.path.join(INV_PATH, investor_id, "accountmanagement.json")
+    
+    try:
+        with open(accountmanagement_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except Exception:
+        return []
+
+    if "chart_timeframes" not in data:
+        return list(TIMEFRAME_MAP)
+    chart_timeframes = data["chart_timeframes"]
+    if not isinstance(chart_timeframes, list):
+        print(f"  ⚠️  Investor {investor_id} | 'chart_timeframes' must be a list, got: {type(chart_timeframes)}", "WARNING")
+        return []
+    return [tf for tf in chart_timeframes if tf in TIMEFRAME_MAP]
+
 def save_errors(error_log):
     """Save error log to JSON file."""
     try:
@@ -224,7 +250,7 @@ def save_errors(error_log):
         print(f"Failed to save error log: {str(e)}", "ERROR")
 
 def initialize_mt5(terminal_path, login_id, password, server):
-    """Initialize MetaTrader 5 terminal for a specific broker."""
+    """Initialize MetaTrader 5 terminal for a specific broker (or reuse the live session)."""
     error_log = []
     if not os.path.exists(terminal_path):
         error_log.append({
@@ -237,31 +263,15 @@ def initialize_mt5(terminal_path, login_id, password, server):
         return False, error_log
 
     try:
-        if not mt5.initialize(
-            path=terminal_path,
-            login=int(login_id),
-            server=server,
-            password=password,
-            timeout=30000
-        ):
+        # Reuses the live session when it is already on this terminal/account
+        if not ensure_session(terminal_path, login_id, password, server, timeout=30000):
             error_log.append({
                 "timestamp": datetime.now(pytz.timezone('Africa/Lagos')).strftime('%Y-%m-%d %H:%M:%S.%f+01:00'),
-                "error": f"Failed to initialize MT5: {mt5.last_error()}",
+                "error": f"Failed to initialize/login MT5: {mt5.last_error()}",
                 "broker": server
             })
             save_errors(error_log)
-            print(f"Failed to initialize MT5: {mt5.last_error()}", "ERROR")
-            return False, error_log
-
-        if not mt5.login(login=int(login_id), server=server, password=password):
-            error_log.append({
-                "timestamp": datetime.now(pytz.timezone('Africa/Lagos')).strftime('%Y-%m-%d %H:%M:%S.%f+01:00'),
-                "error": f"Failed to login to MT5: {mt5.last_error()}",
-                "broker": server
-            })
-            save_errors(error_log)
-            print(f"Failed to login to MT5: {mt5.last_error()}", "ERROR")
-            mt5.shutdown()
+            print(f"Failed to initialize/login MT5: {mt5.last_error()}", "ERROR")
             return False, error_log
 
         return True, error_log
@@ -293,6 +303,28 @@ def get_symbols():
     print(f"Retrieved {len(available_symbols)} symbols", "INFO")
     return available_symbols, error_log
 
+def select_symbol(symbol, attempts=3):
+    """Ensure symbol is selected in Market Watch, retrying briefly."""
+    for attempt in range(attempts):
+        if mt5.symbol_select(symbol, True):
+            return True
+        time.sleep(0.5)
+    return False
+
+def rates_to_df(rates):
+    """Convert an MT5 rates array into the standard OHLCV DataFrame (time index, 'volume' column)."""
+    df = pd.DataFrame(rates)
+    df["time"] = pd.to_datetime(df["time"], unit="s")
+    df = df.set_index("time")
+
+    # Standardize dtypes
+    df = df.astype({
+        "open": float, "high": float, "low": float, "close": float,
+        "tick_volume": float, "spread": int, "real_volume": float
+    })
+    df.rename(columns={"tick_volume": "volume"}, inplace=True)
+    return df
+
 def fetch_ohlcv_data(symbol, mt5_timeframe, bars):
     """
     Fetch OHLCV data including the currently forming candle (index 0).
@@ -301,17 +333,8 @@ def fetch_ohlcv_data(symbol, mt5_timeframe, bars):
     lagos_tz = pytz.timezone('Africa/Lagos')
     timestamp = datetime.now(lagos_tz).strftime('%Y-%m-%d %H:%M:%S.%f%z')
 
-    broker_name = mt5.terminal_info().name if mt5.terminal_info() else "unknown"
-
     # --- Step 1: Ensure symbol is selected ---
-    selected = False
-    for attempt in range(3):
-        if mt5.symbol_select(symbol, True):
-            selected = True
-            break
-        time.sleep(0.5)
-
-    if not selected:
+    if not select_symbol(symbol):
         last_err = mt5.last_error()
         err_msg = f"FAILED symbol_select('{symbol}'): {last_err}"
         print(err_msg, "ERROR")
@@ -328,23 +351,58 @@ def fetch_ohlcv_data(symbol, mt5_timeframe, bars):
         print(err_msg, "ERROR")
         return None, [{"error": err_msg, "timestamp": timestamp}]
 
-    available_bars = len(rates)
-    
-    # Convert to DataFrame
-    df = pd.DataFrame(rates)
-    df["time"] = pd.to_datetime(df["time"], unit="s")
-    df = df.set_index("time")
-
-    # Standardize dtypes
-    df = df.astype({
-        "open": float, "high": float, "low": float, "close": float,
-        "tick_volume": float, "spread": int, "real_volume": float
-    })
-    df.rename(columns={"tick_volume": "volume"}, inplace=True)
+    df = rates_to_df(rates)
 
-    print(f"Fetched {available_bars} bars (including live candle) for {symbol}", "INFO")
+    print(f"Fetched {len(rates)} bars (including live candle) for {symbol}", "INFO")
     return df, error_log
 
+def fetch_ohlcv_incremental(symbol, mt5_timeframe, bars, base_output_dir, timeframe_str):
+    """
+    Fetch only the bars newer than the last closed bar already in the candle store,
+    re-fetching the previously forming candle, and merge them into the stored window.
+    Falls back to a full fetch_ohlcv_data() when nothing usable is stored.
+
+    Returns (df, new_bars, error_log). df is the full merged window (oldest → newest,
+    last row = live candle); new_bars is how many closed bars were added since the
+    previous run (bars for a full fetch).
+    """
+    store = candlestore.load_candles(base_output_dir, symbol, timeframe_str, mmap=False)
+    last_closed = store["header"].get("last_closed_time") if store else None
+
+    # A window shorter than requested (new symbol, 'bars' raised) is rebuilt in full
+    if store is None or last_closed is None or store["header"].get("count", 0) < bars:
+        df, error_log = fetch_ohlcv_data(symbol, mt5_timeframe, bars)
+        return df, (len(df) if df is not None else 0), error_log
+
+    if not select_symbol(symbol):
+        err_msg = f"FAILED symbol_select('{symbol}'): {mt5.last_error()}"
+        print(err_msg, "ERROR")
+        return None, 0, [{"error": err_msg, "timestamp": datetime.now().isoformat()}]
+
+    # Everything from the first bar after the last closed one up to now:
+    # the previously forming candle (now possibly closed), any new bars and the live one.
+    date_from = datetime.fromtimestamp(int(last_closed) + 1, tz=pytz.utc)
+    date_to = datetime.now(pytz.utc) + timedelta(days=1)
+    rates = mt5.copy_rates_range(symbol, mt5_timeframe, date_from, date_to)
+
+    if rates is None or len(rates) == 0 or len(rates) >= bars:
+        # Terminal error, history gap or a stale store: rebuild the window from scratch
+        df, error_log = fetch_ohlcv_data(symbol, mt5_timeframe, bars)
+        return df, (len(df) if df is not None else 0), error_log
+
+    stored = pd.DataFrame(
+        {name: store[name] for name in candlestore.COLUMNS if name != "time"},
+        index=pd.to_datetime(store["time"], unit="s")
+    )
+    stored.index.name = "time"
+    delta = rates_to_df(rates)
+
+    df = pd.concat([stored[stored.index < delta.index[0]], delta]).tail(bars)
+    new_bars = len(delta) - 1
+
+    print(f"Fetched {len(delta)} new bars (incremental, {new_bars} closed) for {symbol}", "INFO")
+    return df, new_bars, []
+
 def backup_investor_users():
     """Backup investor users configuration."""
     main_path = Path(r"C:\xampp\htdocs\synapse\synarex\usersdata\investors\investors.json")
@@ -528,17 +586,14 @@ def clear_unknown_investors():
     if missing > 0:
         print(f"\nReminder: {missing} configured investor(s) missing their folder!")
 
-def save_newest_oldest_df(df, symbol, timeframe_str, base_output_dir):
+def save_newest_oldest_df(df, symbol, timeframe_str, base_output_dir, write_json=False):
     """
-    Save candles directly to base directory with filename: {symbol}_{timeframe}_candledetails.json
-    Format: oldest (index 0) → newest (index n-1)
+    Save candles to the columnar store in base directory: {symbol}_{timeframe}_candles/
+    (one .npy per column + header.json, see candlestore). Format: oldest (index 0) → newest (index n-1)
+    write_json=True additionally exports the legacy {symbol}_{timeframe}_candledetails.json.
     """
     error_log = []
     
-    # Create filename with symbol and timeframe
-    filename = f"{symbol}_{timeframe_str}_candledetails.json"
-    file_path = os.path.join(base_output_dir, filename)
-    
     lagos_tz = pytz.timezone('Africa/Lagos')
     now = datetime.now(lagos_tz)
 
@@ -550,38 +605,22 @@ def save_newest_oldest_df(df, symbol, timeframe_str, base_output_dir):
             save_errors(error_log)
             return error_log
 
-        # Prepare all candles (oldest first, newest last)
-        all_candles = []
-        for i, (ts, row) in enumerate(df.iterrows()):
-            candle = row.to_dict()
-            candle.update({
-                "time": ts.strftime('%Y-%m-%d %H:%M:%S'),
-                "candle_number": i,  # 0 = oldest
-                "symbol": symbol,
-                "timeframe": timeframe_str
-            })
-            all_candles.append(candle)
-
-        # Save all candles to single JSON file
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(all_candles, f, indent=4)
-
-        # Also save latest completed candle separately (for quick access)
-        
-        # Latest completed candle is the last one (index -1)
-        latest_candle = all_candles[-1].copy()
-        candle_time = lagos_tz.localize(datetime.strptime(latest_candle["time"], '%Y-%m-%d %H:%M:%S'))
-        delta = now - candle_time
-        total_hours = delta.total_seconds() / 3600
-        age_str = f"{int(total_hours)}h old" if total_hours <= 24 else f"{int(total_hours // 24)}d old"
-
-        latest_candle.update({"age": age_str, "id": "x"})
-        if "candle_number" in latest_candle:
-            del latest_candle["candle_number"]
+        # The last row is the live candle; the one before it is the last closed bar,
+        # which is where the next incremental fetch resumes from.
+        last_closed_time = int(df.index[-2:].values.astype("datetime64[s]").astype(np.int64)[0])
+        folder = candlestore.save_candles_df(
+            base_output_dir, symbol, timeframe_str, df,
+            extra_header={"last_closed_time": last_closed_time}
+        )
 
-        
+        if write_json:
+            # Legacy export for consumers that still read the JSON layout
+            filename = f"{symbol}_{timeframe_str}_candledetails.json"
+            store = candlestore.load_candles(base_output_dir, symbol, timeframe_str, mmap=False)
+            with open(os.path.join(base_output_dir, filename), 'w', encoding='utf-8') as f:
+                json.dump(candlestore.candles_to_records(store), f, indent=4)
 
-        print(f"✓ {symbol} {timeframe_str} | JSON saved to {filename} | {len(all_candles)} candles", "SUCCESS")
+        print(f"✓ {symbol} {timeframe_str} | Candles saved to {os.path.basename(folder)} | {len(df)} candles", "SUCCESS")
 
     except Exception as e:
         err = f"save_newest_oldest_df failed: {str(e)}"
@@ -591,8 +630,40 @@ def save_newest_oldest_df(df, symbol, timeframe_str, base_output_dir):
 
     return error_log
 
-def generate_and_save_chart_df(df, symbol, timeframe_str, base_output_dir):
-    """Generate and save chart with filename: {symbol}_{timeframe}_chart.png directly in base directory."""
+def compute_chart_geometry(fig, ax, num_candles, candle_width, dpi=CHART_DPI):
+    """
+    Map candle index / price to pixel coordinates of the PNG saved with
+    bbox_inches="tight". mplfinance draws candle i at data x = i, so two
+    reference points per axis fully describe the (linear) transform.
+    """
+    fig.canvas.draw()
+    renderer = fig.canvas.get_renderer()
+    pad_inches = plt.rcParams.get("savefig.pad_inches", 0.1)
+    tight = fig.get_tightbbox(renderer)
+
+    scale = dpi / fig.dpi
+    left_px = (tight.x0 - pad_inches) * dpi
+    top_px = (tight.y1 + pad_inches) * dpi
+
+    (x0, y0), (x1, y1) = ax.transData.transform([(0.0, 0.0), (1.0, 1.0)])
+
+    return {
+        "num_candles": num_candles,
+        "dpi": dpi,
+        "image_width_px": int(round((tight.width + 2 * pad_inches) * dpi)),
+        "image_height_px": int(round((tight.height + 2 * pad_inches) * dpi)),
+        "x_origin_px": x0 * scale - left_px,
+        "x_step_px": (x1 - x0) * scale,
+        "y_origin_px": top_px - y0 * scale,
+        "y_step_px": -(y1 - y0) * scale,
+        "candle_width_px": candle_width * (x1 - x0) * scale
+    }
+
+def generate_and_save_chart_df(df, symbol, timeframe_str, base_output_dir, extra_geometry=None):
+    """
+    Generate and save chart with filename: {symbol}_{timeframe}_chart.png directly in base directory.
+    extra_geometry is merged into the geometry sidecar (used for the dirty check in render_dirty_charts).
+    """
     error_log = []
     
     # Create filename with symbol and timeframe
@@ -682,6 +753,7 @@ def generate_and_save_chart_df(df, symbol, timeframe_str, base_output_dir):
             df_plot = df
 
         # Generate and save chart
+        width_config = {}
         fig, axlist = mpf.plot(
             df_plot, 
             type='candle', 
@@ -689,6 +761,7 @@ def generate_and_save_chart_df(df, symbol, timeframe_str, base_output_dir):
             volume=False,
             title=f"{symbol} ({timeframe_str}) - {num_candles} candles", 
             returnfig=True,
+            return_width_config=width_config,
             warn_too_much_data=5000,
             figsize=(img_width_inches, BASE_HEIGHT),
             scale_padding={'left': 0.5, 'right': 1.5, 'top': 0.5, 'bottom': 0.5}
@@ -702,9 +775,16 @@ def generate_and_save_chart_df(df, symbol, timeframe_str, base_output_dir):
                 if line.get_label() == '':
                     line.set_linewidth(0.5)
 
-        fig.savefig(chart_path, bbox_inches="tight", dpi=100)
+        # Geometry is measured before saving so techniques can place candles
+        # analytically instead of decoding the PNG and matching contours.
+        geometry = compute_chart_geometry(fig, axlist[0], num_candles, width_config.get("candle_width", 0.6))
+        geometry.update(extra_geometry or {})
+        fig.savefig(chart_path, bbox_inches="tight", dpi=CHART_DPI)
         plt.close(fig)
 
+        with open(chart_geometry_path(chart_path), 'w', encoding='utf-8') as f:
+            json.dump(geometry, f, indent=4)
+
         print(f"✓ {symbol} {timeframe_str} | Chart saved to {filename} | {num_candles} candles", "SUCCESS")
         return chart_path, error_log
 
@@ -717,6 +797,69 @@ def generate_and_save_chart_df(df, symbol, timeframe_str, base_output_dir):
         error_log.append(str(e))
         return None, error_log
 
+def chart_is_dirty(base_output_dir, symbol, timeframe_str):
+    """
+    A chart is dirty when its PNG is missing or was rendered from an older set of
+    closed candles than the one currently in the candle store.
+    """
+    header = candlestore.read_header(base_output_dir, symbol, timeframe_str)
+    if header is None:
+        return False
+
+    chart_path = os.path.join(base_output_dir, f"{symbol}_{timeframe_str}_chart.png")
+    geometry = load_chart_geometry(chart_path)
+    if not os.path.exists(chart_path) or geometry is None:
+        return True
+    return geometry.get("last_closed_time") != header.get("last_closed_time")
+
+def ensure_chart(base_output_dir, symbol, timeframe_str):
+    """
+    On-demand rendering: return the chart path for symbol/timeframe, rendering it
+    from the candle store first if it is dirty. Returns None if there are no candles.
+    """
+    chart_path = os.path.join(base_output_dir, f"{symbol}_{timeframe_str}_chart.png")
+    if not chart_is_dirty(base_output_dir, symbol, timeframe_str):
+        return chart_path if os.path.exists(chart_path) else None
+
+    store = candlestore.load_candles(base_output_dir, symbol, timeframe_str, mmap=False)
+    if store is None:
+        return None
+
+    df = pd.DataFrame(
+        {name: store[name] for name in candlestore.COLUMNS if name != "time"},
+        index=pd.to_datetime(store["time"], unit="s")
+    )
+    df.index.name = "time"
+    chart_path, _ = generate_and_save_chart_df(
+        df, symbol, timeframe_str, base_output_dir,
+        extra_geometry={"last_closed_time": store["header"].get("last_closed_time")}
+    )
+    return chart_path
+
+def render_dirty_charts(investor_id, symbol_list, chart_timeframes, base_output_dir):
+    """
+    Chart stage: render only the configured timeframes, and only for symbols whose
+    closed candles changed since the last render. Needs no MT5 connection.
+    """
+    if not chart_timeframes:
+        return 0
+
+    rendered = 0
+    skipped = 0
+    for symbol in symbol_list:
+        for tf_str in chart_timeframes:
+            try:
+                if not chart_is_dirty(base_output_dir, symbol, tf_str):
+                    skipped += 1
+                    continue
+                if ensure_chart(base_output_dir, symbol, tf_str):
+                    rendered += 1
+            except Exception as e:
+                print(f"  ❌ Investor {investor_id} | Chart error on {symbol} {tf_str}: {str(e)[:100]}", "ERROR")
+
+    print(f"  🖼️  Investor {investor_id} | Charts rendered: {rendered} | unchanged: {skipped}", "INFO")
+    return rendered
+
 def fetch_charts_all_brokers_old():
     """Fetch charts for all investors using their individual symbol lists from accountmanagement.json."""
     backup_investor_users()
@@ -827,11 +970,13 @@ def fetch_charts_all_brokers_old():
         traceback.print_exc()
         return False
 
-def process_account_worker(investor_id, symbol_list, TIMEFRAME_MAP, result_dict=None):
+def process_account_worker(investor_id, symbol_list, TIMEFRAME_MAP, result_dict=None, incremental=True, render_charts=True):
     """
     Process symbols for a single investor.
-    This function handles its own MT5 connection and shutdown.
+    This function ensures its own MT5 session and leaves it open for the next cycle.
     No multiprocessing logic inside - just pure processing.
+    With incremental=True only bars newer than the stored series are pulled from the terminal.
+    With render_charts=True the chart stage renders dirty charts for "chart_timeframes" afterwards.
     """
     processed_count = 0
     
@@ -902,16 +1047,17 @@ def process_account_worker(investor_id, symbol_list, TIMEFRAME_MAP, result_dict=
 
                 # Process only the timeframes specified in accountmanagement.json
                 for tf_str, mt5_tf in investor_timeframe_map.items():
-                    df, _ = fetch_ohlcv_data(symbol, mt5_tf, bars)
+                    if incremental:
+                        df, new_bars, _ = fetch_ohlcv_incremental(symbol, mt5_tf, bars, base_output_dir, tf_str)
+                    else:
+                        df, _ = fetch_ohlcv_data(symbol, mt5_tf, bars)
                     if df is not None and not df.empty:
                         df["symbol"] = symbol
                         
                         # Save candle details directly to base directory
+                        # (charts are rendered afterwards by render_dirty_charts)
                         save_newest_oldest_df(df, symbol, tf_str, base_output_dir)
                         
-                        # Generate and save chart directly to base directory
-                        chart_path, _ = generate_and_save_chart_df(df, symbol, tf_str, base_output_dir)
-                        
                 processed_count += 1
                 print(f"  ✅ Investor {investor_id} | Completed | {symbol}", "SUCCESS")
                 
@@ -919,8 +1065,14 @@ def process_account_worker(investor_id, symbol_list, TIMEFRAME_MAP, result_dict=
                 print(f"  ❌ Investor {investor_id} | Error on {symbol}: {str(e)[:100]}", "ERROR")
                 continue
     
-    finally:
-        mt5.shutdown()
+    except Exception as e:
+        # Drop a possibly broken session; the next cycle reconnects
+        print(f"  ❌ Investor {investor_id} | Aborted: {str(e)[:100]}", "ERROR")
+        close_session()
+    
+    # Chart stage needs no terminal access
+    if render_charts:
+        render_dirty_charts(investor_id, symbol_list, load_chart_timeframes(investor_id), base_output_dir)
     
     print(f"  🏁 Investor {investor_id} | Finished | {processed_count}/{total_in_chunk} symbols processed\n", "SUCCESS")
     
@@ -958,8 +1110,8 @@ def fetch_charts_for_investor(investor_id):
             investor_cfg["SERVER"]
         )
         if ok:
+            # Session stays open: process_account_worker below reuses it
             mt5_available, _ = get_symbols()
-            mt5.shutdown()
             print(f"  ✅ Found {len(mt5_available)} symbols available on MT5 server", "SUCCESS")
             
             # Validate symbols against MT5 availability
@@ -0,0 +1,250 @@
+import os
+import json
+import time
+import types
+import builtins
+import traceback
+import functools
+from datetime import datetime
+import MetaTrader5 as mt5
+
+
+# Count bytes of files opened through open() while a stage runs
+TRACK_FILE_IO = True
+
+# Process-wide counters, diffed around every stage
+_MT5_CALLS = {}   # function name -> [calls, seconds]
+_SLOWEST = {}     # function name -> slowest call of the running stage
+_FILE_IO = {"files_read": 0, "read_bytes": 0, "files_written": 0, "write_chars": 0}
+_PROBES_INSTALLED = False
+_real_open = builtins.open
+
+
+def _timed(name, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            entry = _MT5_CALLS.get(name)
+            if entry is None:
+                entry = _MT5_CALLS[name] = [0, 0.0]
+            entry[0] += 1
+            entry[1] += elapsed
+            if elapsed > _SLOWEST.get(name, 0.0):
+                _SLOWEST[name] = elapsed
+    wrapper._metrics_probe = True
+    return wrapper
+
+
+class _CountingWriter:
+    """Write-mode file object that counts what goes through write()/writelines() (characters in text mode)."""
+
+    def __init__(self, f):
+        self._f = f
+
+    def write(self, data):
+        _FILE_IO["write_chars"] += len(data)
+        return self._f.write(data)
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+    def __iter__(self):
+        return iter(self._f)
+
+    def __enter__(self):
+        self._f.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._f.__exit__(exc_type, exc, tb)
+
+
+def _counting_open(file, mode='r', *args, **kwargs):
+    f = _real_open(file, mode, *args, **kwargs)
+    if isinstance(file, int):
+        return f
+    try:
+        if any(flag in mode for flag in "wax+"):
+            _FILE_IO["files_written"] += 1
+            return _CountingWriter(f)
+        _FILE_IO["files_read"] += 1
+        _FILE_IO["read_bytes"] += os.fstat(f.fileno()).st_size
+    except Exception:
+        pass
+    return f
+
+
+def install_probes():
+    """
+    Time every MetaTrader5 function call (and, with TRACK_FILE_IO, count
+    file I/O) in this process. Every module calls mt5.<name>(...) through the
+    module, so wrapping the module attributes covers all call sites. Idempotent.
+    """
+    global _PROBES_INSTALLED
+    if _PROBES_INSTALLED:
+        return
+    for name in dir(mt5):
+        if name.startswith("_"):
+            continue
+        func = getattr(mt5, name)
+        if isinstance(func, (types.FunctionType, types.BuiltinFunctionType)) and not getattr(func, "_metrics_probe", False):
+            setattr(mt5, name, _timed(name, func))
+    if TRACK_FILE_IO:
+        builtins.open = _counting_open
+    _PROBES_INSTALLED = True
+
+
+def _snapshot():
+    return {name: tuple(entry) for name, entry in _MT5_CALLS.items()}, dict(_FILE_IO)
+
+
+class StageRecorder:
+    """
+    Per-investor timing of the pipeline stages of one cycle.
+
+    run() calls a stage and records its wall time, the MT5 calls it made
+    (count / total / slowest per function), the files it read and wrote and
+    the exception it raised, if any - the exception is re-raised so the
+    pipeline behaves as before. records() returns plain dicts the worker
+    hands back to the orchestrator, which is the only writer of the
+    metrics file.
+    """
+
+    def __init__(self, inv_id, cycle_id=None):
+        install_probes()
+        self.inv_id = inv_id
+        self.cycle_id = cycle_id
+        self.started = time.perf_counter()
+        self._records = []
+        self.error = None
+
+    def run(self, func, *args, stage=None, **kwargs):
+        name = stage or func.__name__
+        calls_before, io_before = _snapshot()
+        _SLOWEST.clear()
+        started = time.perf_counter()
+        record = {
+            "type": "stage",
+            "cycle_id": self.cycle_id,
+            "inv_id": self.inv_id,
+            "stage": name,
+            "order": len(self._records),
+            "started_at": datetime.now().isoformat(timespec="milliseconds"),
+        }
+        try:
+            result = func(*args, **kwargs)
+            record["ok"] = True
+            return result
+        except Exception as e:
+            record["ok"] = False
+            record["error"] = {"type": type(e).__name__, "message": str(e), "traceback": traceback.format_exc()}
+            raise
+        finally:
+            record["seconds"] = round(time.perf_counter() - started, 4)
+            calls_after, io_after = _snapshot()
+            mt5_calls = {}
+            for fname, (count, seconds) in calls_after.items():
+                before = calls_before.get(fname, (0, 0.0))
+                if count > before[0]:
+                    mt5_calls[fname] = {
+                        "calls": count - before[0],
+                        "seconds": round(seconds - before[1], 4),
+                        "slowest": round(_SLOWEST.get(fname, 0.0), 4),
+                    }
+            record["mt5"] = mt5_calls
+            record["mt5_calls"] = sum(c["calls"] for c in mt5_calls.values())
+            record["mt5_seconds"] = round(sum(c["seconds"] for c in mt5_calls.values()), 4)
+            record["io"] = {key: io_after[key] - io_before[key] for key in io_after}
+            self._records.append(record)
+
+    def fail(self, exc):
+        """Record an exception raised outside of run() (or the one that ended the pipeline)."""
+        self.error = {"type": type(exc).__name__, "message": str(exc), "traceback": traceback.format_exc()}
+
+    def records(self):
+        """Stage records plus one investor total record."""
+        total = {
+            "type": "investor",
+            "cycle_id": self.cycle_id,
+            "inv_id": self.inv_id,
+            "seconds": round(time.perf_counter() - self.started, 4),
+            "stages": len(self._records),
+            "ok": self.error is None and all(r["ok"] for r in self._records),
+            "error": self.error,
+            "mt5_calls": sum(r["mt5_calls"] for r in self._records),
+            "mt5_seconds": round(sum(r["mt5_seconds"] for r in self._records), 4),
+        }
+        return self._records + [total]
+
+
+def summarize_cycle(records, cycle_id=None):
+    """Aggregate the records of all investors of one cycle per stage and per MT5 function."""
+    stages = {}
+    mt5_calls = {}
+    investors = [r for r in records if r.get("type") == "investor"]
+    for record in records:
+        if record.get("type") != "stage":
+            continue
+        s = stages.setdefault(record["stage"], {"runs": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0,
+                                                 "mt5_calls": 0, "read_bytes": 0, "write_chars": 0})
+        s["runs"] += 1
+        s["errors"] += 0 if record["ok"] else 1
+        s["seconds"] += record["seconds"]
+        s["max_seconds"] = max(s["max_seconds"], record["seconds"])
+        s["mt5_calls"] += record["mt5_calls"]
+        s["read_bytes"] += record["io"].get("read_bytes", 0)
+        s["write_chars"] += record["io"].get("write_chars", 0)
+        for fname, c in record["mt5"].items():
+            m = mt5_calls.setdefault(fname, {"calls": 0, "seconds": 0.0, "slowest": 0.0})
+            m["calls"] += c["calls"]
+            m["seconds"] += c["seconds"]
+            m["slowest"] = max(m["slowest"], c["slowest"])
+
+    for s in stages.values():
+        s["mean_seconds"] = round(s["seconds"] / s["runs"], 4)
+        s["seconds"] = round(s["seconds"], 4)
+    for m in mt5_calls.values():
+        m["seconds"] = round(m["seconds"], 4)
+
+    return {
+        "type": "cycle",
+        "cycle_id": cycle_id,
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        "investors": len(investors),
+        "investors_failed": sum(1 for r in investors if not r["ok"]),
+        "slowest_investor": max(investors, key=lambda r: r["seconds"])["inv_id"] if investors else None,
+        "stages": dict(sorted(stages.items(), key=lambda kv: -kv[1]["seconds"])),
+        "mt5": dict(sorted(mt5_calls.items(), key=lambda kv: -kv[1]["seconds"])),
+    }
+
+
+def write_metrics(path, records, summary=None):
+    """Append the records (and the cycle summary) to the JSONL metrics file."""
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with _real_open(path, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, default=str) + "\n")
+            if summary is not None:
+                f.write(json.dumps(summary, default=str) + "\n")
+    except Exception as e:
+        print(f" ⚠️  Could not write metrics to {path}: {e}")
+
+
+def print_cycle_summary(summary, top=8):
+    print(f"\n{'='*10} ⏱️  CYCLE TIMINGS {'='*10}")
+    print(f"   Investors: {summary['investors']} | failed: {summary['investors_failed']} | slowest: {summary['slowest_investor']}")
+    for name, s in list(summary["stages"].items())[:top]:
+        errors = f" | {s['errors']} error(s)" if s["errors"] else ""
+        print(f"   {name:<45} {s['seconds']:>9.2f}s total | mean {s['mean_seconds']:.2f}s | max {s['max_seconds']:.2f}s "
+              f"| {s['mt5_calls']} MT5 calls{errors}")
+    for name, m in list(summary["mt5"].items())[:top]:
+        print(f"   mt5.{name:<41} {m['seconds']:>9.2f}s over {m['calls']} calls | slowest {m['slowest']*1000:.0f}ms")
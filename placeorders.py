@@ -1,5 +1,16 @@
 import os
 import MetaTrader5 as mt5
+from symbolresolver import get_resolver, reset_resolver
+from symbolcache import PersistentResolutionCache
+from mt5session import ensure_investor_session, close_session, get_supervisor, default_concurrency, TerminalAdmission
+from investorcontext import InvestorContext, read_json
+from dealledger import get_deal_ledger, open_deal_ledger
+from documentcache import (load_document, save_document, document_exists, flush_documents,
+                           begin_document_cycle, end_document_cycle)
+from statestore import get_investor_state, flush_trade_mirrors
+from riskengine import RiskEngine
+from swingengine import candle_arrays
+from crossingengine import first_crossings, trapped_indices, first_liquidations, first_ranging
 import pandas as pd
 import mplfinance as mpf
 from datetime import datetime
@@ -21,7 +32,15 @@ import time
 
 INVESTOR_USERS = r"C:\xampp\htdocs\synapse\synarex\usersdata\investors\demoinvestors.json"
 INV_PATH = r"C:\xampp\htdocs\synapse\synarex\usersdata\investors"
+# Shared SQLite (WAL) database: trade history, daily stats and audit records of all investors
+STATE_DB_PATH = r"C:\xampp\htdocs\synapse\synarex\usersdata\investors_state.db"
 NORMALIZE_SYMBOLS_PATH = r"C:\xampp\htdocs\synapse\synarex\symbols_normalization.json"
+SYMBOL_CACHE_DIR = r"C:\xampp\htdocs\synapse\synarex\usersdata\symbolcache"
+MAX_PARALLEL_INVESTORS = None          # None = min(cpu cores, terminals)
+INVESTOR_DEADLINE_SECONDS = 900        # worker is killed and the investor requeued after this
+INVESTOR_MAX_ATTEMPTS = 3
+INVESTOR_RETRY_BACKOFF_SECONDS = 10    # doubled on every further attempt
+TERMINAL_ADMISSION_TIMEOUT = 600       # max wait for another process to release a shared terminal
 DEFAULT_ACCOUNTMANAGEMENT = r"C:\xampp\htdocs\synapse\synarex\default_accountmanagement.json"
 VERIFIED_INVESTORS = r"C:\xampp\htdocs\synapse\synarex\verified_investors.json"
 UPDATED_INVESTORS = r"C:\xampp\htdocs\synapse\synarex\updated_investors.json"
@@ -501,13 +520,12 @@ def update_verified_investors_file():
                 # Check if tradeshistory.json has data
                 tradeshistory_path = inv_folder / "tradeshistory.json"
                 if tradeshistory_path.exists():
-                    with open(tradeshistory_path, 'r', encoding='utf-8') as f:
-                        tradeshistory = json.load(f)
+                    trade_count = get_investor_state(STATE_DB_PATH, inv_id, inv_folder).trade_count()
                     
-                    if tradeshistory:
-                        print(f"  ✅ Found {len(tradeshistory)} authorized trades in tradeshistory.json")
+                    if trade_count:
+                        print(f"  ✅ Found {trade_count} authorized trades in trade history")
                     else:
-                        print(f"  ℹ️  tradeshistory.json is empty")
+                        print(f"  ℹ️  Trade history is empty")
                 
                 # Remove MESSAGE field if it exists
                 if 'MESSAGE' in investor_data:
@@ -566,60 +584,10 @@ def get_normalized_symbol(record_symbol, risk_keys=None):
     Standardizes symbols with a 'Broker-First' priority.
     If 'US OIL' is passed, it finds the USOIL family, then checks if the broker
     uses USOUSD, USOIL, or WTI.
+    Lookups go through the session-wide SymbolResolver (built once per MT5 session).
     """
     if not record_symbol: return None
-
-    NORM_PATH = Path(r"C:\xampp\htdocs\synapse\synarex\symbols_normalization.json")
-    
-    def clean(s): 
-        return str(s).replace(" ", "").replace("_", "").replace("/", "").replace(".", "").upper()
-
-    search_term = clean(record_symbol)
-    
-    # 1. Load Normalization Map
-    norm_data = {}
-    if NORM_PATH.exists():
-        try:
-            with open(NORM_PATH, 'r', encoding='utf-8') as f:
-                norm_data = json.load(f).get("NORMALIZATION", {})
-        except: pass
-
-    # 2. Find the "Family"
-    target_family_key = None
-    all_family_variants = []
-    
-    for std_key, synonyms in norm_data.items():
-        family_variants = [clean(std_key)] + [clean(s) for s in synonyms]
-        if any(search_term == v or search_term.startswith(v) or v.startswith(search_term) for v in family_variants):
-            target_family_key = std_key
-            all_family_variants = family_variants
-            break
-
-    # 3. IF RISK_KEYS ARE PROVIDED (For Risk Enforcement)
-    if risk_keys:
-        clean_risk_map = {clean(k): k for k in risk_keys}
-        if target_family_key and clean(target_family_key) in clean_risk_map:
-            return clean_risk_map[clean(target_family_key)]
-        for v in all_family_variants:
-            if v in clean_risk_map: return clean_risk_map[v]
-
-    # 4. IF NO RISK_KEYS (For Populating Order Fields / MT5 Specs)
-    # Check what the broker actually has in MarketWatch
-    all_symbols = mt5.symbols_get()
-    if all_symbols:
-        broker_symbols = {clean(s.name): s.name for s in all_symbols}
-        
-        # Try to find which variant the broker uses
-        for v in all_family_variants:
-            if v in broker_symbols:
-                return broker_symbols[v]
-            # Handle suffixes (e.g., USOIL.m)
-            for b_clean, b_raw in broker_symbols.items():
-                if b_clean.startswith(v):
-                    return b_raw
-
-    # Fallback
-    return target_family_key if target_family_key else record_symbol.upper()
+    return get_resolver(NORMALIZE_SYMBOLS_PATH).resolve(record_symbol, risk_keys)
 
 def debug_print_all_broker_symbols():
     """
@@ -650,7 +618,7 @@ def debug_print_all_broker_symbols():
             
         print(f"{'='*40}\nEND OF LIST\n{'='*40}")
 
-def symbols_grid_prices(inv_id=None):
+def symbols_grid_prices(inv_id=None, ctx=None):
     """
     Collect current prices for all symbols in symbols_dictionary from accountmanagement.json
     for  accounts. ASSUMES MT5 IS ALREADY INITIALIZED AND LOGGED IN.
@@ -1499,8 +1467,7 @@ def symbols_grid_prices(inv_id=None):
             **all_symbols_price_data  # Unpack the symbols directly at top level
         }
         
-        with open(symbols_file, 'w', encoding='utf-8') as f:
-            json.dump(final_data, f, indent=4, default=str)
+        save_document(symbols_file, final_data)
         
         print(f"    📁 Saved all symbol prices to: {symbols_file}")
         print(f"    📊 Total symbols in file: {len(all_symbols_price_data)}")
@@ -1663,8 +1630,7 @@ def symbols_grid_prices(inv_id=None):
         
         # Save signals.json
         signals_file = prices_dir / "signals.json"
-        with open(signals_file, 'w', encoding='utf-8') as f:
-            json.dump(signals_data, f, indent=4)
+        save_document(signals_file, signals_data)
         
         print(f"      📊 SIGNALS WITH COUNTERS SUMMARY:")
         print(f"        • Symbols with signals: {symbols_with_signals}")
@@ -1710,8 +1676,7 @@ def symbols_grid_prices(inv_id=None):
             return stats
         
         try:
-            with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = read_json(acc_mgmt_path, ctx)
             
             # Extract symbols dictionary
             symbols_dict = config.get("symbols_dictionary", {})
@@ -1767,8 +1732,8 @@ def symbols_grid_prices(inv_id=None):
             # NEW: Store all symbols price data for single file output
             all_symbols_price_data = {}
             
-            # Symbol resolution cache - exactly like populate_orders_missing_fields
-            resolution_cache = {}
+            # Symbol resolution cache - persisted per broker server, reused across runs
+            resolution_cache = PersistentResolutionCache.for_session(SYMBOL_CACHE_DIR, NORMALIZE_SYMBOLS_PATH)
             
             # Process each category in symbols_dictionary
             for category, symbols in symbols_dict.items():
@@ -1914,6 +1879,7 @@ def symbols_grid_prices(inv_id=None):
                     
                     # Add to all category data for signals
                     all_category_price_data.update(category_price_data)
+            resolution_cache.save()
             
             # Save master price file for this investor (single file with all symbols)
             if successful_symbols > 0:
@@ -1951,7 +1917,7 @@ def symbols_grid_prices(inv_id=None):
             
     return stats
 
-def filter_unauthorized_symbols(inv_id=None):
+def filter_unauthorized_symbols(inv_id=None, ctx=None):
     """
     Verifies and filters risk entries based on allowed symbols defined in accountmanagement.json.
     Targets signals.json records and removes unauthorized symbol orders.
@@ -2009,18 +1975,16 @@ def filter_unauthorized_symbols(inv_id=None):
             print(f"  └─ ⚠️  Account config missing. Skipping.")
             continue
             
-        if not signals_path.exists():
+        if not document_exists(signals_path):
             print(f"  └─ ⚠️  signals.json not found. Skipping.")
             continue
 
         try:
             # Load account management configuration
-            with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = read_json(acc_mgmt_path, ctx)
             
             # Load signals.json
-            with open(signals_path, 'r', encoding='utf-8') as f:
-                signals_data = json.load(f)
+            signals_data = load_document(signals_path)
             
             # Extract and sanitize the list of allowed symbols
             sym_dict = config.get("symbols_dictionary", {})
@@ -2138,8 +2102,7 @@ def filter_unauthorized_symbols(inv_id=None):
                 }
                 
                 # Save modified signals.json
-                with open(signals_path, 'w', encoding='utf-8') as f:
-                    json.dump(signals_data, f, indent=4)
+                save_document(signals_path, signals_data)
                 
                 total_investors_modified += 1
                 total_symbols_removed += investor_symbols_removed
@@ -2181,7 +2144,7 @@ def filter_unauthorized_symbols(inv_id=None):
     
     return filter_stats
 
-def fetch_15m_candles(inv_id=None):
+def fetch_15m_candles(inv_id=None, ctx=None):
     """
     Fetch 15-minute candles (100 candles) for all symbols in symbols_dictionary.
     Uses same symbol normalization pattern as symbols_grid_prices.
@@ -2395,8 +2358,7 @@ def fetch_15m_candles(inv_id=None):
         }
         
         # Save back to file
-        with open(symbols_prices_path, 'w', encoding='utf-8') as f:
-            json.dump(symbols_prices_data, f, indent=4, default=str)
+        save_document(symbols_prices_path, symbols_prices_data)
         
         print(f"    📁 Saved candle data to symbols_prices.json as {candles_added} [symbol]_tf_candles entries")
     
@@ -2416,10 +2378,9 @@ def fetch_15m_candles(inv_id=None):
         symbols_prices_path = prices_dir / "symbols_prices.json"
         
         # Check if symbols_prices.json exists, if not create basic structure
-        if symbols_prices_path.exists():
+        if document_exists(symbols_prices_path):
             print(f" [{inv_id}] 📂 Loading existing symbols_prices.json...")
-            with open(symbols_prices_path, 'r', encoding='utf-8') as f:
-                symbols_prices_data = json.load(f)
+            symbols_prices_data = load_document(symbols_prices_path)
         else:
             print(f" [{inv_id}] ⚠️ symbols_prices.json not found, creating new file...")
             symbols_prices_data = {
@@ -2435,8 +2396,7 @@ def fetch_15m_candles(inv_id=None):
             return stats
         
         try:
-            with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = read_json(acc_mgmt_path, ctx)
             
             # Extract symbols dictionary
             symbols_dict = config.get("symbols_dictionary", {})
@@ -2453,8 +2413,8 @@ def fetch_15m_candles(inv_id=None):
             total_candles_fetched = 0
             current_candle_forming = False
             
-            # Symbol resolution cache - exactly like populate_orders_missing_fields
-            resolution_cache = {}
+            # Symbol resolution cache - persisted per broker server, reused across runs
+            resolution_cache = PersistentResolutionCache.for_session(SYMBOL_CACHE_DIR, NORMALIZE_SYMBOLS_PATH)
             
             # Dictionary to store all symbols' candle data
             all_symbols_candle_data = {}
@@ -2512,6 +2472,7 @@ def fetch_15m_candles(inv_id=None):
                         oldest = symbol_candles_data['candles'][-1]
                         print(f"          • Oldest #{oldest['candle_number']}: {oldest['time_str']} (O:{oldest['open']:.{symbol_candles_data['digits']}f}, "
                               f"C:{oldest['close']:.{symbol_candles_data['digits']}f})")
+            resolution_cache.save()
             
             # Save all candle data to symbols_prices.json
             if all_symbols_candle_data:
@@ -2542,7 +2503,7 @@ def fetch_15m_candles(inv_id=None):
     
     return stats
 
-def identify_first_crosser_candle(inv_id=None):
+def identify_first_crosser_candle(inv_id=None, ctx=None):
     """
     Identify which selected order (bid or ask) gets crossed first by a 15-minute candle.
     The race is between:
@@ -2638,13 +2599,12 @@ def identify_first_crosser_candle(inv_id=None):
         Returns:
             int: Number of orders marked (0 or 1)
         """
-        if not signals_path.exists():
+        if not document_exists(signals_path):
             print(f"            ⚠️  signals.json not found at {signals_path}")
             return 0
         
         try:
-            with open(signals_path, 'r', encoding='utf-8') as f:
-                signals_data = json.load(f)
+            signals_data = load_document(signals_path)
             
             orders_marked = 0
             
@@ -2688,8 +2648,7 @@ def identify_first_crosser_candle(inv_id=None):
             
             # Save the updated signals.json if any marks were made
             if orders_marked > 0:
-                with open(signals_path, 'w', encoding='utf-8') as f:
-                    json.dump(signals_data, f, indent=4)
+                save_document(signals_path, signals_data)
                 print(f"            ✅ Updated signals.json with {orders_marked} order marked with crosser flag")
             
             return orders_marked
@@ -2698,7 +2657,7 @@ def identify_first_crosser_candle(inv_id=None):
             print(f"             Error marking order in signals.json: {e}")
             return 0
     
-    def find_first_crosser_candle_for_order(order_data, completed_candles_list, order_side):
+    def find_first_crosser_candle_for_order(order_data, completed_candles_list, order_side, crossing_index):
         """
         Find the first candle that crosses a specific order.
         Searches ONLY completed candles (current forming candle excluded).
@@ -2707,31 +2666,30 @@ def identify_first_crosser_candle(inv_id=None):
             order_data: Order dictionary with entry and order_type
             completed_candles_list: List of COMPLETED candles sorted by time (newest first)
             order_side: 'bid' or 'ask' for logging
+            crossing_index: Index of the first crossing candle from crossingengine.first_crossings (-1 = none)
             
         Returns:
             tuple: (crossed_candle, candle_index) or (None, -1) if no cross
         """
+        if crossing_index < 0:
+            return None, -1
+        
         order_entry = order_data['entry']
         order_type = order_data['order_type']
+        candle = completed_candles_list[crossing_index]
         
-        # Search through COMPLETED candles only (already sorted newest to oldest)
-        for idx, candle in enumerate(completed_candles_list):
-            if check_candle_crosses_order(candle, order_entry, order_type):
-                # Found a crossing candle
-                cross_direction = "DOWN" if order_type in ['buy_stop', 'sell_limit'] else "UP"
-                # Get candle color
-                color_desc, color_type = get_candle_color(candle)
-                
-                print(f"          🎯 Candle #{candle['candle_number']} at {candle['time_str']} crosses {order_side} order {cross_direction}:")
-                print(f"            • Entry: {order_entry:.{candle.get('digits', 2)}f}")
-                print(f"            • Order Type: {order_type}")
-                print(f"            • Candle: O:{candle['open']:.{candle.get('digits', 2)}f}, "
-                      f"H:{candle['high']:.{candle.get('digits', 2)}f}, "
-                      f"L:{candle['low']:.{candle.get('digits', 2)}f}")
-                print(f"            • Candle Color: {color_desc}")
-                return candle, idx
-        
-        return None, -1
+        cross_direction = "DOWN" if order_type in ['buy_stop', 'sell_limit'] else "UP"
+        # Get candle color
+        color_desc, color_type = get_candle_color(candle)
+        
+        print(f"          🎯 Candle #{candle['candle_number']} at {candle['time_str']} crosses {order_side} order {cross_direction}:")
+        print(f"            • Entry: {order_entry:.{candle.get('digits', 2)}f}")
+        print(f"            • Order Type: {order_type}")
+        print(f"            • Candle: O:{candle['open']:.{candle.get('digits', 2)}f}, "
+              f"H:{candle['high']:.{candle.get('digits', 2)}f}, "
+              f"L:{candle['low']:.{candle.get('digits', 2)}f}")
+        print(f"            • Candle Color: {color_desc}")
+        return candle, crossing_index
     
     def analyze_symbol_crosser(symbol_data, symbol_candles_data, symbol, signals_path):
         """
@@ -2799,8 +2757,17 @@ def identify_first_crosser_candle(inv_id=None):
         # Track all potential crossers with their candle index
         crosser_candidates = []
         
+        # First crossing candle of all four race participants in one pass over the candles
+        race_orders = [selected_bid, selected_bid['order_counter'], selected_ask, selected_ask['order_counter']]
+        opens, highs, lows = candle_arrays(completed_candles_sorted, 'open', 'high', 'low')
+        bid_first, bid_counter_first, ask_first, ask_counter_first = first_crossings(
+            opens, highs, lows,
+            [order['entry'] for order in race_orders],
+            [order['order_type'] for order in race_orders]
+        )
+        
         # Check selected bid order
-        bid_candle, bid_idx = find_first_crosser_candle_for_order(selected_bid, completed_candles_sorted, "selected bid")
+        bid_candle, bid_idx = find_first_crosser_candle_for_order(selected_bid, completed_candles_sorted, "selected bid", bid_first)
         if bid_candle:
             cross_direction = "DOWN" if selected_bid['order_type'] in ['buy_stop', 'sell_limit'] else "UP"
             crosser_candidates.append({
@@ -2813,7 +2780,7 @@ def identify_first_crosser_candle(inv_id=None):
         
         # Check selected bid counter order
         bid_counter_candle, bid_counter_idx = find_first_crosser_candle_for_order(
-            selected_bid['order_counter'], completed_candles_sorted, "selected bid counter"
+            selected_bid['order_counter'], completed_candles_sorted, "selected bid counter", bid_counter_first
         )
         if bid_counter_candle:
             cross_direction = "DOWN" if selected_bid['order_counter']['order_type'] in ['buy_stop', 'sell_limit'] else "UP"
@@ -2826,7 +2793,7 @@ def identify_first_crosser_candle(inv_id=None):
             })
         
         # Check selected ask order
-        ask_candle, ask_idx = find_first_crosser_candle_for_order(selected_ask, completed_candles_sorted, "selected ask")
+        ask_candle, ask_idx = find_first_crosser_candle_for_order(selected_ask, completed_candles_sorted, "selected ask", ask_first)
         if ask_candle:
             cross_direction = "DOWN" if selected_ask['order_type'] in ['buy_stop', 'sell_limit'] else "UP"
             crosser_candidates.append({
@@ -2839,7 +2806,7 @@ def identify_first_crosser_candle(inv_id=None):
         
         # Check selected ask counter order
         ask_counter_candle, ask_counter_idx = find_first_crosser_candle_for_order(
-            selected_ask['order_counter'], completed_candles_sorted, "selected ask counter"
+            selected_ask['order_counter'], completed_candles_sorted, "selected ask counter", ask_counter_first
         )
         if ask_counter_candle:
             cross_direction = "DOWN" if selected_ask['order_counter']['order_type'] in ['buy_stop', 'sell_limit'] else "UP"
@@ -3011,15 +2978,14 @@ def identify_first_crosser_candle(inv_id=None):
         symbols_prices_path = prices_dir / "symbols_prices.json"
         signals_path = prices_dir / "signals.json"
         
-        if not symbols_prices_path.exists():
+        if not document_exists(symbols_prices_path):
             print(f" [{inv_id}]  symbols_prices.json not found at {symbols_prices_path}")
             return stats
         
         try:
             # Load the single file
             print(f" [{inv_id}] 📂 Loading symbols_prices.json...")
-            with open(symbols_prices_path, 'r', encoding='utf-8') as f:
-                symbols_prices_data = json.load(f)
+            symbols_prices_data = load_document(symbols_prices_path)
             
             # Extract symbols data (excluding metadata and other special keys)
             metadata_keys = ['account_type', 'account_login', 'account_server', 'account_balance', 
@@ -3111,8 +3077,7 @@ def identify_first_crosser_candle(inv_id=None):
                 }
                 
                 # Save back to file
-                with open(symbols_prices_path, 'w', encoding='utf-8') as f:
-                    json.dump(symbols_prices_data, f, indent=4, default=str)
+                save_document(symbols_prices_path, symbols_prices_data)
                 
                 print(f"\n  ✅ Updated symbols_prices.json with {reports_added} crossedcandle_report entries as top-level keys")
                 print(f"  ✅ Updated signals.json with {stats['orders_marked_in_signals']} orders marked with first_most_recent_crossed_candle_orders: true")
@@ -3138,7 +3103,7 @@ def identify_first_crosser_candle(inv_id=None):
     
     return stats
 
-def identify_trapped_candles(inv_id=None):
+def identify_trapped_candles(inv_id=None, ctx=None):
     """
     Identify candles that are trapped between an order and its counter order.
     
@@ -3264,13 +3229,12 @@ def identify_trapped_candles(inv_id=None):
         Returns:
             tuple: (main_orders_marked, counter_orders_marked)
         """
-        if not signals_path.exists():
+        if not document_exists(signals_path):
             print(f"            ⚠️  signals.json not found at {signals_path}")
             return 0, 0
         
         try:
-            with open(signals_path, 'r', encoding='utf-8') as f:
-                signals_data = json.load(f)
+            signals_data = load_document(signals_path)
             
             main_orders_marked = 0
             counter_orders_marked = 0
@@ -3357,8 +3321,7 @@ def identify_trapped_candles(inv_id=None):
             
             # Save the updated signals.json if any marks were made
             if main_orders_marked > 0 or counter_orders_marked > 0:
-                with open(signals_path, 'w', encoding='utf-8') as f:
-                    json.dump(signals_data, f, indent=4)
+                save_document(signals_path, signals_data)
                 print(f"            ✅ Updated signals.json with {main_orders_marked} main orders and {counter_orders_marked} counter orders marked")
             
             return main_orders_marked, counter_orders_marked
@@ -3450,8 +3413,10 @@ def identify_trapped_candles(inv_id=None):
             print(f"          ⚠️  Invalid pair: {upper_type} (upper) and {lower_type} (lower)")
             return trapped_candles
         
-        # Search through COMPLETED candles only
-        for idx, candle in enumerate(completed_candles_list):
+        # Search through COMPLETED candles only; only the trapped ones are visited
+        highs, lows = candle_arrays(completed_candles_list, 'high', 'low')
+        for idx in trapped_indices(highs, lows, lower_price, upper_price):
+            candle = completed_candles_list[idx]
             is_trapped, details = check_candle_trapped(candle, lower_price, upper_price, pair_name)
             
             if is_trapped:
@@ -3759,15 +3724,14 @@ def identify_trapped_candles(inv_id=None):
         symbols_prices_path = prices_dir / "symbols_prices.json"
         signals_path = prices_dir / "signals.json"
         
-        if not symbols_prices_path.exists():
+        if not document_exists(symbols_prices_path):
             print(f" [{inv_id}]  symbols_prices.json not found at {symbols_prices_path}")
             return stats
         
         try:
             # Load the single file
             print(f" [{inv_id}] 📂 Loading symbols_prices.json...")
-            with open(symbols_prices_path, 'r', encoding='utf-8') as f:
-                symbols_prices_data = json.load(f)
+            symbols_prices_data = load_document(symbols_prices_path)
             
             # Extract symbols data (excluding metadata and other special keys)
             metadata_keys = ['account_type', 'account_login', 'account_server', 'account_balance', 
@@ -3879,8 +3843,7 @@ def identify_trapped_candles(inv_id=None):
                 }
                 
                 # Save back to file
-                with open(symbols_prices_path, 'w', encoding='utf-8') as f:
-                    json.dump(symbols_prices_data, f, indent=4, default=str)
+                save_document(symbols_prices_path, symbols_prices_data)
                 
                 print(f"\n  ✅ Updated symbols_prices.json with {reports_added} trappedcandle_report entries as top-level keys")
                 
@@ -3919,7 +3882,7 @@ def identify_trapped_candles(inv_id=None):
     
     return stats   
 
-def identify_levels_liquidator_candle(inv_id=None):
+def identify_levels_liquidator_candle(inv_id=None, ctx=None):
     """
     Identify the first candle that liquidates ANY TWO CONSECUTIVE grid levels
     (takes out both orders in the same candle), regardless of selection status.
@@ -4171,14 +4134,22 @@ def identify_levels_liquidator_candle(inv_id=None):
         level_pairs_tested = 0
         liquidator_candidates = []
         
-        for i in range(len(all_levels_sorted) - 1):
-            lower_level = all_levels_sorted[i]
-            upper_level = all_levels_sorted[i + 1]
-            
-            # Only test if the lower level is actually lower (should be by sorting)
-            if lower_level['entry'] >= upper_level['entry']:
-                continue
-            
+        # Only test if the lower level is actually lower (should be by sorting)
+        level_pairs = [
+            (i, all_levels_sorted[i], all_levels_sorted[i + 1])
+            for i in range(len(all_levels_sorted) - 1)
+            if all_levels_sorted[i]['entry'] < all_levels_sorted[i + 1]['entry']
+        ]
+        
+        # First liquidating candle of every pair in one pass over the candles
+        highs, lows = candle_arrays(completed_candles_list, 'high', 'low')
+        first_liquidators = first_liquidations(
+            highs, lows,
+            [lower_level['entry'] for _, lower_level, _ in level_pairs],
+            [upper_level['entry'] for _, _, upper_level in level_pairs]
+        )
+        
+        for (i, lower_level, upper_level), candle_idx in zip(level_pairs, first_liquidators):
             level_pairs_tested += 1
             
             # Format level types for display
@@ -4187,26 +4158,27 @@ def identify_levels_liquidator_candle(inv_id=None):
             
             print(f"              📊 Pair {level_pairs_tested}: {lower_level['entry']:.{symbol_data.get('digits', 2)}f} [{lower_type_desc}] - {upper_level['entry']:.{symbol_data.get('digits', 2)}f} [{upper_type_desc}]")
             
-            # Search through candles for this pair (stop at first match)
-            for candle_idx, candle in enumerate(completed_candles_list):
-                is_liquidator, details = check_candle_liquidates_level_pair(
-                    candle, lower_level['level_data'], upper_level['level_data']
-                )
+            if candle_idx < 0:
+                continue
+            
+            candle = completed_candles_list[candle_idx]
+            is_liquidator, details = check_candle_liquidates_level_pair(
+                candle, lower_level['level_data'], upper_level['level_data']
+            )
+            
+            if is_liquidator:
+                # Found a liquidator candle for this pair
+                liquidator_candidates.append({
+                    'candle': candle,
+                    'candle_index': candle_idx,
+                    'candle_number': candle['candle_number'],
+                    'lower_level': lower_level,
+                    'upper_level': upper_level,
+                    'details': details,
+                    'pair_description': f"Level {i+1} ({lower_level['entry']:.{symbol_data.get('digits', 2)}f}) - Level {i+2} ({upper_level['entry']:.{symbol_data.get('digits', 2)}f})"
+                })
                 
-                if is_liquidator:
-                    # Found a liquidator candle for this pair
-                    liquidator_candidates.append({
-                        'candle': candle,
-                        'candle_index': candle_idx,
-                        'candle_number': candle['candle_number'],
-                        'lower_level': lower_level,
-                        'upper_level': upper_level,
-                        'details': details,
-                        'pair_description': f"Level {i+1} ({lower_level['entry']:.{symbol_data.get('digits', 2)}f}) - Level {i+2} ({upper_level['entry']:.{symbol_data.get('digits', 2)}f})"
-                    })
-                    
-                    print(f"                💧 FOUND LIQUIDATOR at candle #{candle['candle_number']} ({details['candle_color']})")
-                    break  # Stop searching candles for this pair, move to next pair
+                print(f"                💧 FOUND LIQUIDATOR at candle #{candle['candle_number']} ({details['candle_color']})")
         
         # After testing all pairs, find the most recent liquidator (lowest candle_index)
         if liquidator_candidates:
@@ -4248,7 +4220,7 @@ def identify_levels_liquidator_candle(inv_id=None):
         Returns:
             tuple: (main_orders_marked, counter_orders_marked)
         """
-        if not signals_path.exists():
+        if not document_exists(signals_path):
             print(f"            ⚠️  signals.json not found at {signals_path}")
             return 0, 0
         
@@ -4273,8 +4245,7 @@ def identify_levels_liquidator_candle(inv_id=None):
             print(f"            📊 Comparison: Liquidator #{trapped_info['liquidator_num']} vs Trapped #{trapped_info['trapped_num']} = {age_vs_trapped}")
         
         try:
-            with open(signals_path, 'r', encoding='utf-8') as f:
-                signals_data = json.load(f)
+            signals_data = load_document(signals_path)
             
             main_orders_marked = 0
             counter_orders_marked = 0
@@ -4385,8 +4356,7 @@ def identify_levels_liquidator_candle(inv_id=None):
             
             # Save the updated signals.json if any marks were made
             if main_orders_marked > 0 or counter_orders_marked > 0:
-                with open(signals_path, 'w', encoding='utf-8') as f:
-                    json.dump(signals_data, f, indent=4)
+                save_document(signals_path, signals_data)
                 
                 flag_summary = f"{main_flag}"
                 if age_flags:
@@ -4705,15 +4675,14 @@ def identify_levels_liquidator_candle(inv_id=None):
         symbols_prices_path = prices_dir / "symbols_prices.json"
         signals_path = prices_dir / "signals.json"
         
-        if not symbols_prices_path.exists():
+        if not document_exists(symbols_prices_path):
             print(f" [{inv_id}]  symbols_prices.json not found at {symbols_prices_path}")
             return stats
         
         try:
             # Load the single file
             print(f" [{inv_id}] 📂 Loading symbols_prices.json...")
-            with open(symbols_prices_path, 'r', encoding='utf-8') as f:
-                symbols_prices_data = json.load(f)
+            symbols_prices_data = load_document(symbols_prices_path)
             
             # Extract symbols data (excluding metadata and other special keys)
             metadata_keys = ['account_type', 'account_login', 'account_server', 'account_balance', 
@@ -4822,8 +4791,7 @@ def identify_levels_liquidator_candle(inv_id=None):
                 }
                 
                 # Save back to file
-                with open(symbols_prices_path, 'w', encoding='utf-8') as f:
-                    json.dump(symbols_prices_data, f, indent=4, default=str)
+                save_document(symbols_prices_path, symbols_prices_data)
                 
                 print(f"\n  ✅ Updated symbols_prices.json with {reports_added} anylevel_liquidator_report entries as top-level keys")
                 print(f"  ✅ Updated signals.json with {stats['orders_marked_in_signals']} main orders and {stats['counter_orders_marked']} counter orders")
@@ -4868,7 +4836,7 @@ def identify_levels_liquidator_candle(inv_id=None):
     
     return stats
 
-def identify_ranging_orders_candles(inv_id=None):
+def identify_ranging_orders_candles(inv_id=None, ctx=None):
     """
     Identify the FIRST ranging levels after the liquidator candle for SELECTED orders.
     
@@ -5047,13 +5015,12 @@ def identify_ranging_orders_candles(inv_id=None):
         Returns:
             tuple: (selected_orders_marked, counter_orders_marked)
         """
-        if not signals_path.exists():
+        if not document_exists(signals_path):
             print(f"            ⚠️  signals.json not found at {signals_path}")
             return 0, 0
         
         try:
-            with open(signals_path, 'r', encoding='utf-8') as f:
-                signals_data = json.load(f)
+            signals_data = load_document(signals_path)
             
             selected_orders_marked = 0
             counter_orders_marked = 0
@@ -5101,8 +5068,7 @@ def identify_ranging_orders_candles(inv_id=None):
             
             # Save the updated signals.json if any marks were made
             if selected_orders_marked > 0:
-                with open(signals_path, 'w', encoding='utf-8') as f:
-                    json.dump(signals_data, f, indent=4)
+                save_document(signals_path, signals_data)
                 print(f"            ✅ Updated signals.json with {selected_orders_marked} selected orders marked with first_ranging_levels: true")
             
             return selected_orders_marked, counter_orders_marked
@@ -5152,9 +5118,20 @@ def identify_ranging_orders_candles(inv_id=None):
         first_ask_index = None
         first_bid_index = None
         
-        for idx, candle in enumerate(search_candles_sorted):
+        # First candle meeting each condition in one pass; only those candles are visited
+        highs, lows = candle_arrays(search_candles_sorted, 'high', 'low')
+        ask_hit, bid_hit = first_ranging(
+            highs, lows,
+            ask_level=(selected_ask['entry'], selected_ask['exit'], selected_ask['tp'])
+                      if selected_ask['order_type'] in ['buy_stop', 'sell_limit'] else None,
+            bid_level=(selected_bid['entry'], selected_bid['exit'], selected_bid['tp'])
+                      if selected_bid['order_type'] in ['sell_stop', 'buy_limit'] else None
+        )
+        
+        for idx in sorted({hit for hit in (ask_hit, bid_hit) if hit >= 0}):
+            candle = search_candles_sorted[idx]
             # Check selected ask condition if not already found
-            if ask_met_candle is None:
+            if ask_met_candle is None and idx == ask_hit:
                 ask_meets, ask_details = check_selected_ask_ranging_condition(candle, selected_ask)
                 if ask_meets:
                     ask_met_candle = candle
@@ -5163,7 +5140,7 @@ def identify_ranging_orders_candles(inv_id=None):
                     print(f"              • {ask_details['condition']}")
             
             # Check selected bid condition if not already found
-            if bid_met_candle is None:
+            if bid_met_candle is None and idx == bid_hit:
                 bid_meets, bid_details = check_selected_bid_ranging_condition(candle, selected_bid)
                 if bid_meets:
                     bid_met_candle = candle
@@ -5431,15 +5408,14 @@ def identify_ranging_orders_candles(inv_id=None):
         symbols_prices_path = prices_dir / "symbols_prices.json"
         signals_path = prices_dir / "signals.json"
         
-        if not symbols_prices_path.exists():
+        if not document_exists(symbols_prices_path):
             print(f" [{inv_id}]  symbols_prices.json not found at {symbols_prices_path}")
             return stats
         
         try:
             # Load the file
             print(f" [{inv_id}] 📂 Loading symbols_prices.json...")
-            with open(symbols_prices_path, 'r', encoding='utf-8') as f:
-                symbols_prices_data = json.load(f)
+            symbols_prices_data = load_document(symbols_prices_path)
             
             # Extract symbols data, candle data, and liquidator reports
             metadata_keys = ['account_type', 'account_login', 'account_server', 'account_balance', 
@@ -5542,8 +5518,7 @@ def identify_ranging_orders_candles(inv_id=None):
                 }
                 
                 # Save back to file
-                with open(symbols_prices_path, 'w', encoding='utf-8') as f:
-                    json.dump(symbols_prices_data, f, indent=4, default=str)
+                save_document(symbols_prices_path, symbols_prices_data)
                 
                 print(f"\n  ✅ Updated symbols_prices.json with {reports_added} ranging_report entries")
                 print(f"  ✅ Updated signals.json with {stats['selected_orders_marked_in_signals']} selected orders marked with first_ranging_levels: true")
@@ -5655,14 +5630,13 @@ def remove_ranging_levels(inv_id=None):
         }
         
         # Check if signals.json exists
-        if not signals_path.exists():
+        if not document_exists(signals_path):
             print(f" [{current_inv_id}] ⚠️ signals.json not found at {signals_path}")
             continue
         
         try:
             print(f" [{current_inv_id}] 📂 Loading signals.json...")
-            with open(signals_path, 'r', encoding='utf-8') as f:
-                signals_data = json.load(f)
+            signals_data = load_document(signals_path)
             
             # Track if any changes were made for this investor
             changes_made = False
@@ -5861,8 +5835,7 @@ def remove_ranging_levels(inv_id=None):
             
             # Save the updated signals.json if changes were made
             if changes_made:
-                with open(signals_path, 'w', encoding='utf-8') as f:
-                    json.dump(signals_data, f, indent=4)
+                save_document(signals_path, signals_data)
                 print(f"\n [{current_inv_id}] ✅ Updated signals.json with ranging level cleanup")
                 
                 # Store investor stats
@@ -5904,7 +5877,7 @@ def remove_ranging_levels(inv_id=None):
     
     return stats
 
-def orders_configuration(inv_id=None):
+def orders_configuration(inv_id=None, ctx=None):
     """
     Configure orders based on liquidator candle colors from anylevel_liquidator analysis.
     
@@ -6105,8 +6078,7 @@ def orders_configuration(inv_id=None):
             return stats
         
         try:
-            with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
-                acc_config = json.load(f)
+            acc_config = read_json(acc_mgmt_path, ctx)
             
             # Check if orders configuration is enabled
             settings = acc_config.get("settings", {})
@@ -6132,17 +6104,16 @@ def orders_configuration(inv_id=None):
             return stats
         
         # Continue with rest of processing if enabled
-        if not signals_path.exists():
+        if not document_exists(signals_path):
             print(f" [{inv_id}]  signals.json not found at {signals_path}")
             return stats
         
-        if not symbols_prices_path.exists():
+        if not document_exists(symbols_prices_path):
             print(f" [{inv_id}] ⚠️ symbols_prices.json not found - will skip liquidator age comparisons")
             symbols_prices_data = {}
         else:
             try:
-                with open(symbols_prices_path, 'r', encoding='utf-8') as f:
-                    symbols_prices_data = json.load(f)
+                symbols_prices_data = load_document(symbols_prices_path)
                 print(f" [{inv_id}] 📂 Loaded symbols_prices.json for liquidator age data")
             except:
                 symbols_prices_data = {}
@@ -6150,8 +6121,7 @@ def orders_configuration(inv_id=None):
         
         try:
             print(f" [{inv_id}] 📂 Loading signals.json...")
-            with open(signals_path, 'r', encoding='utf-8') as f:
-                signals_data = json.load(f)
+            signals_data = load_document(signals_path)
             
             # Track if any changes were made
             changes_made = False
@@ -6831,8 +6801,7 @@ def orders_configuration(inv_id=None):
             
             # Save the updated signals.json if changes were made
             if changes_made:
-                with open(signals_path, 'w', encoding='utf-8') as f:
-                    json.dump(signals_data, f, indent=4)
+                save_document(signals_path, signals_data)
                 print(f"\n [{inv_id}] ✅ Updated signals.json with order configuration changes")
             else:
                 print(f"\n [{inv_id}] ⏳ No changes needed in signals.json")
@@ -6914,7 +6883,7 @@ def orders_configuration(inv_id=None):
     
     return stats
 
-def liquidator_configuration(inv_id=None):
+def liquidator_configuration(inv_id=None, ctx=None):
     """
     Configure orders based on liquidator candle colors from anylevel_liquidator analysis.
     
@@ -7052,8 +7021,7 @@ def liquidator_configuration(inv_id=None):
             return stats
         
         try:
-            with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
-                acc_config = json.load(f)
+            acc_config = read_json(acc_mgmt_path, ctx)
             
             # Check if liquidator configuration is enabled
             settings = acc_config.get("settings", {})
@@ -7079,14 +7047,13 @@ def liquidator_configuration(inv_id=None):
             return stats
         
         # Continue with rest of processing if enabled
-        if not signals_path.exists():
+        if not document_exists(signals_path):
             print(f" [{inv_id}]  signals.json not found at {signals_path}")
             return stats
         
         try:
             print(f" [{inv_id}] 📂 Loading signals.json...")
-            with open(signals_path, 'r', encoding='utf-8') as f:
-                signals_data = json.load(f)
+            signals_data = load_document(signals_path)
             
             # Track if any changes were made
             changes_made = False
@@ -7762,8 +7729,7 @@ def liquidator_configuration(inv_id=None):
             
             # Save the updated signals.json if changes were made
             if changes_made:
-                with open(signals_path, 'w', encoding='utf-8') as f:
-                    json.dump(signals_data, f, indent=4)
+                save_document(signals_path, signals_data)
                 print(f"\n [{inv_id}] ✅ Updated signals.json with liquidator configuration changes")
             else:
                 print(f"\n [{inv_id}] ⏳ No changes needed in signals.json")
@@ -7973,7 +7939,7 @@ def timeframe_countdown(inv_id=None):
     print(f"\n{'='*10} 🏁 FUNCTION ENDED {'='*10}\n")
     return stats
 
-def place_signals_orders_accounts(inv_id=None):
+def place_signals_orders_accounts(inv_id=None, ctx=None):
     """
     Place orders from signals.json for specified investor(s).
     
@@ -8264,13 +8230,13 @@ def place_signals_orders_accounts(inv_id=None):
                 if position_sl and position_sl > 0:
                     if is_position_buy:
                         # For buy position, risk is entry - SL
-                        position_risk_profit = mt5.order_calc_profit(
+                        position_risk_profit = risk_engine.calc_profit(
                             mt5.ORDER_TYPE_BUY, symbol, position_volume,
                             position_entry, position_sl
                         )
                     else:  # sell position
                         # For sell position, risk is SL - entry
-                        position_risk_profit = mt5.order_calc_profit(
+                        position_risk_profit = risk_engine.calc_profit(
                             mt5.ORDER_TYPE_SELL, symbol, position_volume,
                             position_entry, position_sl
                         )
@@ -8295,7 +8261,7 @@ def place_signals_orders_accounts(inv_id=None):
                         print(f"            📐 SELL pending @ {entry_price} below SELL position @ {position_entry}")
                         print(f"            🧮 Calculating risk: Entry={entry_price}, Exit={position_entry}")
                         
-                        potential_risk_profit = mt5.order_calc_profit(
+                        potential_risk_profit = risk_engine.calc_profit(
                             mt5.ORDER_TYPE_SELL, symbol, volume,
                             entry_price, position_entry
                         )
@@ -8304,7 +8270,7 @@ def place_signals_orders_accounts(inv_id=None):
                         print(f"            📐 SELL pending @ {entry_price} above SELL position @ {position_entry}")
                         print(f"            🧮 Calculating risk: Entry={position_entry}, Exit={entry_price}")
                         
-                        potential_risk_profit = mt5.order_calc_profit(
+                        potential_risk_profit = risk_engine.calc_profit(
                             mt5.ORDER_TYPE_SELL, symbol, volume,
                             position_entry, entry_price
                         )
@@ -8326,7 +8292,7 @@ def place_signals_orders_accounts(inv_id=None):
                         print(f"            📐 BUY pending @ {entry_price} above BUY position @ {position_entry}")
                         print(f"            🧮 Calculating risk: Entry={position_entry}, Exit={entry_price}")
                         
-                        potential_risk_profit = mt5.order_calc_profit(
+                        potential_risk_profit = risk_engine.calc_profit(
                             mt5.ORDER_TYPE_BUY, symbol, volume,
                             position_entry, entry_price
                         )
@@ -8335,7 +8301,7 @@ def place_signals_orders_accounts(inv_id=None):
                         print(f"            📐 BUY pending @ {entry_price} below BUY position @ {position_entry}")
                         print(f"            🧮 Calculating risk: Entry={entry_price}, Exit={position_entry}")
                         
-                        potential_risk_profit = mt5.order_calc_profit(
+                        potential_risk_profit = risk_engine.calc_profit(
                             mt5.ORDER_TYPE_BUY, symbol, volume,
                             entry_price, position_entry
                         )
@@ -8363,13 +8329,13 @@ def place_signals_orders_accounts(inv_id=None):
                 if position_sl and position_sl > 0:
                     if is_position_buy:
                         # For buy position, risk is entry - SL
-                        position_risk_profit = mt5.order_calc_profit(
+                        position_risk_profit = risk_engine.calc_profit(
                             mt5.ORDER_TYPE_BUY, symbol, position_volume,
                             position_entry, position_sl
                         )
                     else:  # sell position
                         # For sell position, risk is SL - entry
-                        position_risk_profit = mt5.order_calc_profit(
+                        position_risk_profit = risk_engine.calc_profit(
                             mt5.ORDER_TYPE_SELL, symbol, position_volume,
                             position_entry, position_sl
                         )
@@ -8401,7 +8367,7 @@ def place_signals_orders_accounts(inv_id=None):
                         print(f"            🧮 Calculating opposite risk: Entry={position_entry}, Exit={entry_price}")
                         
                         # Risk = from SELL position's entry to BUY pending's entry
-                        potential_risk_profit = mt5.order_calc_profit(
+                        potential_risk_profit = risk_engine.calc_profit(
                             mt5.ORDER_TYPE_SELL, symbol, min(volume, position_volume),
                             position_entry, entry_price
                         )
@@ -8411,7 +8377,7 @@ def place_signals_orders_accounts(inv_id=None):
                         print(f"            🧮 Calculating opposite risk: Entry={entry_price}, Exit={position_entry}")
                         
                         # Risk = from BUY pending's entry to SELL position's entry
-                        potential_risk_profit = mt5.order_calc_profit(
+                        potential_risk_profit = risk_engine.calc_profit(
                             mt5.ORDER_TYPE_BUY, symbol, min(volume, position_volume),
                             entry_price, position_entry
                         )
@@ -8436,7 +8402,7 @@ def place_signals_orders_accounts(inv_id=None):
                         print(f"            🧮 Calculating opposite risk: Entry={entry_price}, Exit={position_entry}")
                         
                         # Risk = from SELL pending's entry to BUY position's entry
-                        potential_risk_profit = mt5.order_calc_profit(
+                        potential_risk_profit = risk_engine.calc_profit(
                             mt5.ORDER_TYPE_SELL, symbol, min(volume, position_volume),
                             entry_price, position_entry
                         )
@@ -8446,7 +8412,7 @@ def place_signals_orders_accounts(inv_id=None):
                         print(f"            🧮 Calculating opposite risk: Entry={position_entry}, Exit={entry_price}")
                         
                         # Risk = from BUY position's entry to SELL pending's entry
-                        potential_risk_profit = mt5.order_calc_profit(
+                        potential_risk_profit = risk_engine.calc_profit(
                             mt5.ORDER_TYPE_BUY, symbol, min(volume, position_volume),
                             position_entry, entry_price
                         )
@@ -9289,7 +9255,7 @@ def place_signals_orders_accounts(inv_id=None):
             try:
                 # Import the function (assuming it's in the same module or imported)
                 # If it's in the same file, just call it directly
-                management_result = manage_single_position_and_pending(inv_id=inv_id)
+                management_result = manage_single_position_and_pending(inv_id=inv_id, ctx=ctx)
                 upload_orders_flag = management_result.get("upload_orders", True)
                 stats["upload_orders_flag"] = upload_orders_flag
                 
@@ -9321,8 +9287,7 @@ def place_signals_orders_accounts(inv_id=None):
                 return stats
             
             try:
-                with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
-                    acc_config = json.load(f)
+                acc_config = read_json(acc_mgmt_path, ctx)
                 
                 # Check if auto trading is enabled
                 settings = acc_config.get("settings", {})
@@ -9368,14 +9333,13 @@ def place_signals_orders_accounts(inv_id=None):
                 return stats
             
             # Continue with order placement if enabled
-            if not signals_path.exists():
+            if not document_exists(signals_path):
                 print(f" [{inv_id}]  signals.json not found at {signals_path}")
                 return stats
             
             try:
                 print(f" [{inv_id}] 📂 Loading signals.json...")
-                with open(signals_path, 'r', encoding='utf-8') as f:
-                    signals_data = json.load(f)
+                signals_data = load_document(signals_path)
                 
                 # Get ALL existing pending orders for this account (no symbol filter)
                 print(f" [{inv_id}] 🔍 Checking ALL existing pending orders...")
@@ -9652,9 +9616,11 @@ def place_signals_orders_accounts(inv_id=None):
         
         return stats
     
+    # Contract specs / profit estimates of the logged-in account, used by the closeness checks
+    risk_engine = RiskEngine()
     return main()
 
-def manage_single_position_and_pending(inv_id=None):
+def manage_single_position_and_pending(inv_id=None, ctx=None):
     """
     Function: Manages positions and pending orders to ensure only one position exists PER SYMBOL
     and only the opposite pending order with entry price matching the position's SL price remains.
@@ -9725,8 +9691,7 @@ def manage_single_position_and_pending(inv_id=None):
 
         # --- LOAD CONFIG AND CHECK SETTINGS ---
         try:
-            with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = read_json(acc_mgmt_path, ctx)
             
             # Check if single position and pending management is enabled
             settings = config.get("settings", {})
@@ -9751,6 +9716,7 @@ def manage_single_position_and_pending(inv_id=None):
         print(f"      • Login ID: {login_id}")
 
         # Initialize MT5 connection if needed
+        reset_resolver()
         if not mt5.initialize(path=mt5_path):
             print(f"  └─  MT5 initialization failed")
             stats["errors"] += 1
@@ -9760,7 +9726,8 @@ def manage_single_position_and_pending(inv_id=None):
         acc = mt5.account_info()
         if acc is None or acc.login != login_id:
             print(f"      🔑 Logging into account...")
-            if not mt5.login(login_id, password=broker_cfg["PASSWORD"], server=broker_cfg["SERVER"]):
+            reset_resolver()
+            if not ensure_investor_session(broker_cfg):
                 error = mt5.last_error()
                 print(f"  └─  Login failed: {error}")
                 stats["errors"] += 1
@@ -10360,6 +10327,7 @@ def martingale_old(inv_id=None):
         print(f"      • Login ID: {login_id}")
 
         # Initialize MT5 connection if needed
+        reset_resolver()
         if not mt5.initialize(path=mt5_path):
             print(f"  └─  MT5 initialization failed")
             stats["errors"] += 1
@@ -10369,7 +10337,8 @@ def martingale_old(inv_id=None):
         acc = mt5.account_info()
         if acc is None or acc.login != login_id:
             print(f"      🔑 Logging into account...")
-            if not mt5.login(login_id, password=broker_cfg["PASSWORD"], server=broker_cfg["SERVER"]):
+            reset_resolver()
+            if not ensure_investor_session(broker_cfg):
                 error = mt5.last_error()
                 print(f"  └─  Login failed: {error}")
                 stats["errors"] += 1
@@ -10426,7 +10395,6 @@ def martingale_old(inv_id=None):
         print(f"  └─ 💰 Martingale Maximum Risk: ${martingale_max_risk:.2f}")
 
         # --- GET STARTING BALANCE FOR TODAY ---
-        daily_stats_path = inv_root / "daily_stats.json"
         starting_balance = None
         
         today_date = datetime.now().date()
@@ -10434,20 +10402,18 @@ def martingale_old(inv_id=None):
         
         print(f"      • Today's Date: {today_str}")
         
-        if daily_stats_path.exists():
-            try:
-                with open(daily_stats_path, 'r', encoding='utf-8') as f:
-                    daily_stats = json.load(f)
-                
-                if today_str in daily_stats:
-                    starting_balance = daily_stats[today_str].get("starting_balance")
-                    print(f"      • Found recorded starting balance: ${starting_balance:.2f}")
-                else:
-                    print(f"      • No recorded starting balance for today")
-            except Exception as e:
-                print(f"      ⚠️  Could not read daily stats: {e}")
-        else:
-            print(f"      • No daily stats file found")
+        state = None
+        try:
+            state = get_investor_state(STATE_DB_PATH, user_brokerid, inv_root)
+            today_stats = state.daily_stats(today_str)
+            
+            if today_stats and today_stats.get("starting_balance") is not None:
+                starting_balance = today_stats["starting_balance"]
+                print(f"      • Found recorded starting balance: ${starting_balance:.2f}")
+            else:
+                print(f"      • No recorded starting balance for today")
+        except Exception as e:
+            print(f"      ⚠️  Could not read daily stats: {e}")
         
         if starting_balance is None:
             print(f"      🔍 Calculating starting balance from trade history...")
@@ -10478,22 +10444,12 @@ def martingale_old(inv_id=None):
                 print(f"      • Total profit/loss today: ${total_pl:.2f}")
             
             try:
-                if daily_stats_path.exists():
-                    with open(daily_stats_path, 'r', encoding='utf-8') as f:
-                        daily_stats = json.load(f)
-                else:
-                    daily_stats = {}
-                
-                if today_str not in daily_stats:
-                    daily_stats[today_str] = {}
-                
-                daily_stats[today_str]["starting_balance"] = starting_balance
-                daily_stats[today_str]["last_updated"] = datetime.now().isoformat()
-                
-                with open(daily_stats_path, 'w', encoding='utf-8') as f:
-                    json.dump(daily_stats, f, indent=2, ensure_ascii=False)
-                
-                print(f"      • Saved starting balance to daily_stats.json")
+                if state is not None:
+                    state.update_daily_stats(today_str, {
+                        "starting_balance": starting_balance,
+                        "last_updated": datetime.now().isoformat()
+                    })
+                    print(f"      • Saved starting balance to daily stats")
             except Exception as e:
                 print(f"      ⚠️  Could not save daily stats: {e}")
         
@@ -10784,12 +10740,11 @@ def martingale_old(inv_id=None):
                     # Load signals.json
                     signals_path = inv_root / "prices" / "signals.json"
                     
-                    if not signals_path.exists():
+                    if not document_exists(signals_path):
                         print(f"      ⚠️  signals.json not found at {signals_path}")
                         print(f"      ⏭️  Skipping pre-scaling")
                     else:
-                        with open(signals_path, 'r', encoding='utf-8') as f:
-                            signals_data = json.load(f)
+                        signals_data = load_document(signals_path)
                         
                         print(f"      📂 Loaded signals.json")
                         
@@ -11030,8 +10985,7 @@ def martingale_old(inv_id=None):
                         
                         # Save signals.json if any modifications were made
                         if stats["pre_scaling_applied"]:
-                            with open(signals_path, 'w', encoding='utf-8') as f:
-                                json.dump(signals_data, f, indent=2, ensure_ascii=False)
+                            save_document(signals_path, signals_data)
                             
                             print(f"\n      ✅ Saved signals.json with pre-scaled volumes")
                         else:
@@ -11062,13 +11016,12 @@ def martingale_old(inv_id=None):
             
             signals_path = inv_root / "prices" / "signals.json"
             
-            if not signals_path.exists():
+            if not document_exists(signals_path):
                 print(f"      ⚠️  signals.json not found at {signals_path}")
                 print(f"      ⏭️  Skipping volume modification")
             else:
                 try:
-                    with open(signals_path, 'r', encoding='utf-8') as f:
-                        signals_data = json.load(f)
+                    signals_data = load_document(signals_path)
                     
                     print(f"      📂 Loaded signals.json")
                     print(f"      🔄 Symbols requiring recovery: {', '.join(symbols_with_recovery_needed)}")
@@ -11338,8 +11291,7 @@ def martingale_old(inv_id=None):
                     
                     # Save signals.json if any modifications were made
                     if modifications_made and any(mod.get('modified', False) for mod in modifications_made):
-                        with open(signals_path, 'w', encoding='utf-8') as f:
-                            json.dump(signals_data, f, indent=2, ensure_ascii=False)
+                        save_document(signals_path, signals_data)
                         
                         stats["signals_modified"] = True
                         print(f"\n      ✅ Saved signals.json with {len([m for m in modifications_made if m.get('modified')])} symbols modified")
@@ -11380,11 +11332,10 @@ def martingale_old(inv_id=None):
                 # Load signals.json to get expected volumes
                 signals_path = inv_root / "prices" / "signals.json"
                 
-                if not signals_path.exists():
+                if not document_exists(signals_path):
                     print(f"      ⚠️  signals.json not found - cannot verify volumes")
                 else:
-                    with open(signals_path, 'r', encoding='utf-8') as f:
-                        signals_data = json.load(f)
+                    signals_data = load_document(signals_path)
                     
                     # Build expected volumes dictionary from signals.json
                     expected_volumes = {}
@@ -11614,7 +11565,7 @@ def martingale_old(inv_id=None):
     
     return stats
 
-def martingale(inv_id=None):
+def martingale(inv_id=None, ctx=None):
 
     """
     Function: Checks daily loss and martingale status for the day.
@@ -11704,8 +11655,7 @@ def martingale(inv_id=None):
 
         # --- LOAD CONFIG AND CHECK MARTINGALE SETTINGS ---
         try:
-            with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = read_json(acc_mgmt_path, ctx)
             
             # Check both old and new config structure
             settings = config.get("settings", {})
@@ -11779,6 +11729,7 @@ def martingale(inv_id=None):
         print(f"      • Login ID: {login_id}")
 
         # Initialize MT5 connection if needed
+        reset_resolver()
         if not mt5.initialize(path=mt5_path):
             print(f"  └─  MT5 initialization failed")
             stats["errors"] += 1
@@ -11788,7 +11739,8 @@ def martingale(inv_id=None):
         acc = mt5.account_info()
         if acc is None or acc.login != login_id:
             print(f"      🔑 Logging into account...")
-            if not mt5.login(login_id, password=broker_cfg["PASSWORD"], server=broker_cfg["SERVER"]):
+            reset_resolver()
+            if not ensure_investor_session(broker_cfg):
                 error = mt5.last_error()
                 print(f"  └─  Login failed: {error}")
                 stats["errors"] += 1
@@ -11803,12 +11755,18 @@ def martingale(inv_id=None):
             print(f"  └─  Failed to get account information")
             stats["errors"] += 1
             continue
+
+        # Contract specs / profit estimates for this account's volume searches
+        risk_engine = RiskEngine()
         
         current_balance = account_info.balance
         stats["current_balance"] = current_balance
         
         print(f"      • Current Balance: ${current_balance:.2f}")
 
+        # Day windows below are served by the investor's deal ledger when one exists
+        ledger = ctx.deal_ledger() if ctx else open_deal_ledger(inv_root, login=account_info.login)
+
         # --- GET MARTINGALE RISK BASED ON CURRENT BALANCE ---
         martingale_risk_map = config.get("martingale_risk_management", {})
         martingale_max_risk = None
@@ -11845,7 +11803,6 @@ def martingale(inv_id=None):
         print(f"  └─ 💰 Martingale Maximum Risk: ${martingale_max_risk:.2f}")
 
         # --- GET STARTING BALANCE FOR TODAY ---
-        daily_stats_path = inv_root / "daily_stats.json"
         starting_balance = None
         
         today_date = datetime.now().date()
@@ -11853,27 +11810,25 @@ def martingale(inv_id=None):
         
         print(f"      • Today's Date: {today_str}")
         
-        if daily_stats_path.exists():
-            try:
-                with open(daily_stats_path, 'r', encoding='utf-8') as f:
-                    daily_stats = json.load(f)
-                
-                if today_str in daily_stats:
-                    starting_balance = daily_stats[today_str].get("starting_balance")
-                    print(f"      • Found recorded starting balance: ${starting_balance:.2f}")
-                else:
-                    print(f"      • No recorded starting balance for today")
-            except Exception as e:
-                print(f"      ⚠️  Could not read daily stats: {e}")
-        else:
-            print(f"      • No daily stats file found")
+        state = None
+        try:
+            state = get_investor_state(STATE_DB_PATH, user_brokerid, inv_root)
+            today_stats = state.daily_stats(today_str)
+            
+            if today_stats and today_stats.get("starting_balance") is not None:
+                starting_balance = today_stats["starting_balance"]
+                print(f"      • Found recorded starting balance: ${starting_balance:.2f}")
+            else:
+                print(f"      • No recorded starting balance for today")
+        except Exception as e:
+            print(f"      ⚠️  Could not read daily stats: {e}")
         
         if starting_balance is None:
             print(f"      🔍 Calculating starting balance from trade history...")
             
             from_date = datetime(today_date.year, today_date.month, today_date.day, 0, 0, 0)
             to_date = datetime(today_date.year, today_date.month, today_date.day, 23, 59, 59)
-            deals = mt5.history_deals_get(from_date, to_date)
+            deals = ledger.deals_between(from_date, to_date) if ledger else mt5.history_deals_get(from_date, to_date)
             
             if deals is None:
                 print(f"      ⚠️  Could not retrieve deal history")
@@ -11897,22 +11852,12 @@ def martingale(inv_id=None):
                 print(f"      • Total profit/loss today: ${total_pl:.2f}")
             
             try:
-                if daily_stats_path.exists():
-                    with open(daily_stats_path, 'r', encoding='utf-8') as f:
-                        daily_stats = json.load(f)
-                else:
-                    daily_stats = {}
-                
-                if today_str not in daily_stats:
-                    daily_stats[today_str] = {}
-                
-                daily_stats[today_str]["starting_balance"] = starting_balance
-                daily_stats[today_str]["last_updated"] = datetime.now().isoformat()
-                
-                with open(daily_stats_path, 'w', encoding='utf-8') as f:
-                    json.dump(daily_stats, f, indent=2, ensure_ascii=False)
-                
-                print(f"      • Saved starting balance to daily_stats.json")
+                if state is not None:
+                    state.update_daily_stats(today_str, {
+                        "starting_balance": starting_balance,
+                        "last_updated": datetime.now().isoformat()
+                    })
+                    print(f"      • Saved starting balance to daily stats")
             except Exception as e:
                 print(f"      ⚠️  Could not save daily stats: {e}")
         
@@ -11965,7 +11910,7 @@ def martingale(inv_id=None):
                 from_date = datetime(check_date.year, check_date.month, check_date.day, 0, 0, 0)
                 to_date = datetime(check_date.year, check_date.month, check_date.day, 23, 59, 59)
                 
-                day_deals = mt5.history_deals_get(from_date, to_date)
+                day_deals = ledger.deals_between(from_date, to_date) if ledger else mt5.history_deals_get(from_date, to_date)
                 if day_deals and len(day_deals) > 0:
                     all_deals_by_day[check_date] = day_deals
                     print(f"      • {check_date.strftime('%Y-%m-%d')}: Found {len(day_deals)} deals")
@@ -12203,12 +12148,11 @@ def martingale(inv_id=None):
                     # Load signals.json
                     signals_path = inv_root / "prices" / "signals.json"
                     
-                    if not signals_path.exists():
+                    if not document_exists(signals_path):
                         print(f"      ⚠️  signals.json not found at {signals_path}")
                         print(f"      ⏭️  Skipping pre-scaling")
                     else:
-                        with open(signals_path, 'r', encoding='utf-8') as f:
-                            signals_data = json.load(f)
+                        signals_data = load_document(signals_path)
                         
                         print(f"      📂 Loaded signals.json")
                         
@@ -12401,7 +12345,7 @@ def martingale(inv_id=None):
                                         continue
                                     
                                     def calculate_profit_for_volume(volume):
-                                        profit = mt5.order_calc_profit(
+                                        profit = risk_engine.calc_profit(
                                             calc_type,
                                             symbol,
                                             volume,
@@ -12523,8 +12467,7 @@ def martingale(inv_id=None):
                         
                         # Save signals.json if any modifications were made
                         if stats["pre_scaling_applied"]:
-                            with open(signals_path, 'w', encoding='utf-8') as f:
-                                json.dump(signals_data, f, indent=2, ensure_ascii=False)
+                            save_document(signals_path, signals_data)
                             
                             print(f"\n      ✅ Saved signals.json with pre-scaled volumes")
                         else:
@@ -12555,13 +12498,12 @@ def martingale(inv_id=None):
             
             signals_path = inv_root / "prices" / "signals.json"
             
-            if not signals_path.exists():
+            if not document_exists(signals_path):
                 print(f"      ⚠️  signals.json not found at {signals_path}")
                 print(f"      ⏭️  Skipping volume modification")
             else:
                 try:
-                    with open(signals_path, 'r', encoding='utf-8') as f:
-                        signals_data = json.load(f)
+                    signals_data = load_document(signals_path)
                     
                     print(f"      📂 Loaded signals.json")
                     print(f"      🔄 Symbols requiring recovery: {', '.join(symbols_with_recovery_needed)}")
@@ -12658,7 +12600,7 @@ def martingale(inv_id=None):
                         print(f"        • Price difference (entry to stop): {price_diff:.2f}")
                         
                         def calculate_profit_for_volume(volume):
-                            profit = mt5.order_calc_profit(
+                            profit = risk_engine.calc_profit(
                                 calc_type,
                                 recovery_symbol,
                                 volume,
@@ -12831,8 +12773,7 @@ def martingale(inv_id=None):
                     
                     # Save signals.json if any modifications were made
                     if modifications_made and any(mod.get('modified', False) for mod in modifications_made):
-                        with open(signals_path, 'w', encoding='utf-8') as f:
-                            json.dump(signals_data, f, indent=2, ensure_ascii=False)
+                        save_document(signals_path, signals_data)
                         
                         stats["signals_modified"] = True
                         print(f"\n      ✅ Saved signals.json with {len([m for m in modifications_made if m.get('modified')])} symbols modified")
@@ -12873,11 +12814,10 @@ def martingale(inv_id=None):
                 # Load signals.json to get expected volumes
                 signals_path = inv_root / "prices" / "signals.json"
                 
-                if not signals_path.exists():
+                if not document_exists(signals_path):
                     print(f"      ⚠️  signals.json not found - cannot verify volumes")
                 else:
-                    with open(signals_path, 'r', encoding='utf-8') as f:
-                        signals_data = json.load(f)
+                    signals_data = load_document(signals_path)
                     
                     # Build expected volumes dictionary from signals.json
                     expected_volumes = {}
@@ -13109,7 +13049,7 @@ def martingale(inv_id=None):
     
     return stats
 
-def check_pending_orders_risk(inv_id=None):
+def check_pending_orders_risk(inv_id=None, ctx=None):
     """
     Function 3: Validates live pending orders against the account's current risk bucket.
      VERSION: Uses the EXACT account initialization logic from place_usd_orders_for_accounts()
@@ -13150,8 +13090,7 @@ def check_pending_orders_risk(inv_id=None):
         if not os.path.exists(NORMALIZE_SYMBOLS_PATH):
             print(" [!] CRITICAL ERROR: Normalization map path missing.")
             return stats
-        with open(NORMALIZE_SYMBOLS_PATH, 'r') as f:
-            norm_map = json.load(f)
+        norm_map = read_json(NORMALIZE_SYMBOLS_PATH, ctx)
     except Exception as e:
         print(f" [!] CRITICAL ERROR: Normalization map load failed: {e}")
         return stats
@@ -13190,8 +13129,7 @@ def check_pending_orders_risk(inv_id=None):
 
         # --- LOAD CONFIG AND DETERMINE RISK CONFIGURATION TO USE ---
         try:
-            with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = read_json(acc_mgmt_path, ctx)
             
             # Get settings flags
             settings = config.get("settings", {})
@@ -13342,6 +13280,9 @@ def check_pending_orders_risk(inv_id=None):
         if pending_orders:
             print(f"  └─ 🔍 Scanning {len(pending_orders)} pending orders (ALL types)...")
             
+            # SL risk of every pending order in one pass
+            sl_profits = RiskEngine().leg_profits(pending_orders, leg="sl")
+            
             for order in pending_orders:
                 # Skip if not a pending order type
                 if order.type not in ORDER_TYPES.keys():
@@ -13361,8 +13302,7 @@ def check_pending_orders_risk(inv_id=None):
                     print(f"    └─ ⚠️  Order #{order.ticket} | {order_type_name} | {order.symbol} - No SL set, skipping risk check")
                     continue
                 
-                sl_profit = mt5.order_calc_profit(calc_type, order.symbol, order.volume_initial, 
-                                                  order.price_open, order.sl)
+                sl_profit = sl_profits.get(order.ticket)
                 
                 if sl_profit is not None:
                     order_risk_usd = round(abs(sl_profit), 2)
@@ -13455,7 +13395,7 @@ def check_pending_orders_risk(inv_id=None):
     print(f"\n{'='*10} 🏁 RISK AUDIT COMPLETE {'='*10}\n")
     return stats
 
-def orders_risk_correction(inv_id=None):
+def orders_risk_correction(inv_id=None, ctx=None):
     """
     Function: Checks both live pending orders AND open positions (LIMIT, STOP, and MARKET)
     and adjusts their take profit levels based on the selected risk-reward ratio from
@@ -13509,8 +13449,7 @@ def orders_risk_correction(inv_id=None):
 
         # --- LOAD CONFIG AND CHECK SETTINGS ---
         try:
-            with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = read_json(acc_mgmt_path, ctx)
             
             # Check if risk_reward_correction is enabled
             settings = config.get("settings", {})
@@ -13549,7 +13488,8 @@ def orders_risk_correction(inv_id=None):
         acc = mt5.account_info()
         if acc is None or acc.login != login_id:
             print(f"      🔑 Logging into account...")
-            if not mt5.login(login_id, password=broker_cfg["PASSWORD"], server=broker_cfg["SERVER"]):
+            reset_resolver()
+            if not ensure_investor_session(broker_cfg):
                 error = mt5.last_error()
                 print(f"  └─   login failed: {error}")
                 stats["orders_error"] += 1
@@ -13619,6 +13559,10 @@ def orders_risk_correction(inv_id=None):
             mt5.ORDER_TYPE_SELL_STOP_LIMIT: "SELL STOP-LIMIT"
         }
 
+        # Contract specs / profit estimates for this account; SL risk of all positions in one pass
+        risk_engine = RiskEngine()
+        position_sl_profits = risk_engine.leg_profits(positions, leg="sl")
+
         # Process OPEN POSITIONS first
         if positions:
             print(f"\n  └─ 🔍 Scanning {len(positions)} open positions (MARKET)...")
@@ -13630,7 +13574,7 @@ def orders_risk_correction(inv_id=None):
                 position_type_name = POSITION_TYPES.get(position.type, f"Unknown Type {position.type}")
                 
                 # Get symbol info
-                symbol_info = mt5.symbol_info(position.symbol)
+                symbol_info = risk_engine.symbol_info(position.symbol)
                 if not symbol_info:
                     print(f"    └─ ⚠️  Cannot get symbol info for {position.symbol}")
                     investor_positions_skipped += 1
@@ -13666,8 +13610,7 @@ def orders_risk_correction(inv_id=None):
                 
                 # Alternative: calculate using MT5 profit calculator for accuracy
                 calc_type = mt5.ORDER_TYPE_BUY if is_buy else mt5.ORDER_TYPE_SELL
-                sl_profit = mt5.order_calc_profit(calc_type, position.symbol, position.volume, 
-                                                  position.price_open, position.sl)
+                sl_profit = position_sl_profits.get(position.ticket)
                 
                 if sl_profit is not None:
                     current_risk_usd = round(abs(sl_profit), 2)
@@ -13757,8 +13700,8 @@ def orders_risk_correction(inv_id=None):
                         else:
                             test_price = position.price_open - test_move
                             
-                        test_profit = mt5.order_calc_profit(calc_type, position.symbol, position.volume, 
-                                                            position.price_open, test_price)
+                        test_profit = risk_engine.calc_profit(calc_type, position.symbol, position.volume, 
+                                                              position.price_open, test_price)
                         
                         if test_profit and test_profit != 0:
                             point_value = abs(test_profit) / 10
@@ -13808,6 +13751,7 @@ def orders_risk_correction(inv_id=None):
         
         # --- CHECK AND ADJUST ALL PENDING ORDERS (LIMIT AND STOP) ---
         pending_orders = mt5.orders_get()
+        order_sl_profits = risk_engine.leg_profits(pending_orders, leg="sl")
         investor_orders_checked = 0
         investor_orders_adjusted = 0
         investor_orders_skipped = 0
@@ -13827,7 +13771,7 @@ def orders_risk_correction(inv_id=None):
                 order_type_name = ORDER_TYPES.get(order.type, f"Unknown Type {order.type}")
                 
                 # Get symbol info
-                symbol_info = mt5.symbol_info(order.symbol)
+                symbol_info = risk_engine.symbol_info(order.symbol)
                 if not symbol_info:
                     print(f"    └─ ⚠️  Cannot get symbol info for {order.symbol}")
                     investor_orders_skipped += 1
@@ -13848,8 +13792,7 @@ def orders_risk_correction(inv_id=None):
                     continue
                     
                 # For pending orders, risk is from entry to SL
-                sl_profit = mt5.order_calc_profit(calc_type, order.symbol, order.volume_initial, 
-                                                  order.price_open, order.sl)
+                sl_profit = order_sl_profits.get(order.ticket)
                 
                 if sl_profit is None:
                     print(f"       ⚠️  Cannot calculate risk. Skipping.")
@@ -13944,8 +13887,8 @@ def orders_risk_correction(inv_id=None):
                         else:
                             test_price = order.price_open - test_move
                             
-                        test_profit = mt5.order_calc_profit(calc_type, order.symbol, order.volume_initial, 
-                                                            order.price_open, test_price)
+                        test_profit = risk_engine.calc_profit(calc_type, order.symbol, order.volume_initial, 
+                                                              order.price_open, test_price)
                         
                         if test_profit and test_profit != 0:
                             point_value = abs(test_profit) / 10
@@ -14036,7 +13979,7 @@ def orders_risk_correction(inv_id=None):
     print(f"\n{'='*10} 🏁 POSITIONS & PENDING ORDERS RISK-REWARD CORRECTION COMPLETE {'='*10}\n")
     return stats
 
-def adjust_pending_orders_to_max_risk(inv_id=None):
+def adjust_pending_orders_to_max_risk(inv_id=None, ctx=None):
     """
     Adjust pending orders to match maximum risk configuration.
     
@@ -14113,8 +14056,7 @@ def adjust_pending_orders_to_max_risk(inv_id=None):
         # STEP 1: Check account management settings for maximum config
         # =====================================================
         try:
-            with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
-                acc_config = json.load(f)
+            acc_config = read_json(acc_mgmt_path, ctx)
             
             # Check if maximum account balance management is enabled
             settings = acc_config.get("settings", {})
@@ -14143,13 +14085,12 @@ def adjust_pending_orders_to_max_risk(inv_id=None):
         # =====================================================
         # STEP 2: Load signals.json to find orders with liquidator flags
         # =====================================================
-        if not signals_path.exists():
+        if not document_exists(signals_path):
             print(f"  └─  signals.json not found at {signals_path}")
             continue
         
         try:
-            with open(signals_path, 'r', encoding='utf-8') as f:
-                signals_data = json.load(f)
+            signals_data = load_document(signals_path)
             print(f"  └─ 📂 Loaded signals.json")
         except Exception as e:
             print(f"  └─  Failed to load signals.json: {e}")
@@ -14170,7 +14111,8 @@ def adjust_pending_orders_to_max_risk(inv_id=None):
         acc = mt5.account_info()
         if acc is None or acc.login != login_id:
             print(f"      🔑 Logging into account...")
-            if not mt5.login(login_id, password=broker_cfg["PASSWORD"], server=broker_cfg["SERVER"]):
+            reset_resolver()
+            if not ensure_investor_session(broker_cfg):
                 error = mt5.last_error()
                 print(f"  └─  Login failed: {error}")
                 stats["adjustment_failures"] += 1
@@ -14208,6 +14150,9 @@ def adjust_pending_orders_to_max_risk(inv_id=None):
         print(f"  └─ 💰 Maximum Risk Target: ${max_risk:.2f}")
         stats["max_risk_values"][user_brokerid] = max_risk
         
+        # Contract specs / profit estimates for this account (the exit searches below call it many times)
+        risk_engine = RiskEngine()
+        
         # =====================================================
         # STEP 4: Get all live pending orders
         # =====================================================
@@ -14333,9 +14278,9 @@ def adjust_pending_orders_to_max_risk(inv_id=None):
                     calc_type = mt5.ORDER_TYPE_BUY if is_buy else mt5.ORDER_TYPE_SELL
                     
                     # =====================================================
-                    # STEP 6: Calculate current risk using MT5's order_calc_profit (same as orders_risk_correction)
+                    # STEP 6: Calculate current risk with the risk engine (same as orders_risk_correction)
                     # =====================================================
-                    sl_profit = mt5.order_calc_profit(calc_type, symbol, sig_volume, sig_entry, sig_exit)
+                    sl_profit = risk_engine.calc_profit(calc_type, symbol, sig_volume, sig_entry, sig_exit)
                     
                     if sl_profit is None:
                         print(f"        ⚠️ Could not calculate risk for order at {sig_entry}")
@@ -14401,7 +14346,7 @@ def adjust_pending_orders_to_max_risk(inv_id=None):
                             continue
                         
                         # Check if prices match (allow small tolerance based on symbol)
-                        symbol_info = mt5.symbol_info(symbol)
+                        symbol_info = risk_engine.symbol_info(symbol)
                         if symbol_info:
                             tolerance = symbol_info.point * 10  # 10 points tolerance
                             if abs(pending_price - sig_entry) > tolerance:
@@ -14432,7 +14377,7 @@ def adjust_pending_orders_to_max_risk(inv_id=None):
                     # STEP 8: Calculate new exit price to achieve EXACT max risk
                     # =====================================================
                     # Get symbol info for price rounding
-                    symbol_info = mt5.symbol_info(symbol)
+                    symbol_info = risk_engine.symbol_info(symbol)
                     if not symbol_info:
                         print(f"          ⚠️ Could not get symbol info for {symbol}")
                         investor_orders_skipped_error += 1
@@ -14459,7 +14404,7 @@ def adjust_pending_orders_to_max_risk(inv_id=None):
                         # Binary search for the exit price that gives exactly max_risk
                         for _ in range(50):  # Limit iterations
                             test_exit = (min_exit + max_exit) / 2
-                            test_risk = mt5.order_calc_profit(calc_type, symbol, sig_volume, sig_entry, test_exit)
+                            test_risk = risk_engine.calc_profit(calc_type, symbol, sig_volume, sig_entry, test_exit)
                             
                             if test_risk is None:
                                 break
@@ -14498,7 +14443,7 @@ def adjust_pending_orders_to_max_risk(inv_id=None):
                         # Binary search for the exit price that gives exactly max_risk
                         for _ in range(50):  # Limit iterations
                             test_exit = (min_exit + max_exit) / 2
-                            test_risk = mt5.order_calc_profit(calc_type, symbol, sig_volume, sig_entry, test_exit)
+                            test_risk = risk_engine.calc_profit(calc_type, symbol, sig_volume, sig_entry, test_exit)
                             
                             if test_risk is None:
                                 break
@@ -14531,7 +14476,7 @@ def adjust_pending_orders_to_max_risk(inv_id=None):
                     new_exit = round(new_exit, digits)
                     
                     # Verify the new risk calculation
-                    new_risk = mt5.order_calc_profit(calc_type, symbol, sig_volume, sig_entry, new_exit)
+                    new_risk = risk_engine.calc_profit(calc_type, symbol, sig_volume, sig_entry, new_exit)
                     if new_risk is not None:
                         new_risk_abs = abs(new_risk)
                         print(f"          📊 Calculated adjustment:")
@@ -14631,8 +14576,7 @@ def adjust_pending_orders_to_max_risk(inv_id=None):
         # =====================================================
         if changes_made_to_signals:
             try:
-                with open(signals_path, 'w', encoding='utf-8') as f:
-                    json.dump(signals_data, f, indent=4)
+                save_document(signals_path, signals_data)
                 print(f"\n  └─ ✅ Updated signals.json with adjusted orders")
             except Exception as e:
                 print(f"\n  └─  Failed to save signals.json: {e}")
@@ -14684,7 +14628,7 @@ def adjust_pending_orders_to_max_risk(inv_id=None):
     print(f"\n{'='*10} 🏁 MAX RISK ADJUSTMENT COMPLETE {'='*10}\n")
     return stats  
 
-def apply_dynamic_breakeven(inv_id=None):
+def apply_dynamic_breakeven(inv_id=None, ctx=None):
     """
     Function: Dynamically moves stop loss to breakeven or partial profit levels based on
     running profit reward multiples. Uses breakeven_dictionary from accountmanagement.json
@@ -14735,8 +14679,7 @@ def apply_dynamic_breakeven(inv_id=None):
 
         # --- LOAD CONFIG AND CHECK SETTINGS ---
         try:
-            with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = read_json(acc_mgmt_path, ctx)
             
             # Check if breakeven is enabled
             settings = config.get("settings", {})
@@ -14780,7 +14723,8 @@ def apply_dynamic_breakeven(inv_id=None):
         acc = mt5.account_info()
         if acc is None or acc.login != login_id:
             print(f"      🔑 Logging into account...")
-            if not mt5.login(login_id, password=broker_cfg["PASSWORD"], server=broker_cfg["SERVER"]):
+            reset_resolver()
+            if not ensure_investor_session(broker_cfg):
                 error = mt5.last_error()
                 print(f"  └─  login failed: {error}")
                 stats["positions_error"] += 1
@@ -15152,20 +15096,12 @@ def update_investor_info(inv_id=None):
         else:
             print(f"    ⚠️  activities.json not found in {inv_root}")
         
-        # Look for tradeshistory.json directly in investor root folder
-        history_path = inv_root / "tradeshistory.json"
-        if history_path.exists():
-            try:
-                with open(history_path, 'r', encoding='utf-8') as f:
-                    authorized_trades = json.load(f)
-                for trade in authorized_trades:
-                    if 'ticket' in trade and trade['ticket']:
-                        authorized_tickets.add(int(trade['ticket']))
-                print(f"    📋 Found {len(authorized_tickets)} authorized tickets in tradeshistory.json")
-            except Exception as e:
-                print(f"    ⚠️  Error reading tradeshistory.json: {e}")
-        else:
-            print(f"    ⚠️  tradeshistory.json not found in {inv_root}")
+        # Authorized tickets come from the trade history in the state database
+        try:
+            authorized_tickets = get_investor_state(STATE_DB_PATH, user_brokerid, inv_root).trade_tickets()
+            print(f"    📋 Found {len(authorized_tickets)} authorized tickets in trade history")
+        except Exception as e:
+            print(f"    ⚠️  Error reading trade history: {e}")
 
         # Fallback to accountmanagement.json if execution_start_date not found
         if not execution_start_date:
@@ -15190,7 +15126,8 @@ def update_investor_info(inv_id=None):
                 
                 if start_datetime:
                     print(f"    🔍 Looking for trades from: {start_datetime.strftime('%Y-%m-%d')}")
-                    all_deals = mt5.history_deals_get(start_datetime, datetime.now())
+                    ledger = get_deal_ledger(inv_root, start_datetime)
+                    all_deals = ledger.deals if ledger else mt5.history_deals_get(start_datetime, datetime.now())
                     
                     if all_deals and len(all_deals) > 0:
                         all_deals = sorted(list(all_deals), key=lambda x: x.time)
@@ -15610,37 +15547,38 @@ def process_single_invest(inv_folder):
     if not broker_cfg:
         return account_stats
 
-    import random
-    import time
-    time.sleep(random.uniform(0.1, 2.0)) 
+    # One process per terminal binary at a time; other terminals are not held up
+    admission = TerminalAdmission(broker_cfg["TERMINAL_PATH"])
+    if not admission.acquire(timeout=TERMINAL_ADMISSION_TIMEOUT):
+        return account_stats
     
-    login_id = int(broker_cfg['LOGIN_ID'])
-    mt5_path = broker_cfg["TERMINAL_PATH"]
-
     try:
-        if not mt5.initialize(path=mt5_path, timeout=180000):
+        # Reuses this worker's logged-in session when it is still healthy
+        if not ensure_investor_session(broker_cfg):
             return account_stats
 
-        acc = mt5.account_info()
-        if acc is None or acc.login != login_id:
-            if not mt5.login(login_id, password=broker_cfg["PASSWORD"], server=broker_cfg["SERVER"]):
-                mt5.shutdown()
-                return account_stats
+        # Configs parsed once for the whole cycle and handed to every stage
+        ctx = InvestorContext.load(inv_id, Path(INV_PATH) / inv_id, NORMALIZE_SYMBOLS_PATH)
+
+        # signals.json / symbols_prices.json edits stay in memory and are flushed atomically
+        begin_document_cycle()
             
         #timeframe_countdown(inv_id=inv_id)
 
         # STEP 0: SYMBOL AUTHORIZATION FILTER
-        martingale(inv_id=inv_id)
+        martingale(inv_id=inv_id, ctx=ctx)
         
         
-        mt5.shutdown()
+        # Session is left open for the next cycle on this terminal
         account_stats["success"] = True
         
     except Exception as e:
-        try:
-            mt5.shutdown()
-        except:
-            pass
+        # Drop a possibly broken session; the next cycle reconnects
+        close_session()
+    finally:
+        flush_trade_mirrors()
+        end_document_cycle()
+        admission.release()
     
     return account_stats
 
@@ -15689,55 +15627,57 @@ def process_single_investor(inv_folder):
     if not broker_cfg:
         return account_stats
 
-    import random
-    import time
-    time.sleep(random.uniform(0.1, 2.0)) 
+    # One process per terminal binary at a time; other terminals are not held up
+    admission = TerminalAdmission(broker_cfg["TERMINAL_PATH"])
+    if not admission.acquire(timeout=TERMINAL_ADMISSION_TIMEOUT):
+        # Terminal busy: worth another attempt after the backoff
+        account_stats["retryable"] = True
+        return account_stats
     
-    login_id = int(broker_cfg['LOGIN_ID'])
-    mt5_path = broker_cfg["TERMINAL_PATH"]
-
     try:
-        if not mt5.initialize(path=mt5_path, timeout=180000):
+        # Reuses this worker's logged-in session when it is still healthy
+        if not ensure_investor_session(broker_cfg):
+            account_stats["retryable"] = True
             return account_stats
 
-        acc = mt5.account_info()
-        if acc is None or acc.login != login_id:
-            if not mt5.login(login_id, password=broker_cfg["PASSWORD"], server=broker_cfg["SERVER"]):
-                mt5.shutdown()
-                return account_stats
+        # Configs parsed once for the whole cycle and handed to every stage
+        ctx = InvestorContext.load(inv_id, Path(INV_PATH) / inv_id, NORMALIZE_SYMBOLS_PATH)
+
+        # signals.json / symbols_prices.json edits stay in memory and are flushed atomically
+        begin_document_cycle()
             
         #timeframe_countdown(inv_id=inv_id)
 
         # STEP 0: SYMBOL AUTHORIZATION FILTER
-        filter_stats = filter_unauthorized_symbols(inv_id=inv_id)
+        filter_stats = filter_unauthorized_symbols(inv_id=inv_id, ctx=ctx)
         account_stats["symbols_filtered"] = filter_stats.get("symbols_filtered", 0)
         account_stats["orders_filtered"] = filter_stats.get("orders_filtered", 0)
 
         # STEP 1: PRICE COLLECTION
-        price_stats = symbols_grid_prices(inv_id=inv_id)
+        price_stats = symbols_grid_prices(inv_id=inv_id, ctx=ctx)
         account_stats["price_collection_stats"] = price_stats
         account_stats["symbols_processed"] = price_stats.get("total_symbols", 0)
         account_stats["symbols_successful"] = price_stats.get("successful_symbols", 0)
         
         # STEP 1.5: FETCH 15-MINUTE CANDLES
-        candle_stats = fetch_15m_candles(inv_id=inv_id)
+        candle_stats = fetch_15m_candles(inv_id=inv_id, ctx=ctx)
         account_stats["candle_fetch_stats"] = candle_stats
         account_stats["current_candle_forming"] = candle_stats.get("current_candle_forming", False)
         
         # STEP 1.6: IDENTIFY FIRST CROSSER CANDLE
-        crosser_stats = identify_first_crosser_candle(inv_id=inv_id)
+        crosser_stats = identify_first_crosser_candle(inv_id=inv_id, ctx=ctx)
         account_stats["crosser_analysis_stats"] = crosser_stats
         account_stats["bid_wins"] = crosser_stats.get("bid_wins", 0)
         account_stats["ask_wins"] = crosser_stats.get("ask_wins", 0)
         
         # STEP 1.7: IDENTIFY TRAPPED CANDLES
-        trapped_stats = identify_trapped_candles(inv_id=inv_id)
+        trapped_stats = identify_trapped_candles(inv_id=inv_id, ctx=ctx)
         account_stats["trapped_analysis_stats"] = trapped_stats
         account_stats["trapped_candles_found"] = trapped_stats.get("total_trapped_candles_found", 0)
         account_stats["symbols_with_trapped"] = trapped_stats.get("symbols_with_trapped_candles", 0)
         
         # STEP 1.8: IDENTIFY LEVELS LIQUIDATOR CANDLE
-        liquidator_stats = identify_levels_liquidator_candle(inv_id=inv_id)
+        liquidator_stats = identify_levels_liquidator_candle(inv_id=inv_id, ctx=ctx)
         account_stats["liquidator_analysis_stats"] = liquidator_stats
         account_stats["symbols_with_liquidator"] = liquidator_stats.get("symbols_with_liquidator", 0)
         account_stats["liquidator_candles_found"] = liquidator_stats.get("symbols_with_liquidator", 0)
@@ -15745,56 +15685,63 @@ def process_single_investor(inv_folder):
         account_stats["bearish_liquidators"] = liquidator_stats.get("liquidator_candle_stats", {}).get("red_candles", 0)
         
         # STEP 1.9: IDENTIFY RANGING ORDERS CANDLES
-        ranging_stats = identify_ranging_orders_candles(inv_id=inv_id)
+        ranging_stats = identify_ranging_orders_candles(inv_id=inv_id, ctx=ctx)
         account_stats["ranging_analysis_stats"] = ranging_stats
         account_stats["symbols_ranging"] = ranging_stats.get("symbols_ranging", 0)
         account_stats["avg_ranging_cycles"] = ranging_stats.get("ranging_stats", {}).get("avg_cycle_count", 0)
 
 
         # STEP 1.6.5: FLAG ORDERS WITHOUT CROSSER CANDLE
-        account_stats["orders_config_stats"] = orders_configuration(inv_id=inv_id)
+        account_stats["orders_config_stats"] = orders_configuration(inv_id=inv_id, ctx=ctx)
 
         # STEP 1.6.5: LIQUIDATOR LEVELS
-        account_stats["liquidator_config_stats"] = liquidator_configuration(inv_id=inv_id)
+        account_stats["liquidator_config_stats"] = liquidator_configuration(inv_id=inv_id, ctx=ctx)
 
         
 
+        # Analysis is done: publish its signals/prices before the slower order stages
+        flush_documents()
+
         # STEP 2: ORDER PLACEMENT
-        order_stats = manage_single_position_and_pending(inv_id=inv_id)
-        martingale(inv_id=inv_id)
-        order_stats = place_signals_orders_accounts(inv_id=inv_id)
-        order_stats = manage_single_position_and_pending(inv_id=inv_id)
-        apply_dynamic_breakeven(inv_id=inv_id)
+        order_stats = manage_single_position_and_pending(inv_id=inv_id, ctx=ctx)
+        martingale(inv_id=inv_id, ctx=ctx)
+        order_stats = place_signals_orders_accounts(inv_id=inv_id, ctx=ctx)
+        order_stats = manage_single_position_and_pending(inv_id=inv_id, ctx=ctx)
+        apply_dynamic_breakeven(inv_id=inv_id, ctx=ctx)
         account_stats["order_placement_stats"] = order_stats
         account_stats["orders_placed"] = order_stats.get("orders_placed", 0)
         account_stats["counter_orders_placed"] = order_stats.get("counter_orders_placed", 0)
         account_stats["total_active_orders"] = order_stats.get("total_active_orders", 0)
 
-        adjust_pending_orders_to_max_risk(inv_id=inv_id)
+        adjust_pending_orders_to_max_risk(inv_id=inv_id, ctx=ctx)
 
         # STEP 4: RISK AUDIT
-        audit_stats = check_pending_orders_risk(inv_id=inv_id)
+        audit_stats = check_pending_orders_risk(inv_id=inv_id, ctx=ctx)
         account_stats["risk_audit_stats"] = audit_stats
         account_stats["orders_removed"] = audit_stats.get("orders_removed", 0)
 
-        correction_stats = orders_risk_correction(inv_id=inv_id)
+        correction_stats = orders_risk_correction(inv_id=inv_id, ctx=ctx)
         account_stats["risk_correction_stats"] = correction_stats
         account_stats["orders_adjusted"] = correction_stats.get("orders_adjusted", 0)
         
-        mt5.shutdown()
+        # Session is left open for the next cycle on this terminal
         account_stats["success"] = True
         
     except Exception as e:
-        try:
-            mt5.shutdown()
-        except:
-            pass
+        # Drop a possibly broken session; the next cycle reconnects
+        account_stats["error"] = f"{type(e).__name__}: {e}"
+        account_stats["retryable"] = True
+        close_session()
+    finally:
+        flush_trade_mirrors()
+        end_document_cycle()
+        admission.release()
     
     return account_stats
 
 def place_grid_orders_parallel():
     """
-    ORCHESTRATOR: Spawns multiple processes to handle  investors in parallel.
+    ORCHESTRATOR: Runs investors in parallel on the bounded terminal-worker scheduler.
     Uses the  account initialization logic.
     """
     inv_base_path = Path(INV_PATH)
@@ -15805,12 +15752,61 @@ def place_grid_orders_parallel():
         return False
 
     print(f" 📋 Found {len(investor_folders)} investors to process")
-    print(f" 🔧 Creating pool with {len(investor_folders)} processes...")
     
-    # Create a pool based on the number of accounts
-    # This will run 'process_single_investor' for all folders at the same time
-    with mp.Pool(processes=len(investor_folders)) as pool:
-        results = pool.map(process_single_investor, investor_folders)
+    # Only configured investors with a readable accountmanagement.json get a worker
+    eligible_investors = []
+    skipped_investors = []
+    
+    for inv_folder in investor_folders:
+        inv_id = inv_folder.name
+        acc_mgmt_path = inv_folder / "accountmanagement.json"
+        
+        if not usersdictionary.get(inv_id, {}).get("TERMINAL_PATH"):
+            print(f" ⚠️  {inv_id}: No broker config / TERMINAL_PATH found. Skipping.")
+            skipped_investors.append(inv_id)
+            continue
+        
+        if not acc_mgmt_path.exists():
+            print(f" ⚠️  {inv_id}: No accountmanagement.json found. Skipping.")
+            skipped_investors.append(inv_id)
+            continue
+            
+        try:
+            with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
+                json.load(f)
+            eligible_investors.append(inv_folder)
+        except Exception as e:
+            print(f" ❌ {inv_id}: Error reading accountmanagement.json: {e}. Skipping.")
+            skipped_investors.append(inv_id)
+            continue
+    
+    if not eligible_investors:
+        print(f"\n └─ 🔘 No eligible investors found.")
+        return False
+    
+    print(f"\n 📊 Processing {len(eligible_investors)} out of {len(investor_folders)} investors")
+    if skipped_investors:
+        print(f"    Skipped: {', '.join(skipped_investors[:5])}{'...' if len(skipped_investors) > 5 else ''}")
+    
+    # Bounded by cores and terminal count; overrunning, crashed and transiently failed
+    # (retryable) investors are requeued with backoff
+    jobs = [
+        (usersdictionary[inv_folder.name]["TERMINAL_PATH"], process_single_investor, (inv_folder,))
+        for inv_folder in eligible_investors
+    ]
+    terminal_count = len(set(path for path, _, _ in jobs))
+    max_workers = MAX_PARALLEL_INVESTORS or default_concurrency(terminal_count)
+    print(f" 🔧 Scheduling {len(jobs)} investors on {terminal_count} terminals | max {max_workers} in parallel...")
+    
+    results = get_supervisor().run_scheduled(
+        jobs,
+        max_workers=max_workers,
+        deadline=INVESTOR_DEADLINE_SECONDS,
+        max_attempts=INVESTOR_MAX_ATTEMPTS,
+        backoff=INVESTOR_RETRY_BACKOFF_SECONDS,
+        # Login / admission / MT5 failures are requeued; a missing config would fail the same way again
+        is_success=lambda stats: not stats.get("retryable")
+    )
 
     #time.sleep(1)
     #place_grid_orders_parallel()
@@ -0,0 +1,136 @@
+import os
+import sys
+import json
+import time
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+
+# Changes recorded while a deferred batch is open in this process (None = apply immediately)
+_DEFERRED = None
+
+
+def registry_set(path, inv_id, value):
+    """Change record: registry[inv_id] = value."""
+    return ("set", str(path), inv_id, value)
+
+
+def registry_remove(path, inv_id):
+    """Change record: drop inv_id from the registry (dict or legacy list-of-dicts layout)."""
+    return ("remove", str(path), inv_id, None)
+
+
+def read_registry(path, default=None):
+    """Parsed registry file, or default ({}) when missing or unreadable."""
+    if not os.path.exists(path):
+        return {} if default is None else default
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return {} if default is None else default
+
+
+def write_registry(path, data):
+    """Atomic replace, so readers never see a half-written registry."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+class _RegistryLock:
+    """Exclusive OS lock next to the registry, held for one read-modify-write."""
+
+    def __init__(self, path):
+        self.lock_path = f"{path}.lock"
+        self.file = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.lock_path) or ".", exist_ok=True)
+        self.file = open(self.lock_path, "a+b")
+        while True:
+            try:
+                if sys.platform == "win32":
+                    self.file.seek(0)
+                    msvcrt.locking(self.file.fileno(), msvcrt.LK_NBLCK, 1)
+                else:
+                    fcntl.flock(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return self
+            except OSError:
+                time.sleep(0.05)
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if sys.platform == "win32":
+                self.file.seek(0)
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        except OSError:
+            pass
+        self.file.close()
+        return False
+
+
+def _apply(data, op, inv_id, value):
+    if op == "set":
+        if isinstance(data, list):
+            data = {k: v for item in data if isinstance(item, dict) for k, v in item.items()}
+        data[inv_id] = value
+    elif isinstance(data, list):
+        data = [item for item in data if not (isinstance(item, dict) and inv_id in item)]
+    else:
+        data.pop(inv_id, None)
+    return data
+
+
+def apply_registry_changes(changes):
+    """
+    Apply change records in order with one locked read-modify-write and one
+    atomic write per registry file. Returns {path: number of changes applied}.
+    """
+    by_path = {}
+    for change in changes or []:
+        by_path.setdefault(change[1], []).append(change)
+
+    applied = {}
+    for path, path_changes in by_path.items():
+        try:
+            with _RegistryLock(path):
+                data = read_registry(path)
+                for op, _, inv_id, value in path_changes:
+                    data = _apply(data, op, inv_id, value)
+                write_registry(path, data)
+            applied[path] = len(path_changes)
+        except Exception as e:
+            print(f" ❌ Could not update registry {path}: {e}")
+    return applied
+
+
+def submit_registry_changes(changes):
+    """
+    Hand change records to the single writer: buffered while this process
+    runs a deferred batch (an investor job), applied right away otherwise.
+    """
+    if _DEFERRED is not None:
+        _DEFERRED.extend(changes)
+        return {}
+    return apply_registry_changes(changes)
+
+
+def defer_registry_changes():
+    """Start buffering this process's registry changes (investor worker side)."""
+    global _DEFERRED
+    _DEFERRED = []
+
+
+def collect_deferred_registry_changes():
+    """Stop buffering and return the recorded changes for the orchestrator to apply."""
+    global _DEFERRED
+    changes, _DEFERRED = _DEFERRED or [], None
+    return changes
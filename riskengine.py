@@ -0,0 +1,210 @@
+import numpy as np
+import MetaTrader5 as mt5
+
+
+# A tick-value estimate is trusted for a (symbol, side, win/loss) once it agrees
+# with the terminal's order_calc_profit within max(SPOT_CHECK_MIN_USD, SPOT_CHECK_TOLERANCE * |profit|)
+SPOT_CHECK_TOLERANCE = 0.005
+SPOT_CHECK_MIN_USD = 0.01
+
+BUY_TYPES = (
+    mt5.ORDER_TYPE_BUY,
+    mt5.ORDER_TYPE_BUY_LIMIT,
+    mt5.ORDER_TYPE_BUY_STOP,
+    mt5.ORDER_TYPE_BUY_STOP_LIMIT,
+)
+
+
+def is_buy_type(order_type):
+    """True for BUY positions and BUY pending order types (position.type BUY == ORDER_TYPE_BUY)."""
+    return order_type in BUY_TYPES
+
+
+class RiskEngine:
+    """
+    Dollar profit/risk of price moves for the logged-in account without one
+    terminal round trip per order.
+
+    Contract specs (tick size, tick value for winning and losing moves,
+    contract size, currencies) are read once per symbol. A move is then worth
+    move / tick_size * tick_value * volume, which is what order_calc_profit
+    returns for any symbol whose profit currency is the account currency or
+    is converted at the terminal's current rate. The first estimate for each
+    (symbol, side, win/loss) is checked against order_calc_profit; groups that
+    disagree, and symbols quoted against the account currency (USDJPY on a
+    USD account: profit is divided by the close price), keep using the terminal.
+
+    Create one per investor run: specs and conversion rates are snapshots.
+    account_currency can be handed in from the cycle's InvestorContext;
+    otherwise it is asked from the terminal on first use.
+    """
+
+    def __init__(self, account_currency=None):
+        self._account_currency = account_currency
+        self._specs = {}
+        self._trusted = {}
+        self.stats = {"estimated": 0, "terminal_calls": 0}
+
+    # ----------------------------------------------------------------- specs
+    @property
+    def account_currency(self):
+        if self._account_currency is None:
+            acc = mt5.account_info()
+            self._account_currency = acc.currency if acc else ""
+        return self._account_currency
+
+    def symbol_info(self, symbol):
+        """mt5.symbol_info(symbol), asked once per engine."""
+        spec = self.spec(symbol)
+        return spec["info"] if spec else None
+
+    def spec(self, symbol):
+        """Cached contract spec of symbol, or None when the terminal does not know it."""
+        if symbol in self._specs:
+            return self._specs[symbol]
+
+        info = mt5.symbol_info(symbol)
+        spec = None
+        if info is not None:
+            tick_value = info.trade_tick_value
+            account_currency = self.account_currency
+            spec = {
+                "info": info,
+                "tick_size": info.trade_tick_size,
+                "tick_value_profit": getattr(info, "trade_tick_value_profit", 0) or tick_value,
+                "tick_value_loss": getattr(info, "trade_tick_value_loss", 0) or tick_value,
+                "contract_size": info.trade_contract_size,
+                "currency_profit": info.currency_profit,
+                "currency_base": info.currency_base,
+                # Profit in the base currency = account currency depends on the close price
+                "linear": (info.trade_tick_size > 0 and tick_value > 0
+                           and not (account_currency
+                                    and info.currency_profit != account_currency
+                                    and info.currency_base == account_currency)),
+            }
+        self._specs[symbol] = spec
+        return spec
+
+    # -------------------------------------------------------------- terminal
+    def _terminal(self, calc_type, symbol, volume, price_open, price_close):
+        self.stats["terminal_calls"] += 1
+        return mt5.order_calc_profit(calc_type, symbol, float(volume), float(price_open), float(price_close))
+
+    def _spot_check(self, symbol, is_buy, gain, volume, price_open, price_close, estimate):
+        """
+        One-time comparison of an estimate with the terminal for this group.
+        Returns (trusted, exact profit of this very move or None).
+        """
+        key = (symbol, bool(is_buy), bool(gain))
+        trusted = self._trusted.get(key)
+        if trusted is not None:
+            return trusted, None
+
+        calc_type = mt5.ORDER_TYPE_BUY if is_buy else mt5.ORDER_TYPE_SELL
+        exact = self._terminal(calc_type, symbol, volume, price_open, price_close)
+        if exact is None:
+            # Terminal could not answer either; decide on the next move
+            return False, None
+        trusted = abs(exact - estimate) <= max(SPOT_CHECK_MIN_USD, SPOT_CHECK_TOLERANCE * abs(exact))
+        if not trusted:
+            print(f"      ⚠️  {symbol}: tick-value estimate ${estimate:.2f} vs terminal ${exact:.2f} - using the terminal for this symbol/side")
+        self._trusted[key] = trusted
+        return trusted, exact
+
+    # ----------------------------------------------------------------- scalar
+    def calc_profit(self, calc_type, symbol, volume, price_open, price_close):
+        """Drop-in for mt5.order_calc_profit: same arguments, profit in account currency or None."""
+        is_buy = calc_type == mt5.ORDER_TYPE_BUY
+        spec = self.spec(symbol)
+        if spec is None or not spec["linear"]:
+            return self._terminal(calc_type, symbol, volume, price_open, price_close)
+
+        move = (price_close - price_open) if is_buy else (price_open - price_close)
+        if move == 0:
+            return 0.0
+        gain = move > 0
+        tick_value = spec["tick_value_profit"] if gain else spec["tick_value_loss"]
+        estimate = move / spec["tick_size"] * tick_value * volume
+
+        trusted, exact = self._spot_check(symbol, is_buy, gain, volume, price_open, price_close, estimate)
+        if exact is not None:
+            return exact
+        if not trusted:
+            return self._terminal(calc_type, symbol, volume, price_open, price_close)
+        self.stats["estimated"] += 1
+        return estimate
+
+    # ----------------------------------------------------------------- arrays
+    def calc_profits(self, is_buy, symbols, volumes, prices_open, prices_close):
+        """
+        Vectorised calc_profit over equally long sequences. Returns a float64
+        array, NaN where the profit could not be calculated.
+        """
+        is_buy = np.asarray(is_buy, dtype=bool)
+        volumes = np.asarray(volumes, dtype=np.float64)
+        prices_open = np.asarray(prices_open, dtype=np.float64)
+        prices_close = np.asarray(prices_close, dtype=np.float64)
+        count = len(is_buy)
+        result = np.full(count, np.nan)
+        if count == 0:
+            return result
+
+        unique_symbols, symbol_index = np.unique(np.asarray(symbols, dtype=object).astype(str), return_inverse=True)
+        specs = [self.spec(s) for s in unique_symbols]
+        usable = np.array([bool(s and s["linear"]) for s in specs])
+        tick_size = np.array([s["tick_size"] if s and s["linear"] else 1.0 for s in specs])[symbol_index]
+        value_profit = np.array([s["tick_value_profit"] if s else 0.0 for s in specs])[symbol_index]
+        value_loss = np.array([s["tick_value_loss"] if s else 0.0 for s in specs])[symbol_index]
+
+        move = np.where(is_buy, prices_close - prices_open, prices_open - prices_close)
+        gain = move > 0
+        estimates = move / tick_size * np.where(gain, value_profit, value_loss) * volumes
+        result[move == 0] = 0.0
+
+        exact_rows = []
+        pending = (move != 0) & usable[symbol_index]
+        exact_rows.extend(np.nonzero((move != 0) & ~usable[symbol_index])[0])
+
+        # One spot check per (symbol, side, win/loss) group, on its largest move
+        group_key = symbol_index * 4 + is_buy * 2 + gain
+        for key in np.unique(group_key[pending]):
+            rows = np.nonzero(pending & (group_key == key))[0]
+            probe = rows[np.argmax(np.abs(move[rows]))]
+            trusted, exact = self._spot_check(unique_symbols[symbol_index[probe]], is_buy[probe], gain[probe],
+                                              volumes[probe], prices_open[probe], prices_close[probe],
+                                              float(estimates[probe]))
+            if exact is not None:
+                result[probe] = exact
+                rows = rows[rows != probe]
+            if trusted:
+                result[rows] = estimates[rows]
+                self.stats["estimated"] += len(rows)
+            else:
+                exact_rows.extend(rows)
+
+        for row in exact_rows:
+            calc_type = mt5.ORDER_TYPE_BUY if is_buy[row] else mt5.ORDER_TYPE_SELL
+            profit = self._terminal(calc_type, unique_symbols[symbol_index[row]], volumes[row],
+                                    prices_open[row], prices_close[row])
+            if profit is not None:
+                result[row] = profit
+        return result
+
+    def leg_profits(self, items, leg="sl"):
+        """
+        Profit of every MT5 order/position in items if it closes at its SL
+        (leg="sl") or TP (leg="tp"), all in one pass. Pending orders use
+        volume_initial, positions use volume. Returns {ticket: profit or None};
+        items without that leg set are left out.
+        """
+        items = [item for item in items or () if getattr(item, leg, 0)]
+        if not items:
+            return {}
+        profits = self.calc_profits(
+            [is_buy_type(item.type) for item in items],
+            [item.symbol for item in items],
+            [item.volume_initial if hasattr(item, "volume_initial") else item.volume for item in items],
+            [item.price_open for item in items],
+            [getattr(item, leg) for item in items],
+        )
+        return {item.ticket: (None if np.isnan(p) else float(p)) for item, p in zip(items, profits)}
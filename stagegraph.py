@@ -0,0 +1,222 @@
+import os
+import glob
+import json
+import time
+import hashlib
+from mt5session import get_supervisor, default_concurrency
+
+
+# Stage outcomes; dependents only run after DONE / UNCHANGED
+DONE = "done"
+UNCHANGED = "unchanged"
+FAILED = "failed"
+TIMEOUT = "timeout"
+SKIPPED = "skipped"
+
+
+def files_fingerprint(*patterns):
+    """
+    Cheap fingerprint of every file matching the glob patterns (path, size,
+    mtime - contents are not read). Any added, removed or rewritten file
+    changes it.
+    """
+    digest = hashlib.sha1()
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern, recursive=True)):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            digest.update(f"{path}|{st.st_size}|{st.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class Stage:
+    """
+    One node of a StageGraph: func(*args) run in the worker of `lane`.
+
+    lane    - worker the stage runs in; MT5 stages use their terminal path so
+              one terminal is never driven by two stages at once
+    deps    - names of stages that must finish (done/unchanged) first
+    soft_deps - names of stages that must be over first, whatever their
+              outcome; a failed, timed-out or skipped one does not skip
+              this stage
+    timeout - seconds before the stage's worker is killed
+    inputs  - callable returning a fingerprint of what the stage reads; when
+              it equals the fingerprint of the last successful run the stage
+              is not run again (UNCHANGED)
+    """
+
+    __slots__ = ("name", "func", "args", "deps", "soft_deps", "lane", "timeout", "inputs")
+
+    def __init__(self, name, func, args=(), deps=(), lane=None, timeout=None, inputs=None, soft_deps=()):
+        self.name = name
+        self.func = func
+        self.args = tuple(args)
+        self.deps = tuple(deps)
+        self.soft_deps = tuple(soft_deps)
+        self.lane = lane or name
+        self.timeout = timeout
+        self.inputs = inputs
+
+
+class StageGraph:
+    """
+    Dependency graph of pipeline stages, run on the terminal-worker supervisor.
+
+    A stage is dispatched as soon as its own dependencies are through, so
+    broker A's analysis overlaps broker B's data fetch instead of every step
+    waiting for the slowest broker. Among ready stages the one heading the
+    longest remaining chain goes first. A failed or timed-out stage skips
+    everything downstream of it and nothing else - except stages that only
+    list it in soft_deps, which run once it is over either way.
+
+    At most max_workers lane workers stay alive: a lane without a worker
+    evicts the least recently used idle one (SessionSupervisor.make_room),
+    and workers of lanes no longer in the graph are stopped after the run.
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, name, func, args=(), deps=(), lane=None, timeout=None, inputs=None, soft_deps=()):
+        if name in self.stages:
+            raise ValueError(f"Stage {name} added twice")
+        self.stages[name] = Stage(name, func, args, deps, lane, timeout, inputs, soft_deps)
+        return name
+
+    def _chain_lengths(self):
+        """Stage name -> number of stages on its longest downstream path (itself included); checks the graph."""
+        dependents = {name: [] for name in self.stages}
+        for stage in self.stages.values():
+            for dep in stage.deps + stage.soft_deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage {stage.name} depends on unknown stage {dep}")
+                dependents[dep].append(stage.name)
+
+        lengths = {}
+        visiting = set()
+
+        def length(name):
+            if name in lengths:
+                return lengths[name]
+            if name in visiting:
+                raise ValueError(f"Dependency cycle through stage {name}")
+            visiting.add(name)
+            lengths[name] = 1 + max((length(d) for d in dependents[name]), default=0)
+            visiting.discard(name)
+            return lengths[name]
+
+        for name in self.stages:
+            length(name)
+        return lengths
+
+    @staticmethod
+    def _read_state(state_path):
+        if not state_path or not os.path.exists(state_path):
+            return {}
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    @staticmethod
+    def _write_state(state_path, state):
+        if not state_path:
+            return
+        os.makedirs(os.path.dirname(state_path) or ".", exist_ok=True)
+        tmp_path = f"{state_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=4)
+        os.replace(tmp_path, state_path)
+
+    def run(self, max_workers=None, state_path=None, supervisor=None):
+        """
+        Run the graph once. state_path keeps the input fingerprints of
+        successful runs between cycles (skip-if-unchanged).
+
+        Returns {stage name: {"status", "seconds", "result" | "error"}}.
+        """
+        supervisor = supervisor or get_supervisor()
+        chain = self._chain_lengths()
+        lanes = {stage.lane for stage in self.stages.values()}
+        max_workers = max_workers or default_concurrency(len(lanes))
+        state = self._read_state(state_path)
+
+        outcome = {}
+        fingerprints = {}
+        waiting = sorted(self.stages, key=lambda name: -chain[name])
+        in_flight = {}  # job_id -> (name, started)
+
+        def finish(name, status, seconds=0.0, **extra):
+            outcome[name] = dict(status=status, seconds=round(seconds, 2), **extra)
+            mark = {DONE: "✅", UNCHANGED: "⏭️ ", SKIPPED: "⏭️ ", TIMEOUT: "⏱️ "}.get(status, "❌")
+            print(f" {mark} [{name}] {status} ({seconds:.1f}s)")
+            if status == DONE and name in fingerprints:
+                state[name] = {"fingerprint": fingerprints[name], "finished_at": time.time()}
+
+        while waiting or in_flight:
+            busy = {self.stages[name].lane for name, _ in in_flight.values()}
+            now = time.monotonic()
+
+            for name in list(waiting):
+                stage = self.stages[name]
+                dep_status = [outcome.get(dep, {}).get("status") for dep in stage.deps]
+                if any(s in (FAILED, TIMEOUT, SKIPPED) for s in dep_status):
+                    waiting.remove(name)
+                    finish(name, SKIPPED, error="upstream stage did not complete")
+                    continue
+                if any(s is None for s in dep_status):
+                    continue
+                if any(dep not in outcome for dep in stage.soft_deps):
+                    continue
+
+                if stage.inputs is not None and name not in fingerprints:
+                    try:
+                        fingerprints[name] = stage.inputs()
+                    except Exception as e:
+                        print(f" ⚠️  [{name}] Could not fingerprint inputs: {e}")
+                        fingerprints[name] = None
+                    if fingerprints[name] is not None and state.get(name, {}).get("fingerprint") == fingerprints[name]:
+                        waiting.remove(name)
+                        finish(name, UNCHANGED)
+                        continue
+
+                if len(in_flight) >= max_workers or stage.lane in busy:
+                    continue
+                if not supervisor.make_room(stage.lane, busy, max_workers):
+                    continue
+                waiting.remove(name)
+                job_id = supervisor.submit(stage.lane, stage.func, *stage.args)
+                in_flight[job_id] = (name, now)
+                busy.add(stage.lane)
+
+            if not in_flight:
+                continue
+
+            # Wait for a result, but wake up for the next stage deadline
+            wake = [1.0]
+            for name, started in in_flight.values():
+                if self.stages[name].timeout:
+                    wake.append(started + self.stages[name].timeout - now)
+            for job_id, (ok, payload) in supervisor.collect(in_flight, timeout=max(0.05, min(wake)), first=True).items():
+                name, started = in_flight.pop(job_id)
+                seconds = time.monotonic() - started
+                if ok and payload is not False:
+                    finish(name, DONE, seconds, result=payload)
+                else:
+                    finish(name, FAILED, seconds, error=payload if not ok else "stage reported failure")
+
+            # Kill overrunning stages
+            now = time.monotonic()
+            for job_id, (name, started) in list(in_flight.items()):
+                stage = self.stages[name]
+                if stage.timeout and now - started > stage.timeout:
+                    in_flight.pop(job_id)
+                    supervisor.stop_worker(stage.lane, kill=True)
+                    finish(name, TIMEOUT, now - started, error=f"timeout of {stage.timeout}s exceeded")
+
+        supervisor.retire_workers(lanes)
+        self._write_state(state_path, state)
+        return outcome
@@ -0,0 +1,337 @@
+import os
+import json
+import sqlite3
+from pathlib import Path
+from datetime import datetime
+from documentcache import save_document, document_cycle_open
+
+
+STATE_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    inv_id      TEXT NOT NULL,
+    ticket      TEXT NOT NULL,
+    magic       INTEGER,
+    symbol      TEXT,
+    volume      REAL,
+    placed_time REAL,
+    status      TEXT,
+    record      TEXT NOT NULL,
+    PRIMARY KEY (inv_id, ticket)
+);
+CREATE INDEX IF NOT EXISTS trades_by_magic  ON trades (inv_id, magic);
+CREATE INDEX IF NOT EXISTS trades_by_placed ON trades (inv_id, placed_time);
+CREATE INDEX IF NOT EXISTS trades_by_symbol ON trades (inv_id, symbol, volume, placed_time);
+CREATE INDEX IF NOT EXISTS trades_by_status ON trades (inv_id, status);
+
+CREATE TABLE IF NOT EXISTS daily_stats (
+    inv_id TEXT NOT NULL,
+    day    TEXT NOT NULL,
+    record TEXT NOT NULL,
+    PRIMARY KEY (inv_id, day)
+);
+
+CREATE TABLE IF NOT EXISTS audits (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    inv_id       TEXT NOT NULL,
+    audited_at   TEXT NOT NULL,
+    unauthorized INTEGER NOT NULL,
+    record       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS audits_by_investor ON audits (inv_id, audited_at);
+
+CREATE TABLE IF NOT EXISTS imports (
+    inv_id      TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    imported_at TEXT NOT NULL,
+    PRIMARY KEY (inv_id, name)
+);
+"""
+
+# SQLite caps the number of ? parameters per statement (999 on older builds)
+_CHUNK = 500
+
+
+def _placed_time(record):
+    """placed_timestamp as epoch seconds, parsed the way the matching code always has."""
+    placed_ts = record.get('placed_timestamp')
+    if not placed_ts:
+        return None
+    try:
+        return datetime.fromisoformat(placed_ts.replace('Z', '+00:00')).timestamp()
+    except Exception:
+        return None
+
+
+def _magic(record):
+    magic = record.get('magic')
+    if not magic:
+        return None
+    try:
+        return int(magic)
+    except Exception:
+        return magic
+
+
+def _ticket_key(ticket):
+    return str(ticket)
+
+
+class StateStore:
+    """
+    Shared SQLite database (WAL mode) holding the per-investor records that
+    used to live in ever-growing JSON files: trade history, daily stats and
+    authorization audits. Every row carries inv_id, so cross-investor
+    reporting is a plain query.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            self.conn.execute(f"PRAGMA user_version={STATE_VERSION}")
+
+    def investor(self, inv_id, inv_root=None):
+        """InvestorState view; legacy JSON files under inv_root are imported the first time."""
+        state = InvestorState(self, inv_id)
+        if inv_root is not None:
+            state.import_legacy(inv_root)
+        return state
+
+    # ----------------------------------------------------------- reporting
+    def trade_counts(self):
+        """{inv_id: number of recorded trades} across all investors."""
+        return dict(self.conn.execute("SELECT inv_id, COUNT(*) FROM trades GROUP BY inv_id"))
+
+    def latest_audits(self):
+        """{inv_id: most recent audit record} across all investors."""
+        rows = self.conn.execute(
+            "SELECT inv_id, record FROM audits WHERE id IN (SELECT MAX(id) FROM audits GROUP BY inv_id)"
+        )
+        return {inv_id: json.loads(record) for inv_id, record in rows}
+
+
+class InvestorState:
+    """One investor's slice of the StateStore."""
+
+    def __init__(self, store, inv_id):
+        self.store = store
+        self.conn = store.conn
+        self.inv_id = inv_id
+
+    # -------------------------------------------------------------- import
+    def import_legacy(self, inv_root):
+        """One-time import of tradeshistory.json and daily_stats.json."""
+        inv_root = Path(inv_root)
+        for name, loader in (("tradeshistory.json", self._import_trades),
+                             ("daily_stats.json", self._import_daily_stats)):
+            if self.conn.execute("SELECT 1 FROM imports WHERE inv_id=? AND name=?",
+                                 (self.inv_id, name)).fetchone():
+                continue
+            path = inv_root / name
+            data = None
+            if path.exists():
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                except Exception as e:
+                    print(f" [{self.inv_id}] ⚠️  Could not import {path}: {e}")
+                    continue
+            with self.conn:
+                if data:
+                    loader(data)
+                self.conn.execute("INSERT OR REPLACE INTO imports VALUES (?, ?, ?)",
+                                  (self.inv_id, name, datetime.now().isoformat()))
+
+    def _import_trades(self, data):
+        items = data if isinstance(data, list) else list(data.values())
+        rows = []
+        for i, trade in enumerate(items):
+            if not isinstance(trade, dict):
+                continue
+            ticket = trade.get('ticket')
+            # Ticketless records are kept (for the mirror and counts) but never match
+            rows.append(self._row(trade, _ticket_key(ticket) if ticket else f"noticket:{i}"))
+        self._upsert(rows)
+
+    def _import_daily_stats(self, data):
+        if isinstance(data, dict):
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO daily_stats VALUES (?, ?, ?)",
+                [(self.inv_id, day, json.dumps(record)) for day, record in data.items()]
+            )
+
+    # -------------------------------------------------------------- trades
+    def _row(self, trade, key=None):
+        return (
+            self.inv_id, key or _ticket_key(trade.get('ticket')), _magic(trade),
+            trade.get('symbol'), trade.get('volume'), _placed_time(trade),
+            trade.get('status'), json.dumps(trade, default=str),
+        )
+
+    def _upsert(self, rows):
+        self.conn.executemany(
+            "INSERT INTO trades VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (inv_id, ticket) DO UPDATE SET magic=excluded.magic, symbol=excluded.symbol, "
+            "volume=excluded.volume, placed_time=excluded.placed_time, status=excluded.status, "
+            "record=excluded.record",
+            rows
+        )
+
+    def trade_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM trades WHERE inv_id=?", (self.inv_id,)).fetchone()[0]
+
+    def get_trade(self, ticket):
+        row = self.conn.execute("SELECT record FROM trades WHERE inv_id=? AND ticket=?",
+                                (self.inv_id, _ticket_key(ticket))).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def has_ticket(self, ticket):
+        return self.conn.execute("SELECT 1 FROM trades WHERE inv_id=? AND ticket=?",
+                                 (self.inv_id, _ticket_key(ticket))).fetchone() is not None
+
+    def has_magic(self, magic):
+        if not magic:
+            return False
+        return self.conn.execute("SELECT 1 FROM trades WHERE inv_id=? AND magic=? LIMIT 1",
+                                 (self.inv_id, magic)).fetchone() is not None
+
+    def trade_tickets(self):
+        """Set of recorded tickets (ints where possible)."""
+        tickets = set()
+        for record, in self.conn.execute("SELECT record FROM trades WHERE inv_id=?", (self.inv_id,)):
+            ticket = json.loads(record).get('ticket')
+            if ticket:
+                try:
+                    tickets.add(int(ticket))
+                except Exception:
+                    tickets.add(ticket)
+        return tickets
+
+    def magics(self):
+        return {m for m, in self.conn.execute(
+            "SELECT DISTINCT magic FROM trades WHERE inv_id=? AND magic IS NOT NULL", (self.inv_id,))}
+
+    def first_placed_between(self, from_time, to_time):
+        """Ticket of the first recorded trade placed in [from_time, to_time), or None."""
+        row = self.conn.execute(
+            "SELECT ticket FROM trades WHERE inv_id=? AND placed_time>=? AND placed_time<? ORDER BY rowid LIMIT 1",
+            (self.inv_id, from_time, to_time)
+        ).fetchone()
+        return row[0] if row else None
+
+    def first_symbol_volume_between(self, symbol, volume, from_time, to_time):
+        """Ticket of the first recorded symbol/volume trade placed in [from_time, to_time), or None."""
+        row = self.conn.execute(
+            "SELECT ticket FROM trades WHERE inv_id=? AND symbol=? AND volume=? "
+            "AND placed_time>=? AND placed_time<? ORDER BY rowid LIMIT 1",
+            (self.inv_id, symbol, volume, from_time, to_time)
+        ).fetchone()
+        return row[0] if row else None
+
+    def add_trade(self, trade):
+        """Append a trade unless its ticket is already recorded. Returns True when added."""
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO trades VALUES (?, ?, ?, ?, ?, ?, ?, ?)", self._row(trade)
+            )
+        return cursor.rowcount > 0
+
+    def save_trades(self, trades):
+        """Insert or update the given trade records (matched by ticket)."""
+        if trades:
+            with self.conn:
+                self._upsert([self._row(trade) for trade in trades])
+
+    def trades_to_sync(self, active_tickets=()):
+        """Trades whose status can still change: not closed yet, or still open on the terminal."""
+        records = {}
+        for rowid, record in self.conn.execute(
+                "SELECT rowid, record FROM trades WHERE inv_id=? AND (status IS NULL OR status!='closed')",
+                (self.inv_id,)):
+            records[rowid] = record
+        keys = [_ticket_key(t) for t in active_tickets]
+        for i in range(0, len(keys), _CHUNK):
+            chunk = keys[i:i + _CHUNK]
+            for rowid, record in self.conn.execute(
+                    f"SELECT rowid, record FROM trades WHERE inv_id=? AND ticket IN ({','.join('?' * len(chunk))})",
+                    (self.inv_id, *chunk)):
+                records[rowid] = record
+        return [json.loads(records[rowid]) for rowid in sorted(records)]
+
+    def trades(self):
+        """All trade records in the order they were recorded."""
+        return [json.loads(record) for record, in self.conn.execute(
+            "SELECT record FROM trades WHERE inv_id=? ORDER BY rowid", (self.inv_id,))]
+
+    def export_trades(self, *paths):
+        """
+        Keep JSON copies of the trade history for the web pages. Inside an
+        investor cycle the export is deferred to flush_trade_mirrors(), so a
+        cycle that records many trades writes the files once.
+        """
+        if document_cycle_open():
+            _PENDING_MIRRORS.setdefault((self.store.db_path, self.inv_id), [self, set()])[1].update(map(str, paths))
+            return
+        trades = self.trades()
+        for path in paths:
+            save_document(path, trades)
+
+    # --------------------------------------------------------- daily stats
+    def daily_stats(self, day):
+        row = self.conn.execute("SELECT record FROM daily_stats WHERE inv_id=? AND day=?",
+                                (self.inv_id, day)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update_daily_stats(self, day, values):
+        """Merge values into the record of day (created when missing)."""
+        with self.conn:
+            record = self.daily_stats(day) or {}
+            record.update(values)
+            self.conn.execute("INSERT OR REPLACE INTO daily_stats VALUES (?, ?, ?)",
+                              (self.inv_id, day, json.dumps(record, default=str)))
+
+    # -------------------------------------------------------------- audits
+    def record_audit(self, record, unauthorized=False):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO audits (inv_id, audited_at, unauthorized, record) VALUES (?, ?, ?, ?)",
+                (self.inv_id, datetime.now().isoformat(), 1 if unauthorized else 0, json.dumps(record, default=str))
+            )
+
+
+# --- one connection per database per process ---
+_STORES = {}
+_PENDING_MIRRORS = {}
+
+
+def get_state_store(db_path):
+    key = (os.path.normcase(os.path.abspath(str(db_path))), os.getpid())
+    store = _STORES.get(key)
+    if store is None:
+        store = StateStore(db_path)
+        _STORES[key] = store
+    return store
+
+
+def get_investor_state(db_path, inv_id, inv_root=None):
+    """InvestorState of inv_id in the shared database (legacy JSON imported on first use)."""
+    return get_state_store(db_path).investor(inv_id, inv_root)
+
+
+def flush_trade_mirrors():
+    """Write the trade-history JSON copies deferred during the cycle."""
+    pending = list(_PENDING_MIRRORS.values())
+    _PENDING_MIRRORS.clear()
+    for state, paths in pending:
+        try:
+            trades = state.trades()
+            for path in paths:
+                save_document(path, trades)
+        except Exception as e:
+            print(f" ❌ Could not export trade history of {state.inv_id}: {e}")
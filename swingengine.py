@@ -0,0 +1,176 @@
+import os
+import json
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+GEOMETRY_SUFFIX = "_geometry.json"
+
+# Largest pixel error a fitted geometry may have against the contours it was fitted to
+GEOMETRY_FIT_TOLERANCE_PX = 2.0
+
+
+def chart_geometry_path(chart_path):
+    """Return the geometry sidecar path written next to a chart PNG."""
+    return os.path.splitext(chart_path)[0] + GEOMETRY_SUFFIX
+
+
+def chart_signature(chart_path):
+    """Size and mtime of a chart PNG; changes whenever the chart is rendered again."""
+    try:
+        st = os.stat(chart_path)
+    except OSError:
+        return None
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def load_chart_geometry(chart_path):
+    """
+    Load the chart geometry sidecar saved by ohlc.generate_and_save_chart_df
+    (or fitted by fit_chart_geometry). Returns None when the chart has none,
+    or when a fitted sidecar belongs to an older render of the chart.
+    """
+    geometry_path = chart_geometry_path(chart_path)
+    if not os.path.exists(geometry_path):
+        return None
+    try:
+        with open(geometry_path, 'r', encoding='utf-8') as f:
+            geometry = json.load(f)
+    except Exception:
+        return None
+
+    required = ("x_origin_px", "x_step_px", "y_origin_px", "y_step_px", "candle_width_px")
+    if not all(k in geometry for k in required):
+        return None
+    if "chart_signature" in geometry and geometry["chart_signature"] != chart_signature(chart_path):
+        return None
+    return geometry
+
+
+def fit_chart_geometry(boxes, highs, lows):
+    """
+    Linear chart geometry (the candle_pixel_boxes inverse) fitted to contour
+    boxes of a chart rendered without a sidecar, so the next run over the
+    same PNG can place candles analytically. Returns None unless there is
+    exactly one box per candle and every box lies within
+    GEOMETRY_FIT_TOLERANCE_PX of the fit.
+    """
+    n = len(highs)
+    if n < 2 or len(boxes["candle_x"]) != n:
+        return None
+    prices = np.concatenate([np.asarray(highs, dtype=np.float64), np.asarray(lows, dtype=np.float64)])
+    if not np.all(np.isfinite(prices)) or np.ptp(prices) == 0:
+        return None
+
+    idx = np.arange(n, dtype=np.float64)
+    centers = boxes["candle_x"].astype(np.float64)
+    x_step, x_origin = np.polyfit(idx, centers, 1)
+
+    edges = np.concatenate([boxes["candle_top"], boxes["candle_bottom"]]).astype(np.float64)
+    y_step, y_origin = np.polyfit(prices, edges, 1)
+
+    residual = max(
+        np.abs(x_origin + idx * x_step - centers).max(),
+        np.abs(y_origin + prices * y_step - edges).max(),
+    )
+    if residual > GEOMETRY_FIT_TOLERANCE_PX:
+        return None
+    return {
+        "num_candles": n,
+        "x_origin_px": float(x_origin),
+        "x_step_px": float(x_step),
+        "y_origin_px": float(y_origin),
+        "y_step_px": float(y_step),
+        "candle_width_px": float(np.median(boxes["candle_width"])),
+        "fitted": True,
+    }
+
+
+def candle_arrays(candles, *fields):
+    """Pull float64 columns out of a list of candle dicts in a single pass per field."""
+    return tuple(
+        np.fromiter((c.get(field, np.nan) for c in candles), dtype=np.float64, count=len(candles))
+        for field in fields
+    )
+
+
+def candle_pixel_boxes(geometry, highs, lows):
+    """
+    Compute candle bounding boxes (wick-to-wick, body width) in image pixels.
+
+    Candle i sits at data x = i and price p maps linearly to
+    y = y_origin_px + p * y_step_px, exactly as mplfinance drew it.
+    Returns a dict of int64 arrays keyed like the contour-based fields
+    (candle_x, candle_y, candle_width, candle_height, candle_left, ...).
+    """
+    n = len(highs)
+    idx = np.arange(n, dtype=np.float64)
+    half_w = geometry["candle_width_px"] / 2.0
+
+    center = geometry["x_origin_px"] + idx * geometry["x_step_px"]
+    left = np.rint(center - half_w).astype(np.int64)
+    right = np.rint(center + half_w).astype(np.int64)
+    width = np.maximum(right - left, 1)
+
+    y_high = geometry["y_origin_px"] + np.asarray(highs, dtype=np.float64) * geometry["y_step_px"]
+    y_low = geometry["y_origin_px"] + np.asarray(lows, dtype=np.float64) * geometry["y_step_px"]
+    top = np.rint(np.minimum(y_high, y_low)).astype(np.int64)
+    bottom = np.rint(np.maximum(y_high, y_low)).astype(np.int64)
+    height = np.maximum(bottom - top, 1)
+
+    return {
+        "candle_x": left + (width // 2),
+        "candle_y": top,
+        "candle_width": width,
+        "candle_height": height,
+        "candle_left": left,
+        "candle_right": left + width,
+        "candle_top": top,
+        "candle_bottom": top + height,
+    }
+
+
+def _window_extreme(values, window, reducer, empty_value):
+    """
+    Extreme of values[j:j+window] for every j in 0..n-window.
+    A zero-width window yields empty_value for every position (n+1 slots).
+    """
+    if window <= 0:
+        return np.full(len(values) + 1, empty_value)
+    if window > len(values):
+        return np.empty(0)
+    return reducer(sliding_window_view(values, window), axis=1)
+
+
+def detect_swings(highs, lows, neighbor_left=5, neighbor_right=5):
+    """
+    Vectorized swing detection over OHLC arrays.
+
+    Candle i (neighbor_left <= i < n - neighbor_right) is a higher high when its
+    high is strictly above every high in the left and right windows, and a lower
+    low when its low is strictly below every low in both windows.
+    Returns (is_hh, is_ll) boolean arrays of length n.
+    """
+    highs = np.asarray(highs, dtype=np.float64)
+    lows = np.asarray(lows, dtype=np.float64)
+    n = len(highs)
+
+    is_hh = np.zeros(n, dtype=bool)
+    is_ll = np.zeros(n, dtype=bool)
+
+    start, end = neighbor_left, n - neighbor_right
+    if end <= start:
+        return is_hh, is_ll
+
+    # Left window of i is values[i-left:i] -> window starting at i-left.
+    # Right window of i is values[i+1:i+1+right] -> window starting at i+1.
+    left_max = _window_extreme(highs, neighbor_left, np.max, -np.inf)[0:end - start]
+    left_min = _window_extreme(lows, neighbor_left, np.min, np.inf)[0:end - start]
+    right_max = _window_extreme(highs, neighbor_right, np.max, -np.inf)[start + 1:end + 1]
+    right_min = _window_extreme(lows, neighbor_right, np.min, np.inf)[start + 1:end + 1]
+
+    core_h = highs[start:end]
+    core_l = lows[start:end]
+    is_hh[start:end] = (core_h > left_max) & (core_h > right_max)
+    is_ll[start:end] = (core_l < left_min) & (core_l < right_min)
+    return is_hh, is_ll
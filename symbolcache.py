@@ -0,0 +1,162 @@
+import os
+import re
+import json
+import hashlib
+import MetaTrader5 as mt5
+from symbolresolver import get_resolver
+
+
+# symbol_info fields that only change when the broker edits the contract
+STATIC_FIELDS = (
+    "name", "digits", "point", "trade_tick_size", "trade_tick_value", "trade_contract_size",
+    "volume_min", "volume_max", "volume_step", "volume_limit", "trade_mode",
+    "currency_base", "currency_profit", "currency_margin",
+)
+
+
+def symbols_hash(symbol_names):
+    """Stable fingerprint of a broker's symbol list."""
+    digest = hashlib.sha1()
+    for name in sorted(symbol_names):
+        digest.update(name.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def normalization_hash(norm_data):
+    """Fingerprint of symbols_normalization.json (family order matters, so keys are not sorted)."""
+    return hashlib.sha1(json.dumps(norm_data or {}).encode("utf-8")).hexdigest()
+
+
+class CachedSymbolInfo:
+    """
+    Snapshot of the static symbol_info fields. trade_tick_value is only static
+    when the profit currency is the account currency; otherwise it is read
+    live (once per process) the first time it is needed. Any field that was
+    not cached falls through to a live mt5.symbol_info() call.
+    """
+
+    def __init__(self, fields, tick_value_static=True):
+        self.__dict__.update(fields)
+        self._tick_value_static = tick_value_static
+        self._live = None
+
+    def _live_info(self):
+        if self._live is None:
+            self._live = mt5.symbol_info(self.__dict__["name"])
+        return self._live
+
+    def __getattribute__(self, attr):
+        if attr == "trade_tick_value" and not object.__getattribute__(self, "_tick_value_static"):
+            live = object.__getattribute__(self, "_live_info")()
+            if live is not None:
+                return live.trade_tick_value
+        return object.__getattribute__(self, attr)
+
+    def __getattr__(self, attr):
+        # Only reached for fields that are not in the snapshot
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        live = self._live_info()
+        if live is None:
+            raise AttributeError(attr)
+        return getattr(live, attr)
+
+
+class PersistentResolutionCache(dict):
+    """
+    Drop-in replacement for the per-run `resolution_cache = {}` dicts:
+    raw symbol -> {'broker_sym': ..., 'info': symbol_info-or-None}.
+
+    Entries are persisted per broker server and reloaded by later runs; the
+    whole file is discarded when the broker's symbol list or
+    symbols_normalization.json changes. New entries are recorded through
+    normal dict assignment and written by save(); failed resolutions (info
+    None) stay in memory only, so the next run tries them again.
+    """
+
+    def __init__(self, cache_path, server, hash_value, account_currency, norm_hash=None):
+        super().__init__()
+        self.cache_path = cache_path
+        self.server = server
+        self.hash_value = hash_value
+        self.norm_hash = norm_hash
+        self.account_currency = account_currency
+        self._dirty = {}
+        for raw_symbol, entry in self._read_entries().items():
+            super().__setitem__(raw_symbol, self._from_disk(entry))
+
+    @classmethod
+    def for_session(cls, cache_dir, norm_path, account=None):
+        """
+        Open the cache for the broker the terminal is logged into. account:
+        the InvestorContext's account fields (server, currency), asked from
+        the terminal when not given. Falls back to a plain in-memory cache if
+        the account is unavailable.
+        """
+        if account is None:
+            acc = mt5.account_info()
+            account = None if acc is None else {"server": acc.server, "currency": acc.currency}
+        if account is None:
+            return cls(None, None, None, None)
+        resolver = get_resolver(norm_path)
+        server = account["server"] or "unknown"
+        safe_server = re.sub(r'[^A-Za-z0-9._-]', '_', server)
+        return cls(
+            os.path.join(cache_dir, f"{safe_server}.json"), server,
+            symbols_hash(resolver.broker_symbol_names), account["currency"],
+            normalization_hash(resolver.norm_data)
+        )
+
+    def _read_entries(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception:
+            return {}
+        if data.get("symbols_hash") != self.hash_value or data.get("normalization_hash") != self.norm_hash:
+            # Broker added/removed/renamed symbols or the families were edited:
+            # every cached resolution is suspect
+            return {}
+        # Misses written by older versions are dropped so they get retried
+        return {raw: entry for raw, entry in data.get("symbols", {}).items() if entry.get("info") is not None}
+
+    def _from_disk(self, entry):
+        fields = entry.get("info")
+        info = None
+        if fields is not None:
+            info = CachedSymbolInfo(
+                fields, tick_value_static=fields.get("currency_profit") == self.account_currency
+            )
+        return {'broker_sym': entry.get("broker_sym"), 'info': info}
+
+    def __setitem__(self, raw_symbol, value):
+        super().__setitem__(raw_symbol, value)
+        symbol_info = value.get('info')
+        if symbol_info is None:
+            # Misses may be temporary (symbol not yet visible, terminal hiccup)
+            self._dirty.pop(raw_symbol, None)
+            return
+        fields = {f: getattr(symbol_info, f, None) for f in STATIC_FIELDS}
+        self._dirty[raw_symbol] = {"broker_sym": value.get('broker_sym'), "info": fields}
+
+    def save(self):
+        """Merge new entries into the on-disk cache (atomic replace)."""
+        if not self.cache_path or not self._dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            # Other investors on the same server may have written meanwhile
+            entries = self._read_entries()
+            entries.update(self._dirty)
+            data = {"server": self.server, "symbols_hash": self.hash_value,
+                    "normalization_hash": self.norm_hash, "symbols": entries}
+            tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.cache_path)
+            self._dirty = {}
+        except Exception as e:
+            print(f"    ⚠️  Could not save symbol cache {self.cache_path}: {e}")
@@ -0,0 +1,303 @@
+import os
+import re
+import json
+import MetaTrader5 as mt5
+
+
+# Separators stripped before any comparison ("US Oil" / "US_OIL" / "US.OIL" -> "USOIL")
+_CLEAN_RE = re.compile(r"[ _/.]")
+# Broker suffixes ignored by the strict (calculateprices) matcher: CHFJPY+ -> CHFJPY
+_SUFFIX_RE = re.compile(r'[+\\]|\.PRO|\.M|M$|PRO$')
+
+
+def clean(s):
+    """Remove spaces, underscores, slashes and dots and uppercase."""
+    if s is None:
+        return ""
+    return _CLEAN_RE.sub("", str(s)).upper()
+
+
+def strip_suffix(s):
+    return _SUFFIX_RE.sub("", s)
+
+
+class _PrefixTrie:
+    """
+    Character trie where every node remembers the earliest-inserted entry in its
+    subtree, so "first entry whose key starts with P" is a walk of len(P) steps.
+    """
+
+    __slots__ = ("root",)
+
+    def __init__(self):
+        self.root = [{}, None]  # [children, (order, value)]
+
+    def insert(self, key, order, value):
+        node = self.root
+        entry = (order, value)
+        if node[1] is None or order < node[1][0]:
+            node[1] = entry
+        for ch in key:
+            child = node[0].get(ch)
+            if child is None:
+                child = node[0][ch] = [{}, None]
+            node = child
+            if node[1] is None or order < node[1][0]:
+                node[1] = entry
+
+    def first_with_prefix(self, prefix):
+        """(order, value) of the earliest entry starting with prefix, or None."""
+        node = self.root
+        for ch in prefix:
+            node = node[0].get(ch)
+            if node is None:
+                return None
+        return node[1]
+
+
+class SymbolResolver:
+    """
+    Resolves record symbols ("US Oil", "GBP/USD", "CHFJPY+") to normalization
+    families and to the names the connected broker actually uses.
+
+    Built once per MT5 session from symbols_normalization.json and
+    mt5.symbols_get(); every lookup afterwards is a dict hit or a trie walk
+    instead of rescanning all families and broker symbols.
+    """
+
+    def __init__(self, norm_data, broker_symbol_names):
+        self.norm_data = norm_data or {}
+        self.broker_symbol_names = list(broker_symbol_names or [])
+        self._build_family_index()
+        self._build_broker_index()
+        self._strict_index = None
+
+    # ------------------------------------------------------------------ build
+    def _build_family_index(self):
+        self.family_keys = list(self.norm_data.keys())
+        self.family_variants = []          # order -> [clean variants]
+        self._variant_order = {}           # clean variant -> earliest family order
+        self._variant_trie = _PrefixTrie() # prefix of a variant -> earliest family order
+
+        for order, std_key in enumerate(self.family_keys):
+            variants = [clean(std_key)] + [clean(s) for s in self.norm_data[std_key]]
+            self.family_variants.append(variants)
+            for v in variants:
+                self._variant_order.setdefault(v, order)
+                self._variant_trie.insert(v, order, order)
+
+    def _build_broker_index(self):
+        # Same collision rule as the old dict comprehension: last raw name wins,
+        # first occurrence keeps its position.
+        self.broker_by_clean = {}
+        for name in self.broker_symbol_names:
+            self.broker_by_clean[clean(name)] = name
+
+        self._broker_trie = _PrefixTrie()
+        for order, (b_clean, b_raw) in enumerate(self.broker_by_clean.items()):
+            self._broker_trie.insert(b_clean, order, b_raw)
+
+    # ----------------------------------------------------------------- lookup
+    def family_order(self, record_symbol):
+        """
+        Index of the first family (in file order) having a variant v with
+        term == v, term.startswith(v) or v.startswith(term). None if no family matches.
+        """
+        term = clean(record_symbol)
+        candidates = []
+
+        # Variants that are a prefix of the term (includes exact match)
+        for i in range(len(term) + 1):
+            order = self._variant_order.get(term[:i])
+            if order is not None:
+                candidates.append(order)
+
+        # Variants that start with the term
+        hit = self._variant_trie.first_with_prefix(term)
+        if hit is not None:
+            candidates.append(hit[0])
+
+        return min(candidates) if candidates else None
+
+    def family(self, record_symbol):
+        """(std_key, clean variants) of the matching family, or (None, [])."""
+        order = self.family_order(record_symbol)
+        if order is None:
+            return None, []
+        return self.family_keys[order], self.family_variants[order]
+
+    def broker_symbol_for_variants(self, variants):
+        """First broker symbol equal to, or (suffix) starting with, one of the variants."""
+        for v in variants:
+            raw = self.broker_by_clean.get(v)
+            if raw is not None:
+                return raw
+            hit = self._broker_trie.first_with_prefix(v)
+            if hit is not None:
+                return hit[1]
+        return None
+
+    def resolve(self, record_symbol, risk_keys=None):
+        """
+        'Broker-First' resolution used by synapse/placeorders get_normalized_symbol:
+        risk key of the family when risk_keys is given, otherwise the broker's name
+        for the family, otherwise the family key / uppercased input.
+        """
+        if not record_symbol:
+            return None
+
+        target_family_key, all_family_variants = self.family(record_symbol)
+
+        if risk_keys:
+            clean_risk_map = {clean(k): k for k in risk_keys}
+            if target_family_key and clean(target_family_key) in clean_risk_map:
+                return clean_risk_map[clean(target_family_key)]
+            for v in all_family_variants:
+                if v in clean_risk_map:
+                    return clean_risk_map[v]
+
+        if self.broker_by_clean:
+            raw = self.broker_symbol_for_variants(all_family_variants)
+            if raw is not None:
+                return raw
+
+        return target_family_key if target_family_key else record_symbol.upper()
+
+    # ------------------------------------------------ strict (calculateprices)
+    def _build_strict_index(self):
+        """Indexes for resolve_strict, built on first use."""
+        exact_key, exact_syn, base_key, base_syn = {}, {}, {}, {}
+        for order, std_key in enumerate(self.family_keys):
+            clean_key = std_key.replace("_", "").upper()
+            exact_key.setdefault(clean_key, order)
+            base_key.setdefault(strip_suffix(clean_key), order)
+            for s in self.norm_data[std_key]:
+                clean_syn = s.replace(" ", "").replace("_", "").replace("/", "").upper()
+                exact_syn.setdefault(clean_syn, order)
+                base_syn.setdefault(strip_suffix(clean_syn), order)
+
+        available = set(self.broker_symbol_names)
+        by_upper = {}
+        base_to_actual = {}
+        upper_trie, base_trie = _PrefixTrie(), _PrefixTrie()
+        for order, name in enumerate(self.broker_symbol_names):
+            upper = name.upper()
+            by_upper.setdefault(upper, name)
+            base = strip_suffix(upper)
+            base_to_actual.setdefault(base.replace(".", ""), []).append(name)
+            upper_trie.insert(upper, order, name)
+            base_trie.insert(base, order, name)
+
+        self._strict_index = {
+            "exact_key": exact_key, "exact_syn": exact_syn,
+            "base_key": base_key, "base_syn": base_syn,
+            "available": available, "by_upper": by_upper,
+            "base_to_actual": base_to_actual,
+            "upper_trie": upper_trie, "base_trie": base_trie,
+        }
+
+    def _pick_base(self, base):
+        actual_symbols = self._strict_index["base_to_actual"].get(base)
+        if not actual_symbols:
+            return None
+        # Prefer symbols without special suffixes first
+        for sym in actual_symbols:
+            if not _SUFFIX_RE.search(sym.upper()):
+                return sym
+        return actual_symbols[0]
+
+    def resolve_strict(self, record_symbol):
+        """
+        Resolution used by calculateprices: suffix-aware matching against the
+        broker list that returns None when the broker has no matching symbol.
+        """
+        if not record_symbol:
+            return None
+        if self._strict_index is None:
+            self._build_strict_index()
+        idx = self._strict_index
+
+        search_term = record_symbol.replace(" ", "").replace("_", "").replace(".", "").upper()
+        base_search_term = strip_suffix(search_term)
+
+        orders = [
+            d.get(t) for d, t in (
+                (idx["exact_key"], search_term), (idx["exact_syn"], search_term),
+                (idx["base_key"], base_search_term), (idx["base_syn"], base_search_term),
+            )
+        ]
+        orders = [o for o in orders if o is not None]
+
+        if orders:
+            synonyms = self.norm_data[self.family_keys[min(orders)]]
+            target_synonyms = list(synonyms)
+            base_target_synonyms = [
+                strip_suffix(s.replace(" ", "").replace("_", "").replace("/", "").upper()) for s in synonyms
+            ]
+        else:
+            target_synonyms = [record_symbol, search_term, base_search_term]
+            base_target_synonyms = [base_search_term]
+
+        # Exact, then case-insensitive match
+        for option in target_synonyms:
+            if option in idx["available"]:
+                return option
+            hit = idx["by_upper"].get(option.upper())
+            if hit is not None:
+                return hit
+
+        # Suffix matching on base names
+        for option in base_target_synonyms:
+            hit = self._pick_base(strip_suffix(option.upper()))
+            if hit is not None:
+                return hit
+
+        # Partial matching: base names, then broker names starting with the option
+        for option in target_synonyms:
+            clean_opt = strip_suffix(option.replace("/", "").upper())
+            hit = self._pick_base(clean_opt)
+            if hit is not None:
+                return hit
+            hits = [h for h in (idx["upper_trie"].first_with_prefix(clean_opt),
+                                idx["base_trie"].first_with_prefix(clean_opt)) if h is not None]
+            if hits:
+                return min(hits)[1]
+
+        print(f"[!] No broker match found for {record_symbol} even after normalization check.")
+        return None
+
+
+# --- process-wide instances, one per normalization file per MT5 session ---
+_RESOLVERS = {}
+
+
+def load_normalization(norm_path):
+    """NORMALIZATION section of a symbols_normalization.json file ({} if unreadable)."""
+    if not norm_path or not os.path.exists(norm_path):
+        return {}
+    try:
+        with open(norm_path, 'r', encoding='utf-8') as f:
+            return json.load(f).get("NORMALIZATION", {})
+    except Exception:
+        return {}
+
+
+def get_resolver(norm_path, norm_data=None):
+    """
+    Shared resolver for the current MT5 session. Built on first use from
+    norm_data (or norm_path) and mt5.symbols_get(); call reset_resolver()
+    whenever the process switches terminal/account.
+    """
+    resolver = _RESOLVERS.get(str(norm_path))
+    if resolver is None:
+        if norm_data is None:
+            norm_data = load_normalization(norm_path)
+        symbols = mt5.symbols_get()
+        resolver = SymbolResolver(norm_data, [s.name for s in symbols] if symbols else [])
+        _RESOLVERS[str(norm_path)] = resolver
+    return resolver
+
+
+def reset_resolver():
+    """Drop all cached resolvers (new MT5 session / account)."""
+    _RESOLVERS.clear()
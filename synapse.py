@@ -1,5 +1,19 @@
 import os
 import MetaTrader5 as mt5
+from symbolresolver import get_resolver, reset_resolver
+from symbolcache import PersistentResolutionCache
+from mt5session import ensure_investor_session, close_session, get_supervisor, default_concurrency, TerminalAdmission
+from investorcontext import InvestorContext, read_json, account_field
+from dealledger import get_deal_ledger, open_deal_ledger
+from registrystore import (registry_set, registry_remove, apply_registry_changes,
+                           submit_registry_changes, defer_registry_changes, collect_deferred_registry_changes)
+from documentcache import (load_document, save_document, document_exists, flush_documents,
+                           begin_document_cycle, end_document_cycle)
+from statestore import get_investor_state, flush_trade_mirrors
+from riskengine import RiskEngine
+from volumesizing import UsdRates, size_volume
+from breakevenmonitor import ensure_breakeven_monitors
+from pipelinemetrics import StageRecorder, summarize_cycle, write_metrics, print_cycle_summary
 import pandas as pd
 import mplfinance as mpf
 from datetime import datetime
@@ -23,11 +37,21 @@ import sys
 
 INVESTOR_USERS = r"C:\xampp\htdocs\synapse\synarex\usersdata\investors\investors.json"
 INV_PATH = r"C:\xampp\htdocs\synapse\synarex\usersdata\investors"
+# Shared SQLite (WAL) database: trade history, daily stats and audit records of all investors
+STATE_DB_PATH = r"C:\xampp\htdocs\synapse\synarex\usersdata\investors_state.db"
 NORMALIZE_SYMBOLS_PATH = r"C:\xampp\htdocs\synapse\synarex\symbols_normalization.json"
+SYMBOL_CACHE_DIR = r"C:\xampp\htdocs\synapse\synarex\usersdata\symbolcache"
 DEFAULT_ACCOUNTMANAGEMENT = r"C:\xampp\htdocs\synapse\synarex\default_accountmanagement.json"
 VERIFIED_INVESTORS = r"C:\xampp\htdocs\synapse\synarex\verified_investors.json"
 UPDATED_INVESTORS = r"C:\xampp\htdocs\synapse\synarex\updated_investors.json"
 ISSUES_INVESTORS = r"C:\xampp\htdocs\synapse\synarex\issues_investors.json"
+MAX_PARALLEL_INVESTORS = None          # None = min(cpu cores, terminals)
+INVESTOR_DEADLINE_SECONDS = 900        # worker is killed and the investor requeued after this
+INVESTOR_MAX_ATTEMPTS = 3
+INVESTOR_RETRY_BACKOFF_SECONDS = 10    # doubled on every further attempt
+TERMINAL_ADMISSION_TIMEOUT = 600       # max wait for another process to release a shared terminal
+BREAKEVEN_MONITORS = True              # resident tick-driven breakeven process per eligible investor
+METRICS_PATH = r"C:\xampp\htdocs\synapse\synarex\usersdata\metrics\pipeline_metrics.jsonl"  # per-stage timings (JSONL)
 
 def load_investors_dictionary():
     BROKERS_JSON_PATH = r"C:\xampp\htdocs\synapse\synarex\usersdata\investors\investors.json"
@@ -179,11 +203,9 @@ def move_verified_investors():
         investors_data[inv_id] = minimal_investor
         investors_updated.append(inv_id)
     
-    # Save updated investors.json
+    # Save updated investors.json (locked per-investor changes, like the workers' registry updates)
     if investors_updated:
-        os.makedirs(os.path.dirname(INVESTOR_USERS), exist_ok=True)
-        with open(INVESTOR_USERS, 'w', encoding='utf-8') as f:
-            json.dump(investors_data, f, indent=4)
+        apply_registry_changes([registry_set(INVESTOR_USERS, inv_id, investors_data[inv_id]) for inv_id in investors_updated])
         
         print(f"\n  ✅ Added/Updated: {len(investors_updated)} investors")
         if investors_updated:
@@ -563,6 +585,7 @@ def update_verified_investors_file():
     updated = False
     investors_to_remove = []
     investors_moved_to_issues = []
+    investors_verified = []
     
     for inv_id, investor_data in verified_investors.items():
         print(f"\n📋 Checking investor: {inv_id}")
@@ -634,18 +657,17 @@ def update_verified_investors_file():
             tradeshistory_path = inv_folder / "tradeshistory.json"
             if tradeshistory_path.exists():
                 try:
-                    with open(tradeshistory_path, 'r', encoding='utf-8') as f:
-                        tradeshistory = json.load(f)
-                    
-                    if tradeshistory:
-                        print(f"  ✅ Found {len(tradeshistory)} authorized trades in tradeshistory.json")
+                    trade_count = get_investor_state(STATE_DB_PATH, inv_id, inv_folder).trade_count()
+
+                    if trade_count:
+                        print(f"  ✅ Found {trade_count} authorized trades in trade history")
                     else:
-                        print(f"  ℹ️  tradeshistory.json exists but is empty (acceptable)")
+                        print(f"  ℹ️  Trade history exists but is empty (acceptable)")
                 except Exception as e:
-                    print(f"  ⚠️  Error reading tradeshistory.json: {e}")
-                    # Note: If tradeshistory.json is corrupted, that's an issue
+                    print(f"  ⚠️  Error reading trade history: {e}")
+                    # Note: If the trade history is unreadable, that's an issue
                     investor_data_copy = investor_data.copy()
-                    investor_data_copy['MESSAGE'] = f"Error reading tradeshistory.json: {str(e)}"
+                    investor_data_copy['MESSAGE'] = f"Error reading trade history: {str(e)}"
                     investor_data_copy['verified_status'] = 'tradeshistory_read_error'
                     issues_investors[inv_id] = investor_data_copy
                     investors_moved_to_issues.append(inv_id)
@@ -670,6 +692,7 @@ def update_verified_investors_file():
             
             # Add verification status
             investor_data['verified_status'] = 'verified'
+            investors_verified.append(inv_id)
             
         except Exception as e:
             print(f"  ❌ Error reading activities.json: {e}")
@@ -690,15 +713,19 @@ def update_verified_investors_file():
                 del verified_investors[inv_id]
                 updated = True
     
-    # Save updated files
+    # Save updated files through the locked single-writer path, so entries other
+    # processes changed since they were read above are not overwritten
     try:
-        # Save verified_investors.json
-        with open(verified_investors_path, 'w', encoding='utf-8') as f:
-            json.dump(verified_investors, f, indent=4)
-        
-        # Save issues_investors.json
-        with open(issues_investors_path, 'w', encoding='utf-8') as f:
-            json.dump(issues_investors, f, indent=4)
+        registry_changes = [registry_remove(verified_investors_path, inv_id) for inv_id in investors_to_remove]
+        registry_changes += [
+            registry_set(verified_investors_path, inv_id, verified_investors[inv_id])
+            for inv_id in investors_verified if inv_id in verified_investors
+        ]
+        registry_changes += [
+            registry_set(issues_investors_path, inv_id, issues_investors[inv_id])
+            for inv_id in investors_moved_to_issues
+        ]
+        apply_registry_changes(registry_changes)
         
         print(f"\n" + "="*80)
         if updated:
@@ -724,7 +751,7 @@ def update_verified_investors_file():
     
     return True
 
-def get_requirements(inv_id):
+def get_requirements(inv_id, ctx=None):
     """
     Mirroring the logic of update_investor_info to find the date 
     directly in root files (new path structure). Also checks if investor balance
@@ -766,11 +793,10 @@ def get_requirements(inv_id):
         acc_mgmt_path = inv_root / "accountmanagement.json"
         if acc_mgmt_path.exists():
             try:
-                with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
-                    acc_mgmt = json.load(f)
-                    execution_start_date = acc_mgmt.get('execution_start_date')
-                    if execution_start_date:
-                        print(f"  📋 Found execution_start_date in accountmanagement.json: {execution_start_date}")
+                acc_mgmt = read_json(acc_mgmt_path, ctx)
+                execution_start_date = acc_mgmt.get('execution_start_date')
+                if execution_start_date:
+                    print(f"  📋 Found execution_start_date in accountmanagement.json: {execution_start_date}")
             except Exception as e:
                 print(f"  ⚠️  Error reading accountmanagement.json: {e}")
 
@@ -787,119 +813,41 @@ def get_requirements(inv_id):
         except: continue
 
     if start_datetime:
-        print(f"  🔍 Fetching deals from: {start_datetime.strftime('%Y-%m-%d')}")
-        all_deals = mt5.history_deals_get(start_datetime, datetime.now())
+        print(f"  🔍 Syncing deal ledger from: {start_datetime.strftime('%Y-%m-%d')}")
+        ledger = ctx.deal_ledger(start_datetime) if ctx else get_deal_ledger(inv_root, start_datetime)
         account_info = mt5.account_info()
         
-        if account_info:
-            # Find the FIRST DEPOSIT after execution start date
-            first_deposit_amount = None
-            first_deposit_time = None
-            all_deposits = []
+        if account_info and ledger:
+            summary = ledger.summary
+            balance_info = ledger.starting_balance(account_info.balance)
+            first_deposit = balance_info["first_deposit"]
+            first_deposit_amount = first_deposit["amount"] if first_deposit else None
+            existing_balance = balance_info["existing_balance"]
             
-            # Collect all deposits (type = 2 for deposit in MT5)
-            for deal in all_deals:
-                if deal.type == 2:  # 2 = DEPOSIT in MT5
-                    all_deposits.append({
-                        'amount': deal.profit,
-                        'time': deal.time,
-                        'datetime': datetime.fromtimestamp(deal.time)
-                    })
-            
-            # Find the first deposit (earliest timestamp)
-            if all_deposits:
-                all_deposits.sort(key=lambda x: x['time'])
-                first_deposit = all_deposits[0]
-                first_deposit_amount = first_deposit['amount']
-                first_deposit_time = first_deposit['datetime'].strftime('%Y-%m-%d %H:%M:%S')
+            if first_deposit:
+                first_deposit_time = datetime.fromtimestamp(first_deposit["time"]).strftime('%Y-%m-%d %H:%M:%S')
                 print(f"  💰 Found first deposit: ${first_deposit_amount:.2f} at {first_deposit_time}")
-                print(f"  ℹ️  Total deposits found: {len(all_deposits)}")
-            
-            # ENHANCED LOGIC: Search for existing balance between execution start date and first deposit
-            existing_balance = None
-            if first_deposit_time:
-                # Get deals BEFORE the first deposit (from execution start date up to first deposit)
-                deals_before_first_deposit = []
-                first_deposit_timestamp = first_deposit['time']
-                
-                for deal in all_deals:
-                    if deal.time < first_deposit_timestamp:
-                        deals_before_first_deposit.append(deal)
-                
-                if deals_before_first_deposit:
-                    # Calculate balance from trades before first deposit
-                    trades_pnl_before_deposit = sum((d.profit + d.swap + d.commission) for d in deals_before_first_deposit if d.type in [0, 1])
-                    withdrawals_before_deposit = sum(d.profit for d in deals_before_first_deposit if d.type == 3)
-                    
-                    # The existing balance would be the starting balance from execution date
-                    # We need to calculate what the balance was before the first deposit
-                    # Current balance minus all deposits and trades gives us the initial balance
-                    all_deposits_before_first = [d for d in all_deposits if d['time'] < first_deposit_timestamp]
-                    total_deposits_before_first = sum(d['amount'] for d in all_deposits_before_first)
-                    
-                    # Calculate existing balance = current_balance - (first_deposit + other_deposits + trades + withdrawals)
-                    # But we want the balance right before the first deposit
-                    # Let's get the balance at the time just before first deposit
-                    
-                    # Get all deals up to (but not including) first deposit
-                    balance_at_time = 0
-                    for deal in sorted(deals_before_first_deposit, key=lambda x: x.time):
-                        if deal.type in [0, 1]:  # Trade
-                            balance_at_time += (deal.profit + deal.swap + deal.commission)
-                        elif deal.type == 2:  # Deposit
-                            balance_at_time += deal.profit
-                        elif deal.type == 3:  # Withdrawal
-                            balance_at_time += deal.profit
-                    
-                    # The existing balance would be the initial deposit (if any) plus trades
-                    # But we need to find if there was an initial balance before any deposit
-                    # Check if there were any deposits before first deposit (unlikely but possible)
-                    if total_deposits_before_first > 0:
-                        # There was a deposit before the first deposit we found (shouldn't happen if we sorted correctly)
-                        existing_balance = total_deposits_before_first + trades_pnl_before_deposit + withdrawals_before_deposit
-                    else:
-                        # No deposits before first deposit, so existing balance comes from initial funds + trades
-                        # Calculate starting balance from execution date
-                        total_pnl_all = sum((d.profit + d.swap + d.commission) for d in all_deals if d.type in [0, 1])
-                        total_withdrawals_all = sum(d.profit for d in all_deals if d.type == 3)
-                        total_deposits_all = sum(d['amount'] for d in all_deposits)
-                        
-                        # current_balance = starting_balance + total_deposits_all + total_pnl_all + total_withdrawals_all
-                        # starting_balance = current_balance - total_deposits_all - total_pnl_all - total_withdrawals_all
-                        starting_balance_from_exec = account_info.balance - total_deposits_all - total_pnl_all - total_withdrawals_all
-                        
-                        # The existing balance before first deposit would be starting_balance_from_exec + trades_before_first
-                        existing_balance = starting_balance_from_exec + trades_pnl_before_deposit + withdrawals_before_deposit
-                    
+                print(f"  ℹ️  Total deposits found: {summary['deposit_count']}")
+                if summary["before_first_deposit"]["deal_count"]:
                     print(f"  🔍 Found existing balance before first deposit: ${existing_balance:.2f}")
                 else:
-                    # No deals before first deposit
-                    existing_balance = 0
                     print(f"  🔍 No deals found before first deposit, existing balance = $0")
             
             # Determine starting balance based on existing balance
-            broker_balance = None
-            starting_bal = None
+            starting_bal = balance_info["starting_balance"]
+            broker_balance = starting_bal
             
             if existing_balance is not None and existing_balance > 0:
-                starting_bal = existing_balance
-                broker_balance = existing_balance
                 print(f"  📊 Using EXISTING BALANCE (found before first deposit): ${starting_bal:.2f}")
             elif first_deposit_amount is not None:
-                starting_bal = first_deposit_amount
-                broker_balance = first_deposit_amount
                 print(f"  📊 Using FIRST DEPOSIT (no existing balance found): ${starting_bal:.2f}")
             else:
-                # Fallback: No deposits found
-                total_pnl = sum((d.profit + d.swap + d.commission) for d in all_deals if d.type in [0, 1])
-                starting_bal = account_info.balance - total_pnl
-                broker_balance = starting_bal
                 print(f"  ℹ️  No deposits found, using traditional calculation: ${starting_bal:.2f}")
             
             # Calculate additional metrics for reporting
-            total_trades_pnl = sum((d.profit + d.swap + d.commission) for d in all_deals if d.type in [0, 1])
-            total_withdrawals = sum(d.profit for d in all_deals if d.type == 3)
-            other_deposits_total = sum(d['amount'] for d in all_deposits[1:]) if len(all_deposits) > 1 else 0
+            total_trades_pnl = summary["trade_pnl"]
+            total_withdrawals = summary["withdrawals_total"]
+            other_deposits_total = balance_info["other_deposits"] if summary["deposit_count"] > 1 else 0
             
             print(f"  📊 Balance breakdown:")
             print(f"     Starting balance: ${starting_bal:.2f}")
@@ -1033,19 +981,11 @@ def get_requirements(inv_id):
                                             message = f"Existing balance ${existing_balance:.2f} + first deposit ${first_deposit_amount:.2f} = ${balance_to_check:.2f} is below minimum requirement ${min_balance}"
                                         investor_data_to_move['MESSAGE'] = message
                                         
-                                        with open(INVESTOR_USERS, 'w', encoding='utf-8') as f:
-                                            json.dump(investors_data, f, indent=4)
-                                        
-                                        issues_data = {}
-                                        if os.path.exists(ISSUES_INVESTORS):
-                                            try:
-                                                with open(ISSUES_INVESTORS, 'r', encoding='utf-8') as f:
-                                                    issues_data = json.load(f)
-                                            except: issues_data = {}
-                                        
-                                        issues_data[inv_id] = investor_data_to_move
-                                        with open(ISSUES_INVESTORS, 'w', encoding='utf-8') as f:
-                                            json.dump(issues_data, f, indent=4)
+                                        # Applied by the registry's single writer (the orchestrator when run in a pool)
+                                        submit_registry_changes([
+                                            registry_remove(INVESTOR_USERS, inv_id),
+                                            registry_set(ISSUES_INVESTORS, inv_id, investor_data_to_move),
+                                        ])
                                         
                                         print(f"  ✅ Successfully moved investor {inv_id} to issues_investors.json")
                                     else:
@@ -1086,19 +1026,11 @@ def get_requirements(inv_id):
                 if investor_data_to_move:
                     investor_data_to_move['MESSAGE'] = "invalid broker login please check your login details"
                     
-                    with open(INVESTOR_USERS, 'w', encoding='utf-8') as f:
-                        json.dump(investors_data, f, indent=4)
-                    
-                    issues_data = {}
-                    if os.path.exists(ISSUES_INVESTORS):
-                        try:
-                            with open(ISSUES_INVESTORS, 'r', encoding='utf-8') as f:
-                                issues_data = json.load(f)
-                        except: issues_data = {}
-                    
-                    issues_data[inv_id] = investor_data_to_move
-                    with open(ISSUES_INVESTORS, 'w', encoding='utf-8') as f:
-                        json.dump(issues_data, f, indent=4)
+                    # Applied by the registry's single writer (the orchestrator when run in a pool)
+                    submit_registry_changes([
+                        registry_remove(INVESTOR_USERS, inv_id),
+                        registry_set(ISSUES_INVESTORS, inv_id, investor_data_to_move),
+                    ])
                     
                     print(f"  ✅ Successfully moved investor {inv_id} to issues_investors.json")
                 else:
@@ -1111,7 +1043,7 @@ def get_requirements(inv_id):
 
     return None
 
-def check_and_record_authorized_actions(inv_id=None):
+def check_and_record_authorized_actions(inv_id=None, ctx=None):
     """
     Check and record authorized/unauthorized actions for investors based on signals.json and tradeshistory.json.
     
@@ -1201,33 +1133,21 @@ def check_and_record_authorized_actions(inv_id=None):
             except Exception as e:
                 print(f"│  ⚠️ Error reading activities.json: {e}")
         
-        # Load tradeshistory.json
-        existing_history_dict = {}
-        if tradeshistory_path.exists():
-            try:
-                with open(tradeshistory_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    items = data if isinstance(data, list) else list(data.values())
-                    for trade in items:
-                        ticket = trade.get('ticket')
-                        if ticket:
-                            existing_history_dict[str(ticket)] = trade
-                print(f"│  📚 Loaded {len(existing_history_dict)} trades from tradeshistory.json")
-            except Exception as e:
-                print(f"│  ⚠️ Error reading tradeshistory.json: {e}")
+        # Trade history lives in the state database; matching below is indexed lookups
+        state = get_investor_state(STATE_DB_PATH, user_brokerid, inv_root)
+        print(f"│  📚 {state.trade_count()} trades in trade history")
         
         # Load signals.json for original order data
         signals_dict = {}
-        if signals_path.exists():
+        if document_exists(signals_path):
             try:
-                with open(signals_path, 'r', encoding='utf-8') as f:
-                    signals = json.load(f)
-                    if isinstance(signals, list):
-                        for signal in signals:
-                            ticket = signal.get('ticket')
-                            if ticket:
-                                signals_dict[str(ticket)] = signal
-                    print(f"│  📡 Loaded {len(signals_dict)} signals from signals.json")
+                signals = load_document(signals_path)
+                if isinstance(signals, list):
+                    for signal in signals:
+                        ticket = signal.get('ticket')
+                        if ticket:
+                            signals_dict[str(ticket)] = signal
+                print(f"│  📡 Loaded {len(signals_dict)} signals from signals.json")
             except Exception as e:
                 print(f"│  ⚠️ Error reading signals.json: {e}")
         
@@ -1239,13 +1159,12 @@ def check_and_record_authorized_actions(inv_id=None):
         
         if acc_mgmt_path.exists():
             try:
-                with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
-                    acc_config = json.load(f)
-                    settings = acc_config.get("settings", {})
-                    bypass_active = settings.get("enable_authorization_bypass", False)
-                    autotrading_active = settings.get("enable_auto_trading", False)
-                    magic_number = acc_config.get("magic_number", 0)
-                    execution_start_date = acc_config.get('execution_start_date')
+                acc_config = read_json(acc_mgmt_path, ctx)
+                settings = acc_config.get("settings", {})
+                bypass_active = settings.get("enable_authorization_bypass", False)
+                autotrading_active = settings.get("enable_auto_trading", False)
+                magic_number = acc_config.get("magic_number", 0)
+                execution_start_date = acc_config.get('execution_start_date')
                 print(f"│  ⚙️ Bypass: {bypass_active} | Auto-trading: {autotrading_active} | Magic: {magic_number}")
             except Exception as e:
                 print(f"│  ⚠️ Error reading accountmanagement.json: {e}")
@@ -1273,56 +1192,12 @@ def check_and_record_authorized_actions(inv_id=None):
                     continue
         
         # ============================================================
-        # BUILD AUTHORIZED INDEXES
+        # AUTHORIZED SET (indexed in the state database)
         # ============================================================
-        authorized_tickets = set()
-        authorized_magics = set()
-        authorized_by_timestamp = {}  # timestamp -> ticket
-        authorized_by_volume_symbol = {}  # (symbol, volume, approx_time) -> ticket
+        authorized_ticket_count = state.trade_count()
+        authorized_magic_count = len(state.magics())
         
-        for ticket, trade in existing_history_dict.items():
-            # Add ticket
-            try:
-                authorized_tickets.add(int(ticket))
-            except:
-                authorized_tickets.add(ticket)
-            
-            # Add magic
-            magic = trade.get('magic')
-            if magic:
-                try:
-                    authorized_magics.add(int(magic))
-                except:
-                    authorized_magics.add(magic)
-            
-            # Index by placed timestamp (for matching)
-            placed_ts = trade.get('placed_timestamp')
-            if placed_ts:
-                try:
-                    # Parse timestamp and store with 5-second tolerance
-                    dt = datetime.fromisoformat(placed_ts.replace('Z', '+00:00'))
-                    ts_key = int(dt.timestamp() / 5)  # 5-second windows
-                    if ts_key not in authorized_by_timestamp:
-                        authorized_by_timestamp[ts_key] = []
-                    authorized_by_timestamp[ts_key].append(ticket)
-                except:
-                    pass
-            
-            # Index by symbol + volume + time window (15 minutes)
-            symbol = trade.get('symbol')
-            volume = trade.get('volume')
-            if symbol and volume and placed_ts:
-                try:
-                    dt = datetime.fromisoformat(placed_ts.replace('Z', '+00:00'))
-                    time_window = int(dt.timestamp() / 900)  # 15-minute windows
-                    key = f"{symbol}_{volume}_{time_window}"
-                    if key not in authorized_by_volume_symbol:
-                        authorized_by_volume_symbol[key] = []
-                    authorized_by_volume_symbol[key].append(ticket)
-                except:
-                    pass
-        
-        print(f"│  🔑 Authorized: {len(authorized_tickets)} tickets, {len(authorized_magics)} magics")
+        print(f"│  🔑 Authorized: {authorized_ticket_count} tickets, {authorized_magic_count} magics")
         
         # ============================================================
         # CONNECT TO MT5
@@ -1335,10 +1210,10 @@ def check_and_record_authorized_actions(inv_id=None):
         login_id = int(broker_cfg['LOGIN_ID'])
         mt5_path = broker_cfg["TERMINAL_PATH"]
         
-        acc = mt5.account_info()
-        if acc is None or acc.login != login_id:
+        if account_field("login", ctx) != login_id:
             print(f"│  🔌 Logging into account {login_id}...")
-            if not mt5.login(login_id, password=broker_cfg["PASSWORD"], server=broker_cfg["SERVER"]):
+            reset_resolver()
+            if not ensure_investor_session(broker_cfg):
                 print(f"│  ❌ Login failed: {mt5.last_error()}")
                 continue
             print(f"│  ✅ Successfully logged in")
@@ -1361,6 +1236,7 @@ def check_and_record_authorized_actions(inv_id=None):
         history_matched = {"ticket": 0, "magic": 0, "timestamp": 0, "volume_symbol": 0, "order_data": 0, "synthetic": 0}
         history_recorded = 0
         history_updated = 0
+        updated_trades = []
         
         # Initialize trades lists
         authorized_closed_trades = []
@@ -1373,14 +1249,12 @@ def check_and_record_authorized_actions(inv_id=None):
         if start_datetime:
             print(f"│\n├─ 📜 FETCHING HISTORY DEALS".ljust(79) + "┤")
             
-            history_deals = mt5.history_deals_get(start_datetime, datetime.now())
-            history_orders = mt5.history_orders_get(start_datetime, datetime.now())
-            
-            # Index orders by ticket for quick lookup
-            orders_by_ticket = {order.ticket: order for order in (history_orders or [])}
+            # Ledger synced once for the cycle when the InvestorContext was loaded
+            ledger = ctx.deal_ledger(start_datetime) if ctx else get_deal_ledger(inv_root, start_datetime)
+            history_deals = ledger.deals if ledger else mt5.history_deals_get(start_datetime, datetime.now())
             
             if history_deals:
-                print(f"│  ✅ Found {len(history_deals)} deals, {len(orders_by_ticket)} orders")
+                print(f"│  ✅ Found {len(history_deals)} deals")
                 
                 # Group deals by order ticket
                 deals_by_order = {}
@@ -1424,14 +1298,14 @@ def check_and_record_authorized_actions(inv_id=None):
                     matched_ticket = None
                     
                     # Method 1: Direct ticket match
-                    if ticket_id and str(ticket_id) in existing_history_dict:
+                    if ticket_id and state.has_ticket(ticket_id):
                         is_authorized = True
                         match_method = "ticket"
                         matched_ticket = ticket_id
                         history_matched["ticket"] += 1
                     
                     # Method 2: Magic number match
-                    if not is_authorized and entry_deal and entry_deal.magic in authorized_magics:
+                    if not is_authorized and entry_deal and state.has_magic(entry_deal.magic):
                         is_authorized = True
                         match_method = "magic"
                         matched_ticket = f"magic_{entry_deal.magic}"
@@ -1441,10 +1315,11 @@ def check_and_record_authorized_actions(inv_id=None):
                     if not is_authorized and entry_deal:
                         deal_time = int(entry_deal.time)
                         ts_window = int(deal_time / 5)
-                        if ts_window in authorized_by_timestamp:
+                        window_ticket = state.first_placed_between(ts_window * 5, (ts_window + 1) * 5)
+                        if window_ticket is not None:
                             is_authorized = True
                             match_method = "timestamp"
-                            matched_ticket = authorized_by_timestamp[ts_window][0]
+                            matched_ticket = window_ticket
                             history_matched["timestamp"] += 1
                     
                     # Method 4: Volume + Symbol + Time window match (15 min)
@@ -1452,11 +1327,13 @@ def check_and_record_authorized_actions(inv_id=None):
                         symbol = entry_deal.symbol
                         volume = entry_deal.volume
                         time_window = int(entry_deal.time / 900)
-                        key = f"{symbol}_{volume}_{time_window}"
-                        if key in authorized_by_volume_symbol:
+                        window_ticket = state.first_symbol_volume_between(
+                            symbol, volume, time_window * 900, (time_window + 1) * 900
+                        )
+                        if window_ticket is not None:
                             is_authorized = True
                             match_method = "volume_symbol"
-                            matched_ticket = authorized_by_volume_symbol[key][0]
+                            matched_ticket = window_ticket
                             history_matched["volume_symbol"] += 1
                     
                     # Method 5: Original order data from signals.json
@@ -1518,10 +1395,10 @@ def check_and_record_authorized_actions(inv_id=None):
                             profit_symbol = "🚫" if total_pnl > 0 else "⚠️" if total_pnl < 0 else "⚖️"
                             print(f"│     {profit_symbol} UNAUTHORIZED #{ticket_id}: ${total_pnl:.2f}")
                     
-                    # Update existing history dictionary if needed
-                    if is_authorized and ticket_id and str(ticket_id) in existing_history_dict:
+                    # Update the recorded trade if needed
+                    trade = state.get_trade(ticket_id) if is_authorized and ticket_id else None
+                    if trade is not None:
                         # Update existing trade status if closed
-                        trade = existing_history_dict[str(ticket_id)]
                         if trade.get('status') != 'closed' and (exit_deal or len(deals) > 1):
                             trade['status'] = 'closed'
                             trade['close_price'] = exit_deal.price if exit_deal else entry_deal.price if entry_deal else 0
@@ -1529,6 +1406,7 @@ def check_and_record_authorized_actions(inv_id=None):
                             trade['profit'] = total_pnl
                             trade['profit_and_loss'] = float(total_pnl)
                             trade['history_match_method'] = match_method
+                            updated_trades.append(trade)
                             history_updated += 1
                 
                 # Print matching summary
@@ -1568,7 +1446,7 @@ def check_and_record_authorized_actions(inv_id=None):
         unauthorized_positions = []
         
         for order in pending_orders:
-            if order.ticket not in authorized_tickets and order.magic not in authorized_magics and order.magic != magic_number:
+            if not state.has_ticket(order.ticket) and not state.has_magic(order.magic) and order.magic != magic_number:
                 unauthorized_orders.append({
                     'ticket': order.ticket,
                     'symbol': order.symbol,
@@ -1579,7 +1457,7 @@ def check_and_record_authorized_actions(inv_id=None):
                 })
         
         for pos in open_positions:
-            if pos.ticket not in authorized_tickets and pos.magic not in authorized_magics and pos.magic != magic_number:
+            if not state.has_ticket(pos.ticket) and not state.has_magic(pos.magic) and pos.magic != magic_number:
                 unauthorized_positions.append({
                     'ticket': pos.ticket,
                     'symbol': pos.symbol,
@@ -1661,8 +1539,8 @@ def check_and_record_authorized_actions(inv_id=None):
                 'unauthorized_positions': unauthorized_positions
             },
             'authorized_summary': {
-                'tickets': len(authorized_tickets),
-                'magics': len(authorized_magics),
+                'tickets': authorized_ticket_count,
+                'magics': authorized_magic_count,
                 'pending_orders': len(pending_orders),
                 'open_positions': len(open_positions),
                 'unauthorized_orders': len(unauthorized_orders),
@@ -1696,17 +1574,29 @@ def check_and_record_authorized_actions(inv_id=None):
         except Exception as e:
             print(f"│  ❌ Error saving activities.json: {e}")
         
+        # Append-only audit trail (activities.json only keeps the latest state)
+        try:
+            state.record_audit({
+                'last_audit_timestamp': activities_data['last_audit_timestamp'],
+                'current_balance': current_balance,
+                'profitandloss': activities_data['profitandloss'],
+                'history_matching_stats': history_matched,
+                'unauthorized_actions': activities_data['unauthorized_actions'],
+                'authorized_summary': activities_data['authorized_summary']
+            }, unauthorized=unauthorized_detected)
+        except Exception as e:
+            print(f"│  ⚠️ Error recording audit: {e}")
+        
         # ============================================================
-        # UPDATE TRADESHISTORY.JSON IF NEEDED
+        # UPDATE TRADE HISTORY IF NEEDED
         # ============================================================
         if history_updated > 0:
             try:
-                history_list = list(existing_history_dict.values())
-                with open(tradeshistory_path, 'w', encoding='utf-8') as f:
-                    json.dump(history_list, f, indent=4)
-                print(f"│  ✅ tradeshistory.json updated ({len(history_list)} trades)")
+                state.save_trades(updated_trades)
+                state.export_trades(tradeshistory_path)
+                print(f"│  ✅ Trade history updated ({history_updated} trades)")
             except Exception as e:
-                print(f"│  ⚠️ Error saving tradeshistory.json: {e}")
+                print(f"│  ⚠️ Error saving trade history: {e}")
         
         # Update stats
         stats["bypass_active_investors"] += 1 if bypass_active else 0
@@ -1758,7 +1648,7 @@ def check_and_record_authorized_actions(inv_id=None):
     stats["processing_success"] = True
     return stats
 
-def update_investor_info(inv_id=None):
+def update_investor_info(inv_id=None, ctx=None):
     """
     Updates investor information in UPDATED_INVESTORS.json including:
     - Balance at execution start date (from activities.json)
@@ -1798,6 +1688,7 @@ def update_investor_info(inv_id=None):
         issues_investors = {}
     
     investor_ids = [inv_id] if inv_id else list(usersdictionary.keys())
+    registry_changes = []
     
     for user_brokerid in investor_ids:
         print(f"\n{'='*60}")
@@ -1905,19 +1796,15 @@ def update_investor_info(inv_id=None):
         print(f"      • Unauthorized Withdrawals: {len(unauthorized_withdrawals)}")
         
         # ============================================================
-        # READ FROM TRADESHISTORY.JSON (if needed for additional data)
+        # TRADE HISTORY (state database)
         # ============================================================
-        history_path = inv_root / "tradeshistory.json"
         authorized_tickets_count = 0
         
-        if history_path.exists():
-            try:
-                with open(history_path, 'r', encoding='utf-8') as f:
-                    history_trades = json.load(f)
-                authorized_tickets_count = len(history_trades) if isinstance(history_trades, list) else len(history_trades.keys())
-                print(f"\n   📚 TRADESHISTORY.JSON: {authorized_tickets_count} authorized tickets")
-            except Exception as e:
-                print(f"   ⚠️  Error reading tradeshistory.json: {e}")
+        try:
+            authorized_tickets_count = get_investor_state(STATE_DB_PATH, user_brokerid, inv_root).trade_count()
+            print(f"\n   📚 TRADE HISTORY: {authorized_tickets_count} authorized tickets")
+        except Exception as e:
+            print(f"   ⚠️  Error reading trade history: {e}")
         
         # ============================================================
         # READ FROM ACCOUNTMANAGEMENT.JSON (fallback for some data)
@@ -1927,9 +1814,8 @@ def update_investor_info(inv_id=None):
         
         if acc_mgmt_path.exists():
             try:
-                with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
-                    acc_config = json.load(f)
-                    magic_number = acc_config.get('magic_number', 0)
+                acc_config = read_json(acc_mgmt_path, ctx)
+                magic_number = acc_config.get('magic_number', 0)
                 print(f"   ⚙️  Magic Number from accountmanagement.json: {magic_number}")
             except Exception as e:
                 print(f"   ⚠️  Error reading accountmanagement.json: {e}")
@@ -2032,15 +1918,18 @@ def update_investor_info(inv_id=None):
             # Remove from updated_investors if exists
             if user_brokerid in updated_investors:
                 del updated_investors[user_brokerid]
+                registry_changes.append(registry_remove(UPDATED_INVESTORS, user_brokerid))
                 print(f"   🗑️  Removed from updated_investors.json")
             
             # Add to issues_investors
             issues_investors[user_brokerid] = investor_info
+            registry_changes.append(registry_set(ISSUES_INVESTORS, user_brokerid, investor_info))
             print(f"   📝 Added to issues_investors.json")
             
         else:
             # Update or add to updated_investors
             updated_investors[user_brokerid] = investor_info
+            registry_changes.append(registry_set(UPDATED_INVESTORS, user_brokerid, investor_info))
             print(f"\n   ✅ INVESTOR SUMMARY (Added to updated_investors.json):")
             print(f"      • Application Status: {investor_info['application_status']}")
             print(f"      • Starting Balance: ${investor_info['broker_balance']:.2f}")
@@ -2055,24 +1944,14 @@ def update_investor_info(inv_id=None):
         print(f"\n{'-'*60}")
     
     # ============================================================
-    # SAVE UPDATED INVESTORS JSON
+    # SAVE UPDATED / ISSUES INVESTORS JSON
     # ============================================================
-    try:
-        with open(updated_investors_path, 'w', encoding='utf-8') as f:
-            json.dump(updated_investors, f, indent=4)
-        print(f"\n✅ Saved updated_investors.json with {len(updated_investors)} investors")
-    except Exception as e:
-        print(f"\n❌ Failed to save updated_investors.json: {e}")
-    
-    # ============================================================
-    # SAVE ISSUES INVESTORS JSON
-    # ============================================================
-    try:
-        with open(issues_investors_path, 'w', encoding='utf-8') as f:
-            json.dump(issues_investors, f, indent=4)
-        print(f"✅ Saved issues_investors.json with {len(issues_investors)} investors")
-    except Exception as e:
-        print(f"❌ Failed to save issues_investors.json: {e}")
+    # Only this run's entries are sent; other investors' entries are left to their own workers
+    applied = submit_registry_changes(registry_changes)
+    if applied:
+        print(f"\n✅ Saved updated_investors.json / issues_investors.json ({sum(applied.values())} changes)")
+    elif registry_changes:
+        print(f"\n📨 Queued {len(registry_changes)} registry changes for the cycle's registry writer")
     
     # ============================================================
     # FINAL SUMMARY
@@ -2094,60 +1973,10 @@ def get_normalized_symbol(record_symbol, risk_keys=None):
     Standardizes symbols with a 'Broker-First' priority.
     If 'US OIL' is passed, it finds the USOIL family, then checks if the broker
     uses USOUSD, USOIL, or WTI.
+    Lookups go through the session-wide SymbolResolver (built once per MT5 session).
     """
     if not record_symbol: return None
-
-    NORM_PATH = Path(r"C:\xampp\htdocs\synapse\synarex\symbols_normalization.json")
-    
-    def clean(s): 
-        return str(s).replace(" ", "").replace("_", "").replace("/", "").replace(".", "").upper()
-
-    search_term = clean(record_symbol)
-    
-    # 1. Load Normalization Map
-    norm_data = {}
-    if NORM_PATH.exists():
-        try:
-            with open(NORM_PATH, 'r', encoding='utf-8') as f:
-                norm_data = json.load(f).get("NORMALIZATION", {})
-        except: pass
-
-    # 2. Find the "Family"
-    target_family_key = None
-    all_family_variants = []
-    
-    for std_key, synonyms in norm_data.items():
-        family_variants = [clean(std_key)] + [clean(s) for s in synonyms]
-        if any(search_term == v or search_term.startswith(v) or v.startswith(search_term) for v in family_variants):
-            target_family_key = std_key
-            all_family_variants = family_variants
-            break
-
-    # 3. IF RISK_KEYS ARE PROVIDED (For Risk Enforcement)
-    if risk_keys:
-        clean_risk_map = {clean(k): k for k in risk_keys}
-        if target_family_key and clean(target_family_key) in clean_risk_map:
-            return clean_risk_map[clean(target_family_key)]
-        for v in all_family_variants:
-            if v in clean_risk_map: return clean_risk_map[v]
-
-    # 4. IF NO RISK_KEYS (For Populating Order Fields / MT5 Specs)
-    # Check what the broker actually has in MarketWatch
-    all_symbols = mt5.symbols_get()
-    if all_symbols:
-        broker_symbols = {clean(s.name): s.name for s in all_symbols}
-        
-        # Try to find which variant the broker uses
-        for v in all_family_variants:
-            if v in broker_symbols:
-                return broker_symbols[v]
-            # Handle suffixes (e.g., USOIL.m)
-            for b_clean, b_raw in broker_symbols.items():
-                if b_clean.startswith(v):
-                    return b_raw
-
-    # Fallback
-    return target_family_key if target_family_key else record_symbol.upper()
+    return get_resolver(NORMALIZE_SYMBOLS_PATH).resolve(record_symbol, risk_keys)
 
 def debug_print_all_broker_symbols():
     """
@@ -2387,63 +2216,8 @@ def symbols_10_levels_250_multiplier_grid_prices(inv_id=None):
             print(f"        ⚠️  Could not get minimum volume: {e}")
             return 0.01, 0.01  # Default to 0.01 lots as fallback
     
-    def calculate_risk_in_usd(symbol_info, entry_price, exit_price, volume, account_currency):
-        """
-        Calculate the risk amount in USD for a given trade level.
-        
-        Args:
-            symbol_info: MT5 symbol info object
-            entry_price: Entry price for the trade
-            exit_price: Exit price (stop loss) for the trade
-            volume: Trade volume in lots
-            account_currency: Account currency (e.g., 'USD', 'EUR')
-            
-        Returns:
-            float: Risk amount in USD
-        """
-        try:
-            # Calculate risk distance in price points
-            risk_distance_points = abs(exit_price - entry_price)
-            
-            # Get tick information
-            tick_size = symbol_info.trade_tick_size
-            tick_value = symbol_info.trade_tick_value  # Value per tick in account currency
-            
-            # Calculate risk in account currency
-            # Formula: (risk_distance_points / tick_size) * tick_value * volume
-            risk_in_account_currency = (risk_distance_points / tick_size) * tick_value * volume
-            
-            # Convert to USD if account currency is not USD
-            if account_currency != 'USD':
-                # Get USD conversion rate
-                usd_symbol = f"{account_currency}USD"
-                if mt5.symbol_select(usd_symbol, True):
-                    usd_tick = mt5.symbol_info_tick(usd_symbol)
-                    if usd_tick:
-                        conversion_rate = usd_tick.bid or 1.0
-                        risk_in_usd = risk_in_account_currency * conversion_rate
-                    else:
-                        risk_in_usd = risk_in_account_currency  # Fallback
-                else:
-                    # Try inverse pair
-                    usd_symbol = f"USD{account_currency}"
-                    if mt5.symbol_select(usd_symbol, True):
-                        usd_tick = mt5.symbol_info_tick(usd_symbol)
-                        if usd_tick:
-                            conversion_rate = 1.0 / usd_tick.ask if usd_tick.ask > 0 else 1.0
-                            risk_in_usd = risk_in_account_currency * conversion_rate
-                        else:
-                            risk_in_usd = risk_in_account_currency  # Fallback
-                    else:
-                        risk_in_usd = risk_in_account_currency  # Fallback
-            else:
-                risk_in_usd = risk_in_account_currency
-            
-            return risk_in_usd
-            
-        except Exception as e:
-            print(f"        ⚠️  Could not calculate risk in USD: {e}")
-            return 0.0  # Return 0 as fallback
+    # Account currency -> USD rate asked once per run instead of on every sizing step
+    usd_rates = UsdRates()
     
     def scale_volume_to_target_risk(symbol_info, entry_price, exit_price, min_volume, volume_step, 
                                    account_currency, target_risk_min, target_risk_max, max_iterations=100):
@@ -2468,49 +2242,17 @@ def symbols_10_levels_250_multiplier_grid_prices(inv_id=None):
         print(f"          • Target risk range: ${target_risk_min:.2f} - ${target_risk_max:.2f}")
         print(f"          • Starting volume: {min_volume}")
         
-        current_volume = min_volume
-        best_volume = min_volume
-        best_risk = 0
-        scaling_attempts = []
-        
-        for iteration in range(max_iterations):
-            # Calculate risk for current volume
-            current_risk = calculate_risk_in_usd(
-                symbol_info, entry_price, exit_price, current_volume, account_currency
-            )
-            
-            scaling_attempts.append({
-                "volume": current_volume,
-                "risk_usd": round(current_risk, 2)
-            })
-            
-            print(f"          • Attempt {iteration + 1}: Volume={current_volume}, Risk=${current_risk:.2f}")
-            
-            # Check if we're within target range
-            if target_risk_min <= current_risk <= target_risk_max:
-                print(f"          ✅ Target risk achieved with volume {current_volume} (${current_risk:.2f})")
-                return current_volume, round(current_risk, 2), scaling_attempts
-            
-            # If we've exceeded the target range
-            elif current_risk > target_risk_max:
-                if iteration == 0:
-                    # Even minimum volume exceeds target, use minimum
-                    print(f"          ⚠️  Minimum volume already exceeds target range")
-                    return min_volume, round(current_risk, 2), scaling_attempts
-                else:
-                    # Previous volume was below target, use that
-                    print(f"          ✅ Using previous volume {best_volume} (${best_risk:.2f}) - below target")
-                    return best_volume, round(best_risk, 2), scaling_attempts
-            
-            # If we're below target range, increase volume
-            else:
-                best_volume = current_volume
-                best_risk = current_risk
-                current_volume = round(current_volume + volume_step, 2)  # Round to 2 decimals for volume
+        # Risk is linear in volume: the step is computed, not searched
+        optimal_volume, actual_risk, scaling_attempts = size_volume(
+            symbol_info, entry_price, exit_price, min_volume, volume_step,
+            usd_rates.rate(account_currency), target_risk_min, target_risk_max, max_iterations
+        )
         
-        # If we've reached max iterations without hitting target, use the best volume found
-        print(f"          ⚠️  Max iterations reached. Using best volume {best_volume} (${best_risk:.2f})")
-        return best_volume, round(best_risk, 2), scaling_attempts
+        if target_risk_min <= actual_risk <= target_risk_max:
+            print(f"          ✅ Target risk achieved with volume {optimal_volume} (${actual_risk:.2f})")
+        else:
+            print(f"          ⚠️  No volume step lands in the target range - using volume {optimal_volume} (${actual_risk:.2f})")
+        return optimal_volume, actual_risk, scaling_attempts
     
     def get_significant_digits(price):
         """
@@ -3027,8 +2769,7 @@ def symbols_10_levels_250_multiplier_grid_prices(inv_id=None):
             **all_symbols_price_data  # Unpack the symbols directly at top level
         }
         
-        with open(symbols_file, 'w', encoding='utf-8') as f:
-            json.dump(final_data, f, indent=4, default=str)
+        save_document(symbols_file, final_data)
         
         print(f"    📁 Saved all symbol prices to: {symbols_file}")
         print(f"    📊 Total symbols in file: {len(all_symbols_price_data)}")
@@ -3191,8 +2932,7 @@ def symbols_10_levels_250_multiplier_grid_prices(inv_id=None):
         
         # Save signals.json
         signals_file = prices_dir / "signals.json"
-        with open(signals_file, 'w', encoding='utf-8') as f:
-            json.dump(signals_data, f, indent=4)
+        save_document(signals_file, signals_data)
         
         print(f"      📊 SIGNALS WITH COUNTERS SUMMARY:")
         print(f"        • Symbols with signals: {symbols_with_signals}")
@@ -3295,8 +3035,8 @@ def symbols_10_levels_250_multiplier_grid_prices(inv_id=None):
             # NEW: Store all symbols price data for single file output
             all_symbols_price_data = {}
             
-            # Symbol resolution cache - exactly like populate_orders_missing_fields
-            resolution_cache = {}
+            # Symbol resolution cache - persisted per broker server, reused across runs
+            resolution_cache = PersistentResolutionCache.for_session(SYMBOL_CACHE_DIR, NORMALIZE_SYMBOLS_PATH)
             
             # Process each category in symbols_dictionary
             for category, symbols in symbols_dict.items():
@@ -3442,6 +3182,7 @@ def symbols_10_levels_250_multiplier_grid_prices(inv_id=None):
                     
                     # Add to all category data for signals
                     all_category_price_data.update(category_price_data)
+            resolution_cache.save()
             
             # Save master price file for this investor (single file with all symbols)
             if successful_symbols > 0:
@@ -3479,7 +3220,7 @@ def symbols_10_levels_250_multiplier_grid_prices(inv_id=None):
             
     return stats
 
-def symbols_4_levels_50_multiplier_grid_prices(inv_id=None):
+def symbols_4_levels_50_multiplier_grid_prices(inv_id=None, ctx=None):
     """
     Collect current prices for all symbols in symbols_dictionary from accountmanagement.json
     for accounts. ASSUMES MT5 IS ALREADY INITIALIZED AND LOGGED IN.
@@ -3688,63 +3429,8 @@ def symbols_4_levels_50_multiplier_grid_prices(inv_id=None):
             print(f"        ⚠️  Could not get minimum volume: {e}")
             return 0.01, 0.01  # Default to 0.01 lots as fallback
     
-    def calculate_risk_in_usd(symbol_info, entry_price, exit_price, volume, account_currency):
-        """
-        Calculate the risk amount in USD for a given trade level.
-        
-        Args:
-            symbol_info: MT5 symbol info object
-            entry_price: Entry price for the trade
-            exit_price: Exit price (stop loss) for the trade
-            volume: Trade volume in lots
-            account_currency: Account currency (e.g., 'USD', 'EUR')
-            
-        Returns:
-            float: Risk amount in USD
-        """
-        try:
-            # Calculate risk distance in price points
-            risk_distance_points = abs(exit_price - entry_price)
-            
-            # Get tick information
-            tick_size = symbol_info.trade_tick_size
-            tick_value = symbol_info.trade_tick_value  # Value per tick in account currency
-            
-            # Calculate risk in account currency
-            # Formula: (risk_distance_points / tick_size) * tick_value * volume
-            risk_in_account_currency = (risk_distance_points / tick_size) * tick_value * volume
-            
-            # Convert to USD if account currency is not USD
-            if account_currency != 'USD':
-                # Get USD conversion rate
-                usd_symbol = f"{account_currency}USD"
-                if mt5.symbol_select(usd_symbol, True):
-                    usd_tick = mt5.symbol_info_tick(usd_symbol)
-                    if usd_tick:
-                        conversion_rate = usd_tick.bid or 1.0
-                        risk_in_usd = risk_in_account_currency * conversion_rate
-                    else:
-                        risk_in_usd = risk_in_account_currency  # Fallback
-                else:
-                    # Try inverse pair
-                    usd_symbol = f"USD{account_currency}"
-                    if mt5.symbol_select(usd_symbol, True):
-                        usd_tick = mt5.symbol_info_tick(usd_symbol)
-                        if usd_tick:
-                            conversion_rate = 1.0 / usd_tick.ask if usd_tick.ask > 0 else 1.0
-                            risk_in_usd = risk_in_account_currency * conversion_rate
-                        else:
-                            risk_in_usd = risk_in_account_currency  # Fallback
-                    else:
-                        risk_in_usd = risk_in_account_currency  # Fallback
-            else:
-                risk_in_usd = risk_in_account_currency
-            
-            return risk_in_usd
-            
-        except Exception as e:
-            print(f"        ⚠️  Could not calculate risk in USD: {e}")
-            return 0.0  # Return 0 as fallback
+    # Account currency -> USD rate asked once per run instead of on every sizing step
+    usd_rates = UsdRates()
     
     def scale_volume_to_target_risk(symbol_info, entry_price, exit_price, min_volume, volume_step, 
                                    account_currency, target_risk_min, target_risk_max, max_iterations=100):
@@ -3769,49 +3455,17 @@ def symbols_4_levels_50_multiplier_grid_prices(inv_id=None):
         print(f"          • Target risk range: ${target_risk_min:.2f} - ${target_risk_max:.2f}")
         print(f"          • Starting volume: {min_volume}")
         
-        current_volume = min_volume
-        best_volume = min_volume
-        best_risk = 0
-        scaling_attempts = []
-        
-        for iteration in range(max_iterations):
-            # Calculate risk for current volume
-            current_risk = calculate_risk_in_usd(
-                symbol_info, entry_price, exit_price, current_volume, account_currency
-            )
-            
-            scaling_attempts.append({
-                "volume": current_volume,
-                "risk_usd": round(current_risk, 2)
-            })
-            
-            print(f"          • Attempt {iteration + 1}: Volume={current_volume}, Risk=${current_risk:.2f}")
-            
-            # Check if we're within target range
-            if target_risk_min <= current_risk <= target_risk_max:
-                print(f"          ✅ Target risk achieved with volume {current_volume} (${current_risk:.2f})")
-                return current_volume, round(current_risk, 2), scaling_attempts
-            
-            # If we've exceeded the target range
-            elif current_risk > target_risk_max:
-                if iteration == 0:
-                    # Even minimum volume exceeds target, use minimum
-                    print(f"          ⚠️  Minimum volume already exceeds target range")
-                    return min_volume, round(current_risk, 2), scaling_attempts
-                else:
-                    # Previous volume was below target, use that
-                    print(f"          ✅ Using previous volume {best_volume} (${best_risk:.2f}) - below target")
-                    return best_volume, round(best_risk, 2), scaling_attempts
-            
-            # If we're below target range, increase volume
-            else:
-                best_volume = current_volume
-                best_risk = current_risk
-                current_volume = round(current_volume + volume_step, 2)  # Round to 2 decimals for volume
+        # Risk is linear in volume: the step is computed, not searched
+        optimal_volume, actual_risk, scaling_attempts = size_volume(
+            symbol_info, entry_price, exit_price, min_volume, volume_step,
+            usd_rates.rate(account_currency), target_risk_min, target_risk_max, max_iterations
+        )
         
-        # If we've reached max iterations without hitting target, use the best volume found
-        print(f"          ⚠️  Max iterations reached. Using best volume {best_volume} (${best_risk:.2f})")
-        return best_volume, round(best_risk, 2), scaling_attempts
+        if target_risk_min <= actual_risk <= target_risk_max:
+            print(f"          ✅ Target risk achieved with volume {optimal_volume} (${actual_risk:.2f})")
+        else:
+            print(f"          ⚠️  No volume step lands in the target range - using volume {optimal_volume} (${actual_risk:.2f})")
+        return optimal_volume, actual_risk, scaling_attempts
     
     def get_significant_digits(price):
         """
@@ -4295,8 +3949,7 @@ def symbols_4_levels_50_multiplier_grid_prices(inv_id=None):
             **all_symbols_price_data  # Unpack the symbols directly at top level
         }
         
-        with open(symbols_file, 'w', encoding='utf-8') as f:
-            json.dump(final_data, f, indent=4, default=str)
+        save_document(symbols_file, final_data)
         
         print(f"    📁 Saved all symbol prices to: {symbols_file}")
         print(f"    📊 Total symbols in file: {len(all_symbols_price_data)}")
@@ -4459,8 +4112,7 @@ def symbols_4_levels_50_multiplier_grid_prices(inv_id=None):
         
         # Save signals.json
         signals_file = prices_dir / "signals.json"
-        with open(signals_file, 'w', encoding='utf-8') as f:
-            json.dump(signals_data, f, indent=4)
+        save_document(signals_file, signals_data)
         
         print(f"      📊 SIGNALS WITH COUNTERS SUMMARY:")
         print(f"        • Symbols with signals: {symbols_with_signals}")
@@ -4506,8 +4158,7 @@ def symbols_4_levels_50_multiplier_grid_prices(inv_id=None):
             return stats
         
         try:
-            with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = read_json(acc_mgmt_path, ctx)
             
             # Extract symbols dictionary
             symbols_dict = config.get("symbols_dictionary", {})
@@ -4563,8 +4214,9 @@ def symbols_4_levels_50_multiplier_grid_prices(inv_id=None):
             # NEW: Store all symbols price data for single file output
             all_symbols_price_data = {}
             
-            # Symbol resolution cache - exactly like populate_orders_missing_fields
-            resolution_cache = {}
+            # Symbol resolution cache - persisted per broker server, reused across runs
+            resolution_cache = PersistentResolutionCache.for_session(SYMBOL_CACHE_DIR, NORMALIZE_SYMBOLS_PATH,
+                                                                     account=ctx.account if ctx else None)
             
             # Process each category in symbols_dictionary
             for category, symbols in symbols_dict.items():
@@ -4710,6 +4362,7 @@ def symbols_4_levels_50_multiplier_grid_prices(inv_id=None):
                     
                     # Add to all category data for signals
                     all_category_price_data.update(category_price_data)
+            resolution_cache.save()
             
             # Save master price file for this investor (single file with all symbols)
             if successful_symbols > 0:
@@ -4956,63 +4609,8 @@ def symbols_16_levels_50_multiplier_grid_prices(inv_id=None):
             print(f"        ⚠️  Could not get minimum volume: {e}")
             return 0.01, 0.01  # Default to 0.01 lots as fallback
     
-    def calculate_risk_in_usd(symbol_info, entry_price, exit_price, volume, account_currency):
-        """
-        Calculate the risk amount in USD for a given trade level.
-        
-        Args:
-            symbol_info: MT5 symbol info object
-            entry_price: Entry price for the trade
-            exit_price: Exit price (stop loss) for the trade
-            volume: Trade volume in lots
-            account_currency: Account currency (e.g., 'USD', 'EUR')
-            
-        Returns:
-            float: Risk amount in USD
-        """
-        try:
-            # Calculate risk distance in price points
-            risk_distance_points = abs(exit_price - entry_price)
-            
-            # Get tick information
-            tick_size = symbol_info.trade_tick_size
-            tick_value = symbol_info.trade_tick_value  # Value per tick in account currency
-            
-            # Calculate risk in account currency
-            # Formula: (risk_distance_points / tick_size) * tick_value * volume
-            risk_in_account_currency = (risk_distance_points / tick_size) * tick_value * volume
-            
-            # Convert to USD if account currency is not USD
-            if account_currency != 'USD':
-                # Get USD conversion rate
-                usd_symbol = f"{account_currency}USD"
-                if mt5.symbol_select(usd_symbol, True):
-                    usd_tick = mt5.symbol_info_tick(usd_symbol)
-                    if usd_tick:
-                        conversion_rate = usd_tick.bid or 1.0
-                        risk_in_usd = risk_in_account_currency * conversion_rate
-                    else:
-                        risk_in_usd = risk_in_account_currency  # Fallback
-                else:
-                    # Try inverse pair
-                    usd_symbol = f"USD{account_currency}"
-                    if mt5.symbol_select(usd_symbol, True):
-                        usd_tick = mt5.symbol_info_tick(usd_symbol)
-                        if usd_tick:
-                            conversion_rate = 1.0 / usd_tick.ask if usd_tick.ask > 0 else 1.0
-                            risk_in_usd = risk_in_account_currency * conversion_rate
-                        else:
-                            risk_in_usd = risk_in_account_currency  # Fallback
-                    else:
-                        risk_in_usd = risk_in_account_currency  # Fallback
-            else:
-                risk_in_usd = risk_in_account_currency
-            
-            return risk_in_usd
-            
-        except Exception as e:
-            print(f"        ⚠️  Could not calculate risk in USD: {e}")
-            return 0.0  # Return 0 as fallback
+    # Account currency -> USD rate asked once per run instead of on every sizing step
+    usd_rates = UsdRates()
     
     def scale_volume_to_target_risk(symbol_info, entry_price, exit_price, min_volume, volume_step, 
                                    account_currency, target_risk_min, target_risk_max, max_iterations=100):
@@ -5037,49 +4635,17 @@ def symbols_16_levels_50_multiplier_grid_prices(inv_id=None):
         print(f"          • Target risk range: ${target_risk_min:.2f} - ${target_risk_max:.2f}")
         print(f"          • Starting volume: {min_volume}")
         
-        current_volume = min_volume
-        best_volume = min_volume
-        best_risk = 0
-        scaling_attempts = []
-        
-        for iteration in range(max_iterations):
-            # Calculate risk for current volume
-            current_risk = calculate_risk_in_usd(
-                symbol_info, entry_price, exit_price, current_volume, account_currency
-            )
-            
-            scaling_attempts.append({
-                "volume": current_volume,
-                "risk_usd": round(current_risk, 2)
-            })
-            
-            print(f"          • Attempt {iteration + 1}: Volume={current_volume}, Risk=${current_risk:.2f}")
-            
-            # Check if we're within target range
-            if target_risk_min <= current_risk <= target_risk_max:
-                print(f"          ✅ Target risk achieved with volume {current_volume} (${current_risk:.2f})")
-                return current_volume, round(current_risk, 2), scaling_attempts
-            
-            # If we've exceeded the target range
-            elif current_risk > target_risk_max:
-                if iteration == 0:
-                    # Even minimum volume exceeds target, use minimum
-                    print(f"          ⚠️  Minimum volume already exceeds target range")
-                    return min_volume, round(current_risk, 2), scaling_attempts
-                else:
-                    # Previous volume was below target, use that
-                    print(f"          ✅ Using previous volume {best_volume} (${best_risk:.2f}) - below target")
-                    return best_volume, round(best_risk, 2), scaling_attempts
-            
-            # If we're below target range, increase volume
-            else:
-                best_volume = current_volume
-                best_risk = current_risk
-                current_volume = round(current_volume + volume_step, 2)  # Round to 2 decimals for volume
+        # Risk is linear in volume: the step is computed, not searched
+        optimal_volume, actual_risk, scaling_attempts = size_volume(
+            symbol_info, entry_price, exit_price, min_volume, volume_step,
+            usd_rates.rate(account_currency), target_risk_min, target_risk_max, max_iterations
+        )
         
-        # If we've reached max iterations without hitting target, use the best volume found
-        print(f"          ⚠️  Max iterations reached. Using best volume {best_volume} (${best_risk:.2f})")
-        return best_volume, round(best_risk, 2), scaling_attempts
+        if target_risk_min <= actual_risk <= target_risk_max:
+            print(f"          ✅ Target risk achieved with volume {optimal_volume} (${actual_risk:.2f})")
+        else:
+            print(f"          ⚠️  No volume step lands in the target range - using volume {optimal_volume} (${actual_risk:.2f})")
+        return optimal_volume, actual_risk, scaling_attempts
     
     def get_significant_digits(price):
         """
@@ -5596,8 +5162,7 @@ def symbols_16_levels_50_multiplier_grid_prices(inv_id=None):
             **all_symbols_price_data  # Unpack the symbols directly at top level
         }
         
-        with open(symbols_file, 'w', encoding='utf-8') as f:
-            json.dump(final_data, f, indent=4, default=str)
+        save_document(symbols_file, final_data)
         
         print(f"    📁 Saved all symbol prices to: {symbols_file}")
         print(f"    📊 Total symbols in file: {len(all_symbols_price_data)}")
@@ -5760,8 +5325,7 @@ def symbols_16_levels_50_multiplier_grid_prices(inv_id=None):
         
         # Save signals.json
         signals_file = prices_dir / "signals.json"
-        with open(signals_file, 'w', encoding='utf-8') as f:
-            json.dump(signals_data, f, indent=4)
+        save_document(signals_file, signals_data)
         
         print(f"      📊 SIGNALS WITH COUNTERS SUMMARY:")
         print(f"        • Symbols with signals: {symbols_with_signals}")
@@ -5864,8 +5428,8 @@ def symbols_16_levels_50_multiplier_grid_prices(inv_id=None):
             # NEW: Store all symbols price data for single file output
             all_symbols_price_data = {}
             
-            # Symbol resolution cache - exactly like populate_orders_missing_fields
-            resolution_cache = {}
+            # Symbol resolution cache - persisted per broker server, reused across runs
+            resolution_cache = PersistentResolutionCache.for_session(SYMBOL_CACHE_DIR, NORMALIZE_SYMBOLS_PATH)
             
             # Process each category in symbols_dictionary
             for category, symbols in symbols_dict.items():
@@ -6011,6 +5575,7 @@ def symbols_16_levels_50_multiplier_grid_prices(inv_id=None):
                     
                     # Add to all category data for signals
                     all_category_price_data.update(category_price_data)
+            resolution_cache.save()
             
             # Save master price file for this investor (single file with all symbols)
             if successful_symbols > 0:
@@ -6257,63 +5822,8 @@ def symbols_6_levels_25_multiplier_grid_prices(inv_id=None):
             print(f"        ⚠️  Could not get minimum volume: {e}")
             return 0.01, 0.01  # Default to 0.01 lots as fallback
     
-    def calculate_risk_in_usd(symbol_info, entry_price, exit_price, volume, account_currency):
-        """
-        Calculate the risk amount in USD for a given trade level.
-        
-        Args:
-            symbol_info: MT5 symbol info object
-            entry_price: Entry price for the trade
-            exit_price: Exit price (stop loss) for the trade
-            volume: Trade volume in lots
-            account_currency: Account currency (e.g., 'USD', 'EUR')
-            
-        Returns:
-            float: Risk amount in USD
-        """
-        try:
-            # Calculate risk distance in price points
-            risk_distance_points = abs(exit_price - entry_price)
-            
-            # Get tick information
-            tick_size = symbol_info.trade_tick_size
-            tick_value = symbol_info.trade_tick_value  # Value per tick in account currency
-            
-            # Calculate risk in account currency
-            # Formula: (risk_distance_points / tick_size) * tick_value * volume
-            risk_in_account_currency = (risk_distance_points / tick_size) * tick_value * volume
-            
-            # Convert to USD if account currency is not USD
-            if account_currency != 'USD':
-                # Get USD conversion rate
-                usd_symbol = f"{account_currency}USD"
-                if mt5.symbol_select(usd_symbol, True):
-                    usd_tick = mt5.symbol_info_tick(usd_symbol)
-                    if usd_tick:
-                        conversion_rate = usd_tick.bid or 1.0
-                        risk_in_usd = risk_in_account_currency * conversion_rate
-                    else:
-                        risk_in_usd = risk_in_account_currency  # Fallback
-                else:
-                    # Try inverse pair
-                    usd_symbol = f"USD{account_currency}"
-                    if mt5.symbol_select(usd_symbol, True):
-                        usd_tick = mt5.symbol_info_tick(usd_symbol)
-                        if usd_tick:
-                            conversion_rate = 1.0 / usd_tick.ask if usd_tick.ask > 0 else 1.0
-                            risk_in_usd = risk_in_account_currency * conversion_rate
-                        else:
-                            risk_in_usd = risk_in_account_currency  # Fallback
-                    else:
-                        risk_in_usd = risk_in_account_currency  # Fallback
-            else:
-                risk_in_usd = risk_in_account_currency
-            
-            return risk_in_usd
-            
-        except Exception as e:
-            print(f"        ⚠️  Could not calculate risk in USD: {e}")
-            return 0.0  # Return 0 as fallback
+    # Account currency -> USD rate asked once per run instead of on every sizing step
+    usd_rates = UsdRates()
     
     def scale_volume_to_target_risk(symbol_info, entry_price, exit_price, min_volume, volume_step, 
                                    account_currency, target_risk_min, target_risk_max, max_iterations=100):
@@ -6338,49 +5848,17 @@ def symbols_6_levels_25_multiplier_grid_prices(inv_id=None):
         print(f"          • Target risk range: ${target_risk_min:.2f} - ${target_risk_max:.2f}")
         print(f"          • Starting volume: {min_volume}")
         
-        current_volume = min_volume
-        best_volume = min_volume
-        best_risk = 0
-        scaling_attempts = []
-        
-        for iteration in range(max_iterations):
-            # Calculate risk for current volume
-            current_risk = calculate_risk_in_usd(
-                symbol_info, entry_price, exit_price, current_volume, account_currency
-            )
-            
-            scaling_attempts.append({
-                "volume": current_volume,
-                "risk_usd": round(current_risk, 2)
-            })
-            
-            print(f"          • Attempt {iteration + 1}: Volume={current_volume}, Risk=${current_risk:.2f}")
-            
-            # Check if we're within target range
-            if target_risk_min <= current_risk <= target_risk_max:
-                print(f"          ✅ Target risk achieved with volume {current_volume} (${current_risk:.2f})")
-                return current_volume, round(current_risk, 2), scaling_attempts
-            
-            # If we've exceeded the target range
-            elif current_risk > target_risk_max:
-                if iteration == 0:
-                    # Even minimum volume exceeds target, use minimum
-                    print(f"          ⚠️  Minimum volume already exceeds target range")
-                    return min_volume, round(current_risk, 2), scaling_attempts
-                else:
-                    # Previous volume was below target, use that
-                    print(f"          ✅ Using previous volume {best_volume} (${best_risk:.2f}) - below target")
-                    return best_volume, round(best_risk, 2), scaling_attempts
-            
-            # If we're below target range, increase volume
-            else:
-                best_volume = current_volume
-                best_risk = current_risk
-                current_volume = round(current_volume + volume_step, 2)  # Round to 2 decimals for volume
+        # Risk is linear in volume: the step is computed, not searched
+        optimal_volume, actual_risk, scaling_attempts = size_volume(
+            symbol_info, entry_price, exit_price, min_volume, volume_step,
+            usd_rates.rate(account_currency), target_risk_min, target_risk_max, max_iterations
+        )
         
-        # If we've reached max iterations without hitting target, use the best volume found
-        print(f"          ⚠️  Max iterations reached. Using best volume {best_volume} (${best_risk:.2f})")
-        return best_volume, round(best_risk, 2), scaling_attempts
+        if target_risk_min <= actual_risk <= target_risk_max:
+            print(f"          ✅ Target risk achieved with volume {optimal_volume} (${actual_risk:.2f})")
+        else:
+            print(f"          ⚠️  No volume step lands in the target range - using volume {optimal_volume} (${actual_risk:.2f})")
+        return optimal_volume, actual_risk, scaling_attempts
     
     def get_significant_digits(price):
         """
@@ -6897,8 +6375,7 @@ def symbols_6_levels_25_multiplier_grid_prices(inv_id=None):
             **all_symbols_price_data  # Unpack the symbols directly at top level
         }
         
-        with open(symbols_file, 'w', encoding='utf-8') as f:
-            json.dump(final_data, f, indent=4, default=str)
+        save_document(symbols_file, final_data)
         
         print(f"    📁 Saved all symbol prices to: {symbols_file}")
         print(f"    📊 Total symbols in file: {len(all_symbols_price_data)}")
@@ -7061,8 +6538,7 @@ def symbols_6_levels_25_multiplier_grid_prices(inv_id=None):
         
         # Save signals.json
         signals_file = prices_dir / "signals.json"
-        with open(signals_file, 'w', encoding='utf-8') as f:
-            json.dump(signals_data, f, indent=4)
+        save_document(signals_file, signals_data)
         
         print(f"      📊 SIGNALS WITH COUNTERS SUMMARY:")
         print(f"        • Symbols with signals: {symbols_with_signals}")
@@ -7165,8 +6641,8 @@ def symbols_6_levels_25_multiplier_grid_prices(inv_id=None):
             # NEW: Store all symbols price data for single file output
             all_symbols_price_data = {}
             
-            # Symbol resolution cache - exactly like populate_orders_missing_fields
-            resolution_cache = {}
+            # Symbol resolution cache - persisted per broker server, reused across runs
+            resolution_cache = PersistentResolutionCache.for_session(SYMBOL_CACHE_DIR, NORMALIZE_SYMBOLS_PATH)
             
             # Process each category in symbols_dictionary
             for category, symbols in symbols_dict.items():
@@ -7312,6 +6788,7 @@ def symbols_6_levels_25_multiplier_grid_prices(inv_id=None):
                     
                     # Add to all category data for signals
                     all_category_price_data.update(category_price_data)
+            resolution_cache.save()
             
             # Save master price file for this investor (single file with all symbols)
             if successful_symbols > 0:
@@ -7349,7 +6826,7 @@ def symbols_6_levels_25_multiplier_grid_prices(inv_id=None):
             
     return stats
 
-def filter_unauthorized_symbols(inv_id=None):
+def filter_unauthorized_symbols(inv_id=None, ctx=None):
     """
     Verifies and filters risk entries based on allowed symbols defined in accountmanagement.json.
     Targets signals.json records and removes unauthorized symbol orders.
@@ -7407,18 +6884,16 @@ def filter_unauthorized_symbols(inv_id=None):
             print(f"  └─ ⚠️  Account config missing. Skipping.")
             continue
             
-        if not signals_path.exists():
+        if not document_exists(signals_path):
             print(f"  └─ ⚠️  signals.json not found. Skipping.")
             continue
 
         try:
             # Load account management configuration
-            with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = read_json(acc_mgmt_path, ctx)
             
             # Load signals.json
-            with open(signals_path, 'r', encoding='utf-8') as f:
-                signals_data = json.load(f)
+            signals_data = load_document(signals_path)
             
             # Extract and sanitize the list of allowed symbols
             sym_dict = config.get("symbols_dictionary", {})
@@ -7536,8 +7011,7 @@ def filter_unauthorized_symbols(inv_id=None):
                 }
                 
                 # Save modified signals.json
-                with open(signals_path, 'w', encoding='utf-8') as f:
-                    json.dump(signals_data, f, indent=4)
+                save_document(signals_path, signals_data)
                 
                 total_investors_modified += 1
                 total_symbols_removed += investor_symbols_removed
@@ -7579,7 +7053,7 @@ def filter_unauthorized_symbols(inv_id=None):
     
     return filter_stats
 
-def fetch_15m_candles(inv_id=None):
+def fetch_15m_candles(inv_id=None, ctx=None):
     """
     Fetch 15-minute candles (100 candles) for all symbols in symbols_dictionary.
     Uses same symbol normalization pattern as symbols_grid_prices.
@@ -7793,8 +7267,7 @@ def fetch_15m_candles(inv_id=None):
         }
         
         # Save back to file
-        with open(symbols_prices_path, 'w', encoding='utf-8') as f:
-            json.dump(symbols_prices_data, f, indent=4, default=str)
+        save_document(symbols_prices_path, symbols_prices_data)
         
         print(f"    📁 Saved candle data to symbols_prices.json as {candles_added} [symbol]_tf_candles entries")
     
@@ -7814,10 +7287,9 @@ def fetch_15m_candles(inv_id=None):
         symbols_prices_path = prices_dir / "symbols_prices.json"
         
         # Check if symbols_prices.json exists, if not create basic structure
-        if symbols_prices_path.exists():
+        if document_exists(symbols_prices_path):
             print(f" [{inv_id}] 📂 Loading existing symbols_prices.json...")
-            with open(symbols_prices_path, 'r', encoding='utf-8') as f:
-                symbols_prices_data = json.load(f)
+            symbols_prices_data = load_document(symbols_prices_path)
         else:
             print(f" [{inv_id}] ⚠️ symbols_prices.json not found, creating new file...")
             symbols_prices_data = {
@@ -7833,8 +7305,7 @@ def fetch_15m_candles(inv_id=None):
             return stats
         
         try:
-            with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = read_json(acc_mgmt_path, ctx)
             
             # Extract symbols dictionary
             symbols_dict = config.get("symbols_dictionary", {})
@@ -7851,8 +7322,9 @@ def fetch_15m_candles(inv_id=None):
             total_candles_fetched = 0
             current_candle_forming = False
             
-            # Symbol resolution cache - exactly like populate_orders_missing_fields
-            resolution_cache = {}
+            # Symbol resolution cache - persisted per broker server, reused across runs
+            resolution_cache = PersistentResolutionCache.for_session(SYMBOL_CACHE_DIR, NORMALIZE_SYMBOLS_PATH,
+                                                                     account=ctx.account if ctx else None)
             
             # Dictionary to store all symbols' candle data
             all_symbols_candle_data = {}
@@ -7910,6 +7382,7 @@ def fetch_15m_candles(inv_id=None):
                         oldest = symbol_candles_data['candles'][-1]
                         print(f"          • Oldest #{oldest['candle_number']}: {oldest['time_str']} (O:{oldest['open']:.{symbol_candles_data['digits']}f}, "
                               f"C:{oldest['close']:.{symbol_candles_data['digits']}f})")
+            resolution_cache.save()
             
             # Save all candle data to symbols_prices.json
             if all_symbols_candle_data:
@@ -8133,7 +7606,7 @@ def timeframe_countdown(inv_id=None):
     print(f"\n{'='*10} 🏁 FUNCTION ENDED - NO VALID INVESTORS {'='*10}\n")
     return stats
 
-def place_signals_orders(inv_id=None):
+def place_signals_orders(inv_id=None, ctx=None):
     """
     Place orders from signals.json for specified investor(s).
     
@@ -8182,15 +7655,25 @@ def place_signals_orders(inv_id=None):
         dict: Statistics about order placement
     """
     
+    # Deal ledgers synced with the terminal once per investor in this run, not per placed order
+    cycle_ledgers = {}
+    
+    def get_cycle_ledger(investor_root):
+        if ctx and investor_root.name == ctx.inv_id:
+            return ctx.deal_ledger()
+        if investor_root not in cycle_ledgers:
+            cycle_ledgers[investor_root] = open_deal_ledger(investor_root)
+        return cycle_ledgers[investor_root]
+    
     # =====================================================
     # SUB-FUNCTION: Sync and save trade history
     # =====================================================
     def sync_and_save_trade_history(investor_root, new_trade=None):
         """
-        Synchronize tradeshistory.json with MT5 terminal status.
+        Synchronize the investor's trade history with MT5 terminal status.
         
-        NEW PATH STRUCTURE:
-        - tradeshistory.json is stored directly in the investor root folder
+        The history lives in the state database; tradeshistory.json (and its
+        backup) in the investor root folder are exported copies for the web pages.
         
         Args:
             investor_root: Path to the investor's root directory
@@ -8200,58 +7683,52 @@ def place_signals_orders(inv_id=None):
             bool: Success status
         """
         try:
-            # Define the history file path
             history_path = investor_root / "tradeshistory.json"
+            state = get_investor_state(STATE_DB_PATH, investor_root.name, investor_root)
             
-            print(f"      📂 Tradeshistory path: {history_path}")
-            
-            # Load existing history if it exists
-            history = []
-            if history_path.exists():
-                try:
-                    with open(history_path, 'r', encoding='utf-8') as f:
-                        history = json.load(f)
-                    print(f"      📋 Loaded {len(history)} existing trades from tradeshistory.json")
-                except Exception as e:
-                    print(f"      ⚠️ Error reading tradeshistory.json: {e}")
-                    history = []
+            print(f"      📂 Trade history: {state.trade_count()} trades recorded")
             
-            # 1. Add new trade if provided
+            # 1. Add new trade if provided (indexed duplicate check)
             if new_trade:
-                # Check if trade already exists to avoid duplicates
-                existing_ticket = any(t.get('ticket') == new_trade.get('ticket') for t in history)
-                if not existing_ticket:
-                    history.append(new_trade)
+                if state.add_trade(new_trade):
                     print(f"      ➕ Added new trade: Ticket {new_trade.get('ticket')}")
                 else:
                     print(f"      ℹ️ Trade Ticket {new_trade.get('ticket')} already exists in history")
             
-            # 2. Sync all records with MT5
+            # 2. Sync the records whose status can still change with MT5
             active_orders = {o.ticket for o in (mt5.orders_get() or [])}
             active_positions = {p.ticket for p in (mt5.positions_get() or [])}
             
-            # Fetch history for the last 24 hours to check recently closed
+            # Fetch history for the last 7 days to check recently closed
             from datetime import datetime, timedelta
-            from_date = datetime.now() - timedelta(days=1)
-            history_deals = mt5.history_deals_get(from_date, datetime.now())
-            history_tickets = {d.order for d in history_deals} if history_deals else set()
-            
-            # Also fetch older history to ensure complete sync (up to 7 days)
             from_date_7days = datetime.now() - timedelta(days=7)
-            older_history_deals = mt5.history_deals_get(from_date_7days, datetime.now())
+            ledger = get_cycle_ledger(investor_root)
+            if ledger:
+                # The deal ledger synced once for this run covers the whole window
+                history_deals = ledger.deals_between(from_date_7days)
+                older_history_deals = None
+            else:
+                from_date = datetime.now() - timedelta(days=1)
+                history_deals = mt5.history_deals_get(from_date, datetime.now())
+                older_history_deals = mt5.history_deals_get(from_date_7days, datetime.now())
+            history_tickets = {d.order for d in history_deals} if history_deals else set()
             if older_history_deals:
                 older_tickets = {d.order for d in older_history_deals}
                 history_tickets.update(older_tickets)
             
             print(f"      🔍 MT5 Status: {len(active_orders)} active orders, {len(active_positions)} active positions, {len(history_tickets)} recent closed trades")
             
+            # Closed trades that are no longer on the terminal cannot change; skip them
+            sync_trades = state.trades_to_sync(active_orders | active_positions)
+            changed_trades = []
             updated_count = 0
-            for trade in history:
+            for trade in sync_trades:
                 ticket = trade.get('ticket')
                 if not ticket:
                     continue
                 
                 old_status = trade.get('status', 'unknown')
+                before = dict(trade)
                 
                 # Logic: If ticket is in active orders or active positions, it's pending/active
                 if ticket in active_orders or ticket in active_positions:
@@ -8292,30 +7769,25 @@ def place_signals_orders(inv_id=None):
                         trade['close_reason'] = 'default_closure'
                         print(f"      🔄 Trade {ticket}: {old_status} → closed (default)")
                         updated_count += 1
+                
+                if trade != before:
+                    changed_trades.append(trade)
             
-            # Save updated history
+            # Save changed records and refresh the JSON copies
             try:
-                with open(history_path, 'w', encoding='utf-8') as f:
-                    json.dump(history, f, indent=4)
+                state.save_trades(changed_trades)
+                if new_trade or changed_trades:
+                    state.export_trades(history_path, investor_root / "tradeshistory_backup.json")
                 
                 if new_trade:
-                    print(f"      ✅ Saved new trade to tradeshistory.json (Ticket: {new_trade['ticket']})")
+                    print(f"      ✅ Saved new trade to trade history (Ticket: {new_trade['ticket']})")
                 elif updated_count > 0:
-                    print(f"      ✅ Updated {updated_count} trades in tradeshistory.json")
+                    print(f"      ✅ Updated {updated_count} trades in trade history")
                 else:
-                    print(f"      ℹ️ No changes to tradeshistory.json")
-                    
-                # Also save a backup copy in the investor root for safety
-                backup_path = investor_root / "tradeshistory_backup.json"
-                try:
-                    with open(backup_path, 'w', encoding='utf-8') as f:
-                        json.dump(history, f, indent=4)
-                    print(f"      💾 Backup saved to: {backup_path}")
-                except Exception as e:
-                    print(f"      ⚠️ Could not save backup: {e}")
+                    print(f"      ℹ️ No changes to trade history")
                     
             except Exception as e:
-                print(f"      ❌ Failed to save tradeshistory.json: {e}")
+                print(f"      ❌ Failed to save trade history: {e}")
                 return False
                 
             return True
@@ -8615,13 +8087,13 @@ def place_signals_orders(inv_id=None):
                 if position_sl and position_sl > 0:
                     if is_position_buy:
                         # For buy position, risk is entry - SL
-                        position_risk_profit = mt5.order_calc_profit(
+                        position_risk_profit = risk_engine.calc_profit(
                             mt5.ORDER_TYPE_BUY, symbol, position_volume,
                             position_entry, position_sl
                         )
                     else:  # sell position
                         # For sell position, risk is SL - entry
-                        position_risk_profit = mt5.order_calc_profit(
+                        position_risk_profit = risk_engine.calc_profit(
                             mt5.ORDER_TYPE_SELL, symbol, position_volume,
                             position_entry, position_sl
                         )
@@ -8646,7 +8118,7 @@ def place_signals_orders(inv_id=None):
                         print(f"            📐 SELL pending @ {entry_price} below SELL position @ {position_entry}")
                         print(f"            🧮 Calculating risk: Entry={entry_price}, Exit={position_entry}")
                         
-                        potential_risk_profit = mt5.order_calc_profit(
+                        potential_risk_profit = risk_engine.calc_profit(
                             mt5.ORDER_TYPE_SELL, symbol, volume,
                             entry_price, position_entry
                         )
@@ -8655,7 +8127,7 @@ def place_signals_orders(inv_id=None):
                         print(f"            📐 SELL pending @ {entry_price} above SELL position @ {position_entry}")
                         print(f"            🧮 Calculating risk: Entry={position_entry}, Exit={entry_price}")
                         
-                        potential_risk_profit = mt5.order_calc_profit(
+                        potential_risk_profit = risk_engine.calc_profit(
                             mt5.ORDER_TYPE_SELL, symbol, volume,
                             position_entry, entry_price
                         )
@@ -8677,7 +8149,7 @@ def place_signals_orders(inv_id=None):
                         print(f"            📐 BUY pending @ {entry_price} above BUY position @ {position_entry}")
                         print(f"            🧮 Calculating risk: Entry={position_entry}, Exit={entry_price}")
                         
-                        potential_risk_profit = mt5.order_calc_profit(
+                        potential_risk_profit = risk_engine.calc_profit(
                             mt5.ORDER_TYPE_BUY, symbol, volume,
                             position_entry, entry_price
                         )
@@ -8686,7 +8158,7 @@ def place_signals_orders(inv_id=None):
                         print(f"            📐 BUY pending @ {entry_price} below BUY position @ {position_entry}")
                         print(f"            🧮 Calculating risk: Entry={entry_price}, Exit={position_entry}")
                         
-                        potential_risk_profit = mt5.order_calc_profit(
+                        potential_risk_profit = risk_engine.calc_profit(
                             mt5.ORDER_TYPE_BUY, symbol, volume,
                             entry_price, position_entry
                         )
@@ -8714,13 +8186,13 @@ def place_signals_orders(inv_id=None):
                 if position_sl and position_sl > 0:
                     if is_position_buy:
                         # For buy position, risk is entry - SL
-                        position_risk_profit = mt5.order_calc_profit(
+                        position_risk_profit = risk_engine.calc_profit(
                             mt5.ORDER_TYPE_BUY, symbol, position_volume,
                             position_entry, position_sl
                         )
                     else:  # sell position
                         # For sell position, risk is SL - entry
-                        position_risk_profit = mt5.order_calc_profit(
+                        position_risk_profit = risk_engine.calc_profit(
                             mt5.ORDER_TYPE_SELL, symbol, position_volume,
                             position_entry, position_sl
                         )
@@ -8752,7 +8224,7 @@ def place_signals_orders(inv_id=None):
                         print(f"            🧮 Calculating opposite risk: Entry={position_entry}, Exit={entry_price}")
                         
                         # Risk = from SELL position's entry to BUY pending's entry
-                        potential_risk_profit = mt5.order_calc_profit(
+                        potential_risk_profit = risk_engine.calc_profit(
                             mt5.ORDER_TYPE_SELL, symbol, min(volume, position_volume),
                             position_entry, entry_price
                         )
@@ -8762,7 +8234,7 @@ def place_signals_orders(inv_id=None):
                         print(f"            🧮 Calculating opposite risk: Entry={entry_price}, Exit={position_entry}")
                         
                         # Risk = from BUY pending's entry to SELL position's entry
-                        potential_risk_profit = mt5.order_calc_profit(
+                        potential_risk_profit = risk_engine.calc_profit(
                             mt5.ORDER_TYPE_BUY, symbol, min(volume, position_volume),
                             entry_price, position_entry
                         )
@@ -8787,7 +8259,7 @@ def place_signals_orders(inv_id=None):
                         print(f"            🧮 Calculating opposite risk: Entry={entry_price}, Exit={position_entry}")
                         
                         # Risk = from SELL pending's entry to BUY position's entry
-                        potential_risk_profit = mt5.order_calc_profit(
+                        potential_risk_profit = risk_engine.calc_profit(
                             mt5.ORDER_TYPE_SELL, symbol, min(volume, position_volume),
                             entry_price, position_entry
                         )
@@ -8797,7 +8269,7 @@ def place_signals_orders(inv_id=None):
                         print(f"            🧮 Calculating opposite risk: Entry={position_entry}, Exit={entry_price}")
                         
                         # Risk = from BUY position's entry to SELL pending's entry
-                        potential_risk_profit = mt5.order_calc_profit(
+                        potential_risk_profit = risk_engine.calc_profit(
                             mt5.ORDER_TYPE_BUY, symbol, min(volume, position_volume),
                             position_entry, entry_price
                         )
@@ -9587,7 +9059,7 @@ def place_signals_orders(inv_id=None):
             try:
                 # Import the function (assuming it's in the same module or imported)
                 # If it's in the same file, just call it directly
-                management_result = manage_single_position_and_pending(inv_id=inv_id)
+                management_result = manage_single_position_and_pending(inv_id=inv_id, ctx=ctx)
                 upload_orders_flag = management_result.get("upload_orders", True)
                 stats["upload_orders_flag"] = upload_orders_flag
                 
@@ -9619,8 +9091,7 @@ def place_signals_orders(inv_id=None):
                 return stats
             
             try:
-                with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
-                    acc_config = json.load(f)
+                acc_config = read_json(acc_mgmt_path, ctx)
                 
                 # Check if auto trading is enabled
                 settings = acc_config.get("settings", {})
@@ -9666,14 +9137,13 @@ def place_signals_orders(inv_id=None):
                 return stats
             
             # Continue with order placement if enabled
-            if not signals_path.exists():
+            if not document_exists(signals_path):
                 print(f" [{inv_id}]  signals.json not found at {signals_path}")
                 return stats
             
             try:
                 print(f" [{inv_id}] 📂 Loading signals.json...")
-                with open(signals_path, 'r', encoding='utf-8') as f:
-                    signals_data = json.load(f)
+                signals_data = load_document(signals_path)
                 
                 # Get ALL existing pending orders for this account (no symbol filter)
                 print(f" [{inv_id}] 🔍 Checking ALL existing pending orders...")
@@ -9954,9 +9424,11 @@ def place_signals_orders(inv_id=None):
         
         return stats
     
+    # Contract specs / profit estimates of the logged-in account, used by the closeness checks
+    risk_engine = RiskEngine(account_currency=account_field("currency", ctx))
     return main()
 
-def manage_single_position_and_pending(inv_id=None):
+def manage_single_position_and_pending(inv_id=None, ctx=None):
     """
     Function: Manages positions and pending orders to ensure only one position exists PER SYMBOL
     and only the opposite pending order with entry price matching the position's SL price remains.
@@ -10027,8 +9499,7 @@ def manage_single_position_and_pending(inv_id=None):
 
         # --- LOAD CONFIG AND CHECK SETTINGS ---
         try:
-            with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = read_json(acc_mgmt_path, ctx)
             
             # Check if single position and pending management is enabled
             settings = config.get("settings", {})
@@ -10053,16 +9524,17 @@ def manage_single_position_and_pending(inv_id=None):
         print(f"      • Login ID: {login_id}")
 
         # Initialize MT5 connection if needed
+        reset_resolver()
         if not mt5.initialize(path=mt5_path):
             print(f"  └─  MT5 initialization failed")
             stats["errors"] += 1
             continue
 
         # Check login status
-        acc = mt5.account_info()
-        if acc is None or acc.login != login_id:
+        if account_field("login", ctx) != login_id:
             print(f"      🔑 Logging into account...")
-            if not mt5.login(login_id, password=broker_cfg["PASSWORD"], server=broker_cfg["SERVER"]):
+            reset_resolver()
+            if not ensure_investor_session(broker_cfg):
                 error = mt5.last_error()
                 print(f"  └─  Login failed: {error}")
                 stats["errors"] += 1
@@ -10708,6 +10180,7 @@ def martingale_old(inv_id=None):
         print(f"      • Login ID: {login_id}")
 
         # Initialize MT5 connection if needed
+        reset_resolver()
         if not mt5.initialize(path=mt5_path):
             print(f"  └─  MT5 initialization failed")
             stats["errors"] += 1
@@ -10717,7 +10190,8 @@ def martingale_old(inv_id=None):
         acc = mt5.account_info()
         if acc is None or acc.login != login_id:
             print(f"      🔑 Logging into account...")
-            if not mt5.login(login_id, password=broker_cfg["PASSWORD"], server=broker_cfg["SERVER"]):
+            reset_resolver()
+            if not ensure_investor_session(broker_cfg):
                 error = mt5.last_error()
                 print(f"  └─  Login failed: {error}")
                 stats["errors"] += 1
@@ -11300,13 +10774,12 @@ def martingale_old(inv_id=None):
             
             signals_path = inv_root / "prices" / "signals.json"
             
-            if not signals_path.exists():
+            if not document_exists(signals_path):
                 print(f"      ⚠️  signals.json not found at {signals_path}")
                 print(f"      ⏭️  Skipping volume modification")
             else:
                 try:
-                    with open(signals_path, 'r', encoding='utf-8') as f:
-                        signals_data = json.load(f)
+                    signals_data = load_document(signals_path)
                     
                     print(f"      📂 Loaded signals.json")
                     
@@ -11523,8 +10996,7 @@ def martingale_old(inv_id=None):
                             updates_summary = update_all_symbol_volumes(signals_data, volumes_to_update)
                             
                             if any(count > 0 for count in updates_summary.values()):
-                                with open(signals_path, 'w', encoding='utf-8') as f:
-                                    json.dump(signals_data, f, indent=2, ensure_ascii=False)
+                                save_document(signals_path, signals_data)
                                 
                                 stats["signals_modified"] = True
                                 print(f"\n      ✅ Saved signals.json with updated volumes (BASE RECOVERY)")
@@ -11564,12 +11036,11 @@ def martingale_old(inv_id=None):
                 if positions:
                     signals_path = inv_root / "prices" / "signals.json"
                     
-                    if not signals_path.exists():
+                    if not document_exists(signals_path):
                         print(f"      ⚠️  signals.json not found at {signals_path}")
                         print(f"      ⏭️  Skipping pre-scaling")
                     else:
-                        with open(signals_path, 'r', encoding='utf-8') as f:
-                            signals_data = json.load(f)
+                        signals_data = load_document(signals_path)
                         
                         print(f"      📂 Loaded signals.json")
                         
@@ -11902,8 +11373,7 @@ def martingale_old(inv_id=None):
                             updates_summary = update_all_symbol_volumes(signals_data, pre_scale_volumes)
                             
                             if any(count > 0 for count in updates_summary.values()):
-                                with open(signals_path, 'w', encoding='utf-8') as f:
-                                    json.dump(signals_data, f, indent=2, ensure_ascii=False)
+                                save_document(signals_path, signals_data)
                                 
                                 stats["pre_scaling_applied"] = True
                                 stats["signals_modified"] = True
@@ -11945,11 +11415,10 @@ def martingale_old(inv_id=None):
             if pending_orders:
                 signals_path = inv_root / "prices" / "signals.json"
                 
-                if not signals_path.exists():
+                if not document_exists(signals_path):
                     print(f"      ⚠️  signals.json not found - cannot verify volumes")
                 else:
-                    with open(signals_path, 'r', encoding='utf-8') as f:
-                        signals_data = json.load(f)
+                    signals_data = load_document(signals_path)
                     
                     expected_volumes = {}
                     
@@ -12199,7 +11668,7 @@ def martingale_old(inv_id=None):
     
     return stats
 
-def martingale(inv_id=None):
+def martingale(inv_id=None, ctx=None):
     """
     Function: Checks daily loss and martingale status using STARTING BALANCE ONLY.
     
@@ -12290,8 +11759,7 @@ def martingale(inv_id=None):
 
         # --- LOAD CONFIG AND CHECK martingale SETTINGS ---
         try:
-            with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = read_json(acc_mgmt_path, ctx)
             
             # Check both old and new config structure
             settings = config.get("settings", {})
@@ -12412,16 +11880,17 @@ def martingale(inv_id=None):
         print(f"      • Login ID: {login_id}")
 
         # Initialize MT5 connection if needed
+        reset_resolver()
         if not mt5.initialize(path=mt5_path):
             print(f"  └─  MT5 initialization failed")
             stats["errors"] += 1
             continue
 
         # Check login status
-        acc = mt5.account_info()
-        if acc is None or acc.login != login_id:
+        if account_field("login", ctx) != login_id:
             print(f"      🔑 Logging into account...")
-            if not mt5.login(login_id, password=broker_cfg["PASSWORD"], server=broker_cfg["SERVER"]):
+            reset_resolver()
+            if not ensure_investor_session(broker_cfg):
                 error = mt5.last_error()
                 print(f"  └─  Login failed: {error}")
                 stats["errors"] += 1
@@ -12436,6 +11905,9 @@ def martingale(inv_id=None):
             print(f"  └─  Failed to get account information")
             stats["errors"] += 1
             continue
+
+        # Contract specs / profit estimates for this account's volume searches
+        risk_engine = RiskEngine(account_currency=account_field("currency", ctx))
         
         mt5_current_balance = account_info.balance
         stats["current_balance"] = mt5_current_balance
@@ -12461,11 +11933,10 @@ def martingale(inv_id=None):
         if not execution_start_date:
             if acc_mgmt_path.exists():
                 try:
-                    with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
-                        acc_mgmt = json.load(f)
-                        execution_start_date = acc_mgmt.get('execution_start_date')
-                        if execution_start_date:
-                            print(f"  📋 Found execution_start_date in accountmanagement.json: {execution_start_date}")
+                    acc_mgmt = read_json(acc_mgmt_path, ctx)
+                    execution_start_date = acc_mgmt.get('execution_start_date')
+                    if execution_start_date:
+                        print(f"  📋 Found execution_start_date in accountmanagement.json: {execution_start_date}")
                 except Exception as e:
                     print(f"  ⚠️  Error reading accountmanagement.json: {e}")
 
@@ -12489,45 +11960,23 @@ def martingale(inv_id=None):
             continue
 
         # --- CALCULATE REAL STARTING BALANCE FROM EXECUTION START DATE ---
-        print(f"  🔍 Fetching ALL deals from execution start date: {start_datetime.strftime('%Y-%m-%d')}")
-        all_deals = mt5.history_deals_get(start_datetime, datetime.now())
-        
-        # Initialize tracking variables
-        total_profits = 0.0
-        total_losses = 0.0
-        total_deposits = 0.0
-        total_withdrawals = 0.0
-        trading_deals_count = 0
-        non_trading_count = 0
-        
-        if all_deals:
-            print(f"  📊 Processing {len(all_deals)} total deals from {start_datetime.strftime('%Y-%m-%d')} to now...")
-            
-            for deal in all_deals:
-                # Calculate total P/L including commission and swap
-                total_pl = deal.profit + deal.commission + deal.swap
-                
-                # Deal type classification
-                # type 0 = BUY, 1 = SELL, 2 = DEPOSIT, 3 = WITHDRAWAL
-                if deal.type == 2:  # Deposit
-                    total_deposits += deal.profit
-                    print(f"      💰 Deposit: +${deal.profit:.2f} on {datetime.fromtimestamp(deal.time).strftime('%Y-%m-%d %H:%M:%S')}")
-                    non_trading_count += 1
-                elif deal.type == 3:  # Withdrawal
-                    withdrawal_amount = abs(deal.profit) if deal.profit < 0 else deal.profit
-                    total_withdrawals += withdrawal_amount
-                    print(f"      💸 Withdrawal: -${withdrawal_amount:.2f} on {datetime.fromtimestamp(deal.time).strftime('%Y-%m-%d %H:%M:%S')}")
-                    non_trading_count += 1
-                elif deal.type in [0, 1]:  # Trading deals (BUY/SELL)
-                    trading_deals_count += 1
-                    if total_pl > 0:
-                        total_profits += total_pl
-                        print(f"      📈 Trading Profit: +${total_pl:.2f} for {deal.symbol} on {datetime.fromtimestamp(deal.time).strftime('%Y-%m-%d %H:%M:%S')}")
-                    elif total_pl < 0:
-                        total_losses += abs(total_pl)
-                        print(f"      📉 Trading Loss: -${abs(total_pl):.2f} for {deal.symbol} on {datetime.fromtimestamp(deal.time).strftime('%Y-%m-%d %H:%M:%S')}")
-                else:
-                    print(f"      ℹ️  Unknown deal type {deal.type}: amount ${deal.profit:.2f}")
+        print(f"  🔍 Syncing deal ledger from execution start date: {start_datetime.strftime('%Y-%m-%d')}")
+        ledger = ctx.deal_ledger(start_datetime) if ctx else get_deal_ledger(inv_root, start_datetime)
+        summary = ledger.summary if ledger else None
+        
+        if summary and summary["deal_count"]:
+            print(f"  📊 Ledger holds {summary['deal_count']} total deals from {start_datetime.strftime('%Y-%m-%d')} to now...")
+            
+            # Running totals kept by the ledger
+            # type 0 = BUY, 1 = SELL, 2 = DEPOSIT, 3 = WITHDRAWAL
+            total_profits = summary["trade_profits"]
+            total_losses = summary["trade_losses"]
+            total_deposits = summary["deposits_total"]
+            total_withdrawals = summary["withdrawals_abs"]
+            trading_deals_count = summary["trade_deals"]
+            non_trading_count = summary["deposit_count"] + summary["withdrawal_count"]
+            if summary["other_count"]:
+                print(f"      ℹ️  {summary['other_count']} deal(s) of other types ignored")
             
             # Calculate REAL STARTING BALANCE
             # Formula: Starting Balance = Current Balance - Total Profits + Total Losses - Net Deposits/Withdrawals
@@ -12662,7 +12111,7 @@ def martingale(inv_id=None):
                 from_date = datetime(check_date.year, check_date.month, check_date.day, 0, 0, 0)
                 to_date = datetime(check_date.year, check_date.month, check_date.day, 23, 59, 59)
                 
-                day_deals = mt5.history_deals_get(from_date, to_date)
+                day_deals = ledger.deals_between(from_date, to_date) if ledger else mt5.history_deals_get(from_date, to_date)
                 if day_deals and len(day_deals) > 0:
                     all_deals_by_day[check_date] = day_deals
                     print(f"      • {check_date.strftime('%Y-%m-%d')}: Found {len(day_deals)} deals")
@@ -13000,13 +12449,12 @@ def martingale(inv_id=None):
             
             signals_path = inv_root / "prices" / "signals.json"
             
-            if not signals_path.exists():
+            if not document_exists(signals_path):
                 print(f"      ⚠️  signals.json not found at {signals_path}")
                 print(f"      ⏭️  Skipping volume modification")
             else:
                 try:
-                    with open(signals_path, 'r', encoding='utf-8') as f:
-                        signals_data = json.load(f)
+                    signals_data = load_document(signals_path)
                     
                     print(f"      📂 Loaded signals.json")
                     
@@ -13111,7 +12559,7 @@ def martingale(inv_id=None):
                             print(f"        • Price difference (entry to stop): {price_diff:.5f}")
                             
                             def calculate_profit_for_volume(volume):
-                                profit = mt5.order_calc_profit(
+                                profit = risk_engine.calc_profit(
                                     calc_type,
                                     symbol,
                                     volume,
@@ -13232,8 +12680,7 @@ def martingale(inv_id=None):
                             updates_summary = update_all_symbol_volumes(signals_data, volumes_to_update)
                             
                             if any(count > 0 for count in updates_summary.values()):
-                                with open(signals_path, 'w', encoding='utf-8') as f:
-                                    json.dump(signals_data, f, indent=2, ensure_ascii=False)
+                                save_document(signals_path, signals_data)
                                 
                                 stats["signals_modified"] = True
                                 print(f"\n      ✅ Saved signals.json with updated volumes (TOTAL RECOVERY: ${total_recovery_amount:.2f})")
@@ -13274,12 +12721,11 @@ def martingale(inv_id=None):
                 if positions:
                     signals_path = inv_root / "prices" / "signals.json"
                     
-                    if not signals_path.exists():
+                    if not document_exists(signals_path):
                         print(f"      ⚠️  signals.json not found at {signals_path}")
                         print(f"      ⏭️  Skipping pre-scaling")
                     else:
-                        with open(signals_path, 'r', encoding='utf-8') as f:
-                            signals_data = json.load(f)
+                        signals_data = load_document(signals_path)
                         
                         print(f"      📂 Loaded signals.json")
                         
@@ -13501,7 +12947,7 @@ def martingale(inv_id=None):
                                 contract_size = symbol_info.trade_contract_size
                                 
                                 def calculate_profit_for_volume_pre(volume):
-                                    profit = mt5.order_calc_profit(
+                                    profit = risk_engine.calc_profit(
                                         calc_type,
                                         symbol,
                                         volume,
@@ -13612,8 +13058,7 @@ def martingale(inv_id=None):
                             updates_summary = update_all_symbol_volumes(signals_data, pre_scale_volumes)
                             
                             if any(count > 0 for count in updates_summary.values()):
-                                with open(signals_path, 'w', encoding='utf-8') as f:
-                                    json.dump(signals_data, f, indent=2, ensure_ascii=False)
+                                save_document(signals_path, signals_data)
                                 
                                 stats["pre_scaling_applied"] = True
                                 stats["signals_modified"] = True
@@ -13655,11 +13100,10 @@ def martingale(inv_id=None):
             if pending_orders:
                 signals_path = inv_root / "prices" / "signals.json"
                 
-                if not signals_path.exists():
+                if not document_exists(signals_path):
                     print(f"      ⚠️  signals.json not found - cannot verify volumes")
                 else:
-                    with open(signals_path, 'r', encoding='utf-8') as f:
-                        signals_data = json.load(f)
+                    signals_data = load_document(signals_path)
                     
                     expected_volumes = {}
                     
@@ -13917,7 +13361,7 @@ def martingale(inv_id=None):
     
     return stats
    
-def check_pending_orders_risk(inv_id=None):
+def check_pending_orders_risk(inv_id=None, ctx=None):
     """
     Function 3: Validates live pending orders against the account's current risk bucket.
      VERSION: Uses the EXACT account initialization logic from place_usd_orders_for_accounts()
@@ -13958,8 +13402,7 @@ def check_pending_orders_risk(inv_id=None):
         if not os.path.exists(NORMALIZE_SYMBOLS_PATH):
             print(" [!] CRITICAL ERROR: Normalization map path missing.")
             return stats
-        with open(NORMALIZE_SYMBOLS_PATH, 'r') as f:
-            norm_map = json.load(f)
+        norm_map = read_json(NORMALIZE_SYMBOLS_PATH, ctx)
     except Exception as e:
         print(f" [!] CRITICAL ERROR: Normalization map load failed: {e}")
         return stats
@@ -13998,8 +13441,7 @@ def check_pending_orders_risk(inv_id=None):
 
         # --- LOAD CONFIG AND DETERMINE RISK CONFIGURATION TO USE ---
         try:
-            with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = read_json(acc_mgmt_path, ctx)
             
             # Get settings flags
             settings = config.get("settings", {})
@@ -14028,12 +13470,12 @@ def check_pending_orders_risk(inv_id=None):
             print(f"      • Login ID: {login_id}")
 
             # Check if already logged into correct account
-            acc = mt5.account_info()
-            if acc is None or acc.login != login_id:
-                print(f"  └─  Not logged into the correct account. Expected: {login_id}, Found: {acc.login if acc else 'None'}")
+            current_login = account_field("login", ctx)
+            if current_login != login_id:
+                print(f"  └─  Not logged into the correct account. Expected: {login_id}, Found: {current_login}")
                 continue
             else:
-                print(f"      ✅ Connected to account: {acc.login}")
+                print(f"      ✅ Connected to account: {current_login}")
 
             acc_info = mt5.account_info()
             if not acc_info:
@@ -14150,6 +13592,9 @@ def check_pending_orders_risk(inv_id=None):
         if pending_orders:
             print(f"  └─ 🔍 Scanning {len(pending_orders)} pending orders (ALL types)...")
             
+            # SL risk of every pending order in one pass
+            sl_profits = RiskEngine(account_currency=account_field("currency", ctx)).leg_profits(pending_orders, leg="sl")
+            
             for order in pending_orders:
                 # Skip if not a pending order type
                 if order.type not in ORDER_TYPES.keys():
@@ -14169,8 +13614,7 @@ def check_pending_orders_risk(inv_id=None):
                     print(f"    └─ ⚠️  Order #{order.ticket} | {order_type_name} | {order.symbol} - No SL set, skipping risk check")
                     continue
                 
-                sl_profit = mt5.order_calc_profit(calc_type, order.symbol, order.volume_initial, 
-                                                  order.price_open, order.sl)
+                sl_profit = sl_profits.get(order.ticket)
                 
                 if sl_profit is not None:
                     order_risk_usd = round(abs(sl_profit), 2)
@@ -14263,7 +13707,7 @@ def check_pending_orders_risk(inv_id=None):
     print(f"\n{'='*10} 🏁 RISK AUDIT COMPLETE {'='*10}\n")
     return stats
 
-def orders_risk_correction(inv_id=None):
+def orders_risk_correction(inv_id=None, ctx=None):
     """
     Function: Checks both live pending orders AND open positions (LIMIT, STOP, and MARKET)
     and adjusts their take profit levels based on the selected risk-reward ratio from
@@ -14317,8 +13761,7 @@ def orders_risk_correction(inv_id=None):
 
         # --- LOAD CONFIG AND CHECK SETTINGS ---
         try:
-            with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = read_json(acc_mgmt_path, ctx)
             
             # Check if risk_reward_correction is enabled
             settings = config.get("settings", {})
@@ -14354,10 +13797,10 @@ def orders_risk_correction(inv_id=None):
         print(f"      • Login ID: {login_id}")
 
         # Check login status
-        acc = mt5.account_info()
-        if acc is None or acc.login != login_id:
+        if account_field("login", ctx) != login_id:
             print(f"      🔑 Logging into account...")
-            if not mt5.login(login_id, password=broker_cfg["PASSWORD"], server=broker_cfg["SERVER"]):
+            reset_resolver()
+            if not ensure_investor_session(broker_cfg):
                 error = mt5.last_error()
                 print(f"  └─   login failed: {error}")
                 stats["orders_error"] += 1
@@ -14427,6 +13870,10 @@ def orders_risk_correction(inv_id=None):
             mt5.ORDER_TYPE_SELL_STOP_LIMIT: "SELL STOP-LIMIT"
         }
 
+        # Contract specs / profit estimates for this account; SL risk of all positions in one pass
+        risk_engine = RiskEngine(account_currency=account_field("currency", ctx))
+        position_sl_profits = risk_engine.leg_profits(positions, leg="sl")
+
         # Process OPEN POSITIONS first
         if positions:
             print(f"\n  └─ 🔍 Scanning {len(positions)} open positions (MARKET)...")
@@ -14438,7 +13885,7 @@ def orders_risk_correction(inv_id=None):
                 position_type_name = POSITION_TYPES.get(position.type, f"Unknown Type {position.type}")
                 
                 # Get symbol info
-                symbol_info = mt5.symbol_info(position.symbol)
+                symbol_info = risk_engine.symbol_info(position.symbol)
                 if not symbol_info:
                     print(f"    └─ ⚠️  Cannot get symbol info for {position.symbol}")
                     investor_positions_skipped += 1
@@ -14474,8 +13921,7 @@ def orders_risk_correction(inv_id=None):
                 
                 # Alternative: calculate using MT5 profit calculator for accuracy
                 calc_type = mt5.ORDER_TYPE_BUY if is_buy else mt5.ORDER_TYPE_SELL
-                sl_profit = mt5.order_calc_profit(calc_type, position.symbol, position.volume, 
-                                                  position.price_open, position.sl)
+                sl_profit = position_sl_profits.get(position.ticket)
                 
                 if sl_profit is not None:
                     current_risk_usd = round(abs(sl_profit), 2)
@@ -14565,8 +14011,8 @@ def orders_risk_correction(inv_id=None):
                         else:
                             test_price = position.price_open - test_move
                             
-                        test_profit = mt5.order_calc_profit(calc_type, position.symbol, position.volume, 
-                                                            position.price_open, test_price)
+                        test_profit = risk_engine.calc_profit(calc_type, position.symbol, position.volume, 
+                                                              position.price_open, test_price)
                         
                         if test_profit and test_profit != 0:
                             point_value = abs(test_profit) / 10
@@ -14616,6 +14062,7 @@ def orders_risk_correction(inv_id=None):
         
         # --- CHECK AND ADJUST ALL PENDING ORDERS (LIMIT AND STOP) ---
         pending_orders = mt5.orders_get()
+        order_sl_profits = risk_engine.leg_profits(pending_orders, leg="sl")
         investor_orders_checked = 0
         investor_orders_adjusted = 0
         investor_orders_skipped = 0
@@ -14635,7 +14082,7 @@ def orders_risk_correction(inv_id=None):
                 order_type_name = ORDER_TYPES.get(order.type, f"Unknown Type {order.type}")
                 
                 # Get symbol info
-                symbol_info = mt5.symbol_info(order.symbol)
+                symbol_info = risk_engine.symbol_info(order.symbol)
                 if not symbol_info:
                     print(f"    └─ ⚠️  Cannot get symbol info for {order.symbol}")
                     investor_orders_skipped += 1
@@ -14656,8 +14103,7 @@ def orders_risk_correction(inv_id=None):
                     continue
                     
                 # For pending orders, risk is from entry to SL
-                sl_profit = mt5.order_calc_profit(calc_type, order.symbol, order.volume_initial, 
-                                                  order.price_open, order.sl)
+                sl_profit = order_sl_profits.get(order.ticket)
                 
                 if sl_profit is None:
                     print(f"       ⚠️  Cannot calculate risk. Skipping.")
@@ -14752,8 +14198,8 @@ def orders_risk_correction(inv_id=None):
                         else:
                             test_price = order.price_open - test_move
                             
-                        test_profit = mt5.order_calc_profit(calc_type, order.symbol, order.volume_initial, 
-                                                            order.price_open, test_price)
+                        test_profit = risk_engine.calc_profit(calc_type, order.symbol, order.volume_initial, 
+                                                              order.price_open, test_price)
                         
                         if test_profit and test_profit != 0:
                             point_value = abs(test_profit) / 10
@@ -14844,7 +14290,7 @@ def orders_risk_correction(inv_id=None):
     print(f"\n{'='*10} 🏁 POSITIONS & PENDING ORDERS RISK-REWARD CORRECTION COMPLETE {'='*10}\n")
     return stats
 
-def adjust_pending_orders_to_max_risk(inv_id=None):
+def adjust_pending_orders_to_max_risk(inv_id=None, ctx=None):
     """
     Adjust pending orders to match maximum risk configuration.
     
@@ -14921,8 +14367,7 @@ def adjust_pending_orders_to_max_risk(inv_id=None):
         # STEP 1: Check account management settings for maximum config
         # =====================================================
         try:
-            with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
-                acc_config = json.load(f)
+            acc_config = read_json(acc_mgmt_path, ctx)
             
             # Check if maximum account balance management is enabled
             settings = acc_config.get("settings", {})
@@ -14951,13 +14396,12 @@ def adjust_pending_orders_to_max_risk(inv_id=None):
         # =====================================================
         # STEP 2: Load signals.json to find orders with liquidator flags
         # =====================================================
-        if not signals_path.exists():
+        if not document_exists(signals_path):
             print(f"  └─  signals.json not found at {signals_path}")
             continue
         
         try:
-            with open(signals_path, 'r', encoding='utf-8') as f:
-                signals_data = json.load(f)
+            signals_data = load_document(signals_path)
             print(f"  └─ 📂 Loaded signals.json")
         except Exception as e:
             print(f"  └─  Failed to load signals.json: {e}")
@@ -14975,10 +14419,10 @@ def adjust_pending_orders_to_max_risk(inv_id=None):
         print(f"      • Login ID: {login_id}")
         
         # Check if already logged into correct account
-        acc = mt5.account_info()
-        if acc is None or acc.login != login_id:
+        if account_field("login", ctx) != login_id:
             print(f"      🔑 Logging into account...")
-            if not mt5.login(login_id, password=broker_cfg["PASSWORD"], server=broker_cfg["SERVER"]):
+            reset_resolver()
+            if not ensure_investor_session(broker_cfg):
                 error = mt5.last_error()
                 print(f"  └─  Login failed: {error}")
                 stats["adjustment_failures"] += 1
@@ -15016,6 +14460,9 @@ def adjust_pending_orders_to_max_risk(inv_id=None):
         print(f"  └─ 💰 Maximum Risk Target: ${max_risk:.2f}")
         stats["max_risk_values"][user_brokerid] = max_risk
         
+        # Contract specs / profit estimates for this account (the exit searches below call it many times)
+        risk_engine = RiskEngine(account_currency=account_field("currency", ctx))
+        
         # =====================================================
         # STEP 4: Get all live pending orders
         # =====================================================
@@ -15141,9 +14588,9 @@ def adjust_pending_orders_to_max_risk(inv_id=None):
                     calc_type = mt5.ORDER_TYPE_BUY if is_buy else mt5.ORDER_TYPE_SELL
                     
                     # =====================================================
-                    # STEP 6: Calculate current risk using MT5's order_calc_profit (same as orders_risk_correction)
+                    # STEP 6: Calculate current risk with the risk engine (same as orders_risk_correction)
                     # =====================================================
-                    sl_profit = mt5.order_calc_profit(calc_type, symbol, sig_volume, sig_entry, sig_exit)
+                    sl_profit = risk_engine.calc_profit(calc_type, symbol, sig_volume, sig_entry, sig_exit)
                     
                     if sl_profit is None:
                         print(f"        ⚠️ Could not calculate risk for order at {sig_entry}")
@@ -15209,7 +14656,7 @@ def adjust_pending_orders_to_max_risk(inv_id=None):
                             continue
                         
                         # Check if prices match (allow small tolerance based on symbol)
-                        symbol_info = mt5.symbol_info(symbol)
+                        symbol_info = risk_engine.symbol_info(symbol)
                         if symbol_info:
                             tolerance = symbol_info.point * 10  # 10 points tolerance
                             if abs(pending_price - sig_entry) > tolerance:
@@ -15240,7 +14687,7 @@ def adjust_pending_orders_to_max_risk(inv_id=None):
                     # STEP 8: Calculate new exit price to achieve EXACT max risk
                     # =====================================================
                     # Get symbol info for price rounding
-                    symbol_info = mt5.symbol_info(symbol)
+                    symbol_info = risk_engine.symbol_info(symbol)
                     if not symbol_info:
                         print(f"          ⚠️ Could not get symbol info for {symbol}")
                         investor_orders_skipped_error += 1
@@ -15267,7 +14714,7 @@ def adjust_pending_orders_to_max_risk(inv_id=None):
                         # Binary search for the exit price that gives exactly max_risk
                         for _ in range(50):  # Limit iterations
                             test_exit = (min_exit + max_exit) / 2
-                            test_risk = mt5.order_calc_profit(calc_type, symbol, sig_volume, sig_entry, test_exit)
+                            test_risk = risk_engine.calc_profit(calc_type, symbol, sig_volume, sig_entry, test_exit)
                             
                             if test_risk is None:
                                 break
@@ -15306,7 +14753,7 @@ def adjust_pending_orders_to_max_risk(inv_id=None):
                         # Binary search for the exit price that gives exactly max_risk
                         for _ in range(50):  # Limit iterations
                             test_exit = (min_exit + max_exit) / 2
-                            test_risk = mt5.order_calc_profit(calc_type, symbol, sig_volume, sig_entry, test_exit)
+                            test_risk = risk_engine.calc_profit(calc_type, symbol, sig_volume, sig_entry, test_exit)
                             
                             if test_risk is None:
                                 break
@@ -15339,7 +14786,7 @@ def adjust_pending_orders_to_max_risk(inv_id=None):
                     new_exit = round(new_exit, digits)
                     
                     # Verify the new risk calculation
-                    new_risk = mt5.order_calc_profit(calc_type, symbol, sig_volume, sig_entry, new_exit)
+                    new_risk = risk_engine.calc_profit(calc_type, symbol, sig_volume, sig_entry, new_exit)
                     if new_risk is not None:
                         new_risk_abs = abs(new_risk)
                         print(f"          📊 Calculated adjustment:")
@@ -15439,8 +14886,7 @@ def adjust_pending_orders_to_max_risk(inv_id=None):
         # =====================================================
         if changes_made_to_signals:
             try:
-                with open(signals_path, 'w', encoding='utf-8') as f:
-                    json.dump(signals_data, f, indent=4)
+                save_document(signals_path, signals_data)
                 print(f"\n  └─ ✅ Updated signals.json with adjusted orders")
             except Exception as e:
                 print(f"\n  └─  Failed to save signals.json: {e}")
@@ -15492,7 +14938,7 @@ def adjust_pending_orders_to_max_risk(inv_id=None):
     print(f"\n{'='*10} 🏁 MAX RISK ADJUSTMENT COMPLETE {'='*10}\n")
     return stats  
 
-def apply_dynamic_breakeven(inv_id=None):
+def apply_dynamic_breakeven(inv_id=None, ctx=None):
     """
     Function: Dynamically moves stop loss to breakeven or partial profit levels based on
     running profit reward multiples. Uses breakeven_dictionary from accountmanagement.json
@@ -15543,8 +14989,7 @@ def apply_dynamic_breakeven(inv_id=None):
 
         # --- LOAD CONFIG AND CHECK SETTINGS ---
         try:
-            with open(acc_mgmt_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = read_json(acc_mgmt_path, ctx)
             
             # Check if breakeven is enabled
             settings = config.get("settings", {})
@@ -15585,10 +15030,10 @@ def apply_dynamic_breakeven(inv_id=None):
         print(f"      • Login ID: {login_id}")
 
         # Check login status
-        acc = mt5.account_info()
-        if acc is None or acc.login != login_id:
+        if account_field("login", ctx) != login_id:
             print(f"      🔑 Logging into account...")
-            if not mt5.login(login_id, password=broker_cfg["PASSWORD"], server=broker_cfg["SERVER"]):
+            reset_resolver()
+            if not ensure_investor_session(broker_cfg):
                 error = mt5.last_error()
                 print(f"  └─  login failed: {error}")
                 stats["positions_error"] += 1
@@ -16080,46 +15525,49 @@ def process_single_invest(inv_folder):
     if not broker_cfg:
         return account_stats
 
-    import random
-    import time
-    time.sleep(random.uniform(0.1, 2.0)) 
+    # One process per terminal binary at a time; other terminals are not held up
+    admission = TerminalAdmission(broker_cfg["TERMINAL_PATH"])
+    if not admission.acquire(timeout=TERMINAL_ADMISSION_TIMEOUT):
+        return account_stats
     
-    login_id = int(broker_cfg['LOGIN_ID'])
-    mt5_path = broker_cfg["TERMINAL_PATH"]
-
     try:
-        if not mt5.initialize(path=mt5_path, timeout=180000):
+        # Reuses this worker's logged-in session when it is still healthy
+        if not ensure_investor_session(broker_cfg):
             return account_stats
 
-        acc = mt5.account_info()
-        if acc is None or acc.login != login_id:
-            if not mt5.login(login_id, password=broker_cfg["PASSWORD"], server=broker_cfg["SERVER"]):
-                mt5.shutdown()
-                return account_stats
+        # Configs parsed once for the whole cycle and handed to every stage
+        ctx = InvestorContext.load(inv_id, Path(INV_PATH) / inv_id, NORMALIZE_SYMBOLS_PATH)
+
+        # signals.json / symbols_prices.json edits stay in memory and are flushed atomically
+        begin_document_cycle()
             
         #timeframe_countdown(inv_id=inv_id)
 
         # STEP 0: SYMBOL AUTHORIZATION FILTER
-        martingale(inv_id=inv_id)
+        martingale(inv_id=inv_id, ctx=ctx)
         
         
-        mt5.shutdown()
+        # Session is left open for the next cycle on this terminal
         account_stats["success"] = True
         
     except Exception as e:
-        try:
-            mt5.shutdown()
-        except:
-            pass
+        # Drop a possibly broken session; the next cycle reconnects
+        close_session()
+    finally:
+        flush_trade_mirrors()
+        end_document_cycle()
+        admission.release()
     
     return account_stats
 
-def process_single_investor(inv_folder):
+def process_single_investor(inv_folder, cycle_id=None):
     """
     WORKER FUNCTION: Handles the entire pipeline for ONE investor.
     Sequential execution without console output.
+    Every stage is timed by a StageRecorder; its records come back in account_stats["metrics"].
     """
     inv_id = inv_folder.name
+    recorder = StageRecorder(inv_id, cycle_id)
     
     account_stats = {
         "inv_id": inv_id, 
@@ -16159,83 +15607,103 @@ def process_single_investor(inv_folder):
     if not broker_cfg:
         return account_stats
 
-    import random
-    import time
-    time.sleep(random.uniform(0.1, 2.0)) 
+    # One process per terminal binary at a time; other terminals are not held up
+    admission = TerminalAdmission(broker_cfg["TERMINAL_PATH"])
+    if not admission.acquire(timeout=TERMINAL_ADMISSION_TIMEOUT):
+        # Terminal busy: worth another attempt after the backoff
+        account_stats["retryable"] = True
+        return account_stats
     
-    login_id = int(broker_cfg['LOGIN_ID'])
-    mt5_path = broker_cfg["TERMINAL_PATH"]
-
     try:
-        if not mt5.initialize(path=mt5_path, timeout=180000):
+        # Reuses this worker's logged-in session when it is still healthy
+        if not recorder.run(ensure_investor_session, broker_cfg):
+            account_stats["retryable"] = True
             return account_stats
 
-        acc = mt5.account_info()
-        if acc is None or acc.login != login_id:
-            if not mt5.login(login_id, password=broker_cfg["PASSWORD"], server=broker_cfg["SERVER"]):
-                mt5.shutdown()
-                return account_stats
+        # Configs parsed once for the whole cycle and handed to every stage
+        ctx = recorder.run(InvestorContext.load, inv_id, Path(INV_PATH) / inv_id, NORMALIZE_SYMBOLS_PATH,
+                           stage="load_context")
+
+        # signals.json / symbols_prices.json edits stay in memory and are flushed atomically
+        begin_document_cycle()
             
         #timeframe_countdown(inv_id=inv_id)
-        move_verified_investors()
-        update_verified_investors_file()
+        # Registry changes are buffered here and applied once per cycle by the orchestrator
+        defer_registry_changes()
 
-        get_requirements(inv_id=inv_id)
+        recorder.run(get_requirements, inv_id=inv_id, ctx=ctx)
 
         # STEP 0: SYMBOL AUTHORIZATION FILTER
-        filter_stats = filter_unauthorized_symbols(inv_id=inv_id)
+        filter_stats = recorder.run(filter_unauthorized_symbols, inv_id=inv_id, ctx=ctx)
         account_stats["symbols_filtered"] = filter_stats.get("symbols_filtered", 0)
         account_stats["orders_filtered"] = filter_stats.get("orders_filtered", 0)
 
         # STEP 1: PRICE COLLECTION
-        price_stats = symbols_4_levels_50_multiplier_grid_prices(inv_id=inv_id)
+        price_stats = recorder.run(symbols_4_levels_50_multiplier_grid_prices, inv_id=inv_id, ctx=ctx)
         account_stats["price_collection_stats"] = price_stats
         account_stats["symbols_processed"] = price_stats.get("total_symbols", 0)
         account_stats["symbols_successful"] = price_stats.get("successful_symbols", 0)
         
         # STEP 1.5: FETCH 15-MINUTE CANDLES
-        candle_stats = fetch_15m_candles(inv_id=inv_id)
+        candle_stats = recorder.run(fetch_15m_candles, inv_id=inv_id, ctx=ctx)
         account_stats["candle_fetch_stats"] = candle_stats
         account_stats["current_candle_forming"] = candle_stats.get("current_candle_forming", False)
         
 
+        # Analysis is done: publish its signals/prices before the slower order stages
+        recorder.run(flush_documents)
+
         # STEP 2: ORDER PLACEMENT
-        order_stats = manage_single_position_and_pending(inv_id=inv_id)
-        martingale(inv_id=inv_id)
-        order_stats = place_signals_orders(inv_id=inv_id)
-        order_stats = manage_single_position_and_pending(inv_id=inv_id)
-        apply_dynamic_breakeven(inv_id=inv_id)
+        order_stats = recorder.run(manage_single_position_and_pending, inv_id=inv_id, ctx=ctx)
+        recorder.run(martingale, inv_id=inv_id, ctx=ctx)
+        order_stats = recorder.run(place_signals_orders, inv_id=inv_id, ctx=ctx)
+        order_stats = recorder.run(manage_single_position_and_pending, inv_id=inv_id, ctx=ctx)
+        recorder.run(apply_dynamic_breakeven, inv_id=inv_id, ctx=ctx)
         account_stats["order_placement_stats"] = order_stats
         account_stats["orders_placed"] = order_stats.get("orders_placed", 0)
         account_stats["counter_orders_placed"] = order_stats.get("counter_orders_placed", 0)
         account_stats["total_active_orders"] = order_stats.get("total_active_orders", 0)
 
-        adjust_pending_orders_to_max_risk(inv_id=inv_id)
+        recorder.run(adjust_pending_orders_to_max_risk, inv_id=inv_id, ctx=ctx)
 
         # STEP 4: RISK AUDIT
-        audit_stats = check_pending_orders_risk(inv_id=inv_id)
+        audit_stats = recorder.run(check_pending_orders_risk, inv_id=inv_id, ctx=ctx)
         account_stats["risk_audit_stats"] = audit_stats
         account_stats["orders_removed"] = audit_stats.get("orders_removed", 0)
 
-        correction_stats = orders_risk_correction(inv_id=inv_id)
+        correction_stats = recorder.run(orders_risk_correction, inv_id=inv_id, ctx=ctx)
         account_stats["risk_correction_stats"] = correction_stats
         account_stats["orders_adjusted"] = correction_stats.get("orders_adjusted", 0)
 
-        check_and_record_authorized_actions(inv_id=inv_id)
-        update_investor_info(inv_id=inv_id)
-        update_verified_investors_file()
+        recorder.run(check_and_record_authorized_actions, inv_id=inv_id, ctx=ctx)
+        recorder.run(update_investor_info, inv_id=inv_id, ctx=ctx)
         
-        mt5.shutdown()
+        # Session is left open for the next cycle on this terminal
         account_stats["success"] = True
         
     except Exception as e:
-        try:
-            mt5.shutdown()
-        except:
-            pass
+        # Drop a possibly broken session; the next cycle reconnects
+        recorder.fail(e)
+        account_stats["error"] = f"{type(e).__name__}: {e}"
+        account_stats["retryable"] = True
+        close_session()
+    finally:
+        flush_trade_mirrors()
+        end_document_cycle()
+        account_stats["registry_changes"] = collect_deferred_registry_changes()
+        account_stats["metrics"] = recorder.records()
+        admission.release()
     
     return account_stats
 
+def reconcile_verified_investors():
+    """
+    Global registries are reconciled once per cycle by the orchestrator, not by
+    every worker, and only after the workers' deferred registry changes are applied.
+    """
+    move_verified_investors()
+    update_verified_investors_file()
+
 def place_orders_parallel():
     """
     ORCHESTRATOR: Spawns multiple processes to handle investors in parallel.
@@ -16247,6 +15715,7 @@ def place_orders_parallel():
     
     if not investor_folders:
         print(" └─ 🔘 No investor directories found.")
+        reconcile_verified_investors()
         return False
 
     print(f" 📋 Found {len(investor_folders)} investors to process")
@@ -16283,21 +15752,68 @@ def place_orders_parallel():
             skipped_investors.append(inv_id)
             continue
     
+    # SL moves on reward levels happen between cycles too; apply_dynamic_breakeven stays the backstop
+    if BREAKEVEN_MONITORS:
+        started = ensure_breakeven_monitors({
+            inv_folder.name: (usersdictionary[inv_folder.name], inv_folder / "accountmanagement.json")
+            for inv_folder in eligible_investors if inv_folder.name in usersdictionary
+        })
+        if started:
+            print(f" 👁️  Started {started} breakeven monitor(s)")
+    
     if not eligible_investors:
         print(f"\n └─ 🔘 No eligible investors found (synapse = true).")
         if skipped_investors:
             print(f"    Skipped {len(skipped_investors)} investors due to synapse = false or config errors.")
+        reconcile_verified_investors()
         return False
     
     print(f"\n 📊 Processing {len(eligible_investors)} out of {len(investor_folders)} investors")
     if skipped_investors:
         print(f"    Skipped: {', '.join(skipped_investors[:5])}{'...' if len(skipped_investors) > 5 else ''}")
     
-    print(f" 🔧 Creating pool with {len(eligible_investors)} processes...")
-    
-    # Create a pool based on the number of eligible accounts
-    with mp.Pool(processes=len(eligible_investors)) as pool:
-        results = pool.map(process_single_investor, eligible_investors)
+    # Long-lived workers per terminal path keep their MT5 sessions across cycles;
+    # concurrency is capped by cores and terminal count instead of one process per investor
+    supervisor = get_supervisor()
+    cycle_id = datetime.now().strftime("%Y%m%d-%H%M%S")
+    jobs = [
+        (usersdictionary.get(inv_folder.name, {}).get("TERMINAL_PATH", inv_folder.name), process_single_investor, (inv_folder, cycle_id))
+        for inv_folder in eligible_investors
+    ]
+    terminal_count = len(set(path for path, _, _ in jobs))
+    max_workers = MAX_PARALLEL_INVESTORS or default_concurrency(terminal_count)
+    print(f" 🔧 Scheduling {len(jobs)} investors on {terminal_count} terminals | max {max_workers} in parallel | "
+          f"deadline {INVESTOR_DEADLINE_SECONDS}s | {INVESTOR_MAX_ATTEMPTS} attempts")
+    
+    scheduled = supervisor.run_scheduled(
+        jobs,
+        max_workers=max_workers,
+        deadline=INVESTOR_DEADLINE_SECONDS,
+        max_attempts=INVESTOR_MAX_ATTEMPTS,
+        backoff=INVESTOR_RETRY_BACKOFF_SECONDS,
+        # Login / admission / MT5 failures are requeued; a missing config would fail the same way again
+        is_success=lambda stats: not stats.get("retryable")
+    )
+    results = [
+        payload if isinstance(payload, dict) else {"inv_id": inv_folder.name, "success": False, "error": payload}
+        for inv_folder, (ok, payload, attempts) in zip(eligible_investors, scheduled)
+    ]
+    
+    # Single writer: every worker's registry changes in one batch, one atomic write per file
+    registry_changes = [change for r in results for change in r.get("registry_changes", [])]
+    if registry_changes:
+        applied = apply_registry_changes(registry_changes)
+        print(f" 🗂️  Registry writer applied {sum(applied.values())} changes to {len(applied)} file(s)")
+    
+    # Only now do the registries reflect this cycle's worker decisions
+    reconcile_verified_investors()
+    
+    # Same single writer for the stage timings; investors that never returned have no records
+    metrics = [record for r in results for record in r.get("metrics", [])]
+    if metrics:
+        cycle_summary = summarize_cycle(metrics, cycle_id)
+        write_metrics(METRICS_PATH, metrics, cycle_summary)
+        print_cycle_summary(cycle_summary)
     
     # Optional: Print summary of results
     successful = sum(1 for r in results if r.get("success", False))
@@ -16307,9 +15823,17 @@ def place_orders_parallel():
     print(f"   Failed: {len(eligible_investors) - successful}")
     print(f"   Skipped (synapse=false/config error): {len(skipped_investors)}")
     print(f"{'='*10} 🏁 PARALLEL PROCESSING COMPLETE {'='*10}\n")
-    place_orders_parallel()
     return True
 
+def place_orders_loop(cycle_pause=0):
+    """Run place_orders_parallel cycle after cycle (iteratively, no recursion)."""
+    while True:
+        if not place_orders_parallel():
+            # Nothing to do this cycle; avoid spinning on an empty investors folder
+            time.sleep(max(cycle_pause, 5))
+        elif cycle_pause:
+            time.sleep(cycle_pause)
+
 if __name__ == "__main__":
-   place_orders_parallel()
+   place_orders_loop()
     
@@ -1,6 +1,7 @@
 import os
 import json
 import re
+import time
 import cv2
 import numpy as np
 import pytz
@@ -15,7 +16,10 @@ import json
 from datetime import datetime
 import pytz
 import shutil
-from collections import defaultdict
+from collections import defaultdict, Counter
+from swingengine import load_chart_geometry, candle_arrays, candle_pixel_boxes, detect_swings
+from chartcontext import ChartContext
+from documentcache import load_document, save_document, document_exists, document_cycle_open, begin_document_cycle, end_document_cycle
 
 
 DEV_PATH = r'C:\xampp\htdocs\chronedge\synarex\usersdata\developers'
@@ -24,6 +28,9 @@ DEFAULT_ACCOUNTMANAGEMENT = r"C:\xampp\htdocs\chronedge\synarex\default_accountm
 INVESTOR_USERS = r"C:\xampp\htdocs\chronedge\synarex\usersdata\investors\investors.json"
 INV_PATH = r"C:\xampp\htdocs\chronedge\synarex\usersdata\investors"
 
+# Detectors analyze_chart runs over each chart, in this order (liquidity reads what HH/LL wrote)
+PIPELINE_DETECTORS = ("higher_highs_lower_lows", "liquidity_candles")
+
 
 def load_developers_dictionary():
     # Corrected os.path.exists logic
@@ -103,6 +110,87 @@ def get_analysis_paths(
         "comm_paths": comm_paths
     }  
 
+# --- per-chart detector registry ---
+# name -> {"detect": fn(ctx, define_candles) -> counters, "configured": fn(define_candles) -> bool,
+#          "summary": report format over the summed counters, "missing": report when not configured}
+CHART_DETECTORS = {}
+
+def chart_detector(name, configured, summary, missing=""):
+    """Register a per-chart detector under the name of its public wrapper."""
+    def register(detect):
+        CHART_DETECTORS[name] = {"detect": detect, "configured": configured, "summary": summary, "missing": missing}
+        return detect
+    return register
+
+def run_chart_detectors(broker_name, detector_names, symbols=None, timeframes=None):
+    """
+    Single pass over the charts of a developer: for every (symbol, timeframe)
+    one ChartContext is built and the requested detectors run over it in
+    order, so the candle JSON, the chart PNG and its contours are read once
+    and config.json plus the annotated charts are written once per chart
+    instead of once per detector.
+
+    Returns {name: summed counters, or None when its section is not
+    configured}, or an error string when the developer can't be analyzed.
+    """
+    dev_dict = load_developers_dictionary()
+    cfg = dev_dict.get(broker_name)
+    if not cfg:
+        return f"[{broker_name}] Error: Broker not in dictionary."
+
+    base_folder = cfg.get("BASE_FOLDER")
+    am_data = get_account_management(broker_name)
+    if not am_data:
+        return f"[{broker_name}] Error: accountmanagement.json missing."
+
+    define_candles = am_data.get("chart", {}).get("define_candles", {})
+    detectors = [(name, CHART_DETECTORS[name]) for name in detector_names]
+    totals = {name: (Counter() if d["configured"](define_candles) else None) for name, d in detectors}
+    active = [(name, d["detect"]) for name, d in detectors if totals[name] is not None]
+    if not active:
+        return totals
+
+    for sym in sorted(os.listdir(base_folder)):
+        sym_p = os.path.join(base_folder, sym)
+        if not os.path.isdir(sym_p):
+            continue
+        if symbols is not None and sym not in symbols:
+            continue
+
+        for tf in sorted(os.listdir(sym_p)):
+            if not os.path.isdir(os.path.join(sym_p, tf)):
+                continue
+            if timeframes is not None and tf not in timeframes:
+                continue
+
+            ctx = ChartContext(base_folder, broker_name, sym, tf)
+            own_cycle = not document_cycle_open()
+            if own_cycle:
+                begin_document_cycle()
+            try:
+                for name, detect in active:
+                    totals[name].update(detect(ctx, define_candles))
+            finally:
+                ctx.flush()
+                if own_cycle:
+                    end_document_cycle()
+    return totals
+
+def chart_detector_reports(broker_name, detector_names, symbols=None, timeframes=None):
+    """run_chart_detectors() formatted as the one-line report of each detector."""
+    totals = run_chart_detectors(broker_name, detector_names, symbols, timeframes)
+    if isinstance(totals, str):
+        return {name: totals for name in detector_names}
+
+    reports = {}
+    for name in detector_names:
+        detector = CHART_DETECTORS[name]
+        if totals[name] is None:
+            reports[name] = detector["missing"].format(broker=broker_name)
+        else:
+            reports[name] = detector["summary"].format_map(defaultdict(int, totals[name], broker=broker_name))
+    return reports
+
 def sync_ticks_data(broker_name):
     lagos_tz = pytz.timezone('Africa/Lagos')
     ts = datetime.now(lagos_tz).strftime('%Y-%m-%d %H:%M:%S')
@@ -504,24 +592,18 @@ def label_objects(
         cv2.putText(img, str(fvg_swing_type), (cx - 8, int(fvg_swing_type_y)), 
                     cv2.FONT_HERSHEY_SIMPLEX, 0.35, (255, 255, 255), 1)
         
-def lower_highs_higher_lows(broker_name):
+@chart_detector(
+    "lower_highs_higher_lows",
+    configured=lambda define_candles: any("lowerhighsandhigherlows" in k.lower() for k in define_candles),
+    summary="COMPLETED. Broker: {broker} | Total Swings: {swings} | Total Charts: {charts}",
+    missing="[{broker}] Error: No configuration found for 'lowerhighsandhigherlows'."
+)
+def lower_highs_higher_lows_chart(ctx, define_candles):
     lagos_tz = pytz.timezone('Africa/Lagos')
     def log(msg, level="INFO"):
         ts = datetime.now(lagos_tz).strftime('%Y-%m-%d %H:%M:%S')
         print(f"[{ts}] [{level}] {msg}")
 
-    dev_dict = load_developers_dictionary()
-    cfg = dev_dict.get(broker_name)
-    if not cfg: 
-        return f"[{broker_name}] Error: Broker not in dictionary."
-    
-    base_folder = cfg.get("BASE_FOLDER")
-    am_data = get_account_management(broker_name)
-    if not am_data: 
-        return f"[{broker_name}] Error: accountmanagement.json missing."
-    
-    define_candles = am_data.get("chart", {}).get("define_candles", {})
-    
     # --- CONFIG LOGIC UPDATE ---
     # We look for the Parent (HH/LL) config specifically to steal its BARS setting
     parent_keyword = "higherhighsandlowerlows"
@@ -531,12 +613,6 @@ def lower_highs_higher_lows(broker_name):
     keyword = "lowerhighsandhigherlows"
     matching_configs = [(k, v) for k, v in define_candles.items() if keyword in k.lower()]
 
-    if not matching_configs:
-        return f"[{broker_name}] Error: No configuration found for '{keyword}'."
-
-    log(f"--- STARTING IDENTIFICATION (CHILD): {broker_name} ---")
-    log(f"Using Parent BARS: {parent_bars}")
-
     total_marked_all, processed_charts_all = 0, 0
 
     def resolve_marker(raw):
@@ -552,7 +628,6 @@ def lower_highs_higher_lows(broker_name):
         return raw, False
 
     for config_key, llhl_cfg in matching_configs:
-        log(f"Processing Config Key: [{config_key}]")
         # Overriding local BARS with parent_bars as requested
         bars = parent_bars 
         output_filename_base = llhl_cfg.get("filename", "lowers.json")
@@ -579,171 +654,177 @@ def lower_highs_higher_lows(broker_name):
         lh_cm_obj, lh_cm_dbl = resolve_marker(label_at.get("lower_highs_contourmaker_marker", ""))
         ll_cm_obj, ll_cm_dbl = resolve_marker(label_at.get("higher_lows_contourmaker_marker", ""))
 
-        symbols = sorted([d for d in os.listdir(base_folder) if os.path.isdir(os.path.join(base_folder, d))])
-        
-        for sym in symbols:
-            sym_p = os.path.join(base_folder, sym)
-            timeframes = sorted(os.listdir(sym_p))
+        paths = get_analysis_paths(ctx.base_folder, ctx.broker_name, ctx.symbol, ctx.timeframe, direction, bars, output_filename_base)
+        config_path = ctx.config_path
 
-            for tf in timeframes:
-                paths = get_analysis_paths(base_folder, broker_name, sym, tf, direction, bars, output_filename_base)
-                config_path = os.path.join(paths["output_dir"], "config.json")
+        if not os.path.exists(paths["source_json"]) or not os.path.exists(paths["source_chart"]):
+            continue
 
-                if not os.path.exists(paths["source_json"]) or not os.path.exists(paths["source_chart"]):
+        try:
+            # 1. Load existing config to check for Parent (HH/LL) claims
+            parent_claimed_candles = set()
+            if document_exists(config_path):
+                existing_cfg_data = load_document(config_path)
+                # Look for any key containing "higherhighsandlowerlows"
+                for k, v in existing_cfg_data.items():
+                    if parent_keyword in k.lower() and isinstance(v, list):
+                        for candle in v:
+                            if candle.get("is_swing"):
+                                parent_claimed_candles.add(candle.get("candle_number"))
+
+            # 2. Load candle data
+            data = sorted(ctx.candles(direction, bars), key=lambda x: x.get('candle_number', 0))
+            
+            img = ctx.chart(bars)
+            if img is None: continue
+
+            contours = ctx.contours(bars)
+            if len(contours) == 0: continue
+
+            if len(data) != len(contours):
+                min_len = min(len(data), len(contours))
+                data = data[:min_len]
+                contours = contours[:min_len]
+
+            # Map coordinates
+            for idx, contour in enumerate(contours):
+                x, y, w, h = cv2.boundingRect(contour)
+                data[idx].update({
+                    "candle_x": x + (w // 2), "candle_y": y,
+                    "candle_width": w, "candle_height": h,
+                    "candle_left": x, "candle_right": x + w,
+                    "candle_top": y, "candle_bottom": y + h
+                })
+
+            n = len(data)
+            swing_count_in_chart = 0
+            for i in range(neighbor_left, n - neighbor_right):
+                fvg_swing_type = data[i].get('candle_number')
+                
+                # --- EXCLUSION CHECK ---
+                # If the Parent already claimed this candle, we skip it
+                if fvg_swing_type in parent_claimed_candles:
                     continue
 
-                try:
-                    # 1. Load existing config to check for Parent (HH/LL) claims
-                    parent_claimed_candles = set()
-                    if os.path.exists(config_path):
-                        with open(config_path, 'r', encoding='utf-8') as f:
-                            existing_cfg_data = json.load(f)
-                            # Look for any key containing "higherhighsandlowerlows"
-                            for k, v in existing_cfg_data.items():
-                                if parent_keyword in k.lower() and isinstance(v, list):
-                                    for candle in v:
-                                        if candle.get("is_swing"):
-                                            parent_claimed_candles.add(candle.get("candle_number"))
-
-                    # 2. Load candle data
-                    with open(paths["source_json"], 'r', encoding='utf-8') as f:
-                        data = sorted(json.load(f), key=lambda x: x.get('candle_number', 0))
-                    
-                    img = cv2.imread(paths["source_chart"])
-                    if img is None: continue
+                curr_h, curr_l = data[i]['high'], data[i]['low']
+                l_h = [d['high'] for d in data[i-neighbor_left:i]]
+                l_l = [d['low'] for d in data[i-neighbor_left:i]]
+                r_h = [d['high'] for d in data[i+1:i+neighbor_right+1]]
+                r_l = [d['low'] for d in data[i+1:i+neighbor_right+1]]
 
-                    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-                    mask = cv2.inRange(hsv, (35, 50, 50), (85, 255, 255)) | cv2.inRange(hsv, (0, 50, 50), (10, 255, 255))
-                    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                    
-                    if len(contours) == 0: continue
+                is_peak = curr_h > max(l_h) and curr_h > max(r_h)
+                is_valley = curr_l < min(l_l) and curr_l < min(r_l)
 
-                    contours = sorted(contours, key=lambda c: cv2.boundingRect(c)[0])
-                    if len(data) != len(contours):
-                        min_len = min(len(data), len(contours))
-                        data = data[:min_len]
-                        contours = contours[:min_len]
+                if is_peak or is_valley:
+                    swing_count_in_chart += 1
+                    is_bull = is_valley
+                    active_color = ll_col if is_bull else lh_col
+                    custom_text = ll_text if is_bull else lh_text
+                    obj_type = ll_obj if is_bull else lh_obj
+                    dbl_arrow = ll_dbl if is_bull else lh_dbl
+                    position = ll_pos if is_bull else lh_pos
 
-                    # Map coordinates
-                    for idx, contour in enumerate(contours):
-                        x, y, w, h = cv2.boundingRect(contour)
-                        data[idx].update({
-                            "candle_x": x + (w // 2), "candle_y": y,
-                            "candle_width": w, "candle_height": h,
-                            "candle_left": x, "candle_right": x + w,
-                            "candle_top": y, "candle_bottom": y + h
-                        })
+                    label_objects_and_text(
+                        img, data[i]["candle_x"], data[i]["candle_y"], data[i]["candle_height"], 
+                        fvg_swing_type=fvg_swing_type,
+                        custom_text=custom_text, object_type=obj_type,
+                        is_bullish_arrow=is_bull, is_marked=True,
+                        double_arrow=dbl_arrow, arrow_color=active_color,
+                        label_position=position
+                    )
 
-                    n = len(data)
-                    swing_count_in_chart = 0
-                    for i in range(neighbor_left, n - neighbor_right):
-                        fvg_swing_type = data[i].get('candle_number')
+                    # Handle Contour Maker
+                    m_idx = i + neighbor_right
+                    contour_maker_entry = None
+                    if m_idx < n:
+                        cm_obj = ll_cm_obj if is_bull else lh_cm_obj
+                        cm_dbl = ll_cm_dbl if is_bull else lh_cm_dbl
                         
-                        # --- EXCLUSION CHECK ---
-                        # If the Parent already claimed this candle, we skip it
-                        if fvg_swing_type in parent_claimed_candles:
-                            continue
-
-                        curr_h, curr_l = data[i]['high'], data[i]['low']
-                        l_h = [d['high'] for d in data[i-neighbor_left:i]]
-                        l_l = [d['low'] for d in data[i-neighbor_left:i]]
-                        r_h = [d['high'] for d in data[i+1:i+neighbor_right+1]]
-                        r_l = [d['low'] for d in data[i+1:i+neighbor_right+1]]
-
-                        is_peak = curr_h > max(l_h) and curr_h > max(r_h)
-                        is_valley = curr_l < min(l_l) and curr_l < min(r_l)
-
-                        if is_peak or is_valley:
-                            swing_count_in_chart += 1
-                            is_bull = is_valley
-                            active_color = ll_col if is_bull else lh_col
-                            custom_text = ll_text if is_bull else lh_text
-                            obj_type = ll_obj if is_bull else lh_obj
-                            dbl_arrow = ll_dbl if is_bull else lh_dbl
-                            position = ll_pos if is_bull else lh_pos
+                        label_objects_and_text(
+                            img, data[m_idx]["candle_x"], data[m_idx]["candle_y"], data[m_idx]["candle_height"], 
+                            custom_text=cm_text, object_type=cm_obj,
+                            is_bullish_arrow=is_bull, is_marked=True,
+                            double_arrow=cm_dbl, arrow_color=active_color,
+                            label_position=position
+                        )
+                        contour_maker_entry = data[m_idx].copy()
+                        contour_maker_entry.update({"is_contour_maker": True})
 
-                            label_objects_and_text(
-                                img, data[i]["candle_x"], data[i]["candle_y"], data[i]["candle_height"], 
-                                fvg_swing_type=fvg_swing_type,
-                                custom_text=custom_text, object_type=obj_type,
-                                is_bullish_arrow=is_bull, is_marked=True,
-                                double_arrow=dbl_arrow, arrow_color=active_color,
-                                label_position=position
-                            )
+                    data[i].update({
+                        "swing_type": "higher_low" if is_bull else "lower_high",
+                        "is_swing": True, "active_color": active_color,
+                        "draw_x": data[i]["candle_x"], "draw_y": data[i]["candle_y"],
+                        "draw_w": data[i]["candle_width"], "draw_h": data[i]["candle_height"],
+                        "contour_maker": contour_maker_entry,
+                        "m_idx": m_idx if m_idx < n else None
+                    })
 
-                            # Handle Contour Maker
-                            m_idx = i + neighbor_right
-                            contour_maker_entry = None
-                            if m_idx < n:
-                                cm_obj = ll_cm_obj if is_bull else lh_cm_obj
-                                cm_dbl = ll_cm_dbl if is_bull else lh_cm_dbl
-                                
-                                label_objects_and_text(
-                                    img, data[m_idx]["candle_x"], data[m_idx]["candle_y"], data[m_idx]["candle_height"], 
-                                    custom_text=cm_text, object_type=cm_obj,
-                                    is_bullish_arrow=is_bull, is_marked=True,
-                                    double_arrow=cm_dbl, arrow_color=active_color,
-                                    label_position=position
-                                )
-                                contour_maker_entry = data[m_idx].copy()
-                                contour_maker_entry.update({"is_contour_maker": True})
+            # Save visual chart and Update config.json
+            ctx.save_image(paths["output_chart"], img)
 
-                            data[i].update({
-                                "swing_type": "higher_low" if is_bull else "lower_high",
-                                "is_swing": True, "active_color": active_color,
-                                "draw_x": data[i]["candle_x"], "draw_y": data[i]["candle_y"],
-                                "draw_w": data[i]["candle_width"], "draw_h": data[i]["candle_height"],
-                                "contour_maker": contour_maker_entry,
-                                "m_idx": m_idx if m_idx < n else None
-                            })
+            config_content = {}
+            if document_exists(config_path):
+                try: config_content = load_document(config_path)
+                except: config_content = {}
 
-                    # Save visual chart and Update config.json
-                    os.makedirs(paths["output_dir"], exist_ok=True)
-                    cv2.imwrite(paths["output_chart"], img)
+            config_content[config_key] = data
+            config_content[f"{config_key}_candle_list"] = data
 
-                    config_content = {}
-                    if os.path.exists(config_path):
-                        with open(config_path, 'r', encoding='utf-8') as f:
-                            try: config_content = json.load(f)
-                            except: config_content = {}
+            save_document(config_path, config_content)
+            
+            processed_charts_all += 1
+            total_marked_all += swing_count_in_chart
 
-                    config_content[config_key] = data
-                    config_content[f"{config_key}_candle_list"] = data
+        except Exception as e:
+            log(f"Error in {ctx.symbol}/{ctx.timeframe}: {e}", "ERROR")
 
-                    with open(config_path, 'w', encoding='utf-8') as f:
-                        json.dump(config_content, f, indent=4)
-                    
-                    processed_charts_all += 1
-                    total_marked_all += swing_count_in_chart
+    return {"swings": total_marked_all, "charts": processed_charts_all}
 
-                except Exception as e:
-                    log(f"Error in {sym}/{tf}: {e}", "ERROR")
+def lower_highs_higher_lows(broker_name):
+    """Mark lower highs / higher lows on every chart of the developer."""
+    return chart_detector_reports(broker_name, ["lower_highs_higher_lows"])["lower_highs_higher_lows"]
 
-    summary = f"COMPLETED. Broker: {broker_name} | Total Swings: {total_marked_all} | Total Charts: {processed_charts_all}"
-    log(summary)
-    return summary
+def contour_candle_boxes(img, contours=None):
+    """
+    Fallback candle geometry for charts rendered without a geometry sidecar:
+    mask green/red candles, sort contours left to right and return their
+    bounding boxes as arrays. Returns None when no contours are found.
+    Pass contours already found on the chart (ChartContext.contours) to skip the mask.
+    """
+    if contours is None:
+        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+        mask = cv2.inRange(hsv, (35, 50, 50), (85, 255, 255)) | cv2.inRange(hsv, (0, 50, 50), (10, 255, 255))
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if len(contours) == 0:
+        return None
+
+    rects = np.array(sorted(cv2.boundingRect(c) for c in contours), dtype=np.int64)
+    x, y, w, h = rects[:, 0], rects[:, 1], rects[:, 2], rects[:, 3]
+    return {
+        "candle_x": x + (w // 2),
+        "candle_y": y,
+        "candle_width": w,
+        "candle_height": h,
+        "candle_left": x,
+        "candle_right": x + w,
+        "candle_top": y,
+        "candle_bottom": y + h,
+    }
 
-def higher_highs_lower_lows(broker_name):
+@chart_detector(
+    "higher_highs_lower_lows",
+    configured=lambda define_candles: any("higherhighsandlowerlows" in k.lower() for k in define_candles),
+    summary="Identify Done. Swings: {swings} | Charts: {charts}",
+    missing="[{broker}] Error: No configuration found for 'higherhighsandlowerlows'."
+)
+def higher_highs_lower_lows_chart(ctx, define_candles):
 
     lagos_tz = pytz.timezone('Africa/Lagos')
     def log(msg, level="INFO"):
         ts = datetime.now(lagos_tz).strftime('%Y-%m-%d %H:%M:%S')
 
-    dev_dict = load_developers_dictionary()
-    cfg = dev_dict.get(broker_name)
-    if not cfg:
-        return f"[{broker_name}] Error: Broker not in dictionary."
-    
-    base_folder = cfg.get("BASE_FOLDER")
-    am_data = get_account_management(broker_name)
-    if not am_data:
-        return f"[{broker_name}] Error: accountmanagement.json missing."
-    
-    define_candles = am_data.get("chart", {}).get("define_candles", {})
     keyword = "higherhighsandlowerlows"
     matching_configs = [(k, v) for k, v in define_candles.items() if keyword in k.lower()]
-    if not matching_configs:
-        return f"[{broker_name}] Error: No configuration found for '{keyword}'."
     
     total_marked_all, processed_charts_all = 0, 0
 
@@ -759,8 +840,6 @@ def higher_highs_lower_lows(broker_name):
         if "dot" in raw: return "dot", False
         return raw, False
 
-    log(f"--- STARTING HH/ll ANALYSIS: {broker_name} ---")
-
     for config_key, hlll_cfg in matching_configs:
         bars = hlll_cfg.get("BARS", 101)
         output_filename_base = hlll_cfg.get("filename", "highers.json")
@@ -768,6 +847,7 @@ def higher_highs_lower_lows(broker_name):
         
         neighbor_left = hlll_cfg.get("NEIGHBOR_LEFT", 5)
         neighbor_right = hlll_cfg.get("NEIGHBOR_RIGHT", 5)
+        draw_chart = hlll_cfg.get("draw_chart", True)
         label_cfg = hlll_cfg.get("label", {})
         hh_text = label_cfg.get("higherhighs_text", "HH")
         ll_text = label_cfg.get("lowerlows_text", "ll")
@@ -785,163 +865,154 @@ def higher_highs_lower_lows(broker_name):
         hh_cm_obj, hh_cm_dbl = resolve_marker(label_at.get("higher_highs_contourmaker_marker", ""))
         ll_cm_obj, ll_cm_dbl = resolve_marker(label_at.get("lower_lows_contourmaker_marker", ""))
 
-        for sym in sorted(os.listdir(base_folder)):
-            sym_p = os.path.join(base_folder, sym)
-            if not os.path.isdir(sym_p): continue
+        paths = get_analysis_paths(ctx.base_folder, ctx.broker_name, ctx.symbol, ctx.timeframe, direction, bars, output_filename_base)
+        config_path = ctx.config_path
+        
+        if not os.path.exists(paths["source_json"]):
+            continue
+        
+        geometry = ctx.geometry(bars)
+        if geometry is None and not os.path.exists(paths["source_chart"]):
+            continue
+        
+        try:
+            # Logging specific pair and timeframe
+            data = sorted(ctx.candles(direction, bars), key=lambda x: x.get('candle_number', 0))
             
-            for tf in sorted(os.listdir(sym_p)):
-                paths = get_analysis_paths(base_folder, broker_name, sym, tf, direction, bars, output_filename_base)
-                config_path = os.path.join(paths["output_dir"], "config.json")
-                
-                if not os.path.exists(paths["source_json"]) or not os.path.exists(paths["source_chart"]):
+            # Candles are placed from the geometry sidecar; only a chart
+            # without one is decoded for its contours, and the sidecar fitted
+            # from them spares the next run over the same PNG that pass.
+            if geometry is not None:
+                data = data[:min(len(data), geometry.get("num_candles", len(data)))]
+                highs, lows = candle_arrays(data, 'high', 'low')
+                boxes = candle_pixel_boxes(geometry, highs, lows)
+            else:
+                boxes = contour_candle_boxes(None, ctx.contours(bars))
+                if boxes is None: 
+                    log(f"   No contours found for {ctx.symbol} {ctx.timeframe}")
                     continue
+                min_len = min(len(data), len(boxes["candle_x"]))
+                data = data[:min_len]
+                boxes = {k: v[:min_len] for k, v in boxes.items()}
+                highs, lows = candle_arrays(data, 'high', 'low')
+                ctx.learn_geometry(bars, boxes, highs, lows)
+
+            box_lists = {k: v.tolist() for k, v in boxes.items()}
+            for idx, candle in enumerate(data):
+                for k, v in box_lists.items():
+                    candle[k] = v[idx]
+
+            n = len(data)
+            swing_count_in_chart = 0
+            is_hh_arr, is_ll_arr = detect_swings(highs, lows, neighbor_left, neighbor_right)
+            swing_indices = np.flatnonzero(is_hh_arr | is_ll_arr).tolist()
+
+            # The PNG is only decoded when there is something to draw on it
+            img = ctx.chart(bars) if draw_chart and swing_indices else None
+
+            for i in swing_indices:
+                is_ll = bool(is_ll_arr[i])
                 
-                try:
-                    # Logging specific pair and timeframe
-                    with open(paths["source_json"], 'r', encoding='utf-8') as f:
-                        data = sorted(json.load(f), key=lambda x: x.get('candle_number', 0))
-                    
-                    img = cv2.imread(paths["source_chart"])
-                    if img is None: 
-                        log(f"   Skipping: Could not load image {paths['source_chart']}", "WARNING")
-                        continue
-                    
-                    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-                    mask = cv2.inRange(hsv, (35, 50, 50), (85, 255, 255)) | cv2.inRange(hsv, (0, 50, 50), (10, 255, 255))
-                    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                    
-                    if len(contours) == 0: 
-                        log(f"   No contours found for {sym} {tf}")
-                        continue
+                swing_count_in_chart += 1
+                is_bull = is_ll
+                active_color = ll_col if is_bull else hh_col
+                custom_text = ll_text if is_bull else hh_text
+                obj_type = ll_obj if is_bull else hh_obj
+                dbl_arrow = ll_dbl if is_bull else hh_dbl
+                position = ll_pos if is_bull else hh_pos
+
+                if img is not None:
+                    label_objects_and_text(
+                        img, data[i]["candle_x"], data[i]["candle_y"], data[i]["candle_height"],
+                        fvg_swing_type=data[i]['candle_number'],
+                        custom_text=custom_text,
+                        object_type=obj_type,
+                        is_bullish_arrow=is_bull,
+                        is_marked=True,
+                        double_arrow=dbl_arrow,
+                        arrow_color=active_color,
+                        label_position=position
+                    )
 
-                    contours = sorted(contours, key=lambda c: cv2.boundingRect(c)[0])
+                m_idx = i + neighbor_right
+                contour_maker_entry = None
+                if m_idx < n:
+                    cm_obj = ll_cm_obj if is_bull else hh_cm_obj
+                    cm_dbl = ll_cm_dbl if is_bull else hh_cm_dbl
                     
-                    if len(data) != len(contours):
-                        min_len = min(len(data), len(contours))
-                        data = data[:min_len]
-                        contours = contours[:min_len]
-
-                    for idx, contour in enumerate(contours):
-                        x, y, w, h = cv2.boundingRect(contour)
-                        data[idx].update({
-                            "candle_x": x + (w // 2),
-                            "candle_y": y,
-                            "candle_width": w,
-                            "candle_height": h,
-                            "candle_left": x,
-                            "candle_right": x + w,
-                            "candle_top": y,
-                            "candle_bottom": y + h
-                        })
-
-                    n = len(data)
-                    swing_count_in_chart = 0
-                    start_idx = neighbor_left
-                    end_idx = n - neighbor_right
-
-                    for i in range(start_idx, end_idx):
-                        curr_h, curr_l = data[i]['high'], data[i]['low']
-                        
-                        l_h = [d['high'] for d in data[i - neighbor_left:i]]
-                        l_l = [d['low'] for d in data[i - neighbor_left:i]]
-                        r_h = [d['high'] for d in data[i + 1:i + 1 + neighbor_right]]
-                        r_l = [d['low'] for d in data[i + 1:i + 1 + neighbor_right]]
-                        
-                        is_hh = curr_h > max(l_h) and curr_h > max(r_h)
-                        is_ll = curr_l < min(l_l) and curr_l < min(r_l)
-                        
-                        if not (is_hh or is_ll):
-                            continue
-                        
-                        swing_count_in_chart += 1
-                        is_bull = is_ll
-                        active_color = ll_col if is_bull else hh_col
-                        custom_text = ll_text if is_bull else hh_text
-                        obj_type = ll_obj if is_bull else hh_obj
-                        dbl_arrow = ll_dbl if is_bull else hh_dbl
-                        position = ll_pos if is_bull else hh_pos
-
+                    if img is not None:
                         label_objects_and_text(
-                            img, data[i]["candle_x"], data[i]["candle_y"], data[i]["candle_height"],
-                            fvg_swing_type=data[i]['candle_number'],
-                            custom_text=custom_text,
-                            object_type=obj_type,
+                            img, data[m_idx]["candle_x"], data[m_idx]["candle_y"], data[m_idx]["candle_height"],
+                            custom_text=cm_text,
+                            object_type=cm_obj,
                             is_bullish_arrow=is_bull,
                             is_marked=True,
-                            double_arrow=dbl_arrow,
+                            double_arrow=cm_dbl,
                             arrow_color=active_color,
                             label_position=position
                         )
 
-                        m_idx = i + neighbor_right
-                        contour_maker_entry = None
-                        if m_idx < n:
-                            cm_obj = ll_cm_obj if is_bull else hh_cm_obj
-                            cm_dbl = ll_cm_dbl if is_bull else hh_cm_dbl
-                            
-                            label_objects_and_text(
-                                img, data[m_idx]["candle_x"], data[m_idx]["candle_y"], data[m_idx]["candle_height"],
-                                custom_text=cm_text,
-                                object_type=cm_obj,
-                                is_bullish_arrow=is_bull,
-                                is_marked=True,
-                                double_arrow=cm_dbl,
-                                arrow_color=active_color,
-                                label_position=position
-                            )
-
-                            data[m_idx]["is_contour_maker"] = True
-                            contour_maker_entry = data[m_idx].copy()
-                            contour_maker_entry.update({
-                                "draw_x": data[m_idx]["candle_x"], "draw_y": data[m_idx]["candle_y"],
-                                "draw_w": data[m_idx]["candle_width"], "draw_h": data[m_idx]["candle_height"],
-                                "draw_left": data[m_idx]["candle_left"], "draw_right": data[m_idx]["candle_right"],
-                                "draw_top": data[m_idx]["candle_top"], "draw_bottom": data[m_idx]["candle_bottom"],
-                                "is_contour_maker": True
-                            })
-
-                        data[i].update({
-                            "swing_type": "lower_low" if is_bull else "higher_high",
-                            "is_swing": True,
-                            "active_color": active_color,
-                            "draw_x": data[i]["candle_x"], "draw_y": data[i]["candle_y"],
-                            "draw_w": data[i]["candle_width"], "draw_h": data[i]["candle_height"],
-                            "draw_left": data[i]["candle_left"], "draw_right": data[i]["candle_right"],
-                            "draw_top": data[i]["candle_top"], "draw_bottom": data[i]["candle_bottom"],
-                            "contour_maker": contour_maker_entry,
-                            "m_idx": m_idx if m_idx < n else None
-                        })
-
-                    # Finalize outputs for this specific TF
-                    os.makedirs(paths["output_dir"], exist_ok=True)
-                    cv2.imwrite(paths["output_chart"], img)
+                    data[m_idx]["is_contour_maker"] = True
+                    contour_maker_entry = data[m_idx].copy()
+                    contour_maker_entry.update({
+                        "draw_x": data[m_idx]["candle_x"], "draw_y": data[m_idx]["candle_y"],
+                        "draw_w": data[m_idx]["candle_width"], "draw_h": data[m_idx]["candle_height"],
+                        "draw_left": data[m_idx]["candle_left"], "draw_right": data[m_idx]["candle_right"],
+                        "draw_top": data[m_idx]["candle_top"], "draw_bottom": data[m_idx]["candle_bottom"],
+                        "is_contour_maker": True
+                    })
 
+                data[i].update({
+                    "swing_type": "lower_low" if is_bull else "higher_high",
+                    "is_swing": True,
+                    "active_color": active_color,
+                    "draw_x": data[i]["candle_x"], "draw_y": data[i]["candle_y"],
+                    "draw_w": data[i]["candle_width"], "draw_h": data[i]["candle_height"],
+                    "draw_left": data[i]["candle_left"], "draw_right": data[i]["candle_right"],
+                    "draw_top": data[i]["candle_top"], "draw_bottom": data[i]["candle_bottom"],
+                    "contour_maker": contour_maker_entry,
+                    "m_idx": m_idx if m_idx < n else None
+                })
+
+            # Finalize outputs for this specific TF
+            if img is not None:
+                ctx.save_image(paths["output_chart"], img)
+            elif draw_chart and os.path.exists(paths["source_chart"]):
+                ctx.copy_chart(bars, paths["output_chart"])
+
+            config_json = {}
+            if document_exists(config_path):
+                try:
+                    config_json = load_document(config_path)
+                except:
                     config_json = {}
-                    if os.path.exists(config_path):
-                        try:
-                            with open(config_path, 'r', encoding='utf-8') as f:
-                                config_json = json.load(f)
-                        except:
-                            config_json = {}
-                    
-                    config_json[config_key] = data
-                    config_json[f"{config_key}_candle_list"] = data 
+            
+            config_json[config_key] = data
+            config_json[f"{config_key}_candle_list"] = data 
 
-                    with open(config_path, 'w', encoding='utf-8') as f:
-                        json.dump(config_json, f, indent=4)
-                    
-                    log(f"{sym} | {tf} | Key: {config_key} Swings found: {swing_count_in_chart}")
-                    
-                    processed_charts_all += 1
-                    total_marked_all += swing_count_in_chart
+            save_document(config_path, config_json)
+            
+            log(f"{ctx.symbol} | {ctx.timeframe} | Key: {config_key} Swings found: {swing_count_in_chart}")
+            
+            processed_charts_all += 1
+            total_marked_all += swing_count_in_chart
 
-                except Exception as e:
-                    log(f"   [ERROR] Failed processing {sym}/{tf}: {e}", "ERROR")
+        except Exception as e:
+            log(f"   [ERROR] Failed processing {ctx.symbol}/{ctx.timeframe}: {e}", "ERROR")
 
-    log(f"--- HH/ll COMPLETE --- Total Swings: {total_marked_all} | Total Charts: {processed_charts_all}")
-    return f"Identify Done. Swings: {total_marked_all} | Charts: {processed_charts_all}"  
+    return {"swings": total_marked_all, "charts": processed_charts_all}
 
-def directional_bias(broker_name):
+def higher_highs_lower_lows(broker_name, symbols=None, timeframes=None):
+    """Mark higher highs / lower lows on every chart of the developer (optionally only some symbols/timeframes)."""
+    return chart_detector_reports(broker_name, ["higher_highs_lower_lows"], symbols, timeframes)["higher_highs_lower_lows"]
+
+@chart_detector(
+    "directional_bias",
+    configured=lambda define_candles: bool(define_candles.get("directional_bias_candles")),
+    summary="Directional Bias Done. DB Markers: {db_marked}, Liq Sweeps: {liq_marked}",
+    missing="[{broker}] Error: 'directional_bias_candles' section missing."
+)
+def directional_bias_chart(ctx, define_candles):
     lagos_tz = pytz.timezone('Africa/Lagos')
     
     def log(msg, level="INFO"):
@@ -961,22 +1032,7 @@ def directional_bias(broker_name):
         if "pentagon" in raw: return "pentagon", False
         return raw, False
 
-    dev_dict = load_developers_dictionary()
-    cfg = dev_dict.get(broker_name)
-    if not cfg:
-        return f"[{broker_name}] Error: Broker not in dictionary."
-    
-    base_folder = cfg.get("BASE_FOLDER")
-    am_data = get_account_management(broker_name)
-    if not am_data:
-        return f"[{broker_name}] Error: accountmanagement.json missing."
-    
-    chart_cfg = am_data.get("chart", {})
-    define_candles = chart_cfg.get("define_candles", {})
     db_section = define_candles.get("directional_bias_candles", {})
-    
-    if not db_section:
-        return f"[{broker_name}] Error: 'directional_bias_candles' section missing."
 
     total_db_marked = 0
     total_liq_marked = 0
@@ -996,8 +1052,6 @@ def directional_bias(broker_name):
         if not isinstance(apprehend_cfg, dict) or apprehend_key == "apprehend_directional_bias_candles":
             continue 
 
-        log(f"Processing directional bias apprehend: '{apprehend_key}'")
-
         target_type = apprehend_cfg.get("target", "").lower()
         label_cfg = apprehend_cfg.get("label", {})
         db_text   = label_cfg.get("directional_bias_candles_text", "DB")
@@ -1018,189 +1072,173 @@ def directional_bias(broker_name):
         is_hlll = "higherhighsandlowerlows" in source_config_name.lower()
         is_llhl = "lowerhighsandhigherlows"   in source_config_name.lower()
 
-        for sym in sorted(os.listdir(base_folder)):
-            sym_p = os.path.join(base_folder, sym)
-            if not os.path.isdir(sym_p): continue
+        config_json_path = ctx.config_path
+        
+        # Check if the config file exists
+        if not document_exists(config_json_path):
+            continue
 
-            for tf in sorted(os.listdir(sym_p)):
-                dev_output_dir = os.path.join(os.path.abspath(os.path.join(base_folder, "..", "developers", broker_name)), sym, tf)
-                config_json_path = os.path.join(dev_output_dir, "config.json")
-                
-                # Check if the config file exists
-                if not os.path.exists(config_json_path):
-                    continue
+        paths = get_analysis_paths(ctx.base_folder, ctx.broker_name, ctx.symbol, ctx.timeframe, "new_old", bars, filename)
+        
+        # We still need the chart and source_json (candle prices) to process logic
+        if not os.path.exists(paths.get("source_json")) or not os.path.exists(paths.get("source_chart")):
+            continue
 
-                paths = get_analysis_paths(base_folder, broker_name, sym, tf, "new_old", bars, filename)
-                
-                # We still need the chart and source_json (candle prices) to process logic
-                if not os.path.exists(paths.get("source_json")) or not os.path.exists(paths.get("source_chart")):
-                    continue
+        try:
+            # 1. Load Price Data (for calculations)
+            full_data = sorted(ctx.candles("new_old", bars), key=lambda x: x.get('candle_number', 0))
+            
+            # 2. Load the developer config.json (The actual Target)
+            local_config = load_document(config_json_path)
 
-                try:
-                    # 1. Load Price Data (for calculations)
-                    with open(paths["source_json"], 'r', encoding='utf-8') as f:
-                        full_data = sorted(json.load(f), key=lambda x: x.get('candle_number', 0))
-                    
-                    # 2. Load the developer config.json (The actual Target)
-                    with open(config_json_path, 'r', encoding='utf-8') as f:
-                        local_config = json.load(f)
+            # Get the list data (e.g., local_config["value"])
+            input_structures = local_config.get(source_config_name, [])
+            if not input_structures:
+                continue
 
-                    # Get the list data (e.g., local_config["value"])
-                    input_structures = local_config.get(source_config_name, [])
-                    if not input_structures:
-                        continue
+            # 3. Setup CV2 Images
+            clean_img  = ctx.chart(bars)
+            if clean_img is None: continue
+            marked_img = ctx.image(paths["output_chart"]) if ctx.image_exists(paths["output_chart"]) else clean_img
+
+            contours = ctx.contours(bars)
+            n_candles = len(full_data)
+
+            final_flat_list = []
+            for structure in input_structures:
+                # Extract the base Marker
+                marker_candle = {k: v for k, v in structure.items() if k not in ["contour_maker", "directional_bias"]}
+                final_flat_list.append(marker_candle)
+
+                reference_idx = None
+                reference_high = None
+                reference_low = None
+                active_color = tuple(structure.get("active_color", [0,255,0]))
+
+                # Process Contour Maker
+                if (is_hlll or is_llhl) and target_type == "contourmaker":
+                    cm_data = structure.get("contour_maker")
+                    if cm_data:
+                        cm_only = {k: v for k, v in cm_data.items() if k != "contour_maker_liquidity_candle"}
+                        cm_only["is_contour_maker"] = True
+                        final_flat_list.append(cm_only)
+                        reference_idx = structure.get("m_idx")
+                        reference_high, reference_low = cm_data["high"], cm_data["low"]
+
+                if reference_idx is None or reference_idx >= n_candles:
+                    continue
 
-                    # 3. Setup CV2 Images
-                    clean_img  = cv2.imread(paths["source_chart"])
-                    marked_img = cv2.imread(paths["output_chart"]) if os.path.exists(paths["output_chart"]) else clean_img.copy()
-                    if clean_img is None: continue
-
-                    hsv = cv2.cvtColor(clean_img, cv2.COLOR_BGR2HSV)
-                    mask = cv2.inRange(hsv, (35,50,50), (85,255,255)) | cv2.inRange(hsv, (0,50,50),(10,255,255))
-                    raw_contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                    contours = sorted(raw_contours, key=lambda c: cv2.boundingRect(c)[0])
-                    n_candles = len(full_data)
-
-                    final_flat_list = []
-                    for structure in input_structures:
-                        # Extract the base Marker
-                        marker_candle = {k: v for k, v in structure.items() if k not in ["contour_maker", "directional_bias"]}
-                        final_flat_list.append(marker_candle)
-
-                        reference_idx = None
-                        reference_high = None
-                        reference_low = None
-                        active_color = tuple(structure.get("active_color", [0,255,0]))
-
-                        # Process Contour Maker
-                        if (is_hlll or is_llhl) and target_type == "contourmaker":
-                            cm_data = structure.get("contour_maker")
-                            if cm_data:
-                                cm_only = {k: v for k, v in cm_data.items() if k != "contour_maker_liquidity_candle"}
-                                cm_only["is_contour_maker"] = True
-                                final_flat_list.append(cm_only)
-                                reference_idx = structure.get("m_idx")
-                                reference_high, reference_low = cm_data["high"], cm_data["low"]
-
-                        if reference_idx is None or reference_idx >= n_candles:
-                            continue
+                # Process Level 1 Directional Bias
+                first_db_info = None
+                for k in range(reference_idx + 1, n_candles):
+                    candle = full_data[k]
+                    if candle['high'] < reference_low:
+                        first_db_info = {**candle, "idx": k, "type": "downward", "level": 1, "is_directional_bias": True}
+                        break
+                    if candle['low'] > reference_high:
+                        first_db_info = {**candle, "idx": k, "type": "upward", "level": 1, "is_directional_bias": True}
+                        break
+
+                if first_db_info:
+                    db_idx = first_db_info["idx"]
+                    base_type = get_base_type(first_db_info["type"])
+                    first_db_info["base_type"] = base_type
+                    final_flat_list.append(first_db_info)
+
+                    # Process Contour Maker Liquidity Sweep
+                    for l_idx in range(db_idx + 1, n_candles):
+                        l_candle = full_data[l_idx]
+                        if (base_type == "support" and l_candle['low'] < reference_low) or \
+                           (base_type == "resistance" and l_candle['high'] > reference_high):
+                            liq_obj = {**l_candle, "idx": l_idx, "is_contour_maker_liquidity": True}
+                            final_flat_list.append(liq_obj)
+                            total_liq_marked += 1
+                            break
 
-                        # Process Level 1 Directional Bias
-                        first_db_info = None
-                        for k in range(reference_idx + 1, n_candles):
-                            candle = full_data[k]
-                            if candle['high'] < reference_low:
-                                first_db_info = {**candle, "idx": k, "type": "downward", "level": 1, "is_directional_bias": True}
+                    # Visual Marking
+                    x, y, w, h = cv2.boundingRect(contours[db_idx])
+                    is_up = first_db_info["type"] == "upward"
+                    label_objects_and_text(
+                        img=marked_img, cx=x + w // 2, y_rect=y, h_rect=h,
+                        custom_text=db_text, object_type=up_obj if is_up else dn_obj,
+                        is_bullish_arrow=is_up, is_marked=True,
+                        double_arrow=up_dbl if is_up else dn_dbl,
+                        arrow_color=active_color, label_position=up_pos if is_up else dn_pos
+                    )
+                    total_db_marked += 1
+
+                    # Process Level 2 Bias (Self Apprehend)
+                    if has_self_apprehend and db_idx + 1 < n_candles:
+                        s_ref_h, s_ref_l = first_db_info["high"], first_db_info["low"]
+                        second_db_info = None
+                        for m in range(db_idx + 1, n_candles):
+                            c2 = full_data[m]
+                            if c2['high'] < s_ref_l:
+                                second_db_info = {**c2, "idx": m, "type": "downward", "level": 2, "is_next_bias_candle": True}
                                 break
-                            if candle['low'] > reference_high:
-                                first_db_info = {**candle, "idx": k, "type": "upward", "level": 1, "is_directional_bias": True}
+                            if c2['low'] > s_ref_h:
+                                second_db_info = {**c2, "idx": m, "type": "upward", "level": 2, "is_next_bias_candle": True}
                                 break
-
-                        if first_db_info:
-                            db_idx = first_db_info["idx"]
-                            base_type = get_base_type(first_db_info["type"])
-                            first_db_info["base_type"] = base_type
-                            final_flat_list.append(first_db_info)
-
-                            # Process Contour Maker Liquidity Sweep
-                            for l_idx in range(db_idx + 1, n_candles):
-                                l_candle = full_data[l_idx]
-                                if (base_type == "support" and l_candle['low'] < reference_low) or \
-                                   (base_type == "resistance" and l_candle['high'] > reference_high):
-                                    liq_obj = {**l_candle, "idx": l_idx, "is_contour_maker_liquidity": True}
-                                    final_flat_list.append(liq_obj)
+                        
+                        if second_db_info:
+                            s_idx = second_db_info["idx"]
+                            next_base_type = get_base_type(second_db_info["type"])
+                            final_flat_list.append(second_db_info)
+
+                            for dl_idx in range(s_idx + 1, n_candles):
+                                dl_candle = full_data[dl_idx]
+                                if (next_base_type == "support" and dl_candle['low'] < s_ref_l) or \
+                                   (next_base_type == "resistance" and dl_candle['high'] > s_ref_h):
+                                    final_flat_list.append({**dl_candle, "idx": dl_idx, "directional_bias_liquidity_candle": True})
                                     total_liq_marked += 1
                                     break
 
-                            # Visual Marking
-                            x, y, w, h = cv2.boundingRect(contours[db_idx])
-                            is_up = first_db_info["type"] == "upward"
+                            sx, sy, sw, sh = cv2.boundingRect(contours[s_idx])
+                            s_is_up = second_db_info["type"] == "upward"
                             label_objects_and_text(
-                                img=marked_img, cx=x + w // 2, y_rect=y, h_rect=h,
-                                custom_text=db_text, object_type=up_obj if is_up else dn_obj,
-                                is_bullish_arrow=is_up, is_marked=True,
-                                double_arrow=up_dbl if is_up else dn_dbl,
-                                arrow_color=active_color, label_position=up_pos if is_up else dn_pos
+                                img=marked_img, cx=sx + sw // 2, y_rect=sy, h_rect=sh,
+                                custom_text=self_db_text, object_type=self_up_obj if s_is_up else self_dn_obj,
+                                is_bullish_arrow=s_is_up, is_marked=True,
+                                double_arrow=self_up_dbl if s_is_up else self_dn_dbl,
+                                arrow_color=active_color, label_position=self_up_pos if s_is_up else self_dn_pos
                             )
                             total_db_marked += 1
 
-                            # Process Level 2 Bias (Self Apprehend)
-                            if has_self_apprehend and db_idx + 1 < n_candles:
-                                s_ref_h, s_ref_l = first_db_info["high"], first_db_info["low"]
-                                second_db_info = None
-                                for m in range(db_idx + 1, n_candles):
-                                    c2 = full_data[m]
-                                    if c2['high'] < s_ref_l:
-                                        second_db_info = {**c2, "idx": m, "type": "downward", "level": 2, "is_next_bias_candle": True}
-                                        break
-                                    if c2['low'] > s_ref_h:
-                                        second_db_info = {**c2, "idx": m, "type": "upward", "level": 2, "is_next_bias_candle": True}
-                                        break
-                                
-                                if second_db_info:
-                                    s_idx = second_db_info["idx"]
-                                    next_base_type = get_base_type(second_db_info["type"])
-                                    final_flat_list.append(second_db_info)
-
-                                    for dl_idx in range(s_idx + 1, n_candles):
-                                        dl_candle = full_data[dl_idx]
-                                        if (next_base_type == "support" and dl_candle['low'] < s_ref_l) or \
-                                           (next_base_type == "resistance" and dl_candle['high'] > s_ref_h):
-                                            final_flat_list.append({**dl_candle, "idx": dl_idx, "directional_bias_liquidity_candle": True})
-                                            total_liq_marked += 1
-                                            break
-
-                                    sx, sy, sw, sh = cv2.boundingRect(contours[s_idx])
-                                    s_is_up = second_db_info["type"] == "upward"
-                                    label_objects_and_text(
-                                        img=marked_img, cx=sx + sw // 2, y_rect=sy, h_rect=sh,
-                                        custom_text=self_db_text, object_type=self_up_obj if s_is_up else self_dn_obj,
-                                        is_bullish_arrow=s_is_up, is_marked=True,
-                                        double_arrow=self_up_dbl if s_is_up else self_dn_dbl,
-                                        arrow_color=active_color, label_position=self_up_pos if s_is_up else self_dn_pos
-                                    )
-                                    total_db_marked += 1
-
-                    # Save visual chart
-                    cv2.imwrite(paths["output_chart"], marked_img)
-                    
-                    # Update ONLY the specific key in local_config
-                    local_config[source_config_name] = final_flat_list
-                    # Optional: keep price data for other functions to use
-                    local_config[f"{source_config_name}_candle_list"] = full_data
-                    
-                    with open(config_json_path, 'w', encoding='utf-8') as f:
-                        json.dump(local_config, f, indent=4)
-                    
-                    log(f"Successfully finalized {sym} {tf}")
+            # Save visual chart
+            ctx.save_image(paths["output_chart"], marked_img)
+            
+            # Update ONLY the specific key in local_config
+            local_config[source_config_name] = final_flat_list
+            # Optional: keep price data for other functions to use
+            local_config[f"{source_config_name}_candle_list"] = full_data
+            
+            save_document(config_json_path, local_config)
+            
+            log(f"Successfully finalized {ctx.symbol} {ctx.timeframe}")
 
-                except Exception as e:
-                    log(f"Error processing {sym}/{tf}: {e}", "ERROR")
+        except Exception as e:
+            log(f"Error processing {ctx.symbol}/{ctx.timeframe}: {e}", "ERROR")
 
-    return f"Directional Bias Done. DB Markers: {total_db_marked}, Liq Sweeps: {total_liq_marked}"
+    return {"db_marked": total_db_marked, "liq_marked": total_liq_marked}
 
-def fair_value_gaps(broker_name):
+def directional_bias(broker_name):
+    """Mark directional bias candles and their liquidity sweeps on every chart of the developer."""
+    return chart_detector_reports(broker_name, ["directional_bias"])["directional_bias"]
+
+@chart_detector(
+    "fair_value_gaps",
+    configured=lambda define_candles: any(isinstance(v, dict) and "fvg" in k.lower() for k, v in define_candles.items()),
+    summary="Done (all FVG configs). Total FVGs: {fvgs} | Total Charts: {charts}",
+    missing="[{broker}] Error: No section key containing 'fvg' found in 'define_candles'."
+)
+def fair_value_gaps_chart(ctx, define_candles):
     lagos_tz = pytz.timezone('Africa/Lagos')
     
     def log(msg, level="INFO"):
         ts = datetime.now(lagos_tz).strftime('%Y-%m-%d %H:%M:%S')
         print(f"[{ts}] [{level}] {msg}")
     
-    dev_dict = load_developers_dictionary()
-    cfg = dev_dict.get(broker_name)
-    if not cfg:
-        return f"[{broker_name}] Error: Broker not in dictionary."
-    
-    base_folder = cfg.get("BASE_FOLDER")
-    am_data = get_account_management(broker_name)
-    if not am_data:
-        return f"[{broker_name}] Error: accountmanagement.json missing."
-    
     # === DYNAMIC SEARCH BY KEYWORD "fvg" IN SECTION NAME ===
-    define_candles = am_data.get("chart", {}).get("define_candles", {})
-    if not define_candles:
-        return f"[{broker_name}] Error: 'define_candles' section missing in accountmanagement.json."
-
     keyword = "fvg"
     matching_configs = []
 
@@ -1208,17 +1246,10 @@ def fair_value_gaps(broker_name):
         if isinstance(section, dict) and keyword in key.lower():
             matching_configs.append((key, section))
 
-    if not matching_configs:
-        return f"[{broker_name}] Error: No section key containing '{keyword}' found in 'define_candles'."
-
-    log(f"Found {len(matching_configs)} FVG configuration(s) matching keyword '{keyword}': {[k for k, _ in matching_configs]}")
-
     total_marked_all = 0
     processed_charts_all = 0
 
     for config_key, fvg_cfg in matching_configs:
-        log(f"Processing FVG configuration: '{config_key}'")
-
         # Config extraction
         bars = fvg_cfg.get("BARS", 101)
         output_filename_base = fvg_cfg.get("filename", "fvg.json")
@@ -1278,278 +1309,254 @@ def fair_value_gaps(broker_name):
         total_marked = 0
         processed_charts = 0
 
-        log(f"Starting FVG Analysis with config '{config_key}' | Mode: Left-to-Right Only")
+        paths = get_analysis_paths(ctx.base_folder, ctx.broker_name, ctx.symbol, ctx.timeframe, direction, bars, output_filename_base)
 
-        for sym in sorted(os.listdir(base_folder)):
-            sym_p = os.path.join(base_folder, sym)
-            if not os.path.isdir(sym_p): continue
+        if not os.path.exists(paths["source_json"]) or not os.path.exists(paths["source_chart"]):
+            continue
             
-            for tf in sorted(os.listdir(sym_p)):
-                tf_path = os.path.join(sym_p, tf)
-                if not os.path.isdir(tf_path): continue
-
-                paths = get_analysis_paths(base_folder, broker_name, sym, tf, direction, bars, output_filename_base)
-
-                if not os.path.exists(paths["source_json"]) or not os.path.exists(paths["source_chart"]):
-                    continue
+        try:
+            data = ctx.candles(direction, bars)
+            
+            min_required = 3 + c1_lookback
+            if len(data) < min_required: continue
+            
+            data = sorted(data, key=lambda x: x.get('candle_number', 0))
+            
+            img = ctx.chart(bars)
+            if img is None: continue
+            
+            contours = ctx.contours(bars)
+            
+            marked_count = 0
+            # Storage for the FVG attributes to apply to candles 1, 2, and 3
+            potential_fvgs_map = {} 
+            c1_tags = {} # candle_num -> {fvg_c1: True, c1_for_fvg_number: X}
+            c3_tags = {} # candle_num -> {fvg_c3: True, c3_for_fvg_number: X}
+            
+            # --- Identify Potential FVGs ---
+            for i in range(1 + c1_lookback, len(data) - 1):
+                if i >= len(contours): break
+                
+                c_idx_1 = i - 1 - c1_lookback
+                c1, c2, c3 = data[c_idx_1], data[i], data[i+1]
+                
+                c1_u_wick = round(c1['high'] - max(c1['open'], c1['close']), 5)
+                c1_l_wick = round(min(c1['open'], c1['close']) - c1['low'], 5)
+                c1_total_wick = round(c1_u_wick + c1_l_wick, 5)
+                
+                c3_u_wick = round(c3['high'] - max(c3['open'], c3['close']), 5)
+                c3_l_wick = round(min(c3['open'], c3['close']) - c3['low'], 5)
+                c3_total_wick = round(c3_u_wick + c3_l_wick, 5)
+                
+                body1 = round(abs(c1['close'] - c1['open']), 5)
+                body2 = round(abs(c2['close'] - c2['open']), 5)
+                body3 = round(abs(c3['close'] - c3['open']), 5)
+                
+                height1 = round(c1['high'] - c1['low'], 5)
+                height2 = round(c2['high'] - c2['low'], 5)
+                height3 = round(c3['high'] - c3['low'], 5)
+                
+                fvg_type = None
+                gap_top, gap_bottom = 0, 0
+                
+                if c1['low'] > c3['high']:
+                    fvg_type = "bearish"
+                    gap_top, gap_bottom = c1['low'], c3['high']
+                elif c1['high'] < c3['low']:
+                    fvg_type = "bullish"
+                    gap_top, gap_bottom = c3['low'], c1['high']
+                
+                if fvg_type:
+                    gap_size = round(abs(gap_top - gap_bottom), 5)
+                    is_bullish_fvg_c = c2['close'] > c2['open']
                     
-                try:
-                    with open(paths["source_json"], 'r', encoding='utf-8') as f:
-                        data = json.load(f)
+                    c1_type_match = ((fvg_type == "bullish" and c1['close'] > c1['open']) or 
+                                    (fvg_type == "bearish" and c1['close'] < c1['open'])) if check_c1_type else True
+                    c3_type_match = ((fvg_type == "bullish" and c3['close'] > c3['open']) or 
+                                    (fvg_type == "bearish" and c3['close'] < c3['open'])) if check_c3_type else True
                     
-                    min_required = 3 + c1_lookback
-                    if len(data) < min_required: continue
+                    c3_beyond_wick = (fvg_type == "bearish" and c3['close'] < c2['low']) or \
+                                     (fvg_type == "bullish" and c3['close'] > c2['high'])
+                    c3_beyond_close = (fvg_type == "bearish" and c3['close'] < c2['close']) or \
+                                      (fvg_type == "bullish" and c3['close'] > c2['close'])
                     
-                    data = sorted(data, key=lambda x: x.get('candle_number', 0))
+                    c3_closing_match = True
+                    if c3_closing_cfg == "beyond_wick":    c3_closing_match = c3_beyond_wick
+                    elif c3_closing_cfg == "beyond_close": c3_closing_match = c3_beyond_close
                     
-                    img = cv2.imread(paths["source_chart"])
-                    if img is None: continue
+                    is_strong_c1 = ((fvg_type == "bearish" and c1['high'] > c2['high']) or 
+                                   (fvg_type == "bullish" and c1['low'] < c2['low'])) if do_c1_check else True
+                    is_strong_c3 = ((fvg_type == "bearish" and c3['low'] < c2['low']) or 
+                                   (fvg_type == "bullish" and c3['high'] > c2['high'])) if do_c3_check else True
                     
-                    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-                    mask = cv2.inRange(hsv, (35, 50, 50), (85, 255, 255)) | cv2.inRange(hsv, (0, 50, 50), (10, 255, 255))
-                    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                    contours = sorted(contours, key=lambda c: cv2.boundingRect(c)[0], reverse=False)
+                    excess_c1 = round(body2 - body1, 5)
+                    excess_c3 = round(body2 - body3, 5)
+                    is_strong_fvg = (excess_c1 > 0 and excess_c3 > 0) if do_strength_check else True
                     
-                    marked_count = 0
-                    # Storage for the FVG attributes to apply to candles 1, 2, and 3
-                    potential_fvgs_map = {} 
-                    c1_tags = {} # candle_num -> {fvg_c1: True, c1_for_fvg_number: X}
-                    c3_tags = {} # candle_num -> {fvg_c3: True, c3_for_fvg_number: X}
+                    fvg_durability = True
+                    if fvg_body_size_cfg == "sum_c1_c3_body":
+                        fvg_durability = (body1 + body3) <= body2
+                    elif fvg_body_size_cfg == "sum_c1_c3_height":
+                        fvg_durability = (height1 + height3) <= height2
+                    elif fvg_body_size_cfg == "multiply_c1_body_by_2":
+                        fvg_durability = (body1 * 2) <= body2
+                    elif fvg_body_size_cfg == "multiply_c3_body_by_2":
+                        fvg_durability = (body3 * 2) <= body2
+                    elif fvg_body_size_cfg == "multiply_c1_height_by_2":
+                        fvg_durability = (height1 * 2) <= body2
+                    elif fvg_body_size_cfg == "multiply_c3_height_by_2":
+                        fvg_durability = (height3 * 2) <= body2
                     
-                    # --- Identify Potential FVGs ---
-                    for i in range(1 + c1_lookback, len(data) - 1):
-                        if i >= len(contours): break
-                        
-                        c_idx_1 = i - 1 - c1_lookback
-                        c1, c2, c3 = data[c_idx_1], data[i], data[i+1]
-                        
-                        c1_u_wick = round(c1['high'] - max(c1['open'], c1['close']), 5)
-                        c1_l_wick = round(min(c1['open'], c1['close']) - c1['low'], 5)
-                        c1_total_wick = round(c1_u_wick + c1_l_wick, 5)
-                        
-                        c3_u_wick = round(c3['high'] - max(c3['open'], c3['close']), 5)
-                        c3_l_wick = round(min(c3['open'], c3['close']) - c3['low'], 5)
-                        c3_total_wick = round(c3_u_wick + c3_l_wick, 5)
-                        
-                        body1 = round(abs(c1['close'] - c1['open']), 5)
-                        body2 = round(abs(c2['close'] - c2['open']), 5)
-                        body3 = round(abs(c3['close'] - c3['open']), 5)
-                        
-                        height1 = round(c1['high'] - c1['low'], 5)
-                        height2 = round(c2['high'] - c2['low'], 5)
-                        height3 = round(c3['high'] - c3['low'], 5)
-                        
-                        fvg_type = None
-                        gap_top, gap_bottom = 0, 0
-                        
-                        if c1['low'] > c3['high']:
-                            fvg_type = "bearish"
-                            gap_top, gap_bottom = c1['low'], c3['high']
-                        elif c1['high'] < c3['low']:
-                            fvg_type = "bullish"
-                            gap_top, gap_bottom = c3['low'], c1['high']
-                        
-                        if fvg_type:
-                            gap_size = round(abs(gap_top - gap_bottom), 5)
-                            is_bullish_fvg_c = c2['close'] > c2['open']
-                            
-                            c1_type_match = ((fvg_type == "bullish" and c1['close'] > c1['open']) or 
-                                            (fvg_type == "bearish" and c1['close'] < c1['open'])) if check_c1_type else True
-                            c3_type_match = ((fvg_type == "bullish" and c3['close'] > c3['open']) or 
-                                            (fvg_type == "bearish" and c3['close'] < c3['open'])) if check_c3_type else True
-                            
-                            c3_beyond_wick = (fvg_type == "bearish" and c3['close'] < c2['low']) or \
-                                             (fvg_type == "bullish" and c3['close'] > c2['high'])
-                            c3_beyond_close = (fvg_type == "bearish" and c3['close'] < c2['close']) or \
-                                              (fvg_type == "bullish" and c3['close'] > c2['close'])
-                            
-                            c3_closing_match = True
-                            if c3_closing_cfg == "beyond_wick":    c3_closing_match = c3_beyond_wick
-                            elif c3_closing_cfg == "beyond_close": c3_closing_match = c3_beyond_close
-                            
-                            is_strong_c1 = ((fvg_type == "bearish" and c1['high'] > c2['high']) or 
-                                           (fvg_type == "bullish" and c1['low'] < c2['low'])) if do_c1_check else True
-                            is_strong_c3 = ((fvg_type == "bearish" and c3['low'] < c2['low']) or 
-                                           (fvg_type == "bullish" and c3['high'] > c2['high'])) if do_c3_check else True
-                            
-                            excess_c1 = round(body2 - body1, 5)
-                            excess_c3 = round(body2 - body3, 5)
-                            is_strong_fvg = (excess_c1 > 0 and excess_c3 > 0) if do_strength_check else True
-                            
-                            fvg_durability = True
-                            if fvg_body_size_cfg == "sum_c1_c3_body":
-                                fvg_durability = (body1 + body3) <= body2
-                            elif fvg_body_size_cfg == "sum_c1_c3_height":
-                                fvg_durability = (height1 + height3) <= height2
-                            elif fvg_body_size_cfg == "multiply_c1_body_by_2":
-                                fvg_durability = (body1 * 2) <= body2
-                            elif fvg_body_size_cfg == "multiply_c3_body_by_2":
-                                fvg_durability = (body3 * 2) <= body2
-                            elif fvg_body_size_cfg == "multiply_c1_height_by_2":
-                                fvg_durability = (height1 * 2) <= body2
-                            elif fvg_body_size_cfg == "multiply_c3_height_by_2":
-                                fvg_durability = (height3 * 2) <= body2
-                            
-                            meets_all = all([
-                                c1_type_match, c3_type_match, c3_closing_match,
-                                is_strong_c1, is_strong_c3, is_strong_fvg, fvg_durability
-                            ])
-                            
-                            if not validate_filter or (validate_filter and meets_all):
-                                # Candle 2 (The FVG) Data
-                                enriched_c2 = c2.copy()
-                                enriched_c2.update({
-                                    "fvg_type": fvg_type,
-                                    "fvg_gap_size": gap_size,
-                                    "fvg_gap_top": round(gap_top, 5),
-                                    "fvg_gap_bottom": round(gap_bottom, 5),
-                                    "c1_lookback_used": c1_lookback,
-                                    "c1_body_size": body1,
-                                    "c2_body_size": body2,
-                                    "c3_body_size": body3,
-                                    "c1_height": height1,
-                                    "c2_height": height2,
-                                    "c3_height": height3,
-                                    "c1_upper_and_lower_wick": c1_total_wick,
-                                    "c1_upper_and_lower_wick_against_body": round(body1 - c1_total_wick, 5),
-                                    "c1_upper_and_lower_wick_higher": c1_total_wick > body1,
-                                    "c1_body_higher": body1 >= c1_total_wick,
-                                    "c3_upper_and_lower_wick": c3_total_wick,
-                                    "c3_upper_and_lower_wick_against_body": round(body3 - c3_total_wick, 5),
-                                    "c3_upper_and_lower_wick_higher": c3_total_wick > body3,
-                                    "c3_body_higher": body3 >= c3_total_wick,
-                                    "fvg_body_size_durability": fvg_durability,
-                                    "c1_candletype_withfvg": c1_type_match,
-                                    "c3_candletype_withfvg": c3_type_match,
-                                    "c3_beyond_wick": c3_beyond_wick,
-                                    "is_strong_c1": is_strong_c1,
-                                    "is_strong_c3": is_strong_c3,
-                                    "is_strong_fvg": is_strong_fvg,
-                                    "c2_body_excess_against_c1": excess_c1,
-                                    "c2_body_excess_against_c3": excess_c3,
-                                    "meets_all_conditions": meets_all,
-                                    "is_fvg": True,
-                                    "_contour_idx": i,
-                                    "_is_bull_c2": is_bullish_fvg_c
-                                })
-                                potential_fvgs_map[c2.get('candle_number')] = enriched_c2
-                                
-                                # Tag Candle 1 and Candle 3 for later list construction
-                                c1_tags[c1.get('candle_number')] = {"fvg_c1": True, "c1_for_fvg_number": c2.get('candle_number')}
-                                c3_tags[c3.get('candle_number')] = {"fvg_c3": True, "c3_for_fvg_number": c2.get('candle_number')}
-
-                    # --- Build Final JSON (Flat List Structure) ---
-                    fvg_results = []
-                    max_gap_found = max([p["fvg_gap_size"] for p in potential_fvgs_map.values()], default=0)
+                    meets_all = all([
+                        c1_type_match, c3_type_match, c3_closing_match,
+                        is_strong_c1, is_strong_c3, is_strong_fvg, fvg_durability
+                    ])
                     
-                    for idx, candle in enumerate(data):
-                        fvg_swing_type = candle.get('candle_number')
+                    if not validate_filter or (validate_filter and meets_all):
+                        # Candle 2 (The FVG) Data
+                        enriched_c2 = c2.copy()
+                        enriched_c2.update({
+                            "fvg_type": fvg_type,
+                            "fvg_gap_size": gap_size,
+                            "fvg_gap_top": round(gap_top, 5),
+                            "fvg_gap_bottom": round(gap_bottom, 5),
+                            "c1_lookback_used": c1_lookback,
+                            "c1_body_size": body1,
+                            "c2_body_size": body2,
+                            "c3_body_size": body3,
+                            "c1_height": height1,
+                            "c2_height": height2,
+                            "c3_height": height3,
+                            "c1_upper_and_lower_wick": c1_total_wick,
+                            "c1_upper_and_lower_wick_against_body": round(body1 - c1_total_wick, 5),
+                            "c1_upper_and_lower_wick_higher": c1_total_wick > body1,
+                            "c1_body_higher": body1 >= c1_total_wick,
+                            "c3_upper_and_lower_wick": c3_total_wick,
+                            "c3_upper_and_lower_wick_against_body": round(body3 - c3_total_wick, 5),
+                            "c3_upper_and_lower_wick_higher": c3_total_wick > body3,
+                            "c3_body_higher": body3 >= c3_total_wick,
+                            "fvg_body_size_durability": fvg_durability,
+                            "c1_candletype_withfvg": c1_type_match,
+                            "c3_candletype_withfvg": c3_type_match,
+                            "c3_beyond_wick": c3_beyond_wick,
+                            "is_strong_c1": is_strong_c1,
+                            "is_strong_c3": is_strong_c3,
+                            "is_strong_fvg": is_strong_fvg,
+                            "c2_body_excess_against_c1": excess_c1,
+                            "c2_body_excess_against_c3": excess_c3,
+                            "meets_all_conditions": meets_all,
+                            "is_fvg": True,
+                            "_contour_idx": i,
+                            "_is_bull_c2": is_bullish_fvg_c
+                        })
+                        potential_fvgs_map[c2.get('candle_number')] = enriched_c2
                         
-                        # Apply contour/coordinate data to every candle
-                        if idx < len(contours):
-                            x_c, y_c, w_c, h_c = cv2.boundingRect(contours[idx])
-                            candle.update({
-                                "candle_x": x_c + w_c // 2, "candle_y": y_c, "candle_width": w_c, "candle_height": h_c,
-                                "candle_left": x_c, "candle_right": x_c + w_c, "candle_top": y_c, "candle_bottom": y_c + h_c,
-                                "draw_x": x_c + w_c // 2, "draw_y": y_c, "draw_w": w_c, "draw_h": h_c,
-                                "draw_left": x_c, "draw_right": x_c + w_c, "draw_top": y_c, "draw_bottom": y_c + h_c
-                            })
+                        # Tag Candle 1 and Candle 3 for later list construction
+                        c1_tags[c1.get('candle_number')] = {"fvg_c1": True, "c1_for_fvg_number": c2.get('candle_number')}
+                        c3_tags[c3.get('candle_number')] = {"fvg_c3": True, "c3_for_fvg_number": c2.get('candle_number')}
 
-                        # If this candle is C2 (The FVG)
-                        if fvg_swing_type in potential_fvgs_map:
-                            entry = potential_fvgs_map[fvg_swing_type]
-                            # Sync coordinates from the base candle to the enriched one
-                            coord_keys = ["candle_x", "candle_y", "candle_width", "candle_height", "candle_left", "candle_right", "candle_top", "candle_bottom", "draw_x", "draw_y", "draw_w", "draw_h", "draw_left", "draw_right", "draw_top", "draw_bottom"]
-                            entry.update({k: candle[k] for k in coord_keys if k in candle})
+            # --- Build Final JSON (Flat List Structure) ---
+            fvg_results = []
+            max_gap_found = max([p["fvg_gap_size"] for p in potential_fvgs_map.values()], default=0)
+            
+            for idx, candle in enumerate(data):
+                fvg_swing_type = candle.get('candle_number')
+                
+                # Apply contour/coordinate data to every candle
+                if idx < len(contours):
+                    x_c, y_c, w_c, h_c = cv2.boundingRect(contours[idx])
+                    candle.update({
+                        "candle_x": x_c + w_c // 2, "candle_y": y_c, "candle_width": w_c, "candle_height": h_c,
+                        "candle_left": x_c, "candle_right": x_c + w_c, "candle_top": y_c, "candle_bottom": y_c + h_c,
+                        "draw_x": x_c + w_c // 2, "draw_y": y_c, "draw_w": w_c, "draw_h": h_c,
+                        "draw_left": x_c, "draw_right": x_c + w_c, "draw_top": y_c, "draw_bottom": y_c + h_c
+                    })
 
-                            is_tallest = (entry["fvg_gap_size"] == max_gap_found)
-                            wick_compromised = (entry["c1_upper_and_lower_wick_higher"] or entry["c3_upper_and_lower_wick_higher"])
-                            entry["constestant_fvg_chosed"] = is_tallest and (wick_compromised if apply_body_vs_wick_rule else True)
-                            
-                            body_condition_ok = ((entry["c1_body_higher"] and entry["c3_body_higher"]) or entry["constestant_fvg_chosed"]) if apply_body_vs_wick_rule else True
-                            
-                            if body_condition_ok:
-                                c_idx = entry["_contour_idx"]
-                                x_rect, y_rect, w_rect, h_rect = cv2.boundingRect(contours[c_idx])
-                                label_objects_and_text(
-                                    img=img, cx=x_rect + w_rect // 2, y_rect=y_rect, h_rect=h_rect,
-                                    fvg_swing_type=fvg_swing_type if (number_all or number_only_marked) else None,
-                                    custom_text=bull_text if entry["fvg_type"] == "bullish" else bear_text,
-                                    object_type=bull_obj if entry["fvg_type"] == "bullish" else bear_obj,
-                                    is_bullish_arrow=entry["_is_bull_c2"], is_marked=True,
-                                    double_arrow=bull_double if entry["fvg_type"] == "bullish" else bear_double,
-                                    arrow_color=bullish_color if entry["_is_bull_c2"] else bearish_color,
-                                    label_position="low" if entry["_is_bull_c2"] else "high"
-                                )
-                                final_entry = {k: v for k, v in entry.items() if not k.startswith("_") and k != "fvg_gap_size"}
-                                fvg_results.append(final_entry)
-                                marked_count += 1
-                                continue 
-                        
-                        # If this candle is C1 or C3 for an FVG, apply the tags
-                        if fvg_swing_type in c1_tags:
-                            candle.update(c1_tags[fvg_swing_type])
-                        if fvg_swing_type in c3_tags:
-                            candle.update(c3_tags[fvg_swing_type])
+                # If this candle is C2 (The FVG)
+                if fvg_swing_type in potential_fvgs_map:
+                    entry = potential_fvgs_map[fvg_swing_type]
+                    # Sync coordinates from the base candle to the enriched one
+                    coord_keys = ["candle_x", "candle_y", "candle_width", "candle_height", "candle_left", "candle_right", "candle_top", "candle_bottom", "draw_x", "draw_y", "draw_w", "draw_h", "draw_left", "draw_right", "draw_top", "draw_bottom"]
+                    entry.update({k: candle[k] for k in coord_keys if k in candle})
 
-                        fvg_results.append(candle)
+                    is_tallest = (entry["fvg_gap_size"] == max_gap_found)
+                    wick_compromised = (entry["c1_upper_and_lower_wick_higher"] or entry["c3_upper_and_lower_wick_higher"])
+                    entry["constestant_fvg_chosed"] = is_tallest and (wick_compromised if apply_body_vs_wick_rule else True)
                     
-                    if marked_count > 0 or (number_all and len(data) > 0):
-                        os.makedirs(paths["output_dir"], exist_ok=True)
-                        cv2.imwrite(paths["output_chart"], img)
-                        config_path = os.path.join(paths["output_dir"], "config.json")
-                        try:
-                            config_content = {}
-                            if os.path.exists(config_path):
-                                with open(config_path, 'r', encoding='utf-8') as f:
-                                    try:
-                                        config_content = json.load(f)
-                                        if not isinstance(config_content, dict): config_content = {}
-                                    except: config_content = {}
-                            config_content[config_key] = fvg_results
-                            with open(config_path, 'w', encoding='utf-8') as f:
-                                json.dump(config_content, f, indent=4)
-                        except Exception as e:
-                            log(f"Config sync failed for {sym}/{tf}: {e}", "WARN")
+                    body_condition_ok = ((entry["c1_body_higher"] and entry["c3_body_higher"]) or entry["constestant_fvg_chosed"]) if apply_body_vs_wick_rule else True
+                    
+                    if body_condition_ok:
+                        c_idx = entry["_contour_idx"]
+                        x_rect, y_rect, w_rect, h_rect = cv2.boundingRect(contours[c_idx])
+                        label_objects_and_text(
+                            img=img, cx=x_rect + w_rect // 2, y_rect=y_rect, h_rect=h_rect,
+                            fvg_swing_type=fvg_swing_type if (number_all or number_only_marked) else None,
+                            custom_text=bull_text if entry["fvg_type"] == "bullish" else bear_text,
+                            object_type=bull_obj if entry["fvg_type"] == "bullish" else bear_obj,
+                            is_bullish_arrow=entry["_is_bull_c2"], is_marked=True,
+                            double_arrow=bull_double if entry["fvg_type"] == "bullish" else bear_double,
+                            arrow_color=bullish_color if entry["_is_bull_c2"] else bearish_color,
+                            label_position="low" if entry["_is_bull_c2"] else "high"
+                        )
+                        final_entry = {k: v for k, v in entry.items() if not k.startswith("_") and k != "fvg_gap_size"}
+                        fvg_results.append(final_entry)
+                        marked_count += 1
+                        continue 
+                
+                # If this candle is C1 or C3 for an FVG, apply the tags
+                if fvg_swing_type in c1_tags:
+                    candle.update(c1_tags[fvg_swing_type])
+                if fvg_swing_type in c3_tags:
+                    candle.update(c3_tags[fvg_swing_type])
 
-                        processed_charts += 1
-                        total_marked += marked_count
-                        
+                fvg_results.append(candle)
+            
+            if marked_count > 0 or (number_all and len(data) > 0):
+                ctx.save_image(paths["output_chart"], img)
+                config_path = ctx.config_path
+                try:
+                    config_content = {}
+                    if document_exists(config_path):
+                        try:
+                            config_content = load_document(config_path)
+                            if not isinstance(config_content, dict): config_content = {}
+                        except: config_content = {}
+                    config_content[config_key] = fvg_results
+                    save_document(config_path, config_content)
                 except Exception as e:
-                    log(f"Error processing {sym}/{tf} with config '{config_key}': {e}", "ERROR")
+                    log(f"Config sync failed for {ctx.symbol}/{ctx.timeframe}: {e}", "WARN")
+
+                processed_charts += 1
+                total_marked += marked_count
+                
+        except Exception as e:
+            log(f"Error processing {ctx.symbol}/{ctx.timeframe} with config '{config_key}': {e}", "ERROR")
 
-        log(f"Completed config '{config_key}': FVGs marked: {total_marked} | Charts: {processed_charts}")
         total_marked_all += total_marked
         processed_charts_all += processed_charts
 
-    return f"Done (all FVG configs). Total FVGs: {total_marked_all} | Total Charts: {processed_charts_all}"
+    return {"fvgs": total_marked_all, "charts": processed_charts_all}
 
-def fvg_higherhighsandlowerlows(broker_name):
+def fair_value_gaps(broker_name):
+    """Mark fair value gaps (every FVG config) on every chart of the developer."""
+    return chart_detector_reports(broker_name, ["fair_value_gaps"])["fair_value_gaps"]
+
+@chart_detector(
+    "fvg_higherhighsandlowerlows",
+    configured=lambda define_candles: any("fvg" in k.lower() for k in define_candles),
+    summary="Finished. Total Swings: {swings}, Charts: {charts}",
+    missing="[{broker}] Warning: No FVG config found → cannot determine parameters."
+)
+def fvg_higherhighsandlowerlows_chart(ctx, define_candles):
     lagos_tz = pytz.timezone('Africa/Lagos')
     
     def log(msg, level="INFO"):
         ts = datetime.now(lagos_tz).strftime('%Y-%m-%d %H:%M:%S')
         print(f"[{ts}] [{level}] {msg}")
 
-    dev_dict = load_developers_dictionary()
-    cfg = dev_dict.get(broker_name)
-    if not cfg:
-        return f"[{broker_name}] Error: Broker not in dictionary."
-
-    base_folder = cfg.get("BASE_FOLDER")
-    am_data = get_account_management(broker_name)
-    if not am_data:
-        return f"[{broker_name}] Error: accountmanagement.json missing."
-
     # Find FVG configuration section(s)
-    define_candles = am_data.get("chart", {}).get("define_candles", {})
     fvg_configs = [(k, v) for k, v in define_candles.items() if "fvg" in k.lower()]
-    
-    if not fvg_configs:
-        return f"[{broker_name}] Warning: No FVG config found → cannot determine parameters."
-
     config_key, fvg_cfg = fvg_configs[0]
-    log(f"Using FVG config section: {config_key} for swing detection parameters")
 
     direction = fvg_cfg.get("read_candles_from", "new_old")
     bars = fvg_cfg.get("BARS", 301)
@@ -1568,197 +1575,191 @@ def fvg_higherhighsandlowerlows(broker_name):
     total_swings_added = 0
     processed_charts = 0
 
-    for sym in sorted(os.listdir(base_folder)):
-        sym_p = os.path.join(base_folder, sym)
-        if not os.path.isdir(sym_p): continue
-
-        for tf in sorted(os.listdir(sym_p)):
-            tf_path = os.path.join(sym_p, tf)
-            if not os.path.isdir(tf_path): continue
+    paths = get_analysis_paths(ctx.base_folder, ctx.broker_name, ctx.symbol, ctx.timeframe, direction, bars, output_filename_base)
+    config_path = ctx.config_path
+    chart_path = paths["output_chart"]
 
-            paths = get_analysis_paths(base_folder, broker_name, sym, tf, direction, bars, output_filename_base)
-            config_path = os.path.join(paths["output_dir"], "config.json")
-            chart_path = paths["output_chart"]
+    if not document_exists(config_path) or not ctx.image_exists(chart_path):
+        return {"swings": total_swings_added, "charts": processed_charts}
 
-            if not os.path.exists(config_path) or not os.path.exists(chart_path):
-                continue
-
-            try:
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    config_content = json.load(f)
+    try:
+        config_content = load_document(config_path)
 
-                data = config_content.get(config_key)
-                if not data or not isinstance(data, list):
-                    continue
+        data = config_content.get(config_key)
+        if not data or not isinstance(data, list):
+            return {"swings": total_swings_added, "charts": processed_charts}
 
-                data = sorted(data, key=lambda x: x.get('candle_number', 0))
-                img = cv2.imread(chart_path)
-                if img is None: continue
+        data = sorted(data, key=lambda x: x.get('candle_number', 0))
+        img = ctx.image(chart_path)
+        if img is None: return {"swings": total_swings_added, "charts": processed_charts}
 
-                n = len(data)
-                min_req = NEIGHBOR_LEFT + NEIGHBOR_RIGHT + 1
-                if n < min_req: continue
+        n = len(data)
+        min_req = NEIGHBOR_LEFT + NEIGHBOR_RIGHT + 1
+        if n < min_req: return {"swings": total_swings_added, "charts": processed_charts}
 
-                swing_count = 0
-                swings_found = []
+        swing_count = 0
+        swings_found = []
 
-                # --- STEP 1: DETECT SWINGS & MARK CONTOUR MAKERS ---
-                for i in range(NEIGHBOR_LEFT, n - NEIGHBOR_RIGHT):
-                    curr_h, curr_l = data[i]['high'], data[i]['low']
-                    left_highs = [d['high'] for d in data[i - NEIGHBOR_LEFT:i]]
-                    right_highs = [d['high'] for d in data[i + 1:i + 1 + NEIGHBOR_RIGHT]]
-                    left_lows  = [d['low']  for d in data[i - NEIGHBOR_LEFT:i]]
-                    right_lows  = [d['low']  for d in data[i + 1:i + 1 + NEIGHBOR_RIGHT]]
+        # --- STEP 1: DETECT SWINGS & MARK CONTOUR MAKERS ---
+        for i in range(NEIGHBOR_LEFT, n - NEIGHBOR_RIGHT):
+            curr_h, curr_l = data[i]['high'], data[i]['low']
+            left_highs = [d['high'] for d in data[i - NEIGHBOR_LEFT:i]]
+            right_highs = [d['high'] for d in data[i + 1:i + 1 + NEIGHBOR_RIGHT]]
+            left_lows  = [d['low']  for d in data[i - NEIGHBOR_LEFT:i]]
+            right_lows  = [d['low']  for d in data[i + 1:i + 1 + NEIGHBOR_RIGHT]]
 
-                    is_hh = curr_h > max(left_highs) and curr_h > max(right_highs)
-                    is_ll = curr_l < min(left_lows)  and curr_l < min(right_lows)
+            is_hh = curr_h > max(left_highs) and curr_h > max(right_highs)
+            is_ll = curr_l < min(left_lows)  and curr_l < min(right_lows)
 
-                    if not (is_hh or is_ll): continue
+            if not (is_hh or is_ll): continue
 
-                    swing_count += 1
-                    is_bullish_swing = is_ll
-                    swing_color = ll_COLOR if is_bullish_swing else HH_COLOR
-                    
-                    label_objects_and_text(
-                        img=img, cx=data[i].get("candle_x"), y_rect=data[i].get("candle_y"), h_rect=data[i].get("candle_height"),
-                        fvg_swing_type=data[i].get('candle_number'),
-                        custom_text=ll_TEXT if is_bullish_swing else HH_TEXT, object_type="arrow",
-                        is_bullish_arrow=is_bullish_swing, is_marked=True,
-                        double_arrow=False, arrow_color=swing_color,
-                        label_position="low" if is_bullish_swing else "high"
-                    )
+            swing_count += 1
+            is_bullish_swing = is_ll
+            swing_color = ll_COLOR if is_bullish_swing else HH_COLOR
+            
+            label_objects_and_text(
+                img=img, cx=data[i].get("candle_x"), y_rect=data[i].get("candle_y"), h_rect=data[i].get("candle_height"),
+                fvg_swing_type=data[i].get('candle_number'),
+                custom_text=ll_TEXT if is_bullish_swing else HH_TEXT, object_type="arrow",
+                is_bullish_arrow=is_bullish_swing, is_marked=True,
+                double_arrow=False, arrow_color=swing_color,
+                label_position="low" if is_bullish_swing else "high"
+            )
 
-                    m_idx = i + NEIGHBOR_RIGHT
-                    contour_maker_data = None
-                    if m_idx < n:
-                        label_objects_and_text(
-                            img=img, cx=data[m_idx].get("candle_x"), y_rect=data[m_idx].get("candle_y"), h_rect=data[m_idx].get("candle_height"),
-                            custom_text=CM_TEXT, object_type="dot",
-                            is_bullish_arrow=is_bullish_swing, is_marked=True,
-                            double_arrow=False, arrow_color=swing_color,
-                            label_position="low" if is_bullish_swing else "high"
-                        )
-                        
-                        data[m_idx].update({"is_contour_maker": True, "contour_maker_for_swing_candle": data[i]['candle_number']})
-                        contour_maker_data = {
-                            "candle_number": data[m_idx]['candle_number'],
-                            "candle_x": data[m_idx].get("candle_x"),
-                            "candle_y": data[m_idx].get("candle_y"),
-                            "data_index": m_idx
-                        }
+            m_idx = i + NEIGHBOR_RIGHT
+            contour_maker_data = None
+            if m_idx < n:
+                label_objects_and_text(
+                    img=img, cx=data[m_idx].get("candle_x"), y_rect=data[m_idx].get("candle_y"), h_rect=data[m_idx].get("candle_height"),
+                    custom_text=CM_TEXT, object_type="dot",
+                    is_bullish_arrow=is_bullish_swing, is_marked=True,
+                    double_arrow=False, arrow_color=swing_color,
+                    label_position="low" if is_bullish_swing else "high"
+                )
+                
+                data[m_idx].update({"is_contour_maker": True, "contour_maker_for_swing_candle": data[i]['candle_number']})
+                contour_maker_data = {
+                    "candle_number": data[m_idx]['candle_number'],
+                    "candle_x": data[m_idx].get("candle_x"),
+                    "candle_y": data[m_idx].get("candle_y"),
+                    "data_index": m_idx
+                }
 
-                    swing_entry = {
-                        "candle_number": data[i].get('candle_number'),
-                        "swing_type": "higher_low" if is_bullish_swing else "higher_high",
-                        "high": curr_h,
-                        "low": curr_l
-                    }
-                    data[i].update({
-                        "swing_type": swing_entry["swing_type"],
-                        "is_swing": True,
-                        "swing_color_bgr": [int(c) for c in swing_color],
-                        "m_idx": m_idx if m_idx < n else None,
-                        "contour_maker": contour_maker_data
-                    })
-                    swings_found.append(swing_entry)
-
-                # --- STEP 2: ASSIGN BASE TYPE (SUPPORT/RESISTANCE) ---
-                for candle in data:
-                    ref_price = candle.get("low")
-                    new_flag = None
-                    for s in swings_found:
-                        if s["swing_type"] == "higher_low" and s["low"] > ref_price:
-                            new_flag = "support"
-                            break
-                        elif s["swing_type"] == "higher_high" and s["high"] < ref_price:
-                            new_flag = "resistance"
-                            break
+            swing_entry = {
+                "candle_number": data[i].get('candle_number'),
+                "swing_type": "higher_low" if is_bullish_swing else "higher_high",
+                "high": curr_h,
+                "low": curr_l
+            }
+            data[i].update({
+                "swing_type": swing_entry["swing_type"],
+                "is_swing": True,
+                "swing_color_bgr": [int(c) for c in swing_color],
+                "m_idx": m_idx if m_idx < n else None,
+                "contour_maker": contour_maker_data
+            })
+            swings_found.append(swing_entry)
+
+        # --- STEP 2: ASSIGN BASE TYPE (SUPPORT/RESISTANCE) ---
+        for candle in data:
+            ref_price = candle.get("low")
+            new_flag = None
+            for s in swings_found:
+                if s["swing_type"] == "higher_low" and s["low"] > ref_price:
+                    new_flag = "support"
+                    break
+                elif s["swing_type"] == "higher_high" and s["high"] < ref_price:
+                    new_flag = "resistance"
+                    break
+            
+            if new_flag:
+                if candle.get("fvg_c1") is True: candle["fvg_c1_base"] = new_flag
+                if candle.get("is_fvg") is True: candle["fvg_base"] = new_flag
+                if candle.get("fvg_c3") is True: candle["fvg_c3_base"] = new_flag
+
+        # --- STEP 3: DEDUPLICATE ---
+        unique_data_dict = {}
+        for entry in data:
+            c_num = entry.get("candle_number")
+            if c_num not in unique_data_dict: unique_data_dict[c_num] = entry
+            else:
+                for key, val in entry.items():
+                    if key not in unique_data_dict[c_num] or unique_data_dict[c_num][key] is None:
+                        unique_data_dict[c_num][key] = val
+        data = sorted(unique_data_dict.values(), key=lambda x: x.get('candle_number', 0))
+
+        # --- STEP 4: ASSOCIATE SWINGS AND FIND LIQUIDITY ---
+        for i in range(2, len(data)):
+            if data[i].get("fvg_c3") is True:
+                c1, c2, c3 = data[i-2], data[i-1], data[i]
+                family_str = f"{c1['candle_number']}, {c2['candle_number']}, {c3['candle_number']}"
+                
+                target_swing_idx = -1
+                cm_idx = -1
+                for j in range(i + 1, len(data)):
+                    if data[j].get("is_swing"):
+                        data[j]["swing_type_for_fvgf_number"] = family_str
+                        target_swing_idx = j
+                        cm_idx = data[j].get("m_idx", -1)
+                        break
+                
+                if target_swing_idx != -1 and cm_idx != -1:
+                    target_candles = [("c1", c1), ("c2", c2), ("c3", c3)]
                     
-                    if new_flag:
-                        if candle.get("fvg_c1") is True: candle["fvg_c1_base"] = new_flag
-                        if candle.get("is_fvg") is True: candle["fvg_base"] = new_flag
-                        if candle.get("fvg_c3") is True: candle["fvg_c3_base"] = new_flag
-
-                # --- STEP 3: DEDUPLICATE ---
-                unique_data_dict = {}
-                for entry in data:
-                    c_num = entry.get("candle_number")
-                    if c_num not in unique_data_dict: unique_data_dict[c_num] = entry
-                    else:
-                        for key, val in entry.items():
-                            if key not in unique_data_dict[c_num] or unique_data_dict[c_num][key] is None:
-                                unique_data_dict[c_num][key] = val
-                data = sorted(unique_data_dict.values(), key=lambda x: x.get('candle_number', 0))
-
-                # --- STEP 4: ASSOCIATE SWINGS AND FIND LIQUIDITY ---
-                for i in range(2, len(data)):
-                    if data[i].get("fvg_c3") is True:
-                        c1, c2, c3 = data[i-2], data[i-1], data[i]
-                        family_str = f"{c1['candle_number']}, {c2['candle_number']}, {c3['candle_number']}"
-                        
-                        target_swing_idx = -1
-                        cm_idx = -1
-                        for j in range(i + 1, len(data)):
-                            if data[j].get("is_swing"):
-                                data[j]["swing_type_for_fvgf_number"] = family_str
-                                target_swing_idx = j
-                                cm_idx = data[j].get("m_idx", -1)
-                                break
+                    for label, triad_candle in target_candles:
+                        triad_h = triad_candle['high']
+                        triad_l = triad_candle['low']
+                        found_h_liq = False
+                        found_l_liq = False
                         
-                        if target_swing_idx != -1 and cm_idx != -1:
-                            target_candles = [("c1", c1), ("c2", c2), ("c3", c3)]
+                        for k in range(cm_idx + 1, len(data)):
+                            liq_cand = data[k]
+                            l_open = liq_cand['open']
+                            l_high = liq_cand['high']
+                            l_low  = liq_cand['low']
+                            l_num  = liq_cand['candle_number']
                             
-                            for label, triad_candle in target_candles:
-                                triad_h = triad_candle['high']
-                                triad_l = triad_candle['low']
-                                found_h_liq = False
-                                found_l_liq = False
+                            # --- High Liquidation Check ---
+                            if not found_h_liq:
+                                if l_open > triad_h:
+                                    if l_low < triad_h: found_h_liq = True
+                                else:
+                                    if l_high > triad_h: found_h_liq = True
+                                
+                                if found_h_liq:
+                                    triad_candle[f"fvg_{label}_high_liquidated_by_candle_number"] = l_num
+                                    liq_cand[f"liquidates_fvg_{label}_high"] = True
+
+                            # --- Low Liquidation Check ---
+                            if not found_l_liq:
+                                if l_open < triad_l:
+                                    if l_high > triad_l: found_l_liq = True
+                                else:
+                                    if l_low < triad_l: found_l_liq = True
                                 
-                                for k in range(cm_idx + 1, len(data)):
-                                    liq_cand = data[k]
-                                    l_open = liq_cand['open']
-                                    l_high = liq_cand['high']
-                                    l_low  = liq_cand['low']
-                                    l_num  = liq_cand['candle_number']
-                                    
-                                    # --- High Liquidation Check ---
-                                    if not found_h_liq:
-                                        if l_open > triad_h:
-                                            if l_low < triad_h: found_h_liq = True
-                                        else:
-                                            if l_high > triad_h: found_h_liq = True
-                                        
-                                        if found_h_liq:
-                                            triad_candle[f"fvg_{label}_high_liquidated_by_candle_number"] = l_num
-                                            liq_cand[f"liquidates_fvg_{label}_high"] = True
-
-                                    # --- Low Liquidation Check ---
-                                    if not found_l_liq:
-                                        if l_open < triad_l:
-                                            if l_high > triad_l: found_l_liq = True
-                                        else:
-                                            if l_low < triad_l: found_l_liq = True
-                                        
-                                        if found_l_liq:
-                                            triad_candle[f"fvg_{label}_low_liquidated_by_candle_number"] = l_num
-                                            liq_cand[f"liquidates_fvg_{label}_low"] = True
-
-                                    if found_h_liq and found_l_liq: 
-                                        break
-
-                if swing_count > 0:
-                    cv2.imwrite(chart_path, img)
-                    config_content[config_key] = data
-                    config_content[f"{config_key}_candle_list"] = data 
-                    with open(config_path, 'w', encoding='utf-8') as f:
-                        json.dump(config_content, f, indent=4)
-                    processed_charts += 1
-                    total_swings_added += swing_count
+                                if found_l_liq:
+                                    triad_candle[f"fvg_{label}_low_liquidated_by_candle_number"] = l_num
+                                    liq_cand[f"liquidates_fvg_{label}_low"] = True
 
-            except Exception as e:
-                log(f"Error in {sym}/{tf}: {e}", "ERROR")
+                            if found_h_liq and found_l_liq: 
+                                break
+
+        if swing_count > 0:
+            ctx.save_image(chart_path, img)
+            config_content[config_key] = data
+            config_content[f"{config_key}_candle_list"] = data 
+            save_document(config_path, config_content)
+            processed_charts += 1
+            total_swings_added += swing_count
+
+    except Exception as e:
+        log(f"Error in {ctx.symbol}/{ctx.timeframe}: {e}", "ERROR")
 
-    return f"Finished. Total Swings: {total_swings_added}, Charts: {processed_charts}"
+    return {"swings": total_swings_added, "charts": processed_charts}
+
+def fvg_higherhighsandlowerlows(broker_name):
+    """Mark HH/LL swings among the FVG candles of every chart of the developer."""
+    return chart_detector_reports(broker_name, ["fvg_higherhighsandlowerlows"])["fvg_higherhighsandlowerlows"]
 
 def timeframes_communication(broker_name):
     lagos_tz = pytz.timezone('Africa/Lagos')
@@ -2182,7 +2183,12 @@ def receiver_comm_higher_highs_lower_lows(broker_name):
 
     return f"Done. Updated {processed_keys_all} keys in config files with {total_marked_all} swings."
 
-def liquidity_candles(broker_name):
+@chart_detector(
+    "liquidity_candles",
+    configured=lambda define_candles: True,
+    summary="Completed: {sweeps} sweeps."
+)
+def liquidity_candles_chart(ctx, define_candles):
     lagos_tz = pytz.timezone('Africa/Lagos')
     
     def log(msg, level="INFO"):
@@ -2200,19 +2206,6 @@ def liquidity_candles(broker_name):
         if "dot" in raw: return "dot", False
         return raw, False
 
-    log(f"--- STARTING SPACE-BASED LIQUIDITY ANALYSIS: {broker_name} ---")
-
-    dev_dict = load_developers_dictionary() 
-    cfg = dev_dict.get(broker_name)
-    if not cfg:
-        return f"Error: Broker {broker_name} not in dictionary."
-    
-    base_folder = cfg.get("BASE_FOLDER")
-    am_data = get_account_management(broker_name)
-    if not am_data:
-        return "Error: accountmanagement.json missing."
-
-    define_candles = am_data.get("chart", {}).get("define_candles", {})
     liq_root = define_candles.get("liquidity_candle", {})
     
     total_liq_found = 0
@@ -2248,165 +2241,152 @@ def liquidity_candles(broker_name):
             "app_ll": resolve_marker(apprentice_cfg.get("label_at", {}).get(f"swing_type_{swing_prefix}_low_marker"))
         }
 
-        for sym in sorted(os.listdir(base_folder)):
-            sym_p = os.path.join(base_folder, sym)
-            if not os.path.isdir(sym_p): 
-                continue
+        dev_output_dir = ctx.output_dir
+        config_path = ctx.config_path
 
-            for tf in os.listdir(sym_p):
-                tf_p = os.path.join(sym_p, tf)
-                if not os.path.isdir(tf_p): 
-                    continue
-                
-                dev_output_dir = os.path.join(
-                    os.path.abspath(os.path.join(base_folder, "..", "developers", broker_name)), 
-                    sym, 
-                    tf
-                )
-                config_path = os.path.join(dev_output_dir, "config.json")
+        if not document_exists(config_path): 
+            continue
+
+        try:
+            config_data = load_document(config_path)
 
-                if not os.path.exists(config_path): 
+            config_modified = False
+            
+            for file_key in list(config_data.keys()):
+                if not (file_key.lower() == source_def_name.lower() or 
+                        target_file_filter in file_key.lower()):
                     continue
 
-                try:
-                    with open(config_path, 'r', encoding='utf-8') as f:
-                        config_data = json.load(f)
+                entry = config_data[file_key]
 
-                    config_modified = False
-                    
-                    for file_key in list(config_data.keys()):
-                        if not (file_key.lower() == source_def_name.lower() or 
-                                target_file_filter in file_key.lower()):
-                            continue
+                # ────────────────────────────────────────────────
+                # NEW: Only accept direct list of candles
+                # ────────────────────────────────────────────────
+                if not isinstance(entry, list):
+                    log(f"Skipping {file_key} — value is not a list (expected direct array of candles)", "WARN")
+                    continue
 
-                        entry = config_data[file_key]
+                candles = entry
 
-                        # ────────────────────────────────────────────────
-                        # NEW: Only accept direct list of candles
-                        # ────────────────────────────────────────────────
-                        if not isinstance(entry, list):
-                            log(f"Skipping {file_key} — value is not a list (expected direct array of candles)", "WARN")
-                            continue
+                if len(candles) < 2:
+                    log(f"Skipping {file_key} — fewer than 2 candles", "WARN")
+                    continue
 
-                        candles = entry
+                # Optional: basic validation that items look like candles
+                if not all(isinstance(c, dict) for c in candles):
+                    log(f"Skipping {file_key} — not all items are dictionaries", "WARN")
+                    continue
+                # ────────────────────────────────────────────────
 
-                        if len(candles) < 2:
-                            log(f"Skipping {file_key} — fewer than 2 candles", "WARN")
-                            continue
+                png_path = os.path.join(dev_output_dir, f"{file_key}.png")
+                if not ctx.image_exists(png_path):
+                    png_path = os.path.join(dev_output_dir, primary_png_name)
 
-                        # Optional: basic validation that items look like candles
-                        if not all(isinstance(c, dict) for c in candles):
-                            log(f"Skipping {file_key} — not all items are dictionaries", "WARN")
-                            continue
-                        # ────────────────────────────────────────────────
+                img = ctx.image(png_path)
+                key_modified = False
 
-                        png_path = os.path.join(dev_output_dir, f"{file_key}.png")
-                        if not os.path.exists(png_path):
-                            png_path = os.path.join(dev_output_dir, primary_png_name)
+                for i in range(len(candles) - 1):
+                    base_c = candles[i]
+                    next_c = candles[i + 1]
+                    
+                    b_h = base_c.get("high")
+                    b_l = base_c.get("low")
+                    n_h = next_c.get("high")
+                    n_l = next_c.get("low")
+                    
+                    if None in [b_h, b_l, n_h, n_l]: 
+                        continue
 
-                        img = cv2.imread(png_path)
-                        key_modified = False
+                    target_side = None
+                    ref_price = None
 
-                        for i in range(len(candles) - 1):
-                            base_c = candles[i]
-                            next_c = candles[i + 1]
-                            
-                            b_h = base_c.get("high")
-                            b_l = base_c.get("low")
-                            n_h = next_c.get("high")
-                            n_l = next_c.get("low")
-                            
-                            if None in [b_h, b_l, n_h, n_l]: 
-                                continue
+                    if n_h >= b_h and n_l <= b_l:
+                        continue 
+                    
+                    elif n_h > b_h and n_l > b_l:
+                        target_side = "low"
+                        ref_price = b_l
+                        
+                    elif n_l < b_l and n_h < b_h:
+                        target_side = "high"
+                        ref_price = b_h
+                    
+                    else:
+                        continue
 
-                            target_side = None
-                            ref_price = None
+                    for j in range(i + 2, len(candles)):
+                        sweeper_c = candles[j]
+                        swept = False
+
+                        if target_side == "low" and sweeper_c.get("low", 999999) <= ref_price:
+                            swept = True
+                            pos = "low"
+                            m_key = "liq_ll"
+                            a_key = "app_ll"
+                        elif target_side == "high" and sweeper_c.get("high", 0) >= ref_price:
+                            swept = True
+                            pos = "high"
+                            m_key = "liq_hh"
+                            a_key = "app_hh"
+
+                        if swept:
+                            obj, dbl = markers[m_key]
+                            app_obj, app_dbl = markers[a_key]
+                            txt = markers.get(f"{m_key}_txt", "")
+
+                            sweeper_c.update({
+                                "is_liquidity_sweep": True, 
+                                "liquidity_price": ref_price
+                            })
+                            base_c.update({
+                                "swept_by_liquidity": True, 
+                                "swept_by_candle_number": sweeper_c.get("candle_number")
+                            })
 
-                            if n_h >= b_h and n_l <= b_l:
-                                continue 
-                            
-                            elif n_h > b_h and n_l > b_l:
-                                target_side = "low"
-                                ref_price = b_l
+                            if img is not None:
+                                label_objects_and_text(img, 
+                                    int(sweeper_c.get("candle_x", 0)), 
+                                    int(sweeper_c.get("candle_y", 0)), 
+                                    int(sweeper_c.get("candle_height", 0)),
+                                    custom_text=txt, 
+                                    object_type=obj, 
+                                    is_bullish_arrow=(target_side == "low"),
+                                    is_marked=True, 
+                                    double_arrow=dbl, 
+                                    arrow_color=(0, 255, 255), 
+                                    label_position=pos)
                                 
-                            elif n_l < b_l and n_h < b_h:
-                                target_side = "high"
-                                ref_price = b_h
-                            
-                            else:
-                                continue
-
-                            for j in range(i + 2, len(candles)):
-                                sweeper_c = candles[j]
-                                swept = False
-
-                                if target_side == "low" and sweeper_c.get("low", 999999) <= ref_price:
-                                    swept = True
-                                    pos = "low"
-                                    m_key = "liq_ll"
-                                    a_key = "app_ll"
-                                elif target_side == "high" and sweeper_c.get("high", 0) >= ref_price:
-                                    swept = True
-                                    pos = "high"
-                                    m_key = "liq_hh"
-                                    a_key = "app_hh"
-
-                                if swept:
-                                    obj, dbl = markers[m_key]
-                                    app_obj, app_dbl = markers[a_key]
-                                    txt = markers.get(f"{m_key}_txt", "")
-
-                                    sweeper_c.update({
-                                        "is_liquidity_sweep": True, 
-                                        "liquidity_price": ref_price
-                                    })
-                                    base_c.update({
-                                        "swept_by_liquidity": True, 
-                                        "swept_by_candle_number": sweeper_c.get("candle_number")
-                                    })
-
-                                    if img is not None:
-                                        label_objects_and_text(img, 
-                                            int(sweeper_c.get("candle_x", 0)), 
-                                            int(sweeper_c.get("candle_y", 0)), 
-                                            int(sweeper_c.get("candle_height", 0)),
-                                            custom_text=txt, 
-                                            object_type=obj, 
-                                            is_bullish_arrow=(target_side == "low"),
-                                            is_marked=True, 
-                                            double_arrow=dbl, 
-                                            arrow_color=(0, 255, 255), 
-                                            label_position=pos)
-                                        
-                                        label_objects_and_text(img, 
-                                            int(base_c.get("candle_x", 0)), 
-                                            int(base_c.get("candle_y", 0)), 
-                                            int(base_c.get("candle_height", 0)),
-                                            custom_text="", 
-                                            object_type=app_obj, 
-                                            is_bullish_arrow=(target_side == "low"),
-                                            is_marked=True, 
-                                            double_arrow=app_dbl, 
-                                            arrow_color=(255, 165, 0), 
-                                            label_position=pos)
-
-                                    key_modified = True
-                                    config_modified = True
-                                    total_liq_found += 1
-                                    break 
-
-                        if key_modified and img is not None:
-                            cv2.imwrite(png_path, img)
+                                label_objects_and_text(img, 
+                                    int(base_c.get("candle_x", 0)), 
+                                    int(base_c.get("candle_y", 0)), 
+                                    int(base_c.get("candle_height", 0)),
+                                    custom_text="", 
+                                    object_type=app_obj, 
+                                    is_bullish_arrow=(target_side == "low"),
+                                    is_marked=True, 
+                                    double_arrow=app_dbl, 
+                                    arrow_color=(255, 165, 0), 
+                                    label_position=pos)
+
+                            key_modified = True
+                            config_modified = True
+                            total_liq_found += 1
+                            break 
+
+                if key_modified and img is not None:
+                    ctx.save_image(png_path, img)
+
+            if config_modified:
+                save_document(config_path, config_data)
 
-                    if config_modified:
-                        with open(config_path, 'w', encoding='utf-8') as f:
-                            json.dump(config_data, f, indent=4)
+        except Exception as e:
+            log(f"Error processing {ctx.symbol} ({ctx.timeframe}): {e}", "ERROR")
 
-                except Exception as e:
-                    log(f"Error processing {sym} ({tf}): {e}", "ERROR")
+    return {"sweeps": total_liq_found}
 
-    log(f"--- LIQUIDITY COMPLETE --- Total Space Sweeps: {total_liq_found}")
-    return f"Completed: {total_liq_found} sweeps."
+def liquidity_candles(broker_name, symbols=None, timeframes=None):
+    """Mark liquidity sweeps of the HH/LL swings on every chart of the developer (optionally only some symbols/timeframes)."""
+    return chart_detector_reports(broker_name, ["liquidity_candles"], symbols, timeframes)["liquidity_candles"]
 
 def entry_point_of_interest(broker_name):
     lagos_tz = pytz.timezone('Africa/Lagos') 
@@ -4387,23 +4367,70 @@ def single():
         sync_results = pool.map(sync_dev_investors, broker_names)
         for r in sync_results: print(r)
 
-def process_single_developer_pipeline(broker_name):
+def list_analysis_charts(broker_name):
     """
-    Orchestrator: Runs the full suite of tasks for one developer sequentially.
-    This allows multiprocessing to happen at the 'Account Level'.
+    Work units of one developer: a (broker, symbol, timeframe) task for every
+    timeframe folder under its BASE_FOLDER.
     """
-    results = []
+    cfg = load_developers_dictionary().get(broker_name)
+    if not cfg:
+        return []
+    base_folder = cfg.get("BASE_FOLDER")
+    if not base_folder or not os.path.isdir(base_folder):
+        return []
+
+    tasks = []
+    for sym in sorted(os.listdir(base_folder)):
+        sym_p = os.path.join(base_folder, sym)
+        if not os.path.isdir(sym_p):
+            continue
+        for tf in sorted(os.listdir(sym_p)):
+            if os.path.isdir(os.path.join(sym_p, tf)):
+                tasks.append((broker_name, sym, tf))
+    return tasks
+
+def prepare_developer(broker_name):
+    """Per-developer data sync that every chart task reads from (ticks and full candle data)."""
     try:
-        # Step 1: Data Sync
         res_ticks = sync_ticks_data(broker_name)
         res_candles = copy_full_candle_data(broker_name)
-        
-        # Step 2: HH/LL Analysis
-        res_hhll = higher_highs_lower_lows(broker_name)
-        
-        # Step 3: Liquidity
-        res_liq = liquidity_candles(broker_name)
-        
+        return {"broker": broker_name, "ok": True, "ticks": res_ticks, "candles": res_candles}
+    except Exception as e:
+        return {"broker": broker_name, "ok": False, "error": str(e)}
+
+def analyze_chart(task):
+    """
+    Map step: HH/LL then liquidity for one (broker, symbol, timeframe) chart,
+    in one pass over a shared ChartContext. Both only touch
+    developers/<broker>/<symbol>/<timeframe>, so charts run independently of
+    each other.
+    """
+    broker_name, sym, tf = task
+    started = time.monotonic()
+    try:
+        reports = chart_detector_reports(broker_name, PIPELINE_DETECTORS, symbols={sym}, timeframes={tf})
+        return {"broker": broker_name, "symbol": sym, "timeframe": tf, "ok": True,
+                "hhll": reports["higher_highs_lower_lows"], "liquidity": reports["liquidity_candles"],
+                "seconds": time.monotonic() - started}
+    except Exception as e:
+        return {"broker": broker_name, "symbol": sym, "timeframe": tf, "ok": False,
+                "error": str(e), "seconds": time.monotonic() - started}
+
+def reduce_developer(broker_name, prepared, chart_results):
+    """
+    Reduce step, once all charts of a developer are analyzed: POI (it shares
+    the paused-symbol and limit-order records of each entry folder across
+    symbols, so it stays per developer), cleanup and investor sync.
+    """
+    try:
+        if not prepared.get("ok"):
+            raise RuntimeError(prepared.get("error"))
+
+        failed = [r for r in chart_results if not r["ok"]]
+        for r in failed:
+            print(f"[{broker_name}] ❌ {r['symbol']}/{r['timeframe']}: {r['error']}")
+        chart_seconds = sum(r["seconds"] for r in chart_results)
+
         # Step 4: POI
         res_poi = entry_point_of_interest(broker_name)
         
@@ -4414,12 +4441,27 @@ def process_single_developer_pipeline(broker_name):
         res_sync = sync_dev_investors(broker_name)
         
         return (f"--- [{broker_name}] PIPELINE COMPLETE ---\n"
-                f"  Ticks: {res_ticks}\n"
-                f"  HHLL: {res_hhll}\n"
+                f"  Ticks: {prepared['ticks']}\n"
+                f"  HHLL/Liquidity: {len(chart_results)} charts ({len(failed)} failed, {chart_seconds:.1f}s of work)\n"
                 f"  POI: {res_poi}\n"
                 f"  Investor Sync: {res_sync}")
     except Exception as e:
         return f"--- [{broker_name}] PIPELINE FAILED: {e} ---"
+
+def process_single_developer_pipeline(broker_name):
+    """
+    Orchestrator: Runs the full suite of tasks for one developer sequentially
+    (prepare -> every chart -> reduce). main() runs the same steps with the
+    charts of all developers spread over the pool.
+    """
+    try:
+        prepared = prepare_developer(broker_name)
+        chart_results = []
+        if prepared["ok"]:
+            chart_results = [analyze_chart(task) for task in list_analysis_charts(broker_name)]
+        return reduce_developer(broker_name, prepared, chart_results)
+    except Exception as e:
+        return f"--- [{broker_name}] PIPELINE FAILED: {e} ---"
     
 def main():
     dev_dict = load_developers_dictionary()
@@ -4430,16 +4472,35 @@ def main():
     broker_names = sorted(dev_dict.keys())
     cores = cpu_count()
     
-    print(f"--- STARTING ACCOUNT-LEVEL MULTIPROCESSING ---")
+    print(f"--- STARTING CHART-LEVEL MULTIPROCESSING ---")
     print(f"Cores: {cores} | Total Developers: {len(broker_names)}")
 
-    # We use the pool to map the 'orchestrator' instead of individual steps
     with Pool(processes=cores) as pool:
-        final_results = pool.map(process_single_developer_pipeline, broker_names)
-        
-        # Print summaries as they finish
-        for report in final_results:
-            print(report)
+        # Step 1: Data sync, one task per developer
+        prepared = {p["broker"]: p for p in pool.map(prepare_developer, broker_names)}
+
+        # Steps 2-3: one task per (broker, symbol, timeframe). Idle workers pull
+        # the next chart (chunksize=1), whichever developer it belongs to.
+        tasks = [task for b in broker_names if prepared[b]["ok"] for task in list_analysis_charts(b)]
+        print(f"Charts to analyze: {len(tasks)}")
+        pending = Counter(b for b, _, _ in tasks)
+        chart_results = defaultdict(list)
+        reductions = {}
+
+        # Steps 4-6: a developer is reduced as soon as its last chart is done
+        for b in broker_names:
+            if pending[b] == 0:
+                reductions[b] = pool.apply_async(reduce_developer, (b, prepared[b], []))
+
+        for result in pool.imap_unordered(analyze_chart, tasks, chunksize=1):
+            b = result["broker"]
+            chart_results[b].append(result)
+            pending[b] -= 1
+            if pending[b] == 0:
+                reductions[b] = pool.apply_async(reduce_developer, (b, prepared[b], chart_results[b]))
+
+        for b in broker_names:
+            print(reductions[b].get())
 
     print("\n[SUCCESS] All developer pipelines completed.")
     
@@ -0,0 +1,116 @@
+import math
+import MetaTrader5 as mt5
+
+
+# Volume steps the grid used to try before giving up on reaching the target risk
+MAX_SCALING_STEPS = 100
+
+
+class UsdRates:
+    """
+    USD value of one unit of each account currency, asked from the terminal
+    once per currency instead of once per risk calculation.
+
+    Looks up {CCY}USD (bid) first and USD{CCY} (1 / ask) when that symbol
+    can't be selected; 1.0 when neither gives a price, like the grid always
+    did. Create one per investor run: the rates are a snapshot.
+    """
+
+    def __init__(self):
+        self._rates = {"USD": 1.0}
+
+    def rate(self, currency):
+        if currency not in self._rates:
+            self._rates[currency] = self._fetch(currency)
+        return self._rates[currency]
+
+    @staticmethod
+    def _fetch(currency):
+        usd_symbol = f"{currency}USD"
+        if mt5.symbol_select(usd_symbol, True):
+            usd_tick = mt5.symbol_info_tick(usd_symbol)
+            return (usd_tick.bid or 1.0) if usd_tick else 1.0
+
+        usd_symbol = f"USD{currency}"
+        if mt5.symbol_select(usd_symbol, True):
+            usd_tick = mt5.symbol_info_tick(usd_symbol)
+            if usd_tick:
+                return 1.0 / usd_tick.ask if usd_tick.ask > 0 else 1.0
+        return 1.0
+
+
+def volume_digits(volume_step):
+    """Decimals volumes are rounded to: 2 as before, more for brokers with finer steps."""
+    if volume_step <= 0:
+        return 2
+    return max(2, -math.floor(math.log10(volume_step) + 1e-9))
+
+
+def risk_in_usd(symbol_info, entry_price, exit_price, volume, usd_rate):
+    """(distance / tick_size) * tick_value * volume, converted to USD. 0.0 without tick data."""
+    tick_size = symbol_info.trade_tick_size
+    if not tick_size or tick_size <= 0:
+        return 0.0
+    risk_in_account_currency = (abs(exit_price - entry_price) / tick_size) * symbol_info.trade_tick_value * volume
+    return risk_in_account_currency * usd_rate
+
+
+def size_volume(symbol_info, entry_price, exit_price, min_volume, volume_step, usd_rate,
+                target_risk_min, target_risk_max, max_steps=MAX_SCALING_STEPS):
+    """
+    Volume for one grid level, picked the way stepping up from min_volume by
+    volume_step would pick it, but computed directly (risk is linear in volume):
+
+    - the first step whose risk reaches target_risk_min, if it stays within
+      target_risk_max
+    - min_volume when even that exceeds the range
+    - otherwise the step below it (the last one under the range)
+    - the last allowed step when the range is never reached
+
+    Steps stop at max_steps and at symbol_info.volume_max.
+
+    Returns (volume, risk_usd, attempts); attempts lists the minimum-volume
+    risk first, then the volumes the choice was made between.
+    """
+    digits = volume_digits(volume_step)
+
+    def volume_at(step):
+        return round(min_volume + step * volume_step, digits) if step else min_volume
+
+    def risk_at(step):
+        return risk_in_usd(symbol_info, entry_price, exit_price, volume_at(step), usd_rate)
+
+    def attempt(step):
+        return {"volume": volume_at(step), "risk_usd": round(risk_at(step), 2)}
+
+    last_step = max_steps - 1
+    volume_max = getattr(symbol_info, "volume_max", 0) or 0
+    if volume_step > 0 and volume_max > 0:
+        last_step = max(0, min(last_step, math.floor((volume_max - min_volume) / volume_step + 1e-9)))
+
+    risk_per_lot = risk_in_usd(symbol_info, entry_price, exit_price, 1.0, usd_rate)
+    if volume_step <= 0 or risk_per_lot <= 0:
+        # Nothing to scale with: stay on the minimum
+        attempts = [attempt(0)]
+        return min_volume, attempts[0]["risk_usd"], attempts
+
+    step = math.ceil((target_risk_min / risk_per_lot - min_volume) / volume_step)
+    step = min(max(step, 0), last_step)
+    # Settle float rounding against the same per-volume risk the steps would see
+    while step > 0 and risk_at(step - 1) >= target_risk_min:
+        step -= 1
+    while step < last_step and risk_at(step) < target_risk_min:
+        step += 1
+
+    risk = risk_at(step)
+    attempts = [attempt(0)]
+    if risk < target_risk_min or target_risk_min <= risk <= target_risk_max:
+        if step > 0:
+            attempts.append(attempt(step))
+        return volume_at(step), round(risk, 2), attempts
+    if step == 0:
+        return min_volume, round(risk, 2), attempts
+    if step > 1:
+        attempts.append(attempt(step - 1))
+    attempts.append(attempt(step))
+    return volume_at(step - 1), round(risk_at(step - 1), 2), attempts